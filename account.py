@@ -7,18 +7,14 @@ from algosdk import encoding
 from algosdk.future import transaction
 from algosdk.v2client import algod
 from algosdk.atomic_transaction_composer import (
-    ABIResult,
     AtomicTransactionComposer,
     TransactionSigner,
     TransactionWithSigner,
 )
 
-from utils import (
-    assemble_program,
-    get_global_state,
-    get_local_state,
-    get_params,
-)
+from pipeline import PendingTxn, Pipeline, resolve
+from utils import assemble_program, get_global_state, get_local_state, get_params
+from watcher import get_watcher
 
 
 @dataclasses.dataclass(frozen=True)
@@ -26,12 +22,19 @@ class Account(TransactionSigner):
     address: str
     private_key: Optional[str] = None
     algod_client: Optional[algod.AlgodClient] = None
+    # NOTE: Pipelined accounts return a `PendingTxn` handle right after
+    # submitting, instead of waiting for the confirmation.
+    pipeline: Optional[Pipeline] = None
 
     @classmethod
     def create(cls, **kwargs) -> "Account":
         private_key, address = algosdk.account.generate_account()
         return cls(cast(str, address), private_key, **kwargs)
 
+    def pipelined(self, pipeline: Pipeline) -> "Account":
+        """This account, submitting through `pipeline`."""
+        return dataclasses.replace(self, pipeline=pipeline)
+
     @property
     def decoded_address(self):
         return encoding.decode_address(self.address)
@@ -54,7 +57,7 @@ class Account(TransactionSigner):
         self,
         txn: transaction.Transaction,
         save_txn: str = None,
-    ):
+    ) -> Union[dict, PendingTxn]:
         """Sign a transaction, submit it, and wait for its confirmation."""
         assert self.algod_client
 
@@ -64,9 +67,10 @@ class Account(TransactionSigner):
             transaction.write_to_file([signed_txn], save_txn, overwrite=True)
 
         try:
-            self.algod_client.send_transactions([signed_txn])
+            if self.pipeline is not None:
+                return self.pipeline.submit([signed_txn])
 
-            transaction.wait_for_confirmation(self.algod_client, tx_id)
+            get_watcher(self.algod_client).submit([signed_txn], 0).result()
 
             return self.algod_client.pending_transaction_info(tx_id)
 
@@ -97,12 +101,20 @@ class Account(TransactionSigner):
         fee: Optional[int] = None,
         max_wait_rounds: int = 10,
         save_abi_call: Optional[str] = None,
-    ) -> ABIResult:
+        accounts: Optional[list[str]] = None,
+        boxes: Optional[list[tuple[int, bytes]]] = None,
+        budget_calls: int = 0,
+    ) -> Any:
         """
         ABI call from `sender` to `app` `method`, with `*args`. Txn-type args are supplied
         as normal arguments.
         Use `group_extra_txns` to append other (non argument) transactions to the ABI call in an
         atomic group.
+        Use `accounts` and `boxes` to reference the accounts and the App Boxes (as
+        `(app_id, name)`) the call accesses, besides the ones in `*args`.
+        Use `budget_calls` to append bare NoOp calls to `app` (each paying the
+        minimum fee), pooling their opcode budget to the ABI call.
+        Pipelined accounts return a handle resolved to the return value.
         """
         assert self.algod_client
 
@@ -125,25 +137,38 @@ class Account(TransactionSigner):
             sender=self.address,
             signer=self,
             on_complete=on_complete,
+            accounts=accounts,
+            boxes=boxes,
         )
 
         if group_extra_txns is not None:
             for transaction_with_signer in group_extra_txns:
                 atc.add_transaction(transaction_with_signer)
 
+        budget_call_params = self._get_params() if budget_calls else None
+        for i in range(budget_calls):
+            budget_call = transaction.ApplicationNoOpTxn(
+                sender=self.address,
+                sp=budget_call_params,
+                index=app,
+                # NOTE: Budget calls would be otherwise identical.
+                note=f"budget {i}".encode(),
+            )
+            atc.add_transaction(TransactionWithSigner(txn=budget_call, signer=self))
+
         atc.build_group()
         atc.gather_signatures()
         if save_abi_call:
             transaction.write_to_file(atc.signed_txns, save_abi_call, overwrite=True)
         try:
-            atc_result = atc.execute(self.algod_client, max_wait_rounds)
-            logged_result = atc_result.abi_results[0]  # type: ignore
-            if logged_result.decode_error:
-                print("ABI decode error:", logged_result.decode_error)
-                print("\tRaw value:", logged_result.raw_value)
-            if not logged_result or logged_result.return_value is None:
-                return None
-            return logged_result.return_value
+            if self.pipeline is not None:
+                [(index, method)] = atc.method_dict.items()
+                return self.pipeline.submit(atc.signed_txns, method, index)
+
+            [return_value] = get_watcher(self.algod_client).execute(
+                atc, max_wait_rounds
+            )
+            return return_value
 
         except algosdk.error.AlgodHTTPError as err:
             drr = transaction.create_dryrun(self.algod_client, atc.signed_txns)
@@ -169,7 +194,7 @@ class Account(TransactionSigner):
         args.update(**kwargs)
         txn = transaction.AssetConfigTxn(sender=self.address, **args)
 
-        ptx = self.sign_send_wait(txn)
+        ptx = resolve(self.sign_send_wait(txn))
         return ptx["asset-index"]
 
     def optin_to_asset(self, asset_id: int) -> dict:
@@ -259,14 +284,17 @@ class Account(TransactionSigner):
 
     def create_asc(
         self,
-        approval_program: str,
-        clear_program: str,
+        approval_program: Union[str, bytes],
+        clear_program: Union[str, bytes],
         global_schema=transaction.StateSchema(0, 0),
         local_schema=transaction.StateSchema(0, 0),
         on_complete=transaction.OnComplete.NoOpOC,
     ) -> "AppAccount":
-        approval_program = assemble_program(self.algod_client, approval_program)
-        clear_program = assemble_program(self.algod_client, clear_program)
+        """Create an App from TEAL source code or already assembled programs."""
+        if isinstance(approval_program, str):
+            approval_program = assemble_program(approval_program)
+        if isinstance(clear_program, str):
+            clear_program = assemble_program(clear_program)
 
         txn = transaction.ApplicationCreateTxn(
             self.address,
@@ -279,15 +307,15 @@ class Account(TransactionSigner):
             extra_pages=(len(approval_program) + len(clear_program)) // 2048,
         )
 
-        transaction_response = self.sign_send_wait(txn)
+        transaction_response = resolve(self.sign_send_wait(txn))
         return AppAccount.from_app_id(
             transaction_response["application-index"], algod_client=self.algod_client
         )
 
     def update_application(
         self,
-        approval_program: str,
-        clear_program: str,
+        approval_program: Union[str, bytes],
+        clear_program: Union[str, bytes],
         app_id: int,
         app_args: Optional[list] = None,
         accounts: Optional[list[str]] = None,
@@ -295,8 +323,10 @@ class Account(TransactionSigner):
         foreign_assets: Optional[list[int]] = None,
     ) -> dict:
 
-        approval_program = assemble_program(self.algod_client, approval_program)
-        clear_program = assemble_program(self.algod_client, clear_program)
+        if isinstance(approval_program, str):
+            approval_program = assemble_program(approval_program)
+        if isinstance(clear_program, str):
+            clear_program = assemble_program(clear_program)
 
         txn = transaction.ApplicationUpdateTxn(
             sender=self.address,
@@ -0,0 +1,177 @@
+import dataclasses
+from typing import Optional, Union
+
+from algosdk import abi
+from algosdk.future import transaction
+from algosdk.atomic_transaction_composer import (
+    AtomicTransactionComposer,
+    TransactionSigner,
+    TransactionWithSigner,
+)
+
+from account import Account, AppAccount
+from async_algod import AsyncAlgodClient, get_params
+from utils import decode_state
+from watcher import abi_return, get_watcher
+
+
+@dataclasses.dataclass(frozen=True)
+class AsyncAccount(TransactionSigner):
+    """`Account` submitting its transactions with an `AsyncAlgodClient`."""
+
+    address: str
+    private_key: Optional[str] = None
+    algod_client: Optional[AsyncAlgodClient] = None
+
+    @classmethod
+    def from_account(
+        cls, account: Account, algod_client: AsyncAlgodClient
+    ) -> "AsyncAccount":
+        return cls(account.address, account.private_key, algod_client)
+
+    def sign(self, txn):
+        assert self.private_key
+        return txn.sign(self.private_key)
+
+    def sign_transactions(
+        self, txn_group: list[transaction.Transaction], indexes: list[int]
+    ) -> list:
+        # Enables using `self` with `AtomicTransactionComposer`
+        return [self.sign(txn_group[i]) for i in indexes]
+
+    async def _get_params(self, *args, **kwargs) -> transaction.SuggestedParams:
+        assert self.algod_client
+        return await get_params(self.algod_client, *args, **kwargs)
+
+    async def send_wait(
+        self, signed_txns: list, max_wait_rounds: int = 10
+    ) -> list[dict]:
+        """
+        Submit signed transactions, wait for their confirmation (ref.
+        `watcher`). Returns their confirmed transaction info.
+        """
+        assert self.algod_client
+        return await get_watcher(self.algod_client).submit(signed_txns, max_wait_rounds)
+
+    async def sign_send_wait(self, txn: transaction.Transaction) -> dict:
+        """Sign a transaction, submit it, and wait for its confirmation."""
+        signed_txn = self.sign(txn)
+        await self.send_wait([signed_txn])
+        return await self.algod_client.pending_transaction_info(signed_txn.get_txid())
+
+    async def pay(self, receiver: Union[Account, "AsyncAccount"], amount: int):
+        txn = transaction.PaymentTxn(
+            self.address, await self._get_params(), receiver.address, amount
+        )
+        return await self.sign_send_wait(txn)
+
+    async def build_abi_call(
+        self,
+        method: abi.Method,
+        *args,
+        app: Union[int, AppAccount],
+        group_extra_txns: Optional[list[TransactionWithSigner]] = None,
+        on_complete: transaction.OnComplete = transaction.OnComplete.NoOpOC,
+        fee: Optional[int] = None,
+        accounts: Optional[list[str]] = None,
+        boxes: Optional[list[tuple[int, bytes]]] = None,
+        budget_calls: int = 0,
+    ) -> AtomicTransactionComposer:
+        """Signed group of an ABI call, as `Account.abi_call` (not submitted)."""
+        if isinstance(app, AppAccount):
+            app = app.app_id
+
+        encoded_args = [
+            arg.address if isinstance(arg, (Account, AsyncAccount)) else arg
+            for arg in args
+        ]
+
+        atc = AtomicTransactionComposer()
+        atc.add_method_call(
+            app_id=app,
+            method=method,
+            method_args=encoded_args,
+            sp=await self._get_params(fee),
+            sender=self.address,
+            signer=self,
+            on_complete=on_complete,
+            accounts=accounts,
+            boxes=boxes,
+        )
+
+        for transaction_with_signer in group_extra_txns or []:
+            atc.add_transaction(transaction_with_signer)
+
+        budget_call_params = await self._get_params() if budget_calls else None
+        for i in range(budget_calls):
+            budget_call = transaction.ApplicationNoOpTxn(
+                sender=self.address,
+                sp=budget_call_params,
+                index=app,
+                # NOTE: Budget calls would be otherwise identical.
+                note=f"budget {i}".encode(),
+            )
+            atc.add_transaction(TransactionWithSigner(txn=budget_call, signer=self))
+
+        atc.build_group()
+        atc.gather_signatures()
+        return atc
+
+    async def abi_call(
+        self, method: abi.Method, *args, max_wait_rounds: int = 10, **kwargs
+    ):
+        """
+        ABI call from `sender` to `app` `method`, with `*args` (ref.
+        `Account.abi_call` for the keyword arguments). Returns the decoded ABI
+        return value.
+        """
+        atc = await self.build_abi_call(method, *args, **kwargs)
+        tx_infos = await self.send_wait(atc.signed_txns, max_wait_rounds)
+        [(index, method)] = atc.method_dict.items()
+        return abi_return(method, tx_infos[index])
+
+    async def optin_to_asset(self, asset_id: int) -> dict:
+        txn = transaction.AssetTransferTxn(
+            sender=self.address,
+            sp=await self._get_params(),
+            receiver=self.address,
+            amt=0,
+            index=asset_id,
+        )
+        return await self.sign_send_wait(txn)
+
+    async def balance(self) -> dict[int, int]:
+        """Returns a dict mapping each asset id to the balance amount; the algo balance has key 0."""
+        assert self.algod_client
+        account_info = await self.algod_client.account_info(self.address)
+        balances = {a["asset-id"]: int(a["amount"]) for a in account_info["assets"]}
+        balances[0] = int(account_info["amount"])
+        return balances
+
+    async def asa_balance(self, asa_idx: int) -> int:
+        return (await self.balance()).get(asa_idx, 0)
+
+    async def app_local_state(
+        self, app: Union[AppAccount, int]
+    ) -> dict[str, Union[bytes, int]]:
+        assert self.algod_client
+        if isinstance(app, AppAccount):
+            app = app.app_id
+        return await get_local_state(self.algod_client, self.address, app)
+
+
+async def get_global_state(
+    algod_client: AsyncAlgodClient, asc_idx: int
+) -> dict[str, Union[bytes, int]]:
+    app_info = await algod_client.application_info(asc_idx)
+    return decode_state(app_info["params"].get("global-state", []))
+
+
+async def get_local_state(
+    algod_client: AsyncAlgodClient, account_address: str, asc_idx: int
+) -> dict[str, Union[bytes, int]]:
+    local_states = (await algod_client.account_info(account_address))[
+        "apps-local-state"
+    ]
+    local_state = [s for s in local_states if s["id"] == asc_idx][0]
+    return decode_state(local_state.get("key-value", {}))
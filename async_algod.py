@@ -0,0 +1,279 @@
+"""
+Asyncio algod client
+"""
+
+__author__ = "Cosimo Bassi, Stefano De Angelis"
+__email__ = "<cosimo.bassi@algorand.com>, <stefano.deangelis@algorand.com>"
+
+import asyncio
+import base64
+import copy
+import json
+import ssl
+import time
+from typing import Optional
+from urllib import parse
+
+from algosdk import constants, encoding, error
+from algosdk.future import transaction
+from algosdk.v2client.algod import api_version_path_prefix
+
+import utils
+
+# NOTE: algod connections are kept alive and reused (HTTP/1.1), at most
+# `max_connections` at once: further requests wait for a free connection.
+DEFAULT_MAX_CONNECTIONS = 16
+
+Connection = tuple[asyncio.StreamReader, asyncio.StreamWriter]
+
+
+class AsyncAlgodClient:
+    """
+    Non-blocking algod client, with the `AlgodClient` API (just the endpoints
+    used by the Smart ASA client) as coroutines, on a bounded pool of
+    keep-alive HTTP connections.
+    """
+
+    def __init__(
+        self,
+        algod_token: str,
+        algod_address: str,
+        headers: Optional[dict] = None,
+        max_connections: int = DEFAULT_MAX_CONNECTIONS,
+    ):
+        assert max_connections > 0
+        self.algod_token = algod_token
+        self.algod_address = algod_address
+        self.headers = headers
+        self.max_connections = max_connections
+
+        url = parse.urlsplit(algod_address)
+        self._host = url.hostname
+        self._ssl = ssl.create_default_context() if url.scheme == "https" else None
+        self._port = url.port or (443 if self._ssl else 80)
+        self._base_path = url.path.rstrip("/")
+        self._host_header = url.netloc
+
+        self._slots = asyncio.Semaphore(max_connections)
+        self._idle: list[Connection] = []
+        self._params: Optional[tuple[float, asyncio.Future]] = None
+
+    async def __aenter__(self) -> "AsyncAlgodClient":
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.close()
+
+    async def close(self) -> None:
+        """Close the idle connections (busy ones close once released)."""
+        idle, self._idle = self._idle, []
+        for _, writer in idle:
+            writer.close()
+        await asyncio.gather(
+            *(writer.wait_closed() for _, writer in idle), return_exceptions=True
+        )
+
+    async def _open(self) -> Connection:
+        return await asyncio.open_connection(self._host, self._port, ssl=self._ssl)
+
+    async def _exchange(
+        self, connection: Connection, request: bytes
+    ) -> tuple[int, bytes, bool]:
+        """Send a request, read its response: status, body and keep-alive."""
+        reader, writer = connection
+        writer.write(request)
+        await writer.drain()
+
+        status_line = await reader.readline()
+        if not status_line:
+            raise ConnectionResetError("algod closed the connection")
+        status = int(status_line.split(b" ", 2)[1])
+        headers = {}
+        while (line := await reader.readline()) not in (b"\r\n", b"\n", b""):
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+
+        keep_alive = headers.get("connection", "").lower() != "close"
+        if "content-length" in headers:
+            body = await reader.readexactly(int(headers["content-length"]))
+        elif headers.get("transfer-encoding", "").lower() == "chunked":
+            chunks = []
+            while size := int((await reader.readline()).split(b";")[0], 16):
+                chunks.append(await reader.readexactly(size))
+                await reader.readline()
+            await reader.readline()
+            body = b"".join(chunks)
+        else:
+            body = await reader.read()
+            keep_alive = False
+        return status, body, keep_alive
+
+    async def _request(self, request: bytes) -> tuple[int, bytes]:
+        async with self._slots:
+            reused = bool(self._idle)
+            connection = self._idle.pop() if reused else await self._open()
+            try:
+                try:
+                    status, body, keep_alive = await self._exchange(connection, request)
+                except ConnectionError:
+                    if not reused:
+                        raise
+                    # NOTE: Idle connections may have been closed by algod
+                    # meanwhile, the request is retried once on a new one.
+                    # Truncated responses (`IncompleteReadError`) are not: the
+                    # request has already been served.
+                    connection[1].close()
+                    connection = await self._open()
+                    status, body, keep_alive = await self._exchange(connection, request)
+            except BaseException:
+                connection[1].close()
+                raise
+            if keep_alive:
+                self._idle.append(connection)
+            else:
+                connection[1].close()
+            return status, body
+
+    async def algod_request(
+        self,
+        method: str,
+        requrl: str,
+        params: Optional[dict] = None,
+        data: Optional[bytes] = None,
+        headers: Optional[dict] = None,
+        response_format: str = "json",
+    ):
+        """Execute a request, as `AlgodClient.algod_request`."""
+        header = {"User-Agent": "py-algorand-sdk"}
+        if self.headers:
+            header.update(self.headers)
+        if headers:
+            header.update(headers)
+        if requrl not in constants.no_auth:
+            header.update({constants.algod_auth_header: self.algod_token})
+
+        if requrl not in constants.unversioned_paths:
+            requrl = api_version_path_prefix + requrl
+        if params:
+            requrl = requrl + "?" + parse.urlencode(params)
+
+        header.update({"Host": self._host_header, "Connection": "keep-alive"})
+        if data is not None:
+            header["Content-Length"] = str(len(data))
+        request = f"{method} {self._base_path}{requrl} HTTP/1.1\r\n"
+        request += "".join(f"{name}: {value}\r\n" for name, value in header.items())
+        status, body = await self._request(
+            (request + "\r\n").encode("latin-1") + (data or b"")
+        )
+
+        if status >= 400:
+            message = body.decode("utf-8")
+            try:
+                message = json.loads(message)["message"]
+            finally:
+                raise error.AlgodHTTPError(message, status)
+        if response_format == "json":
+            try:
+                return json.loads(body)
+            except Exception as e:
+                raise error.AlgodResponseError(
+                    "Failed to parse JSON response from algod"
+                ) from e
+        return body
+
+    async def status(self) -> dict:
+        return await self.algod_request("GET", "/status")
+
+    async def status_after_block(self, round_num: int) -> dict:
+        return await self.algod_request(
+            "GET", "/status/wait-for-block-after/" + str(round_num)
+        )
+
+    async def block_info(self, round_num: int, response_format: str = "json"):
+        return await self.algod_request(
+            "GET",
+            "/blocks/" + str(round_num),
+            {"format": response_format},
+            response_format=response_format,
+        )
+
+    async def account_info(self, address: str) -> dict:
+        return await self.algod_request("GET", "/accounts/" + address)
+
+    async def asset_info(self, asset_id: int) -> dict:
+        return await self.algod_request("GET", "/assets/" + str(asset_id))
+
+    async def application_info(self, application_id: int) -> dict:
+        return await self.algod_request("GET", "/applications/" + str(application_id))
+
+    async def application_box_by_name(
+        self, application_id: int, box_name: bytes
+    ) -> dict:
+        return await self.algod_request(
+            "GET",
+            f"/applications/{application_id}/box",
+            {"name": "b64:" + base64.b64encode(box_name).decode()},
+        )
+
+    async def pending_transaction_info(self, transaction_id: str) -> dict:
+        return await self.algod_request(
+            "GET", "/transactions/pending/" + transaction_id, {"format": "json"}
+        )
+
+    async def send_transactions(self, txns: list) -> str:
+        """Broadcast signed transactions, returns the first transaction ID."""
+        serialized = b"".join(
+            base64.b64decode(encoding.msgpack_encode(txn)) for txn in txns
+        )
+        return (
+            await self.algod_request(
+                "POST",
+                "/transactions",
+                data=serialized,
+                headers={"Content-Type": "application/x-binary"},
+            )
+        )["txId"]
+
+    async def suggested_params(self) -> transaction.SuggestedParams:
+        """
+        algod suggested params, cached as the sync ones (ref.
+        `utils.suggested_params`), shared: must not be modified.
+        """
+        # NOTE: Concurrent requests of expired params share a single fetch.
+        now = time.monotonic()
+        cached = self._params
+        if cached is None or now - cached[0] >= utils.PARAMS_TTL:
+            cached = self._params = (now, asyncio.ensure_future(self._fetch_params()))
+        if cached[1].done() and not cached[1].exception():
+            return cached[1].result()
+        try:
+            return await asyncio.shield(cached[1])
+        except Exception:
+            if self._params is cached:
+                self._params = None
+            raise
+
+    async def _fetch_params(self) -> transaction.SuggestedParams:
+        res = await self.algod_request("GET", "/transactions/params")
+        return transaction.SuggestedParams(
+            res["fee"],
+            res["last-round"],
+            res["last-round"] + 1000,
+            res["genesis-hash"],
+            res["genesis-id"],
+            False,
+            res["consensus-version"],
+            res["min-fee"],
+        )
+
+    def invalidate_params(self) -> None:
+        self._params = None
+
+
+async def get_params(
+    algod_client: AsyncAlgodClient, fee: int = None
+) -> transaction.SuggestedParams:
+    params = copy.copy(await algod_client.suggested_params())
+    params.flat_fee = True
+    params.fee = fee or constants.MIN_TXN_FEE
+    return params
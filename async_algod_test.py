@@ -0,0 +1,109 @@
+"""
+Asyncio algod client test suite, against a scripted local HTTP server
+"""
+
+import asyncio
+import json
+from typing import Optional
+
+import pytest
+from algosdk.error import AlgodHTTPError
+
+from async_algod import AsyncAlgodClient
+
+STATUS = json.dumps({"last-round": 1}).encode()
+
+
+def response(status: int, body: bytes, chunked: bool = False) -> bytes:
+    if not chunked:
+        return (
+            f"HTTP/1.1 {status} -\r\nContent-Length: {len(body)}\r\n\r\n".encode()
+            + body
+        )
+    half = len(body) // 2
+    return (
+        f"HTTP/1.1 {status} -\r\nTransfer-Encoding: chunked\r\n\r\n".encode()
+        + b"".join(
+            f"{len(chunk):x}\r\n".encode() + chunk + b"\r\n"
+            for chunk in (body[:half], body[half:])
+        )
+        + b"0\r\n\r\n"
+    )
+
+
+class ScriptedAlgod:
+    """
+    Local HTTP server answering each request with the next scripted response,
+    closing the connection right after it if truncated (to `drop_after`
+    bytes). Counts the connections opened and the requests served.
+    """
+
+    def __init__(self, *responses: tuple[bytes, Optional[int]]):
+        self.responses = list(responses)
+        self.connections = 0
+        self.requests = 0
+
+    async def __aenter__(self) -> "ScriptedAlgod":
+        self.server = await asyncio.start_server(self.serve, "127.0.0.1", 0)
+        self.address = "http://127.0.0.1:%d" % self.server.sockets[0].getsockname()[1]
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        self.server.close()
+        await self.server.wait_closed()
+
+    async def serve(self, reader, writer) -> None:
+        self.connections += 1
+        try:
+            while await reader.readline():
+                while await reader.readline() not in (b"\r\n", b""):
+                    pass
+                self.requests += 1
+                payload, drop_after = self.responses.pop(0)
+                writer.write(payload[:drop_after])
+                await writer.drain()
+                if drop_after is not None:
+                    break
+        finally:
+            writer.close()
+
+
+@pytest.mark.parametrize("chunked", [False, True])
+def test_keep_alive_after_error(chunked: bool) -> None:
+    error = json.dumps({"message": "asset does not exist"}).encode()
+
+    async def run() -> None:
+        async with ScriptedAlgod(
+            (response(404, error, chunked), None), (response(200, STATUS), None)
+        ) as algod:
+            async with AsyncAlgodClient("", algod.address) as client:
+                with pytest.raises(AlgodHTTPError, match="does not exist"):
+                    await client.asset_info(42)
+                assert await client.status() == {"last-round": 1}
+            # The error response has been read whole, keeping the connection
+            assert algod.connections == 1
+
+    asyncio.run(run())
+
+
+def test_dropped_mid_chunk() -> None:
+    truncated = response(200, STATUS, chunked=True)
+
+    async def run() -> None:
+        async with ScriptedAlgod(
+            (response(200, STATUS), None),
+            # Within the first chunk
+            (truncated, truncated.index(b"\r\n\r\n") + 8),
+            (response(200, STATUS), None),
+        ) as algod:
+            async with AsyncAlgodClient("", algod.address) as client:
+                assert await client.status() == {"last-round": 1}
+                # Truncated on a reused connection: not retried
+                with pytest.raises(asyncio.IncompleteReadError):
+                    await client.status()
+                assert algod.requests == 2
+                # The dropped connection is not reused
+                assert await client.status() == {"last-round": 1}
+            assert algod.connections == 2
+
+    asyncio.run(run())
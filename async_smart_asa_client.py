@@ -0,0 +1,476 @@
+"""
+Asyncio Smart ASA client
+"""
+
+__author__ = "Cosimo Bassi, Stefano De Angelis"
+__email__ = "<cosimo.bassi@algorand.com>, <stefano.deangelis@algorand.com>"
+
+import asyncio
+import base64
+import weakref
+from typing import Any, Optional, Union
+from algosdk.abi import Contract
+from algosdk.atomic_transaction_composer import TransactionWithSigner
+from algosdk.future.transaction import AssetTransferTxn, OnComplete
+from account import Account, AppAccount
+from async_account import AsyncAccount
+from async_algod import AsyncAlgodClient, get_params
+from utils import (
+    SmartASAState,
+    decode_state,
+    normalize_getter_params,
+    normalize_getter_state,
+)
+
+from smart_asa_asc import (
+    BoxGlobalState,
+    BuildOptions,
+    decode_global_state,
+    encode_config_fields,
+)
+from smart_asa_client import (
+    app_call_fee,
+    asset_config_args,
+    config_fields,
+    decode_smart_asa_params,
+    holder_address,
+    infer_build_options,
+    is_box_registry,
+    is_multi_asset,
+    method_budget_calls,
+    pending_smart_asa_boxes,
+    smart_asa_app_id,
+    smart_asa_boxes,
+    transfer_proofs,
+)
+
+Holder = Union[str, Account, AsyncAccount]
+
+# NOTE: Build options are inferred once for each Smart ASA App, by algod client.
+_build_options: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+
+
+async def get_build_options(
+    algod_client: AsyncAlgodClient, app_id: int
+) -> BuildOptions:
+    """Build options of a Smart ASA App (ref. `smart_asa_client`)."""
+    app_options = _build_options.setdefault(algod_client, {})
+    if app_id not in app_options:
+        app_options[app_id] = infer_build_options(
+            await algod_client.application_info(app_id)
+        )
+    return app_options[app_id]
+
+
+async def smart_asa_budget_calls(
+    algod_client: AsyncAlgodClient,
+    smart_asa_app: AppAccount,
+    method: str,
+    max_iterations: Optional[int] = None,
+) -> int:
+    """Bare NoOp App Calls for a `method` App Call (ref. `smart_asa_client`)."""
+    options = await get_build_options(algod_client, smart_asa_app.app_id)
+    # NOTE: The cost report is read from the build artifacts (built first if
+    # not cached), so it is kept off the event loop.
+    return await asyncio.to_thread(method_budget_calls, options, method, max_iterations)
+
+
+async def get_smart_asa_app(
+    algod_client: AsyncAlgodClient, smart_asa_id: int
+) -> AppAccount:
+    """Smart ASA App governing a Smart ASA (ref. Underlying ASA url)."""
+    underlying_asa = await algod_client.asset_info(smart_asa_id)
+    return AppAccount.from_app_id(smart_asa_app_id(underlying_asa["params"]))
+
+
+async def get_smart_asa_params(
+    algod_client: AsyncAlgodClient, smart_asa_id: int
+) -> dict:
+    smart_asa_app_account = await get_smart_asa_app(algod_client, smart_asa_id)
+    smart_asa_app_id = smart_asa_app_account.app_id
+    app_info, app_account_info = await asyncio.gather(
+        algod_client.application_info(smart_asa_app_id),
+        algod_client.account_info(smart_asa_app_account.address),
+    )
+    smart_asa_app = app_info["params"]
+    smart_asa_state = decode_global_state(
+        decode_state(smart_asa_app.get("global-state", []))
+    )
+    if not smart_asa_state:
+        # NOTE: Multi-asset Smart ASA Apps keep each Smart ASA in a Box.
+        box = await algod_client.application_box_by_name(
+            smart_asa_app_id, BoxGlobalState.box_key(smart_asa_id)
+        )
+        smart_asa_state = BoxGlobalState.decode_box(
+            smart_asa_id, base64.b64decode(box["value"])
+        )
+    app_asa_balance = next(
+        (
+            int(a["amount"])
+            for a in app_account_info["assets"]
+            if a["asset-id"] == smart_asa_id
+        ),
+        0,
+    )
+    return decode_smart_asa_params(
+        smart_asa_id,
+        smart_asa_app_account,
+        smart_asa_app,
+        smart_asa_state,
+        app_asa_balance,
+    )
+
+
+async def smart_asa_create(
+    smart_asa_contract: Contract,
+    smart_asa_app: AppAccount,
+    creator: AsyncAccount,
+    total: int,
+    decimals: int = 0,
+    default_frozen: bool = False,
+    unit_name: str = "",
+    name: str = "",
+    url: str = "",
+    metadata_hash: bytes = b"",
+    manager_addr: Optional[Holder] = None,
+    reserve_addr: Optional[Holder] = None,
+    freeze_addr: Optional[Holder] = None,
+    clawback_addr: Optional[Holder] = None,
+) -> int:
+
+    params, budget_calls = await asyncio.gather(
+        get_params(creator.algod_client),
+        smart_asa_budget_calls(creator.algod_client, smart_asa_app, "asset_create"),
+    )
+
+    boxes = None
+    if is_multi_asset(smart_asa_contract):
+        boxes = pending_smart_asa_boxes()
+
+    smart_asa_id = await creator.abi_call(
+        smart_asa_contract.get_method_by_name("asset_create"),
+        total,
+        decimals,
+        default_frozen,
+        unit_name,
+        name,
+        url,
+        metadata_hash,
+        manager_addr if manager_addr is not None else creator,
+        reserve_addr if reserve_addr is not None else creator,
+        freeze_addr if freeze_addr is not None else creator,
+        clawback_addr if clawback_addr is not None else creator,
+        app=smart_asa_app,
+        fee=app_call_fee(params),
+        boxes=boxes,
+        budget_calls=budget_calls,
+    )
+    if is_multi_asset(smart_asa_contract):
+        # NOTE: The new Smart ASA Box can be referenced once its ID is known.
+        await smart_asa_register(
+            smart_asa_contract, smart_asa_app, creator, smart_asa_id
+        )
+    return smart_asa_id
+
+
+async def smart_asa_register(
+    smart_asa_contract: Contract,
+    smart_asa_app: AppAccount,
+    creator: AsyncAccount,
+    asset_id: int,
+) -> None:
+    """Register a pending multi-asset Smart ASA (ref. `smart_asa_client`)."""
+    await creator.abi_call(
+        smart_asa_contract.get_method_by_name("asset_register"),
+        asset_id,
+        app=smart_asa_app,
+        boxes=pending_smart_asa_boxes(asset_id),
+    )
+
+
+async def smart_asa_optin(
+    smart_asa_contract: Contract,
+    smart_asa_app: AppAccount,
+    asset_id: int,
+    caller: AsyncAccount,
+) -> None:
+
+    if is_box_registry(smart_asa_contract):
+        # NOTE: Holders just opt-in to the Underlying ASA.
+        await caller.optin_to_asset(asset_id)
+        return
+
+    params, budget_calls = await asyncio.gather(
+        get_params(caller.algod_client),
+        smart_asa_budget_calls(caller.algod_client, smart_asa_app, "asset_app_optin"),
+    )
+    asa_optin_txn = TransactionWithSigner(
+        txn=AssetTransferTxn(
+            sender=caller.address,
+            sp=params,
+            receiver=caller.address,
+            amt=0,
+            index=asset_id,
+        ),
+        signer=caller,
+    )
+    await caller.abi_call(
+        smart_asa_contract.get_method_by_name("asset_app_optin"),
+        asset_id,
+        asa_optin_txn,
+        on_complete=OnComplete.OptInOC,
+        app=smart_asa_app,
+        fee=app_call_fee(params, inner_txns=0),
+        budget_calls=budget_calls,
+    )
+
+
+async def smart_asa_config(
+    smart_asa_contract: Contract,
+    smart_asa_app: AppAccount,
+    manager: AsyncAccount,
+    asset_id: int,
+    config_total: Optional[int] = None,
+    config_decimals: Optional[int] = None,
+    config_default_frozen: Optional[bool] = None,
+    config_unit_name: Optional[str] = None,
+    config_name: Optional[str] = None,
+    config_url: Optional[str] = None,
+    config_metadata_hash: Optional[bytes] = None,
+    config_manager_addr: Optional[Holder] = None,
+    config_reserve_addr: Optional[Holder] = None,
+    config_freeze_addr: Optional[Holder] = None,
+    config_clawback_addr: Optional[Holder] = None,
+) -> int:
+
+    fields = config_fields(
+        config_total=config_total,
+        config_decimals=config_decimals,
+        config_default_frozen=config_default_frozen,
+        config_unit_name=config_unit_name,
+        config_name=config_name,
+        config_url=config_url,
+        config_metadata_hash=config_metadata_hash,
+        config_manager_addr=config_manager_addr,
+        config_reserve_addr=config_reserve_addr,
+        config_freeze_addr=config_freeze_addr,
+        config_clawback_addr=config_clawback_addr,
+    )
+    # NOTE: The current Smart ASA parameters and metadata hash are read at once.
+    reads = [get_smart_asa_params(manager.algod_client, asset_id)]
+    if config_metadata_hash is None:
+        reads.append(
+            smart_asa_get(
+                smart_asa_contract=smart_asa_contract,
+                smart_asa_app=smart_asa_app,
+                caller=manager,
+                asset_id=asset_id,
+                getter="get_asset_config",
+            )
+        )
+    s_asa, *getter_params = await asyncio.gather(*reads)
+    metadata_hash = b""
+    if getter_params:
+        smart_asa_params = normalize_getter_params(getter_params[0])
+        metadata_hash = bytes(smart_asa_params.metadata_hash)
+
+    params, budget_calls = await asyncio.gather(
+        get_params(manager.algod_client),
+        smart_asa_budget_calls(manager.algod_client, smart_asa_app, "asset_config"),
+    )
+    await manager.abi_call(
+        smart_asa_contract.get_method_by_name("asset_config"),
+        asset_id,
+        *asset_config_args(s_asa, fields, metadata_hash),
+        app=smart_asa_app,
+        fee=app_call_fee(params),
+        boxes=smart_asa_boxes(smart_asa_contract, asset_id),
+        budget_calls=budget_calls,
+    )
+    return asset_id
+
+
+async def smart_asa_config_partial(
+    smart_asa_contract: Contract,
+    smart_asa_app: AppAccount,
+    manager: AsyncAccount,
+    asset_id: int,
+    config_total: Optional[int] = None,
+    config_decimals: Optional[int] = None,
+    config_default_frozen: Optional[bool] = None,
+    config_unit_name: Optional[str] = None,
+    config_name: Optional[str] = None,
+    config_url: Optional[str] = None,
+    config_metadata_hash: Optional[bytes] = None,
+    config_manager_addr: Optional[Holder] = None,
+    config_reserve_addr: Optional[Holder] = None,
+    config_freeze_addr: Optional[Holder] = None,
+    config_clawback_addr: Optional[Holder] = None,
+) -> int:
+    """
+    Configure just the given Smart ASA parameters (`asset_config_partial`),
+    with no need to read the unchanged ones first.
+    """
+    fields = config_fields(
+        config_total=config_total,
+        config_decimals=config_decimals,
+        config_default_frozen=config_default_frozen,
+        config_unit_name=config_unit_name,
+        config_name=config_name,
+        config_url=config_url,
+        config_metadata_hash=config_metadata_hash,
+        config_manager_addr=config_manager_addr,
+        config_reserve_addr=config_reserve_addr,
+        config_freeze_addr=config_freeze_addr,
+        config_clawback_addr=config_clawback_addr,
+    )
+
+    params, budget_calls = await asyncio.gather(
+        get_params(manager.algod_client),
+        smart_asa_budget_calls(
+            manager.algod_client, smart_asa_app, "asset_config_partial"
+        ),
+    )
+    await manager.abi_call(
+        smart_asa_contract.get_method_by_name("asset_config_partial"),
+        asset_id,
+        *encode_config_fields(**fields),
+        app=smart_asa_app,
+        fee=app_call_fee(params),
+        boxes=smart_asa_boxes(smart_asa_contract, asset_id),
+        budget_calls=budget_calls,
+    )
+    return asset_id
+
+
+async def smart_asa_transfer(
+    smart_asa_contract: Contract,
+    smart_asa_app: AppAccount,
+    xfer_asset: int,
+    asset_amount: int,
+    caller: AsyncAccount,
+    asset_receiver: Holder,
+    asset_sender: Optional[Holder] = None,
+    sender_proof: Optional[list[bytes]] = None,
+    receiver_proof: Optional[list[bytes]] = None,
+) -> None:
+
+    asset_sender = holder_address(caller if asset_sender is None else asset_sender)
+    asset_receiver = holder_address(asset_receiver)
+    proofs, max_iterations = transfer_proofs(
+        smart_asa_contract, sender_proof, receiver_proof
+    )
+
+    params, budget_calls = await asyncio.gather(
+        get_params(caller.algod_client),
+        smart_asa_budget_calls(
+            caller.algod_client, smart_asa_app, "asset_transfer", max_iterations
+        ),
+    )
+    await caller.abi_call(
+        smart_asa_contract.get_method_by_name("asset_transfer"),
+        xfer_asset,
+        asset_amount,
+        asset_sender,
+        asset_receiver,
+        *proofs,
+        app=smart_asa_app,
+        fee=app_call_fee(params),
+        boxes=smart_asa_boxes(
+            smart_asa_contract, xfer_asset, asset_sender, asset_receiver
+        ),
+        budget_calls=budget_calls,
+    )
+
+
+async def smart_asa_freeze(
+    smart_asa_contract: Contract,
+    smart_asa_app: AppAccount,
+    freezer: AsyncAccount,
+    freeze_asset: int,
+    asset_frozen: bool = False,
+) -> None:
+
+    params, budget_calls = await asyncio.gather(
+        get_params(freezer.algod_client),
+        smart_asa_budget_calls(freezer.algod_client, smart_asa_app, "asset_freeze"),
+    )
+    await freezer.abi_call(
+        smart_asa_contract.get_method_by_name("asset_freeze"),
+        freeze_asset,
+        asset_frozen,
+        app=smart_asa_app,
+        fee=app_call_fee(params),
+        boxes=smart_asa_boxes(smart_asa_contract, freeze_asset),
+        budget_calls=budget_calls,
+    )
+
+
+async def smart_asa_account_freeze(
+    smart_asa_contract: Contract,
+    smart_asa_app: AppAccount,
+    freezer: AsyncAccount,
+    freeze_asset: int,
+    target_account: Holder,
+    account_frozen: bool = False,
+) -> None:
+
+    target_account = holder_address(target_account)
+    params, budget_calls = await asyncio.gather(
+        get_params(freezer.algod_client),
+        smart_asa_budget_calls(freezer.algod_client, smart_asa_app, "account_freeze"),
+    )
+    await freezer.abi_call(
+        smart_asa_contract.get_method_by_name("account_freeze"),
+        freeze_asset,
+        target_account,
+        account_frozen,
+        app=smart_asa_app,
+        fee=app_call_fee(params),
+        boxes=smart_asa_boxes(smart_asa_contract, freeze_asset, target_account),
+        budget_calls=budget_calls,
+    )
+
+
+async def smart_asa_get(
+    smart_asa_contract: Contract,
+    smart_asa_app: AppAccount,
+    caller: AsyncAccount,
+    asset_id: int,
+    getter: str,
+    account: Optional[Holder] = None,
+) -> Any:
+    args = [asset_id]
+    if account is not None:
+        args.append(holder_address(account))
+    return await caller.abi_call(
+        smart_asa_contract.get_method_by_name(getter),
+        *args,
+        app=smart_asa_app,
+        boxes=smart_asa_boxes(smart_asa_contract, asset_id, *args[1:]),
+        budget_calls=await smart_asa_budget_calls(
+            caller.algod_client, smart_asa_app, getter
+        ),
+    )
+
+
+async def smart_asa_get_state(
+    smart_asa_contract: Contract,
+    smart_asa_app: AppAccount,
+    caller: AsyncAccount,
+    asset_id: int,
+) -> SmartASAState:
+    """
+    Smart ASA configuration, global frozen status, circulating supply and
+    opt-in minimum balance, with a single `get_asset_state` App Call.
+    """
+    smart_asa_state = normalize_getter_state(
+        await smart_asa_get(
+            smart_asa_contract=smart_asa_contract,
+            smart_asa_app=smart_asa_app,
+            caller=caller,
+            asset_id=asset_id,
+            getter="get_asset_state",
+        )
+    )
+    return smart_asa_state._replace(metadata_hash=bytes(smart_asa_state.metadata_hash))
@@ -0,0 +1,350 @@
+"""
+Asyncio Smart ASA client test suite, against a local stand-in algod
+"""
+
+import asyncio
+import base64
+import io
+import json
+import threading
+from typing import Optional, Union
+
+import msgpack
+import pytest
+from algosdk import abi
+from algosdk.atomic_transaction_composer import ABI_RETURN_HASH
+from algosdk.error import AlgodHTTPError
+from algosdk.future.transaction import SignedTransaction
+from algosdk.v2client.algod import AlgodClient
+
+from account import Account, AppAccount
+from async_account import AsyncAccount
+from async_algod import AsyncAlgodClient, get_params
+from async_smart_asa_client import (
+    get_smart_asa_params as async_get_smart_asa_params,
+    smart_asa_budget_calls,
+    smart_asa_get,
+    smart_asa_transfer,
+)
+from smart_asa_artifacts import load_contract
+from smart_asa_asc import (
+    BUILD_OPTIONS_KEY,
+    DEFAULT_BUILD_OPTIONS,
+    SMART_ASA_APP_BINDING,
+    global_state_schema,
+    local_state_schema,
+)
+from smart_asa_client import get_smart_asa_params, method_budget_calls
+
+ASSET_ID = 42
+APP_ID = 7
+CIRCULATING_SUPPLY = 1_000
+CREATOR = Account.create()
+SMART_ASA_APP = AppAccount.from_app_id(APP_ID)
+
+
+def state_value(value) -> dict:
+    if isinstance(value, int):
+        return {"type": 2, "uint": value}
+    return {"type": 1, "bytes": base64.b64encode(value).decode()}
+
+
+SMART_ASA_STATE = {
+    "smart_asa_id": ASSET_ID,
+    "total": 10_000,
+    "decimals": 2,
+    "default_frozen": 0,
+    "frozen": 0,
+    "freeze_epoch": 0,
+    "unit_name": b"TEST",
+    "name": b"Test Smart ASA",
+    "url": b"https://test.io",
+    "metadata_hash": bytes(32),
+    "manager_addr": CREATOR.decoded_address,
+    "reserve_addr": CREATOR.decoded_address,
+    "freeze_addr": CREATOR.decoded_address,
+    "clawback_addr": CREATOR.decoded_address,
+}
+
+LEDGER = {
+    f"/v2/assets/{ASSET_ID}": {
+        "index": ASSET_ID,
+        "params": {"url": SMART_ASA_APP_BINDING + str(APP_ID)},
+    },
+    f"/v2/applications/{APP_ID}": {
+        "id": APP_ID,
+        "params": {
+            "creator": CREATOR.address,
+            "global-state": [
+                {"key": base64.b64encode(k.encode()).decode(), "value": state_value(v)}
+                for k, v in {
+                    **SMART_ASA_STATE,
+                    BUILD_OPTIONS_KEY: DEFAULT_BUILD_OPTIONS.flags(),
+                }.items()
+            ],
+            "global-state-schema": {
+                "num-uint": global_state_schema().num_uints,
+                "num-byte-slice": global_state_schema().num_byte_slices,
+            },
+            "local-state-schema": {
+                "num-uint": local_state_schema().num_uints,
+                "num-byte-slice": local_state_schema().num_byte_slices,
+            },
+        },
+    },
+    f"/v2/accounts/{SMART_ASA_APP.address}": {
+        "address": SMART_ASA_APP.address,
+        "amount": 1_000_000,
+        "assets": [{"asset-id": ASSET_ID, "amount": 2**64 - 1 - CIRCULATING_SUPPLY}],
+    },
+}
+
+
+class StandInAlgod:
+    """
+    Local algod stand-in: serves the `LEDGER` and the transaction endpoints,
+    confirming transactions in the block after their submission (App Calls
+    log `returns`).
+    """
+
+    def __init__(self, delay: float = 0, returns: bytes = b""):
+        self.delay = delay
+        self.returns = returns
+        self.round = 1
+        self.txns: dict[str, SignedTransaction] = {}
+        self.submitted_round: dict[str, int] = {}
+        self.blocks_fetched = 0
+        self.requests = 0
+        self.connections = 0
+        self.max_connections = 0
+        self.server: Optional[asyncio.AbstractServer] = None
+
+    @property
+    def address(self) -> str:
+        host, port = self.server.sockets[0].getsockname()[:2]
+        return f"http://{host}:{port}"
+
+    async def __aenter__(self) -> "StandInAlgod":
+        self.server = await asyncio.start_server(self.serve, "127.0.0.1", 0)
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        self.server.close()
+
+    def logs(self, stxn: SignedTransaction) -> list[bytes]:
+        if stxn.transaction.type == "appl" and stxn.transaction.app_args:
+            return [ABI_RETURN_HASH + self.returns]
+        return []
+
+    def block(self, round_num: int) -> bytes:
+        txns = []
+        for txid, stxn in self.txns.items():
+            if self.submitted_round[txid] == round_num - 1:
+                txn = stxn.transaction.dictify()
+                del txn["gh"]
+                txns.append({"txn": txn, "dt": {"lg": self.logs(stxn)}})
+        return msgpack.packb(
+            {"block": {"gh": bytes(32), "rnd": round_num, "txns": txns}},
+            use_bin_type=True,
+        )
+
+    def route(
+        self, method: str, path: str, body: bytes
+    ) -> tuple[int, Union[dict, bytes]]:
+        path = path.split("?")[0]
+        if path == "/v2/transactions/params":
+            return 200, {
+                "fee": 0,
+                "last-round": self.round,
+                "genesis-hash": base64.b64encode(bytes(32)).decode(),
+                "genesis-id": "stand-in",
+                "consensus-version": "future",
+                "min-fee": 1000,
+            }
+        if path == "/v2/status":
+            return 200, {"last-round": self.round}
+        if path.startswith("/v2/status/wait-for-block-after/"):
+            self.round = max(self.round, int(path.split("/")[-1]) + 1)
+            return 200, {"last-round": self.round}
+        if method == "POST" and path == "/v2/transactions":
+            stxns = [
+                SignedTransaction.undictify(stxn)
+                for stxn in msgpack.Unpacker(io.BytesIO(body), raw=False)
+            ]
+            for stxn in stxns:
+                self.txns[stxn.get_txid()] = stxn
+                self.submitted_round[stxn.get_txid()] = self.round
+            return 200, {"txId": stxns[0].get_txid()}
+        if path.startswith("/v2/transactions/pending/"):
+            txid = path.split("/")[-1]
+            if txid not in self.txns:
+                return 404, {"message": "txn does not exist"}
+            logs = [
+                base64.b64encode(log).decode() for log in self.logs(self.txns[txid])
+            ]
+            confirmed_round = self.submitted_round[txid] + 1
+            if confirmed_round > self.round:
+                return 200, {"confirmed-round": 0, "pool-error": ""}
+            return 200, {"confirmed-round": confirmed_round, "logs": logs}
+        if path.startswith("/v2/blocks/"):
+            self.blocks_fetched += 1
+            return 200, self.block(int(path.split("/")[-1]))
+        if path in LEDGER:
+            return 200, LEDGER[path]
+        return 404, {"message": f"{path} not found"}
+
+    async def serve(self, reader, writer) -> None:
+        self.connections += 1
+        self.max_connections = max(self.max_connections, self.connections)
+        try:
+            while request_line := await reader.readline():
+                method, path, _ = request_line.decode().split(" ", 2)
+                headers = {}
+                while (line := await reader.readline()) not in (b"\r\n", b""):
+                    name, _, value = line.decode().partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                body = await reader.readexactly(int(headers.get("content-length", 0)))
+
+                self.requests += 1
+                await asyncio.sleep(self.delay)
+                status, response = self.route(method, path, body)
+                if isinstance(response, dict):
+                    response = json.dumps(response).encode()
+                close = headers.get("connection") == "close"
+                writer.write(
+                    f"HTTP/1.1 {status} -\r\nContent-Length: {len(response)}\r\n"
+                    f"Connection: {'close' if close else 'keep-alive'}\r\n\r\n".encode()
+                    + response
+                )
+                await writer.drain()
+                if close:
+                    break
+        finally:
+            self.connections -= 1
+            writer.close()
+
+
+def test_connection_pool() -> None:
+    async def run() -> None:
+        async with StandInAlgod(delay=0.001) as algod:
+            async with AsyncAlgodClient("", algod.address, max_connections=8) as client:
+                statuses = await asyncio.gather(*(client.status() for _ in range(2000)))
+            assert all(status == {"last-round": 1} for status in statuses)
+            assert algod.requests == 2000
+            assert algod.max_connections == 8
+
+    asyncio.run(run())
+
+
+def test_http_error() -> None:
+    async def run() -> None:
+        async with StandInAlgod() as algod:
+            async with AsyncAlgodClient("", algod.address) as client:
+                with pytest.raises(AlgodHTTPError, match="not found") as err:
+                    await client.asset_info(ASSET_ID + 1)
+                assert err.value.code == 404
+                # Connections are reused after errors
+                assert (await client.status())["last-round"] == 1
+
+    asyncio.run(run())
+
+
+def test_params_cache() -> None:
+    async def run() -> None:
+        async with StandInAlgod() as algod:
+            async with AsyncAlgodClient("", algod.address) as client:
+                params = await asyncio.gather(
+                    *(get_params(client, fee=2000) for _ in range(100))
+                )
+                assert algod.requests == 1
+                assert all(p.fee == 2000 and p.first == 1 for p in params)
+
+                client.invalidate_params()
+                algod.round = 5
+                assert (await client.suggested_params()).first == 5
+                assert algod.requests == 2
+
+    asyncio.run(run())
+
+
+def test_get_smart_asa_params() -> None:
+    async def run() -> None:
+        async with StandInAlgod() as algod:
+            async with AsyncAlgodClient("", algod.address) as client:
+                smart_asa = await async_get_smart_asa_params(client, ASSET_ID)
+            # Same as the sync client (blocking, so off the event loop)
+            assert smart_asa == await asyncio.to_thread(
+                get_smart_asa_params, AlgodClient("", algod.address), ASSET_ID
+            )
+        assert smart_asa["app_id"] == APP_ID
+        assert smart_asa["circulating_supply"] == CIRCULATING_SUPPLY
+        assert smart_asa["manager_addr"] == CREATOR.address
+
+    asyncio.run(run())
+
+
+def test_budget_calls_off_loop(monkeypatch) -> None:
+    loop_thread = threading.current_thread()
+    threads = []
+
+    def _method_budget_calls(*args) -> int:
+        threads.append(threading.current_thread())
+        return method_budget_calls(*args)
+
+    monkeypatch.setattr(
+        "async_smart_asa_client.method_budget_calls", _method_budget_calls
+    )
+
+    async def run() -> int:
+        async with StandInAlgod() as algod:
+            async with AsyncAlgodClient("", algod.address) as client:
+                return await smart_asa_budget_calls(
+                    client, SMART_ASA_APP, "asset_transfer"
+                )
+
+    assert asyncio.run(run()) == method_budget_calls(
+        DEFAULT_BUILD_OPTIONS, "asset_transfer"
+    )
+    assert threads and loop_thread not in threads
+
+
+def test_abi_return() -> None:
+    contract = load_contract()
+
+    async def run() -> None:
+        returns = abi.UintType(64).encode(CIRCULATING_SUPPLY)
+        async with StandInAlgod(returns=returns) as algod:
+            async with AsyncAlgodClient("", algod.address) as client:
+                caller = AsyncAccount.from_account(Account.create(), client)
+                supply = await smart_asa_get(
+                    contract, SMART_ASA_APP, caller, ASSET_ID, "get_circulating_supply"
+                )
+        assert supply == CIRCULATING_SUPPLY
+
+    asyncio.run(run())
+
+
+def test_many_transfers() -> None:
+    contract = load_contract()
+    transfers = 1000
+    budget_calls = method_budget_calls(DEFAULT_BUILD_OPTIONS, "asset_transfer")
+
+    async def run() -> None:
+        async with StandInAlgod(delay=0.001) as algod:
+            async with AsyncAlgodClient("", algod.address, max_connections=8) as client:
+                caller = AsyncAccount.from_account(Account.create(), client)
+                receiver = Account.create()
+                await asyncio.gather(
+                    *(
+                        smart_asa_transfer(
+                            contract, SMART_ASA_APP, ASSET_ID, i, caller, receiver
+                        )
+                        for i in range(transfers)
+                    )
+                )
+            assert len(algod.txns) == transfers * (1 + budget_calls)
+            assert algod.max_connections <= 8
+            # Confirmed from blocks, each fetched once
+            assert algod.blocks_fetched == algod.round - 1
+
+    asyncio.run(run())
@@ -0,0 +1,114 @@
+"""
+Merkle tree of Algorand addresses, as verified by the Smart ASA App allow list
+(ref. `is_allowed`)
+"""
+
+import hashlib
+from typing import Iterable, Sequence
+
+from algosdk.encoding import decode_address
+
+NODE_BYTES = 32
+EMPTY_LEAF = bytes(NODE_BYTES)
+
+
+def sha256(data: bytes) -> bytes:
+    return hashlib.sha256(data).digest()
+
+
+def leaf_hash(address: str) -> bytes:
+    return sha256(decode_address(address))
+
+
+def node_hash(a: bytes, b: bytes) -> bytes:
+    # NOTE: Sorted pair hashing, so that proofs need no left/right flags.
+    return sha256(min(a, b) + max(a, b))
+
+
+def verify(root: bytes, address: str, proof: Sequence[bytes]) -> bool:
+    """`address` is a leaf of the Merkle tree of `root`, proven by `proof`."""
+    node = leaf_hash(address)
+    for sibling in proof:
+        node = node_hash(node, sibling)
+    return node == root
+
+
+class MerkleTree:
+    """
+    Merkle tree of addresses, with leaves padded to a power of two (at least
+    two, so that the root of the empty tree is not the zero root). Adding or
+    removing an address updates just its path to the root, the tree doubles
+    (and is rebuilt) when full.
+    """
+
+    def __init__(self, addresses: Iterable[str] = ()):
+        self.index: dict[str, int] = {}
+        self.free: list[int] = []
+        self._build(list(dict.fromkeys(addresses)))
+
+    def _build(self, addresses: list[str]) -> None:
+        capacity = 2
+        while capacity < len(addresses):
+            capacity *= 2
+        self.index = {address: i for i, address in enumerate(addresses)}
+        self.free = list(range(capacity - 1, len(addresses) - 1, -1))
+        leaves = [leaf_hash(address) for address in addresses]
+        self.levels = [leaves + [EMPTY_LEAF] * (capacity - len(leaves))]
+        while len(self.levels[-1]) > 1:
+            level = self.levels[-1]
+            self.levels.append(
+                [node_hash(level[i], level[i + 1]) for i in range(0, len(level), 2)]
+            )
+
+    def _update(self, position: int, leaf: bytes) -> None:
+        self.levels[0][position] = leaf
+        for depth in range(1, len(self.levels)):
+            position //= 2
+            children = self.levels[depth - 1]
+            self.levels[depth][position] = node_hash(
+                children[2 * position], children[2 * position + 1]
+            )
+
+    @property
+    def root(self) -> bytes:
+        return self.levels[-1][0]
+
+    @property
+    def depth(self) -> int:
+        """Proof length (number of sibling nodes)."""
+        return len(self.levels) - 1
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+    def __contains__(self, address: str) -> bool:
+        return address in self.index
+
+    def add(self, address: str) -> bytes:
+        """Add `address` (if missing) and return the new root."""
+        if address in self.index:
+            return self.root
+        if not self.free:
+            self._build(list(self.index) + [address])
+            return self.root
+        position = self.free.pop()
+        self.index[address] = position
+        self._update(position, leaf_hash(address))
+        return self.root
+
+    def remove(self, address: str) -> bytes:
+        """Remove `address` (if present) and return the new root."""
+        position = self.index.pop(address, None)
+        if position is not None:
+            self.free.append(position)
+            self._update(position, EMPTY_LEAF)
+        return self.root
+
+    def proof(self, address: str) -> list[bytes]:
+        """Sibling nodes from the `address` leaf up to the root."""
+        position = self.index[address]
+        proof = []
+        for level in self.levels[:-1]:
+            proof.append(level[position ^ 1])
+            position //= 2
+        return proof
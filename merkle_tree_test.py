@@ -0,0 +1,55 @@
+"""
+Merkle tree test suite
+"""
+
+import pytest
+from algosdk import account
+
+from merkle_tree import EMPTY_LEAF, MerkleTree, leaf_hash, node_hash, verify
+
+ADDRESSES = [account.generate_account()[1] for _ in range(9)]
+
+
+def test_node_hash_is_sorted() -> None:
+    a, b = leaf_hash(ADDRESSES[0]), leaf_hash(ADDRESSES[1])
+    assert node_hash(a, b) == node_hash(b, a)
+
+
+@pytest.mark.parametrize("size,depth", [(0, 1), (1, 1), (2, 1), (3, 2), (9, 4)])
+def test_proofs(size: int, depth: int) -> None:
+    tree = MerkleTree(ADDRESSES[:size])
+    assert len(tree) == size
+    assert tree.depth == depth
+    assert tree.root != EMPTY_LEAF
+    for address in ADDRESSES[:size]:
+        proof = tree.proof(address)
+        assert len(proof) == depth
+        assert verify(tree.root, address, proof)
+    for address in ADDRESSES[size:]:
+        assert address not in tree
+        assert not verify(tree.root, address, [EMPTY_LEAF] * depth)
+
+
+def test_incremental_updates() -> None:
+    tree = MerkleTree(ADDRESSES[:5])
+    assert tree.add(ADDRESSES[5]) == MerkleTree(ADDRESSES[:6]).root
+    assert tree.add(ADDRESSES[5]) == tree.root
+
+    # Removed leaves are emptied, then reused
+    tree.remove(ADDRESSES[1])
+    assert ADDRESSES[1] not in tree
+    assert not verify(tree.root, ADDRESSES[1], tree.proof(ADDRESSES[0]))
+    tree.add(ADDRESSES[6])
+    assert tree.index[ADDRESSES[6]] == 1
+    assert tree.depth == 3
+    for address in tree.index:
+        assert verify(tree.root, address, tree.proof(address))
+
+    # Full trees double
+    for address in ADDRESSES[7:]:
+        tree.add(address)
+    assert len(tree) == 8
+    assert tree.depth == 3
+    tree.add(ADDRESSES[1])
+    assert tree.depth == 4
+    assert tree.root == MerkleTree(tree.index).root
@@ -0,0 +1,115 @@
+"""
+Pipelined transaction submission
+"""
+
+__author__ = "Cosimo Bassi, Stefano De Angelis"
+__email__ = "<cosimo.bassi@algorand.com>, <stefano.deangelis@algorand.com>"
+
+import threading
+from concurrent.futures import Future, wait
+from typing import Any, Optional
+
+from algosdk import abi
+from algosdk.future.transaction import SignedTransaction
+from algosdk.v2client.algod import AlgodClient
+
+from watcher import abi_return, get_watcher
+
+# NOTE: In-flight operations (transactions or atomic groups) of a pipeline:
+# submitters block once the window is full, until the oldest get confirmed.
+DEFAULT_WINDOW = 256
+
+
+class PendingTxn(Future):
+    """
+    Handle of a submitted transaction (or atomic group, by its `txid`
+    transaction, if any was built), resolved to its confirmed transaction info
+    or, for ABI calls, to the decoded `method` return value.
+    """
+
+    def __init__(self, txid: Optional[str], method: Optional[abi.Method]):
+        super().__init__()
+        self.txid = txid
+        self.method = method
+        self.tx_info: Optional[dict] = None
+
+
+def resolve(result: Any, timeout: Optional[float] = None) -> Any:
+    """Result of a call, waiting for its confirmation if pipelined."""
+    if isinstance(result, PendingTxn):
+        return result.result(timeout)
+    return result
+
+
+class Pipeline:
+    """
+    Submits transactions without waiting for their confirmation: the block
+    watcher of the algod client (ref. `watcher`) resolves the pending handles
+    as their transactions get confirmed. At most `window` operations are in
+    flight at once.
+    """
+
+    def __init__(
+        self,
+        algod_client: AlgodClient,
+        window: int = DEFAULT_WINDOW,
+        max_wait_rounds: int = 10,
+    ):
+        assert window > 0
+        self.algod_client = algod_client
+        self.window = window
+        self.max_wait_rounds = max_wait_rounds
+        self._slots = threading.BoundedSemaphore(window)
+        self._pending: set[PendingTxn] = set()
+        self._lock = threading.Lock()
+
+    def __enter__(self) -> "Pipeline":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.flush()
+
+    def submit(
+        self,
+        signed_txns: list[SignedTransaction],
+        method: Optional[abi.Method] = None,
+        index: int = 0,
+    ) -> PendingTxn:
+        """
+        Submit signed transactions (an atomic group, if more than one), the
+        handle tracks the `index`-th (the `method` call, if any).
+        """
+        handle = PendingTxn(signed_txns[index].get_txid(), method)
+        self._slots.acquire()
+        try:
+            confirmation = get_watcher(self.algod_client).submit(
+                signed_txns, self.max_wait_rounds
+            )
+        except BaseException:
+            self._slots.release()
+            raise
+        with self._lock:
+            self._pending.add(handle)
+        confirmation.add_done_callback(
+            lambda confirmation: self._resolve(handle, confirmation, index)
+        )
+        return handle
+
+    def flush(self, timeout: Optional[float] = None) -> None:
+        """Wait for all the in-flight operations to be resolved."""
+        with self._lock:
+            pending = list(self._pending)
+        wait(pending, timeout)
+
+    def _resolve(self, handle: PendingTxn, confirmation: Future, index: int) -> None:
+        with self._lock:
+            self._pending.discard(handle)
+        self._slots.release()
+        if confirmation.exception() is not None:
+            handle.set_exception(confirmation.exception())
+            return
+        handle.tx_info = confirmation.result()[index]
+        if handle.method is not None:
+            handle.set_result(abi_return(handle.method, handle.tx_info))
+        else:
+            handle.set_result(handle.tx_info)
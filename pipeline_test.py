@@ -0,0 +1,174 @@
+"""
+Pipelined transaction submission test suite
+"""
+
+import base64
+import threading
+import time
+
+import msgpack
+import pytest
+from algosdk import abi
+from algosdk.atomic_transaction_composer import ABI_RETURN_HASH
+from algosdk.error import (
+    AlgodHTTPError,
+    ConfirmationTimeoutError,
+    TransactionRejectedError,
+)
+from algosdk.future.transaction import PaymentTxn, SuggestedParams
+
+from account import Account
+from pipeline import Pipeline, resolve
+from utils import suggested_params
+
+RETURN_VALUE = 42
+
+
+class StandInAlgod:
+    """
+    Stand-in algod client: a new round at each `status_after_block`, and
+    transactions confirmed in the block after their submission (if `confirm`).
+    App Calls log `RETURN_VALUE`.
+    """
+
+    def __init__(
+        self, confirm: bool = True, pool_error: str = "", block_time: float = 0.001
+    ):
+        self.confirm = confirm
+        self.block_time = block_time
+        self.pool_error = pool_error
+        self.round = 1
+        self.submitted: dict[str, tuple[int, object]] = {}
+        self.rounds_waited = 0
+        self.blocks_fetched = 0
+        self.pending_checks = 0
+        self.max_in_flight = 0
+        self.lock = threading.Lock()
+
+    def suggested_params(self) -> SuggestedParams:
+        return SuggestedParams(
+            fee=0,
+            first=self.round,
+            last=self.round + 1000,
+            gh=base64.b64encode(bytes(32)).decode(),
+        )
+
+    def send_transactions(self, stxns: list) -> str:
+        with self.lock:
+            for stxn in stxns:
+                self.submitted[stxn.get_txid()] = (self.round, stxn)
+            in_flight = sum(r >= self.round for r, _ in self.submitted.values())
+            self.max_in_flight = max(self.max_in_flight, in_flight)
+        return stxns[0].get_txid()
+
+    def status(self) -> dict:
+        return {"last-round": self.round}
+
+    def status_after_block(self, round_num: int) -> dict:
+        time.sleep(self.block_time)
+        with self.lock:
+            self.rounds_waited += 1
+            self.round = max(self.round, round_num + 1)
+        return {"last-round": self.round}
+
+    def block_info(self, block: int, response_format: str = "json") -> bytes:
+        assert response_format == "msgpack"
+        with self.lock:
+            self.blocks_fetched += 1
+            stxns = [
+                stxn
+                for submitted_round, stxn in self.submitted.values()
+                if self.confirm and submitted_round == block - 1
+            ]
+        txns = []
+        for stxn in stxns:
+            txn = stxn.transaction.dictify()
+            del txn["gh"]
+            logs = []
+            if stxn.transaction.type == "appl":
+                logs = [ABI_RETURN_HASH + abi.UintType(64).encode(RETURN_VALUE)]
+            txns.append({"txn": txn, "dt": {"lg": logs}})
+        return msgpack.packb(
+            {"block": {"gh": bytes(32), "rnd": block, "txns": txns}},
+            use_bin_type=True,
+        )
+
+    def pending_transaction_info(self, txid: str) -> dict:
+        self.pending_checks += 1
+        if txid not in self.submitted:
+            raise AlgodHTTPError("txn does not exist", 404)
+        submitted_round, _ = self.submitted[txid]
+        if not self.confirm or submitted_round >= self.round:
+            return {"confirmed-round": 0, "pool-error": self.pool_error}
+        return {"confirmed-round": submitted_round + 1}
+
+
+def payment(account: Account, amount: int) -> PaymentTxn:
+    return PaymentTxn(account.address, account._get_params(), account.address, amount)
+
+
+def test_pipelined_payments() -> None:
+    algod_client = StandInAlgod(block_time=0.5)
+    with Pipeline(algod_client, window=100) as pipeline:
+        account = Account.create(algod_client=algod_client).pipelined(pipeline)
+        handles = [account.sign_send_wait(payment(account, i)) for i in range(100)]
+    assert all(h.result()["confirmed-round"] == 2 for h in handles)
+    # Confirmed together, in a round, from a block
+    assert algod_client.rounds_waited == 1
+    assert algod_client.blocks_fetched == 1
+    assert algod_client.pending_checks == 0
+
+
+@pytest.mark.parametrize("window", [1, 4])
+def test_window(window: int) -> None:
+    algod_client = StandInAlgod(block_time=0.05)
+    with Pipeline(algod_client, window=window) as pipeline:
+        account = Account.create(algod_client=algod_client).pipelined(pipeline)
+        handles = [account.sign_send_wait(payment(account, i)) for i in range(20)]
+    assert all(h.done() for h in handles)
+    assert algod_client.max_in_flight == window
+
+
+def test_abi_return() -> None:
+    algod_client = StandInAlgod()
+    method = abi.Method.from_signature("get()uint64")
+    with Pipeline(algod_client) as pipeline:
+        account = Account.create(algod_client=algod_client).pipelined(pipeline)
+        handle = account.abi_call(method, app=1, budget_calls=2)
+        assert resolve(handle) == RETURN_VALUE
+    assert handle.tx_info["confirmed-round"] == 2
+    assert len(algod_client.submitted) == 3
+
+
+def test_not_pipelined() -> None:
+    algod_client = StandInAlgod()
+    account = Account.create(algod_client=algod_client)
+    tx_info = account.sign_send_wait(payment(account, 1))
+    assert tx_info["confirmed-round"] == 2
+    method = abi.Method.from_signature("get()uint64")
+    assert account.abi_call(method, app=1) == RETURN_VALUE
+
+
+@pytest.mark.parametrize(
+    "pool_error,dead", [("overspend", False), ("txn dead: round 1005", True)]
+)
+def test_rejected(pool_error: str, dead: bool) -> None:
+    algod_client = StandInAlgod(confirm=False, pool_error=pool_error)
+    with Pipeline(algod_client) as pipeline:
+        account = Account.create(algod_client=algod_client).pipelined(pipeline)
+        handle = account.sign_send_wait(payment(account, 1))
+        params = suggested_params(algod_client)
+        with pytest.raises(TransactionRejectedError, match=pool_error):
+            handle.result()
+    # Dead transactions invalidate the cached suggested params
+    assert (suggested_params(algod_client) is not params) == dead
+
+
+def test_timeout() -> None:
+    algod_client = StandInAlgod(confirm=False)
+    with Pipeline(algod_client, max_wait_rounds=3) as pipeline:
+        account = Account.create(algod_client=algod_client).pipelined(pipeline)
+        handle = account.sign_send_wait(payment(account, 1))
+        with pytest.raises(ConfirmationTimeoutError):
+            handle.result()
+    assert algod_client.rounds_waited == 3
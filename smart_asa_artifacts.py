@@ -0,0 +1,253 @@
+"""
+Smart ASA build artifacts cache
+"""
+
+__author__ = "Cosimo Bassi, Stefano De Angelis"
+__email__ = "<cosimo.bassi@algorand.com>, <stefano.deangelis@algorand.com>"
+
+import hashlib
+import json
+import os
+import tempfile
+from importlib.metadata import version
+from pathlib import Path
+from typing import NamedTuple, Optional, Union
+
+from algosdk.abi import Contract
+from algosdk.future.transaction import StateSchema
+
+import smart_asa_asc
+from smart_asa_asc import (
+    DEFAULT_BUILD_OPTIONS,
+    OPTIMIZE_OPTIONS,
+    TEAL_VERSION,
+    BuildOptions,
+    compile_stateful,
+    global_state_schema,
+    local_state_schema,
+    smart_asa_router,
+    teal_version,
+)
+from teal_cost import analyze
+from utils import assemble_program
+
+SOURCE_DIR = Path(__file__).resolve().parent
+SMART_ASA_ASC_SOURCE = Path(smart_asa_asc.__file__).resolve()
+SMART_ASA_ABI_JSON = SOURCE_DIR / "smart_asa_abi.json"
+SMART_ASA_COSTS_JSON = SOURCE_DIR / "smart_asa_costs.json"
+
+# NOTE: The cache directory can be moved (e.g. to a shared volume for batch
+# jobs) with the `SMART_ASA_CACHE_DIR` environment variable.
+CACHE_DIR = Path(os.environ.get("SMART_ASA_CACHE_DIR", SOURCE_DIR / ".smart_asa_cache"))
+
+APPROVAL_TEAL = "approval.teal"
+CLEAR_TEAL = "clear.teal"
+APPROVAL_BYTECODE = "approval.bin"
+CLEAR_BYTECODE = "clear.bin"
+CONTRACT_JSON = "contract.json"
+COSTS_JSON = "costs.json"
+
+# Smart ASA features that can be compiled out (ref. `BuildOptions`).
+FEATURES = ("account_freeze", "clawback", "burn")
+PAGE_SIZE = 2048
+
+
+def artifacts_key(options: BuildOptions = DEFAULT_BUILD_OPTIONS) -> str:
+    """
+    Content address of the Smart ASA build artifacts: changes whenever the
+    Smart ASA App source, its build options or the compiler configuration
+    change.
+    """
+    optimize_options = {
+        k: v for k, v in vars(OPTIMIZE_OPTIONS).items() if not k.startswith("_")
+    }
+    build_config = json.dumps(
+        {
+            "pyteal": version("pyteal"),
+            "teal_version": TEAL_VERSION,
+            "optimize": optimize_options,
+            "build_options": options._asdict(),
+        },
+        sort_keys=True,
+    )
+    digest = hashlib.sha256(SMART_ASA_ASC_SOURCE.read_bytes())
+    digest.update(build_config.encode())
+    return digest.hexdigest()
+
+
+def artifacts_dir(
+    cache_dir: Union[str, Path] = CACHE_DIR,
+    options: BuildOptions = DEFAULT_BUILD_OPTIONS,
+) -> Path:
+    return Path(cache_dir) / artifacts_key(options)
+
+
+def _write_atomic(path: Path, content: Union[str, bytes]) -> None:
+    # Concurrent CLI invocations may race on the same artifact: readers must
+    # never see a partially written file.
+    mode = "wb" if isinstance(content, bytes) else "w"
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.")
+    with os.fdopen(fd, mode) as f:
+        f.write(content)
+    os.replace(tmp_path, path)
+
+
+def opcode_cost_report(approval: str, contract: Contract) -> dict[str, dict]:
+    """
+    Static opcode costs (ref. `teal_cost`) of each Smart ASA method: the max
+    cost with no loop iteration, the max cost added by each loop iteration and
+    the Router dispatch cost.
+    """
+    # NOTE: Smart ASA methods max opcode costs are linear in their loop bound.
+    no_loop, one_loop = (
+        analyze(approval, contract, max_iterations=n)["methods"] for n in (0, 1)
+    )
+    return {
+        name: {
+            "max": cost["max"],
+            "per_iteration": one_loop[name]["max"] - cost["max"],
+            "dispatch": cost["dispatch"],
+        }
+        for name, cost in no_loop.items()
+    }
+
+
+def build_artifacts(
+    cache_dir: Union[str, Path] = CACHE_DIR,
+    options: BuildOptions = DEFAULT_BUILD_OPTIONS,
+) -> Path:
+    """
+    Build Smart ASA TEAL programs, ABI JSON and opcode cost report, unless
+    already cached for the current `artifacts_key`. Returns the artifacts
+    directory.
+    """
+    path = artifacts_dir(cache_dir, options)
+    artifacts = (APPROVAL_TEAL, CLEAR_TEAL, CONTRACT_JSON, COSTS_JSON)
+    if all((path / f).exists() for f in artifacts):
+        return path
+
+    path.mkdir(parents=True, exist_ok=True)
+    approval, clear, contract = smart_asa_router(options).build_program()
+    version = teal_version(options)
+    approval_teal = compile_stateful(approval, version)
+    _write_atomic(path / APPROVAL_TEAL, approval_teal)
+    _write_atomic(path / CLEAR_TEAL, compile_stateful(clear, version))
+    _write_atomic(path / CONTRACT_JSON, json.dumps(contract.dictify(), indent=4))
+    costs = opcode_cost_report(approval_teal, contract)
+    _write_atomic(path / COSTS_JSON, json.dumps(costs, indent=4))
+    return path
+
+
+def load_teal_programs(
+    cache_dir: Union[str, Path] = CACHE_DIR,
+    options: BuildOptions = DEFAULT_BUILD_OPTIONS,
+) -> tuple[str, str]:
+    """Returns Smart ASA TEAL approval and clear programs (built if needed)."""
+    path = build_artifacts(cache_dir, options)
+    return (path / APPROVAL_TEAL).read_text(), (path / CLEAR_TEAL).read_text()
+
+
+def load_bytecode(
+    cache_dir: Union[str, Path] = CACHE_DIR,
+    options: BuildOptions = DEFAULT_BUILD_OPTIONS,
+) -> tuple[bytes, bytes]:
+    """
+    Returns Smart ASA assembled approval and clear programs (built and
+    assembled if needed).
+    """
+    path = build_artifacts(cache_dir, options)
+    programs = []
+    for teal, bytecode in (
+        (APPROVAL_TEAL, APPROVAL_BYTECODE),
+        (CLEAR_TEAL, CLEAR_BYTECODE),
+    ):
+        if not (path / bytecode).exists():
+            assembled = assemble_program((path / teal).read_text())
+            _write_atomic(path / bytecode, assembled)
+        programs.append((path / bytecode).read_bytes())
+    return programs[0], programs[1]
+
+
+def load_contract(
+    cache_dir: Optional[Union[str, Path]] = CACHE_DIR,
+    options: BuildOptions = DEFAULT_BUILD_OPTIONS,
+) -> Contract:
+    """
+    Returns Smart ASA ABI Contract without building the PyTeal program: from
+    the artifacts cache if available, otherwise from `smart_asa_abi.json`.
+    Contracts of non default build options are built (and cached) if not
+    cached yet.
+    """
+    if cache_dir is not None:
+        cached_contract = artifacts_dir(cache_dir, options) / CONTRACT_JSON
+        if cached_contract.exists():
+            return Contract.from_json(cached_contract.read_text())
+    if options == DEFAULT_BUILD_OPTIONS:
+        return Contract.from_json(SMART_ASA_ABI_JSON.read_text())
+    if cache_dir is None:
+        _, _, contract = smart_asa_router(options).build_program()
+        return contract
+    path = build_artifacts(cache_dir, options)
+    return Contract.from_json((path / CONTRACT_JSON).read_text())
+
+
+def load_opcode_costs(
+    cache_dir: Union[str, Path] = CACHE_DIR,
+    options: BuildOptions = DEFAULT_BUILD_OPTIONS,
+) -> dict[str, dict]:
+    """
+    Returns Smart ASA opcode cost report (ref. `opcode_cost_report`) without
+    building or analyzing the TEAL program: from the artifacts cache if
+    available, otherwise from `smart_asa_costs.json`. Reports of non default
+    build options are built (and cached) if not cached yet.
+    """
+    cached_costs = artifacts_dir(cache_dir, options) / COSTS_JSON
+    if cached_costs.exists():
+        return json.loads(cached_costs.read_text())
+    if options == DEFAULT_BUILD_OPTIONS:
+        return json.loads(SMART_ASA_COSTS_JSON.read_text())
+    path = build_artifacts(cache_dir, options)
+    return json.loads((path / COSTS_JSON).read_text())
+
+
+class SmartASAVariant(NamedTuple):
+    """Smart ASA App programs, ABI Contract and State Schemas of a build."""
+
+    options: BuildOptions
+    approval: bytes
+    clear: bytes
+    contract: Contract
+    global_schema: StateSchema
+    local_schema: StateSchema
+
+    @property
+    def program_size(self) -> int:
+        return len(self.approval) + len(self.clear)
+
+    @property
+    def extra_pages(self) -> int:
+        return self.program_size // PAGE_SIZE
+
+
+def build_variant(
+    *features: str,
+    cache_dir: Union[str, Path] = CACHE_DIR,
+    options: BuildOptions = DEFAULT_BUILD_OPTIONS,
+) -> SmartASAVariant:
+    """
+    Smart ASA App built with `features` (ref. `FEATURES`) compiled out, on top
+    of the other build `options`. Artifacts are cached as any other build.
+    """
+    unknown = set(features) - set(FEATURES)
+    if unknown:
+        raise ValueError(f"Unknown Smart ASA features: {sorted(unknown)}")
+    options = options._replace(**{f"without_{f}": True for f in features})
+    approval, clear = load_bytecode(cache_dir, options)
+    return SmartASAVariant(
+        options=options,
+        approval=approval,
+        clear=clear,
+        contract=load_contract(cache_dir, options),
+        global_schema=global_state_schema(options),
+        local_schema=local_state_schema(options),
+    )
@@ -8,6 +8,10 @@ Smart ASA PyTEAL reference implementation based on ARC-20
 __author__ = "Cosimo Bassi, Stefano De Angelis"
 __email__ = "<cosimo.bassi@algorand.com>, <stefano.deangelis@algorand.com>"
 
+import functools
+from contextvars import ContextVar
+from typing import Any, Callable, Literal, Mapping, NamedTuple, Optional, Union
+
 from pyteal import (
     And,
     App,
@@ -16,50 +20,227 @@ from pyteal import (
     AssetHolding,
     AssetParam,
     BareCallActions,
+    BitwiseAnd,
+    BitwiseOr,
+    Btoi,
     Bytes,
+    BytesLt,
+    BytesZero,
     CallConfig,
     Concat,
     Expr,
     Extract,
+    For,
+    ExtractUint16,
+    ExtractUint32,
+    ExtractUint64,
+    GetBit,
     Global,
     Gtxn,
     If,
     InnerTxn,
     InnerTxnBuilder,
     Int,
+    Itob,
     Len,
+    Log,
     Mode,
     Not,
     OnCompleteAction,
     OptimizeOptions,
     Or,
+    Pop,
     Reject,
+    Replace,
     Return,
     Router,
+    ScratchVar,
     Seq,
+    SetBit,
+    SetByte,
+    Sha256,
+    ShiftLeft,
+    ShiftRight,
     Subroutine,
+    SubroutineFnWrapper,
+    Substring,
     Suffix,
     TealType,
     Txn,
     TxnField,
     TxnType,
+    While,
     abi,
     compileTeal,
 )
+from algosdk.abi import ABIType
 from algosdk.future.transaction import StateSchema
 from algosdk.constants import key_len_bytes
+from algosdk.encoding import checksum
 
 
 # / --- CONSTANTS
 TEAL_VERSION = 7
+# Boxes are available since TEAL v8.
+BOX_REGISTRY_TEAL_VERSION = 8
+OPTIMIZE_OPTIONS = OptimizeOptions(scratch_slots=True)
 
 # Descriptive field for the binding of Smart ASA App ID into the Underlying ASA url.
 SMART_ASA_APP_BINDING = "smart-asa-app-id:"
+UINT64_MAX_DIGITS = len(str(2**64 - 1))
+UINT64_BYTES = 8
+
+SMART_ASA_APP_NAME = "Smart ASA ref. implementation"
+MULTI_ASSET_APP_NAME = "Smart ASA multi-asset implementation"
+# NOTE: Multi-asset Smart ASA Apps act on the Smart ASA of the App Call (the
+# first Asset argument), kept in a reserved scratch slot for the whole call.
+CURRENT_SMART_ASA_SLOT = 255
+CURRENT_SMART_ASA_ID = ScratchVar(TealType.uint64, CURRENT_SMART_ASA_SLOT)
+# NOTE: The Box of a new multi-asset Smart ASA, named after its ID, can not be
+# referenced before its creation: `asset_create` writes the new Smart ASA in
+# the Box of the (non-existing) Asset ID 0 and its ID in a dedicated Box, then
+# `asset_register` moves it to its own Box. Smart ASAs are created one at a time.
+PENDING_SMART_ASA_ID = 0
+PENDING_SMART_ASA_BOX = "pending_smart_asa_id"
+
+# NOTE: Merkle allow list Apps keep the allow list root in a dedicated Global
+# State key, whatever the Global State layout. The zero root lifts the list.
+ALLOW_LIST_ROOT = Bytes("allow_list_root")
+MERKLE_NODE_BYTES = 32
+
+# NOTE: Smart ASA Apps record their build options (see `BuildOptions.flags`) on
+# creation in a dedicated Global State key, whatever the Global State layout:
+# the State Schema alone can not tell them apart.
+BUILD_OPTIONS_KEY = "build_options"
 
 # NOTE: The following costs could change over time with protocol upgrades.
 OPTIN_COST = 100_000
 UINTS_COST = 28_500
 BYTES_COST = 50_000
+BOX_FLAT_COST = 2_500
+BOX_BYTE_COST = 400
+
+
+# / --- BUILD OPTIONS
+class BuildOptions(NamedTuple):
+    """Smart ASA App build options, defaults build the reference implementation."""
+
+    # Global State fixed size fields packed in binary records (see
+    # `PackedGlobalState`).
+    packed_global_state: bool = False
+    # Local State fields packed in a single uint (see `PackedLocalState`).
+    packed_local_state: bool = False
+    # Holder fields in App Boxes, no App opt-in required (see `BoxLocalState`).
+    box_registry: bool = False
+    # Many Smart ASAs governed by one App, their fields in App Boxes named
+    # after the Smart ASA ID (see `BoxGlobalState` and `MultiAssetLocalState`).
+    multi_asset: bool = False
+    # Transfers restricted to the accounts of an allow list, committed as a
+    # Merkle root (see `is_allowed`). Not available for multi-asset Apps.
+    merkle_allow_list: bool = False
+    # Features compiled out, for Smart ASAs never using them (see
+    # `COMPILED_OUT_METHODS`): account freeze (holders have no `frozen` field
+    # and `default_frozen` must be False), clawback (`clawback_addr` must be
+    # ZERO_ADDRESS) and burn.
+    without_account_freeze: bool = False
+    without_clawback: bool = False
+    without_burn: bool = False
+    # ABI methods whose selectors are dispatched first (in this order), then
+    # the others in declaration order (see `hot_dispatch_order`).
+    dispatch_order: tuple[str, ...] = ()
+
+    @property
+    def holder_boxes(self) -> bool:
+        """Holder fields are stored in App Boxes (no App opt-in)."""
+        return self.box_registry or self.multi_asset
+
+    # NOTE: Bit i of the flags is the i-th boolean option, so new options must
+    # be appended (not to change the flags of the existing Apps).
+    def flags(self) -> int:
+        """Boolean build options as a bitmask (the dispatch order is not kept)."""
+        return sum(
+            1 << i for i, name in enumerate(self._fields) if getattr(self, name) is True
+        )
+
+    @classmethod
+    def from_flags(cls, flags: int) -> "BuildOptions":
+        return cls(
+            **{
+                name: bool(flags >> i & 1)
+                for i, name in enumerate(cls._fields)
+                if cls._field_defaults[name] is False
+            }
+        )
+
+
+DEFAULT_BUILD_OPTIONS = BuildOptions()
+
+# NOTE: Most Smart ASA App Calls are transfers.
+HOT_METHODS = ("asset_transfer",)
+
+_build_options: ContextVar[BuildOptions] = ContextVar(
+    "build_options", default=DEFAULT_BUILD_OPTIONS
+)
+
+
+def build_options() -> BuildOptions:
+    """Build options of the Smart ASA App being built."""
+    return _build_options.get()
+
+
+def with_build_options(implementation: Callable, options: BuildOptions) -> Callable:
+    # NOTE: PyTeal evaluates subroutines lazily (on compilation), so the
+    # implementation is bound to the build options it has been declared for.
+    @functools.wraps(implementation)
+    def implementation_with_build_options(*args, **kwargs):
+        token = _build_options.set(options)
+        try:
+            return implementation(*args, **kwargs)
+        finally:
+            _build_options.reset(token)
+
+    return implementation_with_build_options
+
+
+_SUBROUTINES: dict[tuple[Callable, BuildOptions], SubroutineFnWrapper] = {}
+
+
+def smart_asa_subroutine(return_type: TealType) -> Callable:
+    """
+    PyTeal `Subroutine` declared once for each build options. Subroutines whose
+    implementation depends on the build options (e.g. accessing the App State)
+    must be declared with this decorator.
+    """
+
+    def decorator(implementation: Callable) -> Callable:
+        @functools.wraps(implementation)
+        def subroutine_call(*args: Expr) -> Expr:
+            key = (implementation, build_options())
+            if key not in _SUBROUTINES:
+                _SUBROUTINES[key] = Subroutine(return_type)(
+                    with_build_options(implementation, build_options())
+                )
+            return _SUBROUTINES[key](*args)
+
+        return subroutine_call
+
+    return decorator
+
+
+SMART_ASA_METHODS: list[tuple[Callable, dict]] = []
+
+
+def smart_asa_method(implementation: Callable = None, /, **method_config) -> Callable:
+    """
+    Register a Smart ASA ABI method, added to the Smart ASA Router of any build
+    options (ref. `Router.method` for `method_config`).
+    """
+
+    def register(implementation: Callable) -> Callable:
+        SMART_ASA_METHODS.append((implementation, method_config))
+        return implementation
+
+    return register(implementation) if implementation else register
 
 
 def static_attrs(cls):
@@ -73,13 +254,136 @@ class Error:
     missing_smart_asa_id = "Smart ASA ID does not exist"
     invalid_smart_asa_id = "Invalid Smart ASA ID"
     not_creator_addr = "Caller not authorized (must be: App Creator Address)"
+    pending_smart_asa = "Pending Smart ASA (must be registered first)"
     not_manager_addr = "Caller not authorized (must be: Manager Address)"
     not_reserve_addr = "Caller not authorized (must be: Reserve Address)"
     not_freeze_addr = "Caller not authorized (must be: Freeze Address)"
-    not_clawback_addr = "Caller not authorized (must be: Clawback Address)"
     asset_frozen = "Smart ASA is frozen"
     sender_frozen = "Sender is frozen"
     receiver_frozen = "Receiver is frozen"
+    config_fields = "Invalid config fields"
+    no_account_freeze = "Account freeze not available (Default Frozen must be False)"
+    no_clawback = "Clawback not available (Clawback Address must be ZERO_ADDRESS)"
+    sender_not_allowed = "Sender is not in the allow list"
+    receiver_not_allowed = "Receiver is not in the allow list"
+
+
+# / --- --- EVENTS
+# NOTE: ARC-28 events: the first 4 bytes of the SHA-512/256 of the event
+# signature followed by the ABI encoding of the event arguments. Dynamic
+# arguments (`byte[]`, just as the last one) are given ABI encoded.
+EVENT_ARG_ENCODERS = {
+    "uint64": Itob,
+    "uint32": lambda value: Suffix(Itob(value), Int(4)),
+    "uint16": lambda value: Suffix(Itob(value), Int(6)),
+    "byte[]": lambda value: value,
+    "address": lambda value: value,
+    "byte[32]": lambda value: value,
+    "bool": lambda value: SetBit(Bytes("base16", "0x00"), Int(0), value),
+}
+
+
+class SmartASAEvent(NamedTuple):
+    name: str
+    args: tuple[tuple[str, str], ...]
+
+    @property
+    def signature(self) -> str:
+        return f"{self.name}({','.join(arg_type for _, arg_type in self.args)})"
+
+    @property
+    def selector(self) -> bytes:
+        return checksum(self.signature.encode())[:4]
+
+    @property
+    def abi_type(self) -> ABIType:
+        return ABIType.from_string(self.signature[len(self.name) :])
+
+    def log(self, *values: Expr) -> Expr:
+        assert len(values) == len(self.args)
+        encoded = [
+            EVENT_ARG_ENCODERS[arg_type](value)
+            for (_, arg_type), value in zip(self.args, values)
+        ]
+        if self.abi_type.is_dynamic():
+            # NOTE: The head ends with the offset of the dynamic argument.
+            *static_types, dynamic_type = self.abi_type.child_types
+            assert dynamic_type.is_dynamic()
+            head_size = sum(t.byte_len() for t in static_types) + 2
+            encoded.insert(-1, Bytes(head_size.to_bytes(2, "big")))
+        return Log(Concat(Bytes(self.selector), *encoded))
+
+    def decode(self, log: bytes) -> dict[str, Union[int, bool, str, bytes]]:
+        assert log[:4] == self.selector
+        values = self.abi_type.decode(log[4:])
+        return {
+            arg_name: bytes(value) if isinstance(value, list) else value
+            for (arg_name, _), value in zip(self.args, values)
+        }
+
+
+class Event:
+    asset_transfer = SmartASAEvent(
+        "AssetTransfer",
+        (
+            ("asset", "uint64"),
+            ("amount", "uint64"),
+            ("sender", "address"),
+            ("receiver", "address"),
+        ),
+    )
+    asset_freeze = SmartASAEvent(
+        "AssetFreeze",
+        (("asset", "uint64"), ("frozen", "bool")),
+    )
+    account_freeze = SmartASAEvent(
+        "AccountFreeze",
+        (("asset", "uint64"), ("account", "address"), ("frozen", "bool")),
+    )
+    account_unfreeze_all = SmartASAEvent(
+        "AccountUnfreezeAll",
+        (("asset", "uint64"), ("freeze_epoch", "uint64")),
+    )
+    asset_config = SmartASAEvent(
+        "AssetConfig",
+        (
+            ("asset", "uint64"),
+            ("total", "uint64"),
+            ("decimals", "uint32"),
+            ("default_frozen", "bool"),
+            ("manager_addr", "address"),
+            ("reserve_addr", "address"),
+            ("freeze_addr", "address"),
+            ("clawback_addr", "address"),
+        ),
+    )
+    asset_config_partial = SmartASAEvent(
+        "AssetConfigPartial",
+        (
+            ("asset", "uint64"),
+            ("config_fields", "uint16"),
+            ("config_values", "byte[]"),
+        ),
+    )
+    asset_destroy = SmartASAEvent("AssetDestroy", (("asset", "uint64"),))
+    asset_allow_list = SmartASAEvent(
+        "AssetAllowList",
+        (("asset", "uint64"), ("allow_list_root", "byte[32]")),
+    )
+
+
+SMART_ASA_EVENTS = {
+    event.selector: event
+    for event in (getattr(Event, attr) for attr in static_attrs(Event))
+}
+
+
+def decode_event(log: bytes) -> Optional[tuple[str, dict]]:
+    """Smart ASA event name and arguments of an App Call log (None if not an event)."""
+    event = SMART_ASA_EVENTS.get(log[:4])
+    if event is None:
+        return None
+    return event.name, event.decode(log)
 
 
 # / --- --- GLOBAL STATE
@@ -89,6 +393,7 @@ class GlobalInts:
     default_frozen = Bytes("default_frozen")
     smart_asa_id = Bytes("smart_asa_id")
     frozen = Bytes("frozen")
+    freeze_epoch = Bytes("freeze_epoch")
 
 
 class GlobalBytes:
@@ -103,6 +408,8 @@ class GlobalBytes:
 
 
 class GlobalState(GlobalInts, GlobalBytes):
+    """Global State layout with a key for each Smart ASA field."""
+
     @staticmethod
     def num_uints():
         return len(static_attrs(GlobalInts))
@@ -118,6 +425,375 @@ class GlobalState(GlobalInts, GlobalBytes):
             num_byte_slices=cls.num_bytes(),
         )
 
+    @staticmethod
+    def field_name(field: Bytes) -> str:
+        return next(
+            name
+            for name in static_attrs(GlobalInts) + static_attrs(GlobalBytes)
+            if getattr(GlobalState, name) is field
+        )
+
+    @staticmethod
+    def get(field: Bytes) -> Expr:
+        return App.globalGet(field)
+
+    @staticmethod
+    def put(field: Bytes, value: Expr) -> Expr:
+        return App.globalPut(field, value)
+
+    @classmethod
+    def put_fields(cls, **values: Expr) -> Expr:
+        """Write Smart ASA fields (by name), in the given order."""
+        return Seq(*[cls.put(getattr(cls, name), v) for name, v in values.items()])
+
+    @classmethod
+    def init(cls) -> Expr:
+        """Initialize the Smart ASA fields on Smart ASA App creation."""
+        return cls.put_fields(
+            smart_asa_id=Int(0),
+            total=Int(0),
+            decimals=Int(0),
+            default_frozen=Int(0),
+            # NOTE: ASA behaves excluding `unit_name` field if not declared:
+            unit_name=Bytes(""),
+            # NOTE: ASA behaves excluding `name` field if not declared:
+            name=Bytes(""),
+            # NOTE: ASA behaves excluding `url` field if not declared:
+            url=Bytes(""),
+            # NOTE: ASA behaves excluding `metadata_hash` field if not declared:
+            metadata_hash=Bytes(""),
+            manager_addr=Global.zero_address(),
+            reserve_addr=Global.zero_address(),
+            freeze_addr=Global.zero_address(),
+            clawback_addr=Global.zero_address(),
+            # Special Smart ASA fields
+            frozen=Int(0),
+            freeze_epoch=Int(0),
+        )
+
+    @staticmethod
+    def clear() -> Expr:
+        """Clear the Smart ASA fields on Smart ASA destruction."""
+        return init_global_state()
+
+    @staticmethod
+    def decode(state: dict[str, Union[int, bytes]]) -> dict[str, Union[int, bytes]]:
+        """Smart ASA fields from the decoded App Global State."""
+        return dict(state)
+
+
+class PackedGlobalState(GlobalState):
+    """
+    Global State layout packing fixed size fields in binary records, read with
+    `extract` and written with `replace` at fixed offsets (uint64 as 8 bytes
+    big-endian, addresses as 32 bytes). Variable size fields keep a key each.
+    """
+
+    # NOTE: Global State key and value can not exceed 128 bytes, so the role
+    # addresses are packed in pairs.
+    RECORDS = {
+        "ints": (
+            "smart_asa_id",
+            "total",
+            "decimals",
+            "default_frozen",
+            "frozen",
+            "freeze_epoch",
+        ),
+        "manager_freeze": ("manager_addr", "freeze_addr"),
+        "reserve_clawback": ("reserve_addr", "clawback_addr"),
+    }
+
+    @staticmethod
+    def num_uints():
+        return 0
+
+    @classmethod
+    def num_bytes(cls):
+        packed = [name for fields in cls.RECORDS.values() for name in fields]
+        unpacked = [name for name in static_attrs(GlobalBytes) if name not in packed]
+        return len(cls.RECORDS) + len(unpacked)
+
+    @classmethod
+    def slot(cls, name: str) -> Optional[tuple[str, int, int]]:
+        """Record key, offset and size of a packed field (None if not packed)."""
+        for record, fields in cls.RECORDS.items():
+            offset = 0
+            for field in fields:
+                if field in static_attrs(GlobalInts):
+                    size = UINT64_BYTES
+                else:
+                    size = key_len_bytes
+                if field == name:
+                    return record, offset, size
+                offset += size
+        return None
+
+    @classmethod
+    def get(cls, field: Bytes) -> Expr:
+        slot = cls.slot(cls.field_name(field))
+        if slot is None:
+            return App.globalGet(field)
+        record, offset, size = slot
+        if size == UINT64_BYTES:
+            return ExtractUint64(App.globalGet(Bytes(record)), Int(offset))
+        return Extract(App.globalGet(Bytes(record)), Int(offset), Int(size))
+
+    @classmethod
+    def put(cls, field: Bytes, value: Expr) -> Expr:
+        return cls.put_fields(**{cls.field_name(field): value})
+
+    @classmethod
+    def put_fields(cls, **values: Expr) -> Expr:
+        # Each record is read and written once, whatever the updated fields.
+        values = dict(values)
+        writes = []
+        for record, fields in cls.RECORDS.items():
+            encoded = {}
+            for name in fields:
+                if name in values:
+                    value = values.pop(name)
+                    if name in static_attrs(GlobalInts):
+                        value = Itob(value)
+                    encoded[name] = value
+            if not encoded:
+                continue
+            if len(encoded) == len(fields):
+                packed = Concat(*[encoded[name] for name in fields])
+            else:
+                packed = App.globalGet(Bytes(record))
+                for name, value in encoded.items():
+                    packed = Replace(packed, Int(cls.slot(name)[1]), value)
+            writes.append(App.globalPut(Bytes(record), packed))
+        writes += [App.globalPut(getattr(cls, name), v) for name, v in values.items()]
+        return Seq(*writes)
+
+    @classmethod
+    def decode(
+        cls, state: dict[str, Union[int, bytes]]
+    ) -> dict[str, Union[int, bytes]]:
+        fields = {k: v for k, v in state.items() if k not in cls.RECORDS}
+        for record, names in cls.RECORDS.items():
+            for name in names:
+                _, offset, size = cls.slot(name)
+                value = state[record][offset : offset + size]
+                if size == UINT64_BYTES:
+                    value = int.from_bytes(value, "big")
+                fields[name] = value
+        return fields
+
+
+class SmartASAMetadata(abi.NamedTuple):
+    unit_name: abi.Field[abi.DynamicBytes]
+    name: abi.Field[abi.DynamicBytes]
+    url: abi.Field[abi.DynamicBytes]
+    metadata_hash: abi.Field[abi.DynamicBytes]
+
+
+class BoxGlobalState(PackedGlobalState):
+    """
+    Multi-asset layout: the fields of each Smart ASA in an App Box named after
+    its ID (8 bytes big-endian), fixed size fields packed in a record as in
+    `PackedGlobalState` followed by the ABI encoded variable size fields (see
+    `SmartASAMetadata`). Fields are those of the current Smart ASA (see
+    `CURRENT_SMART_ASA_ID`), that exists as long as its Box.
+    """
+
+    RECORDS = {
+        "config": (
+            "total",
+            "decimals",
+            "default_frozen",
+            "frozen",
+            "freeze_epoch",
+            "manager_addr",
+            "reserve_addr",
+            "freeze_addr",
+            "clawback_addr",
+        )
+    }
+    RECORD_SIZE = 5 * UINT64_BYTES + 4 * key_len_bytes
+
+    @staticmethod
+    def num_uints():
+        return 0
+
+    @staticmethod
+    def num_bytes():
+        return 0
+
+    @staticmethod
+    def box_name() -> Expr:
+        return Itob(CURRENT_SMART_ASA_ID.load())
+
+    @staticmethod
+    def box_key(smart_asa_id: int) -> bytes:
+        """Box name of a Smart ASA."""
+        return smart_asa_id.to_bytes(UINT64_BYTES, "big")
+
+    @classmethod
+    def get(cls, field: Bytes) -> Expr:
+        name = cls.field_name(field)
+        if name == "smart_asa_id":
+            box = App.box_length(cls.box_name())
+            return Seq(
+                box,
+                If(box.hasValue()).Then(CURRENT_SMART_ASA_ID.load()).Else(Int(0)),
+            )
+        slot = cls.slot(name)
+        if slot is None:
+            box = App.box_get(cls.box_name())
+            metadata = SmartASAMetadata()
+            return Seq(
+                box,
+                metadata.decode(box.value(), start_index=Int(cls.RECORD_SIZE)),
+                getattr(metadata, name).use(lambda value: value.get()),
+            )
+        _, offset, size = slot
+        value = App.box_extract(cls.box_name(), Int(offset), Int(size))
+        return Btoi(value) if size == UINT64_BYTES else value
+
+    @classmethod
+    def put_fields(cls, **values: Expr) -> Expr:
+        values = dict(values)
+        writes = []
+        is_creation = "smart_asa_id" in values
+        if is_creation:
+            # NOTE: On Smart ASA creation the Box is named after the new ID.
+            writes.append(CURRENT_SMART_ASA_ID.store(values.pop("smart_asa_id")))
+        encoded = {}
+        for name in cls.RECORDS["config"]:
+            if name in values:
+                value = values.pop(name)
+                if name in static_attrs(GlobalInts):
+                    value = Itob(value)
+                encoded[name] = value
+            elif is_creation:
+                # NOTE: New Smart ASA Boxes have no previous record to update.
+                encoded[name] = BytesZero(Int(cls.slot(name)[2]))
+        if not values:
+            # Fixed size fields are written in place.
+            return Seq(
+                *writes,
+                *[
+                    App.box_replace(cls.box_name(), Int(cls.slot(name)[1]), v)
+                    for name, v in encoded.items()
+                ],
+            )
+
+        # NOTE: Variable size fields change the Box size, so the Box is
+        # written all at once (and they must be all given).
+        metadata_fields = list(SmartASAMetadata.__annotations__)
+        if set(values) != set(metadata_fields):
+            raise ValueError(f"Smart ASA fields must be all given: {metadata_fields}")
+        if len(encoded) == len(cls.RECORDS["config"]):
+            record = Concat(*[encoded[name] for name in cls.RECORDS["config"]])
+        else:
+            record = App.box_extract(cls.box_name(), Int(0), Int(cls.RECORD_SIZE))
+            for name, value in encoded.items():
+                record = Replace(record, Int(cls.slot(name)[1]), value)
+        fields = {name: abi.DynamicBytes() for name in metadata_fields}
+        metadata = SmartASAMetadata()
+        config = ScratchVar(TealType.bytes)
+        return Seq(
+            *writes,
+            *[fields[name].set(values[name]) for name in metadata_fields],
+            metadata.set(*fields.values()),
+            config.store(Concat(record, metadata.encode())),
+            Pop(App.box_delete(cls.box_name())),
+            App.box_put(cls.box_name(), config.load()),
+        )
+
+    @staticmethod
+    def init() -> Expr:
+        # NOTE: Smart ASA Boxes are created along with their Smart ASA.
+        return Seq()
+
+    @classmethod
+    def clear(cls) -> Expr:
+        # NOTE: Box MBR is given back to the Smart ASA App.
+        return Pop(App.box_delete(cls.box_name()))
+
+    @classmethod
+    def decode_box(
+        cls, smart_asa_id: int, value: bytes
+    ) -> dict[str, Union[int, bytes]]:
+        """Smart ASA fields from a Smart ASA Box value."""
+        fields = cls.decode({"config": value[: cls.RECORD_SIZE]})
+        metadata_type = ABIType.from_string(str(SmartASAMetadata().type_spec()))
+        metadata = metadata_type.decode(value[cls.RECORD_SIZE :])
+        fields.update(
+            (name, bytes(v))
+            for name, v in zip(SmartASAMetadata.__annotations__, metadata)
+        )
+        return {"smart_asa_id": smart_asa_id, **fields}
+
+
+def global_state_layout(options: Optional[BuildOptions] = None) -> type[GlobalState]:
+    """Global State layout for the build options (default: being built)."""
+    if options is None:
+        options = build_options()
+    if options.multi_asset:
+        return BoxGlobalState
+    return PackedGlobalState if options.packed_global_state else GlobalState
+
+
+def global_state_schema(options: Optional[BuildOptions] = None) -> StateSchema:
+    """Global State schema for the build options (default: being built)."""
+    if options is None:
+        options = build_options()
+    layout = global_state_layout(options)
+    return StateSchema(
+        num_uints=layout.num_uints() + 1,  # Build options
+        num_byte_slices=layout.num_bytes() + int(options.merkle_allow_list),
+    )
+
+
+def global_get(field: Bytes) -> Expr:
+    return global_state_layout().get(field)
+
+
+def global_put(field: Bytes, value: Expr) -> Expr:
+    return global_state_layout().put(field, value)
+
+
+def global_put_fields(**values: Expr) -> Expr:
+    return global_state_layout().put_fields(**values)
+
+
+class GlobalStateView:
+    """
+    App Global State fields, each loaded once (see `load`) and then read many
+    times from scratch space: pays off for fields read more than twice on the
+    same path, or packed in records (see `PackedGlobalState`).
+    """
+
+    def __init__(self, *fields: Bytes):
+        self.fields: dict[str, tuple[Bytes, ScratchVar]] = {}
+        for field in fields:
+            name = GlobalState.field_name(field)
+            is_uint = name in static_attrs(GlobalInts)
+            self.fields[name] = (
+                field,
+                ScratchVar(TealType.uint64 if is_uint else TealType.bytes),
+            )
+
+    def load(self) -> Expr:
+        return Seq(*[v.store(global_get(f)) for f, v in self.fields.values()])
+
+    def get(self, field: Bytes) -> Expr:
+        return self.fields[GlobalState.field_name(field)][1].load()
+
+
+def decode_global_state(
+    state: dict[str, Union[int, bytes]]
+) -> dict[str, Union[int, bytes]]:
+    """Smart ASA fields from the decoded App Global State, for any layout."""
+    state = {k: v for k, v in state.items() if k != BUILD_OPTIONS_KEY}
+    if all(record in state for record in PackedGlobalState.RECORDS):
+        return PackedGlobalState.decode(state)
+    return GlobalState.decode(state)
+
 
 class SmartASAConfig(abi.NamedTuple):
     total: abi.Field[abi.Uint64]
@@ -133,6 +809,79 @@ class SmartASAConfig(abi.NamedTuple):
     clawback_addr: abi.Field[abi.Address]
 
 
+# NOTE: `asset_config_partial` sets the `SmartASAConfig` fields flagged in a
+# bitmask (bit `i` for the `i`-th field), given as the concatenation of their
+# ABI encodings: fixed size fields are decoded at their offset, variable size
+# fields after their 2 bytes length prefix.
+CONFIG_FIELDS = tuple(SmartASAConfig.__annotations__)
+CONFIG_FIELD_DECODERS = {
+    "uint64": (ExtractUint64, UINT64_BYTES, TealType.uint64),
+    "uint32": (ExtractUint32, 4, TealType.uint64),
+    "bool": (
+        lambda values, offset: GetBit(values, offset * Int(8)),
+        1,
+        TealType.uint64,
+    ),
+    "address": (
+        lambda values, offset: Extract(values, offset, Int(key_len_bytes)),
+        key_len_bytes,
+        TealType.bytes,
+    ),
+}
+
+
+def encode_config_fields(**values) -> tuple[int, bytes]:
+    """`asset_config_partial` bitmask and values of the given config fields."""
+    config_type = ABIType.from_string(str(SmartASAConfig().type_spec()))
+    fields = 0
+    encoded = b""
+    for i, (name, abi_type) in enumerate(zip(CONFIG_FIELDS, config_type.child_types)):
+        if name in values:
+            fields |= 1 << i
+            encoded += abi_type.encode(values.pop(name))
+    if values:
+        raise ValueError(f"Unknown Smart ASA config fields: {sorted(values)}")
+    return fields, encoded
+
+
+def decode_config_fields(fields: int, encoded: bytes) -> dict[str, Any]:
+    """Config fields of an `asset_config_partial` bitmask and values."""
+    config_type = ABIType.from_string(str(SmartASAConfig().type_spec()))
+    values = {}
+    offset = 0
+    for i, (name, abi_type) in enumerate(zip(CONFIG_FIELDS, config_type.child_types)):
+        if fields >> i & 1:
+            if abi_type.is_dynamic():
+                size = 2 + int.from_bytes(encoded[offset : offset + 2], "big")
+            else:
+                size = abi_type.byte_len()
+            values[name] = abi_type.decode(encoded[offset : offset + size])
+            offset += size
+    return values
+
+
+class SmartASAState(abi.NamedTuple):
+    total: abi.Field[abi.Uint64]
+    decimals: abi.Field[abi.Uint32]
+    default_frozen: abi.Field[abi.Bool]
+    unit_name: abi.Field[abi.String]
+    name: abi.Field[abi.String]
+    url: abi.Field[abi.String]
+    metadata_hash: abi.Field[abi.DynamicArray[abi.Byte]]
+    manager_addr: abi.Field[abi.Address]
+    reserve_addr: abi.Field[abi.Address]
+    freeze_addr: abi.Field[abi.Address]
+    clawback_addr: abi.Field[abi.Address]
+    frozen: abi.Field[abi.Bool]
+    circulating_supply: abi.Field[abi.Uint64]
+    optin_min_balance: abi.Field[abi.Uint64]
+
+
+class SmartASATransfer(abi.NamedTuple):
+    receiver: abi.Field[abi.Address]
+    amount: abi.Field[abi.Uint64]
+
+
 # / --- --- LOCAL STATE
 # NOTE: Local State is needed only if the Smart ASA has `account_frozen`.
 # Local State is not needed in case Smart ASA has just "global" `asset_freeze`.
@@ -146,6 +895,14 @@ class LocalBytes:
 
 
 class LocalState(LocalInts, LocalBytes):
+    """
+    Local State layout with a key for each Smart ASA holder field. The
+    `frozen` field keeps the freeze epoch the account has been frozen in, plus
+    one (0 if not frozen, see `freeze_stamp`).
+    """
+
+    MAX_FREEZE_EPOCH = 2**64 - 2
+
     @staticmethod
     def num_uints():
         return len(static_attrs(LocalInts))
@@ -161,57 +918,360 @@ class LocalState(LocalInts, LocalBytes):
             num_byte_slices=cls.num_bytes(),
         )
 
+    @staticmethod
+    def get(account: Expr, field: Bytes) -> Expr:
+        return App.localGet(account, field)
 
-# / --- --- SUBROUTINES
-@Subroutine(TealType.none)
-def init_global_state() -> Expr:
-    return Seq(
-        App.globalPut(GlobalState.smart_asa_id, Int(0)),
-        App.globalPut(GlobalState.total, Int(0)),
-        App.globalPut(GlobalState.decimals, Int(0)),
-        App.globalPut(GlobalState.default_frozen, Int(0)),
-        # NOTE: ASA behaves excluding `unit_name` field if not declared:
-        App.globalPut(GlobalState.unit_name, Bytes("")),
-        # NOTE: ASA behaves excluding `name` field if not declared:
-        App.globalPut(GlobalState.name, Bytes("")),
-        # NOTE: ASA behaves excluding `url` field if not declared:
-        App.globalPut(GlobalState.url, Bytes("")),
-        # NOTE: ASA behaves excluding `metadata_hash` field if not declared:
-        App.globalPut(GlobalState.metadata_hash, Bytes("")),
-        App.globalPut(GlobalState.manager_addr, Global.zero_address()),
-        App.globalPut(GlobalState.reserve_addr, Global.zero_address()),
-        App.globalPut(GlobalState.freeze_addr, Global.zero_address()),
-        App.globalPut(GlobalState.clawback_addr, Global.zero_address()),
-        # Special Smart ASA fields
-        App.globalPut(GlobalState.frozen, Int(0)),
+    @staticmethod
+    def put(account: Expr, field: Bytes, value: Expr) -> Expr:
+        return App.localPut(account, field, value)
+
+    @staticmethod
+    def put_fields(account: Expr, smart_asa_id: Expr, frozen: Expr) -> Expr:
+        if build_options().without_account_freeze:
+            return App.localPut(account, LocalState.smart_asa_id, smart_asa_id)
+        return Seq(
+            App.localPut(account, LocalState.smart_asa_id, smart_asa_id),
+            App.localPut(account, LocalState.frozen, frozen),
+        )
+
+    @staticmethod
+    def load(account: Expr, record: ScratchVar) -> Expr:
+        """Load the account Local State into `record` (if worth it)."""
+        return Seq()
+
+    @staticmethod
+    def get_loaded(account: Expr, record: ScratchVar, field: Bytes) -> Expr:
+        """Read a field of the account Local State loaded into `record`."""
+        return App.localGet(account, field)
+
+    @staticmethod
+    def clear(account: Expr) -> Expr:
+        """Clear the account holder fields on Smart ASA close-out."""
+        # NOTE: Local State is cleared by the App close-out itself.
+        return Seq()
+
+    @staticmethod
+    def decode(state: dict[str, int]) -> dict[str, int]:
+        """Smart ASA holder fields from the decoded App Local State."""
+        return dict(state)
+
+
+class PackedLocalState(LocalState):
+    """
+    Local State layout packing the holder fields in a single uint: the Smart
+    ASA ID shifted left by `FROZEN_BITS` bits, the `frozen` field in the least
+    significant bits.
+    """
+
+    # NOTE: ASA IDs are assumed to be lower than 2^48.
+    RECORD = "smart_asa_state"
+    FROZEN_BITS = 16
+    FROZEN_MASK = 2**FROZEN_BITS - 1
+    MAX_FREEZE_EPOCH = FROZEN_MASK - 1
+
+    @staticmethod
+    def num_uints():
+        return 1
+
+    @staticmethod
+    def num_bytes():
+        return 0
+
+    @classmethod
+    def decode_field(cls, record: Expr, field: Bytes) -> Expr:
+        if field is LocalState.smart_asa_id:
+            return ShiftRight(record, Int(cls.FROZEN_BITS))
+        return BitwiseAnd(record, Int(cls.FROZEN_MASK))
+
+    @classmethod
+    def get(cls, account: Expr, field: Bytes) -> Expr:
+        return cls.decode_field(App.localGet(account, Bytes(cls.RECORD)), field)
+
+    @classmethod
+    def put(cls, account: Expr, field: Bytes, value: Expr) -> Expr:
+        record = App.localGet(account, Bytes(cls.RECORD))
+        if field is LocalState.smart_asa_id:
+            packed = BitwiseOr(
+                ShiftLeft(value, Int(cls.FROZEN_BITS)),
+                BitwiseAnd(record, Int(cls.FROZEN_MASK)),
+            )
+        else:
+            packed = BitwiseOr(
+                BitwiseAnd(record, Int(2**64 - 1 - cls.FROZEN_MASK)), value
+            )
+        return App.localPut(account, Bytes(cls.RECORD), packed)
+
+    @classmethod
+    def put_fields(cls, account: Expr, smart_asa_id: Expr, frozen: Expr) -> Expr:
+        packed = BitwiseOr(ShiftLeft(smart_asa_id, Int(cls.FROZEN_BITS)), frozen)
+        return App.localPut(account, Bytes(cls.RECORD), packed)
+
+    @classmethod
+    def load(cls, account: Expr, record: ScratchVar) -> Expr:
+        return record.store(App.localGet(account, Bytes(cls.RECORD)))
+
+    @classmethod
+    def get_loaded(cls, account: Expr, record: ScratchVar, field: Bytes) -> Expr:
+        return cls.decode_field(record.load(), field)
+
+    @classmethod
+    def decode(cls, state: dict[str, int]) -> dict[str, int]:
+        fields = {k: v for k, v in state.items() if k != cls.RECORD}
+        if cls.RECORD in state:
+            fields["smart_asa_id"] = state[cls.RECORD] >> cls.FROZEN_BITS
+            fields["frozen"] = state[cls.RECORD] & cls.FROZEN_MASK
+        return fields
+
+
+class BoxLocalState(PackedLocalState):
+    """
+    Holder fields packed as in `PackedLocalState`, stored in an App Box named
+    after the account address and funded by the Smart ASA App: holders just
+    opt-in to the Underlying ASA. Accounts without a Box for the current Smart
+    ASA have the current `default_frozen` status, the Smart ASA App Account is
+    never a holder (as it can not opt-in to itself).
+    """
+
+    BOX_SIZE = UINT64_BYTES
+
+    @staticmethod
+    def num_uints():
+        return 0
+
+    @staticmethod
+    def num_bytes():
+        return 0
+
+    @classmethod
+    def get(cls, account: Expr, field: Bytes) -> Expr:
+        return cls.decode_field(box_local_state(account), field)
+
+    @classmethod
+    def put(cls, account: Expr, field: Bytes, value: Expr) -> Expr:
+        if field is LocalState.smart_asa_id:
+            return cls.put_fields(account, value, cls.get(account, LocalState.frozen))
+        smart_asa_id = global_get(GlobalState.smart_asa_id)
+        return cls.put_fields(account, smart_asa_id, value)
+
+    @classmethod
+    def put_fields(cls, account: Expr, smart_asa_id: Expr, frozen: Expr) -> Expr:
+        packed = BitwiseOr(ShiftLeft(smart_asa_id, Int(cls.FROZEN_BITS)), frozen)
+        return App.box_put(cls.box_name(account), Itob(packed))
+
+    @classmethod
+    def load(cls, account: Expr, record: ScratchVar) -> Expr:
+        return record.store(box_local_state(account))
+
+    @classmethod
+    def clear(cls, account: Expr) -> Expr:
+        # NOTE: Box MBR is given back to the Smart ASA App.
+        return Pop(App.box_delete(cls.box_name(account)))
+
+    @staticmethod
+    def box_name(account: Expr) -> Expr:
+        return account
+
+    @staticmethod
+    def box_key(smart_asa_id: int, address: bytes) -> bytes:
+        """Box name of a holder (decoded `address`)."""
+        return address
+
+    @classmethod
+    def decode_box(cls, value: bytes) -> dict[str, int]:
+        """Smart ASA holder fields from an account Box value."""
+        return cls.decode({cls.RECORD: int.from_bytes(value, "big")})
+
+
+class MultiAssetLocalState(BoxLocalState):
+    """
+    Holder fields as in `BoxLocalState`, in an App Box named after both the
+    current Smart ASA ID (8 bytes big-endian) and the account address.
+    """
+
+    @staticmethod
+    def box_name(account: Expr) -> Expr:
+        return Concat(BoxGlobalState.box_name(), account)
+
+    @staticmethod
+    def box_key(smart_asa_id: int, address: bytes) -> bytes:
+        return BoxGlobalState.box_key(smart_asa_id) + address
+
+
+class LocalStateView:
+    """
+    Account Local State, loaded once (see `load`) and then read many times:
+    packed layouts read the account Local State just once. The current freeze
+    epoch can be given, if already loaded.
+    """
+
+    def __init__(self, account: Expr, freeze_epoch: Optional[Expr] = None):
+        self.layout = local_state_layout()
+        self.account = account
+        self.freeze_epoch = freeze_epoch
+        self.record = ScratchVar(TealType.uint64)
+
+    def load(self) -> Expr:
+        return self.layout.load(self.account, self.record)
+
+    def get(self, field: Bytes) -> Expr:
+        value = self.layout.get_loaded(self.account, self.record, field)
+        if field is LocalState.frozen:
+            return is_frozen_stamp(value, self.freeze_epoch)
+        return value
+
+
+def local_state_layout(options: Optional[BuildOptions] = None) -> type[LocalState]:
+    """Local State layout for the build options (default: being built)."""
+    if options is None:
+        options = build_options()
+    if options.multi_asset:
+        return MultiAssetLocalState
+    if options.box_registry:
+        return BoxLocalState
+    return PackedLocalState if options.packed_local_state else LocalState
+
+
+def local_state_schema(options: Optional[BuildOptions] = None) -> StateSchema:
+    """Local State schema for the build options (default: being built)."""
+    if options is None:
+        options = build_options()
+    layout = local_state_layout(options)
+    # NOTE: Holders have no `frozen` key if account freeze is compiled out.
+    frozen_key = int(layout is LocalState and options.without_account_freeze)
+    return StateSchema(
+        num_uints=layout.num_uints() - frozen_key,
+        num_byte_slices=layout.num_bytes(),
     )
 
 
-@Subroutine(TealType.none)
-def init_local_state() -> Expr:
-    smart_asa_id = App.globalGet(GlobalState.smart_asa_id)
-    return Seq(
-        App.localPut(Txn.sender(), LocalState.smart_asa_id, smart_asa_id),
-        App.localPut(Txn.sender(), LocalState.frozen, Int(0)),
+def freeze_stamp(frozen: Expr) -> Expr:
+    """Holder `frozen` field of a (un)freeze in the current freeze epoch."""
+    return frozen * (global_get(GlobalState.freeze_epoch) + Int(1))
+
+
+def is_frozen_stamp(stamp: Expr, freeze_epoch: Optional[Expr] = None) -> Expr:
+    """Holder frozen status: freezes of previous freeze epochs are lifted."""
+    if freeze_epoch is None:
+        freeze_epoch = global_get(GlobalState.freeze_epoch)
+    return stamp == freeze_epoch + Int(1)
+
+
+def local_get(account: Expr, field: Bytes) -> Expr:
+    value = local_state_layout().get(account, field)
+    return is_frozen_stamp(value) if field is LocalState.frozen else value
+
+
+def local_put(account: Expr, field: Bytes, value: Expr) -> Expr:
+    if field is LocalState.frozen:
+        value = freeze_stamp(value)
+    return local_state_layout().put(account, field, value)
+
+
+def decode_local_state(
+    state: dict[str, int], freeze_epoch: int
+) -> dict[str, Union[int, bool]]:
+    """
+    Smart ASA holder fields from the decoded App Local State, for any layout:
+    `frozen` in the current `freeze_epoch`, its stamp kept as `frozen_stamp`.
+    """
+    if PackedLocalState.RECORD in state:
+        fields = PackedLocalState.decode(state)
+    else:
+        fields = LocalState.decode(state)
+    if "frozen" in fields:
+        fields["frozen_stamp"] = fields["frozen"]
+        fields["frozen"] = fields["frozen_stamp"] == freeze_epoch + 1
+    return fields
+
+
+# / --- --- SUBROUTINES
+@smart_asa_subroutine(TealType.none)
+def init_global_state() -> Expr:
+    if build_options().merkle_allow_list:
+        return Seq(
+            global_state_layout().init(),
+            App.globalPut(ALLOW_LIST_ROOT, BytesZero(Int(MERKLE_NODE_BYTES))),
+        )
+    return global_state_layout().init()
+
+
+@smart_asa_subroutine(TealType.uint64)
+def box_local_state(account: Expr) -> Expr:
+    """Packed holder fields of `account`, from its Box if any (see `BoxLocalState`)."""
+    layout = local_state_layout()
+    smart_asa_id = global_get(GlobalState.smart_asa_id)
+    # NOTE: Holders without a Box have no opt-in to stamp, so their default
+    # freeze holds in the current freeze epoch (ref. `account_unfreeze_all`).
+    default_frozen = freeze_stamp(global_get(GlobalState.default_frozen))
+    if build_options().multi_asset:
+        # NOTE: Holders of destroyed Smart ASAs (no Smart ASA Box) can still
+        # close-out, as not frozen.
+        smart_asa_id = CURRENT_SMART_ASA_ID.load()
+        default_frozen = (
+            If(global_get(GlobalState.smart_asa_id)).Then(default_frozen).Else(Int(0))
+        )
+    box = App.box_get(layout.box_name(account))
+    record = Btoi(box.value())
+    is_registered = And(
+        box.hasValue(), ShiftRight(record, Int(layout.FROZEN_BITS)) == smart_asa_id
+    )
+    return (
+        If(account == Global.current_application_address())
+        .Then(Int(0))
+        .Else(
+            Seq(
+                box,
+                If(is_registered)
+                .Then(record)
+                .Else(
+                    BitwiseOr(
+                        ShiftLeft(smart_asa_id, Int(layout.FROZEN_BITS)), default_frozen
+                    )
+                ),
+            )
+        )
     )
 
 
-@Subroutine(TealType.bytes)
-def digit_to_ascii(i: Expr) -> Expr:
-    """digit_to_ascii converts an integer < 10 to the ASCII byte that represents it"""
-    return Extract(Bytes("0123456789"), i, Int(1))
+@smart_asa_subroutine(TealType.none)
+def init_local_state(frozen: Expr) -> Expr:
+    smart_asa_id = global_get(GlobalState.smart_asa_id)
+    return local_state_layout().put_fields(
+        Txn.sender(), smart_asa_id, freeze_stamp(frozen)
+    )
 
 
 @Subroutine(TealType.bytes)
 def itoa(i: Expr) -> Expr:
     """itoa converts an integer to the ASCII byte string it represents."""
-    return If(
-        i == Int(0),
-        Bytes("0"),
-        Concat(
-            If(i / Int(10) > Int(0), itoa(i / Int(10)), Bytes("")),
-            digit_to_ascii(i % Int(10)),
-        ),
+    # Digits are written backwards into a fixed size buffer, one loop
+    # iteration per digit: no recursion and no concatenation.
+    digits = ScratchVar(TealType.bytes)
+    position = ScratchVar(TealType.uint64)
+    quotient = ScratchVar(TealType.uint64)
+
+    def write_digit() -> Expr:
+        return Seq(
+            position.store(position.load() - Int(1)),
+            digits.store(
+                SetByte(
+                    digits.load(),
+                    position.load(),
+                    quotient.load() % Int(10) + Int(ord("0")),
+                )
+            ),
+            quotient.store(quotient.load() / Int(10)),
+        )
+
+    return Seq(
+        digits.store(BytesZero(Int(UINT64_MAX_DIGITS))),
+        position.store(Int(UINT64_MAX_DIGITS)),
+        quotient.store(i),
+        # The first digit is always written (`0` included).
+        write_digit(),
+        While(quotient.load() > Int(0)).Do(write_digit()),
+        Substring(digits.load(), position.load(), Int(UINT64_MAX_DIGITS)),
     )
 
 
@@ -296,6 +1356,20 @@ def is_valid_address_bytes_length(address: Expr) -> Expr:
     return Assert(Len(address) == Int(key_len_bytes), comment=Error.address_length)
 
 
+def compiled_out_preconditions(default_frozen: Expr, clawback_addr: Expr) -> Expr:
+    """Smart ASA configuration preconditions of the features compiled out."""
+    preconditions = []
+    if build_options().without_account_freeze:
+        preconditions.append(
+            Assert(Not(default_frozen), comment=Error.no_account_freeze)
+        )
+    if build_options().without_clawback:
+        preconditions.append(
+            Assert(clawback_addr == Global.zero_address(), comment=Error.no_clawback)
+        )
+    return Seq(*preconditions)
+
+
 @Subroutine(TealType.uint64)
 def circulating_supply(asset_id: Expr):
     smart_asa_reserve = AssetHolding.balance(
@@ -304,9 +1378,92 @@ def circulating_supply(asset_id: Expr):
     return Seq(smart_asa_reserve, UNDERLYING_ASA_TOTAL - smart_asa_reserve.value())
 
 
-@Subroutine(TealType.none)
+@Subroutine(TealType.uint64)
+def is_allowed(account: Expr, proof: Expr) -> Expr:
+    """
+    `account` is in the allow list, proven by `proof` (ABI encoded `byte[32][]`
+    of the sibling nodes from the leaf up to the root). Leaves are the SHA-256
+    of the addresses, nodes the SHA-256 of their sorted children (ref.
+    `merkle_tree`). Any account is allowed if the allow list root is zero.
+    """
+    root = App.globalGet(ALLOW_LIST_ROOT)
+    node = ScratchVar(TealType.bytes)
+    sibling = ScratchVar(TealType.bytes)
+    i = ScratchVar(TealType.uint64)
+    # NOTE: SHA-256 is cheaper than SHA-512/256 (35 vs 45 opcodes).
+    return Seq(
+        If(root == BytesZero(Int(MERKLE_NODE_BYTES))).Then(Return(Int(1))),
+        node.store(Sha256(account)),
+        For(
+            i.store(Int(abi.Uint16TypeSpec().byte_length_static())),
+            i.load() < Len(proof),
+            i.store(i.load() + Int(MERKLE_NODE_BYTES)),
+        ).Do(
+            sibling.store(Extract(proof, i.load(), Int(MERKLE_NODE_BYTES))),
+            If(BytesLt(node.load(), sibling.load()))
+            .Then(node.store(Sha256(Concat(node.load(), sibling.load()))))
+            .Else(node.store(Sha256(Concat(sibling.load(), node.load())))),
+        ),
+        node.load() == root,
+    )
+
+
+def optin_min_balance() -> Expr:
+    """Smart ASA required minimum balance (Underlying ASA and App Local State)."""
+    local_schema = local_state_schema()
+    return Int(
+        OPTIN_COST
+        + UINTS_COST * local_schema.num_uints
+        + BYTES_COST * local_schema.num_byte_slices
+    )
+
+
+def get_config_values() -> tuple[Expr, list[abi.BaseType]]:
+    """Smart ASA configuration ABI values (ref. `SmartASAConfig`) and their setter."""
+    total = abi.Uint64()
+    decimals = abi.Uint32()
+    default_frozen = abi.Bool()
+    unit_name = abi.String()
+    name = abi.String()
+    url = abi.String()
+    metadata_hash_str = abi.String()
+    metadata_hash = abi.make(abi.DynamicArray[abi.Byte])
+    manager_addr = abi.Address()
+    reserve_addr = abi.Address()
+    freeze_addr = abi.Address()
+    clawback_addr = abi.Address()
+    setter = Seq(
+        total.set(global_get(GlobalState.total)),
+        decimals.set(global_get(GlobalState.decimals)),
+        default_frozen.set(global_get(GlobalState.default_frozen)),
+        unit_name.set(global_get(GlobalState.unit_name)),
+        name.set(global_get(GlobalState.name)),
+        url.set(global_get(GlobalState.url)),
+        metadata_hash_str.set(global_get(GlobalState.metadata_hash)),
+        metadata_hash.decode(metadata_hash_str.encode()),
+        manager_addr.set(global_get(GlobalState.manager_addr)),
+        reserve_addr.set(global_get(GlobalState.reserve_addr)),
+        freeze_addr.set(global_get(GlobalState.freeze_addr)),
+        clawback_addr.set(global_get(GlobalState.clawback_addr)),
+    )
+    return setter, [
+        total,
+        decimals,
+        default_frozen,
+        unit_name,
+        name,
+        url,
+        metadata_hash,
+        manager_addr,
+        reserve_addr,
+        freeze_addr,
+        clawback_addr,
+    ]
+
+
+@smart_asa_subroutine(TealType.none)
 def getter_preconditions(asset_id: Expr) -> Expr:
-    smart_asa_id = App.globalGet(GlobalState.smart_asa_id)
+    smart_asa_id = global_get(GlobalState.smart_asa_id)
     is_correct_smart_asa_id = smart_asa_id == asset_id
     return Seq(
         Assert(smart_asa_id, comment=Error.missing_smart_asa_id),
@@ -316,53 +1473,41 @@ def getter_preconditions(asset_id: Expr) -> Expr:
 
 # / --- --- ABI
 # / --- --- BARE CALLS
-@Subroutine(TealType.none)
+@smart_asa_subroutine(TealType.none)
 def asset_app_create() -> Expr:
+    global_schema = global_state_schema()
+    local_schema = local_state_schema()
     return Seq(
         # Preconditions
         # Not mandatory - Smart ASA Application self validate its state.
         Assert(
-            Txn.global_num_uints() == Int(GlobalState.num_uints()),
+            Txn.global_num_uints() == Int(global_schema.num_uints),
             comment=f"Wrong State Schema - Expexted Global Ints: "
-            f"{GlobalState.num_uints()}",
+            f"{global_schema.num_uints}",
         ),
         Assert(
-            Txn.global_num_byte_slices() == Int(GlobalState.num_bytes()),
+            Txn.global_num_byte_slices() == Int(global_schema.num_byte_slices),
             comment=f"Wrong State Schema - Expexted Global Bytes: "
-            f"{GlobalState.num_bytes()}",
+            f"{global_schema.num_byte_slices}",
         ),
         Assert(
-            Txn.local_num_uints() == Int(LocalState.num_uints()),
+            Txn.local_num_uints() == Int(local_schema.num_uints),
             comment=f"Wrong State Schema - Expexted Local Ints: "
-            f"{LocalState.num_uints()}",
+            f"{local_schema.num_uints}",
         ),
         Assert(
-            Txn.local_num_byte_slices() == Int(LocalState.num_bytes()),
+            Txn.local_num_byte_slices() == Int(local_schema.num_byte_slices),
             comment=f"Wrong State Schema - Expexted Local Bytes: "
-            f"{LocalState.num_bytes()}",
+            f"{local_schema.num_byte_slices}",
         ),
+        App.globalPut(Bytes(BUILD_OPTIONS_KEY), Int(build_options().flags())),
         init_global_state(),
         Approve(),
     )
 
 
-smart_asa_abi = Router(
-    "Smart ASA ref. implementation",
-    BareCallActions(
-        no_op=OnCompleteAction.create_only(asset_app_create()),
-        # Rules governing a Smart ASA are only in place as long as the
-        # controlling Smart Contract is not updatable.
-        update_application=OnCompleteAction.always(Reject()),
-        # Rules governing a Smart ASA are only in place as long as the
-        # controlling Smart Contract is not deletable.
-        delete_application=OnCompleteAction.always(Reject()),
-        clear_state=OnCompleteAction.call_only(Reject()),
-    ),
-)
-
-
 # / --- --- METHODS
-@smart_asa_abi.method(opt_in=CallConfig.ALL)
+@smart_asa_method(opt_in=CallConfig.ALL)
 def asset_app_optin(
     asset: abi.Asset,
     underlying_asa_optin: abi.AssetTransferTransaction,
@@ -377,13 +1522,15 @@ def asset_app_optin(
     # On OptIn the frozen status must be set to `True` if account owns any
     # units of the underlying ASA. This prevents malicious users to circumvent
     # the `default_frozen` status by clearing their Local State. Note that this
-    # could be avoided by the use of Boxes once available.
-    smart_asa_id = App.globalGet(GlobalState.smart_asa_id)
+    # is avoided by the use of Boxes (see `BoxLocalState`).
+    smart_asa_id = global_get(GlobalState.smart_asa_id)
     is_correct_smart_asa_id = smart_asa_id == asset.asset_id()
-    default_frozen = App.globalGet(GlobalState.default_frozen)
-    freeze_account = App.localPut(Txn.sender(), LocalState.frozen, Int(1))
+    default_frozen = global_get(GlobalState.default_frozen)
     account_balance = AssetHolding().balance(Txn.sender(), asset.asset_id())
     optin_to_underlying_asa = account_balance.hasValue()
+    frozen = Or(default_frozen, account_balance.value() > Int(0))
+    if build_options().without_account_freeze:
+        frozen = Int(0)
     return Seq(
         # Preconditions
         Assert(smart_asa_id, comment=Error.missing_smart_asa_id),
@@ -415,13 +1562,12 @@ def asset_app_optin(
         account_balance,
         Assert(optin_to_underlying_asa, comment="Missing Opt-In to Underlying ASA"),
         # Effects
-        init_local_state(),
-        If(Or(default_frozen, account_balance.value() > Int(0))).Then(freeze_account),
+        init_local_state(frozen),
         Approve(),
     )
 
 
-@smart_asa_abi.method
+@smart_asa_method
 def asset_create(
     total: abi.Uint64,
     decimals: abi.Uint32,
@@ -458,39 +1604,57 @@ def asset_create(
     """
 
     is_creator = Txn.sender() == Global.creator_address()
-    smart_asa_not_created = Not(App.globalGet(GlobalState.smart_asa_id))
+    smart_asa_not_created = Assert(
+        Not(global_get(GlobalState.smart_asa_id)),
+        comment="Smart ASA ID already exists",
+    )
     smart_asa_id = underlying_asa_create_inner_tx()
-
+    new_smart_asa_id = output.set(global_get(GlobalState.smart_asa_id))
+    if build_options().multi_asset:
+        # NOTE: Multi-asset Smart ASA Apps create a new Smart ASA on each call,
+        # pending until registered under its new ID (see `PENDING_SMART_ASA_ID`).
+        pending_box = Bytes(PENDING_SMART_ASA_BOX)
+        smart_asa_not_created = Assert(
+            App.box_create(pending_box, Int(UINT64_BYTES)),
+            comment=Error.pending_smart_asa,
+        )
+        smart_asa_id = Seq(
+            output.set(smart_asa_id),
+            App.box_replace(pending_box, Int(0), Itob(output.get())),
+            Int(PENDING_SMART_ASA_ID),
+        )
+        new_smart_asa_id = Seq()
     return Seq(
         # Preconditions
         Assert(is_creator, comment=Error.not_creator_addr),
-        Assert(smart_asa_not_created, comment="Smart ASA ID already exists"),
+        smart_asa_not_created,
         is_valid_address_bytes_length(manager_addr.get()),
         is_valid_address_bytes_length(reserve_addr.get()),
         is_valid_address_bytes_length(freeze_addr.get()),
         is_valid_address_bytes_length(clawback_addr.get()),
+        compiled_out_preconditions(default_frozen.get(), clawback_addr.get()),
         # Effects
-        # Underlying ASA creation
-        App.globalPut(GlobalState.smart_asa_id, smart_asa_id),
-        # Smart ASA properties
-        App.globalPut(GlobalState.total, total.get()),
-        App.globalPut(GlobalState.decimals, decimals.get()),
-        App.globalPut(GlobalState.default_frozen, default_frozen.get()),
-        App.globalPut(GlobalState.unit_name, unit_name.get()),
-        App.globalPut(GlobalState.name, name.get()),
-        App.globalPut(GlobalState.url, url.get()),
-        App.globalPut(
-            GlobalState.metadata_hash, strip_len_prefix(metadata_hash.encode())
+        global_put_fields(
+            # Underlying ASA creation
+            smart_asa_id=smart_asa_id,
+            # Smart ASA properties
+            total=total.get(),
+            decimals=decimals.get(),
+            default_frozen=default_frozen.get(),
+            unit_name=unit_name.get(),
+            name=name.get(),
+            url=url.get(),
+            metadata_hash=strip_len_prefix(metadata_hash.encode()),
+            manager_addr=manager_addr.get(),
+            reserve_addr=reserve_addr.get(),
+            freeze_addr=freeze_addr.get(),
+            clawback_addr=clawback_addr.get(),
         ),
-        App.globalPut(GlobalState.manager_addr, manager_addr.get()),
-        App.globalPut(GlobalState.reserve_addr, reserve_addr.get()),
-        App.globalPut(GlobalState.freeze_addr, freeze_addr.get()),
-        App.globalPut(GlobalState.clawback_addr, clawback_addr.get()),
-        output.set(App.globalGet(GlobalState.smart_asa_id)),
+        new_smart_asa_id,
     )
 
 
-@smart_asa_abi.method
+@smart_asa_method
 def asset_config(
     config_asset: abi.Asset,
     total: abi.Uint64,
@@ -523,11 +1687,12 @@ def asset_config(
         clawback_addr: The address of the account that can clawback holdings of this asset. If empty, clawback is not permitted.
     """
 
-    smart_asa_id = App.globalGet(GlobalState.smart_asa_id)
-    current_manager_addr = App.globalGet(GlobalState.manager_addr)
-    current_reserve_addr = App.globalGet(GlobalState.reserve_addr)
-    current_freeze_addr = App.globalGet(GlobalState.freeze_addr)
-    current_clawback_addr = App.globalGet(GlobalState.clawback_addr)
+    global_state = GlobalStateView(GlobalState.smart_asa_id)
+    smart_asa_id = global_state.get(GlobalState.smart_asa_id)
+    current_manager_addr = global_get(GlobalState.manager_addr)
+    current_reserve_addr = global_get(GlobalState.reserve_addr)
+    current_freeze_addr = global_get(GlobalState.freeze_addr)
+    current_clawback_addr = global_get(GlobalState.clawback_addr)
 
     is_manager_addr = Txn.sender() == current_manager_addr
     is_correct_smart_asa_id = smart_asa_id == config_asset.asset_id()
@@ -542,6 +1707,7 @@ def asset_config(
 
     return Seq(
         # Preconditions
+        global_state.load(),
         Assert(smart_asa_id, comment=Error.missing_smart_asa_id),
         # NOTE: useless in ref. impl since 1 ASA : 1 App
         Assert(is_correct_smart_asa_id, comment=Error.invalid_smart_asa_id),
@@ -549,6 +1715,7 @@ def asset_config(
         is_valid_address_bytes_length(reserve_addr.get()),
         is_valid_address_bytes_length(freeze_addr.get()),
         is_valid_address_bytes_length(clawback_addr.get()),
+        compiled_out_preconditions(default_frozen.get(), clawback_addr.get()),
         Assert(is_manager_addr, comment=Error.not_manager_addr),
         If(update_reserve_addr).Then(
             Assert(
@@ -567,26 +1734,331 @@ def asset_config(
                 current_clawback_addr != Global.zero_address(),
                 comment="Clawback Address has been deleted",
             )
-        ),
-        Assert(is_valid_total, comment="Invalid Total (must be >= Circulating Supply)"),
+        ),
+        Assert(is_valid_total, comment="Invalid Total (must be >= Circulating Supply)"),
+        # Effects
+        global_put_fields(
+            total=total.get(),
+            decimals=decimals.get(),
+            default_frozen=default_frozen.get(),
+            unit_name=unit_name.get(),
+            name=name.get(),
+            url=url.get(),
+            metadata_hash=strip_len_prefix(metadata_hash.encode()),
+            manager_addr=manager_addr.get(),
+            reserve_addr=reserve_addr.get(),
+            freeze_addr=freeze_addr.get(),
+            clawback_addr=clawback_addr.get(),
+        ),
+        Event.asset_config.log(
+            config_asset.asset_id(),
+            total.get(),
+            decimals.get(),
+            default_frozen.get(),
+            manager_addr.get(),
+            reserve_addr.get(),
+            freeze_addr.get(),
+            clawback_addr.get(),
+        ),
+    )
+
+
+def asset_config_partial(
+    config_asset: abi.Asset,
+    config_fields: abi.Uint16,
+    config_values: abi.DynamicBytes,
+) -> Expr:
+    """
+    Configure just some Smart ASA parameters, unchanged parameters are neither given nor written. Setting Smart ASA roles to zero-address is irreversible.
+
+    Args:
+        config_asset: Underlying ASA ID to configure (ref. App Global State: "smart_asa_id").
+        config_fields: Bitmask of the parameters to configure, bit i for the i-th parameter of `get_asset_config`.
+        config_values: ABI encodings of the parameters to configure, concatenated in `get_asset_config` order.
+    """
+    global_state = GlobalStateView(GlobalState.smart_asa_id)
+    smart_asa_id = global_state.get(GlobalState.smart_asa_id)
+    is_manager_addr = Txn.sender() == global_get(GlobalState.manager_addr)
+    is_correct_smart_asa_id = smart_asa_id == config_asset.asset_id()
+    values = ScratchVar(TealType.bytes)
+    offset = ScratchVar(TealType.uint64)
+    length = ScratchVar(TealType.uint64)
+    value = {
+        TealType.uint64: ScratchVar(TealType.uint64),
+        TealType.bytes: ScratchVar(TealType.bytes),
+    }
+
+    # NOTE: In ref. implementation Smart ASA total can not be configured to
+    # less than its current circulating supply.
+    checks = {
+        "total": Assert(
+            value[TealType.uint64].load() >= circulating_supply(smart_asa_id),
+            comment="Invalid Total (must be >= Circulating Supply)",
+        )
+    }
+    for name in ("reserve_addr", "freeze_addr", "clawback_addr"):
+        current_addr = global_get(getattr(GlobalState, name))
+        role = name.split("_")[0].capitalize()
+        checks[name] = If(current_addr != value[TealType.bytes].load()).Then(
+            Assert(
+                current_addr != Global.zero_address(),
+                comment=f"{role} Address has been deleted",
+            )
+        )
+
+    # NOTE: Variable size fields change the size of the Smart ASA Box, which
+    # is then rewritten all at once (ref. `asset_config`). The fields of the
+    # features compiled out keep their creation values.
+    fixed_size_only = global_state_layout() is BoxGlobalState
+    compiled_out = {
+        "default_frozen": build_options().without_account_freeze,
+        "clawback_addr": build_options().without_clawback,
+    }
+
+    # NOTE: Just the fields flagged are decoded, checked and written, each
+    # one from the `offset` of its encoding (reads past the given values fail).
+    length_prefix = abi.Uint16TypeSpec().byte_length_static()
+    configurable = 0
+    updates = []
+    type_specs = SmartASAConfig().type_spec().value_type_specs()
+    for i, (name, type_spec) in enumerate(zip(CONFIG_FIELDS, type_specs)):
+        field = getattr(GlobalState, name)
+        is_fixed_size = str(type_spec) in CONFIG_FIELD_DECODERS
+        if compiled_out.get(name) or (fixed_size_only and not is_fixed_size):
+            continue
+        if is_fixed_size:
+            decoder, size, teal_type = CONFIG_FIELD_DECODERS[str(type_spec)]
+            decoded = decoder(values.load(), offset.load())
+            if name in checks:
+                update = [
+                    value[teal_type].store(decoded),
+                    checks[name],
+                    global_put(field, value[teal_type].load()),
+                ]
+            else:
+                update = [global_put(field, decoded)]
+            update.append(offset.store(offset.load() + Int(size)))
+        else:
+            update = [
+                length.store(ExtractUint16(values.load(), offset.load())),
+                offset.store(offset.load() + Int(length_prefix)),
+                global_put(field, Extract(values.load(), offset.load(), length.load())),
+                offset.store(offset.load() + length.load()),
+            ]
+        configurable |= 1 << i
+        updates.append(If(BitwiseAnd(config_fields.get(), Int(1 << i))).Then(*update))
+
+    return Seq(
+        # Preconditions
+        global_state.load(),
+        Assert(smart_asa_id, comment=Error.missing_smart_asa_id),
+        Assert(is_correct_smart_asa_id, comment=Error.invalid_smart_asa_id),
+        Assert(is_manager_addr, comment=Error.not_manager_addr),
+        Assert(
+            Not(BitwiseAnd(config_fields.get(), Int(~configurable & 0xFFFF))),
+            comment=Error.config_fields,
+        ),
+        values.store(config_values.get()),
+        offset.store(Int(0)),
+        # Effects
+        *updates,
+        Assert(offset.load() == Len(values.load()), comment="Invalid config values"),
+        Event.asset_config_partial.log(
+            config_asset.asset_id(), config_fields.get(), config_values.encode()
+        ),
+    )
+
+
+def transfer(
+    xfer_asset: abi.Asset,
+    asset_amount: abi.Uint64,
+    asset_sender: abi.Account,
+    asset_receiver: abi.Account,
+    sender_proof: Optional[Expr] = None,
+    receiver_proof: Optional[Expr] = None,
+) -> Expr:
+    # NOTE: Allow list builds check that the holders moving Smart ASA (not the
+    # Smart ASA App, on mint and burn) are in the allow list. Clawback is not
+    # restricted.
+    sender_allowed = []
+    receiver_allowed = []
+    if sender_proof is not None:
+        sender_allowed.append(
+            Assert(
+                is_allowed(asset_sender.address(), sender_proof),
+                comment=Error.sender_not_allowed,
+            )
+        )
+    if receiver_proof is not None:
+        receiver_allowed.append(
+            Assert(
+                is_allowed(asset_receiver.address(), receiver_proof),
+                comment=Error.receiver_not_allowed,
+            )
+        )
+
+    options = build_options()
+    global_state = GlobalStateView(GlobalState.smart_asa_id)
+    smart_asa_id = global_state.get(GlobalState.smart_asa_id)
+    clawback_addr = global_get(GlobalState.clawback_addr)
+    reserve_addr = global_get(GlobalState.reserve_addr)
+    freeze_epoch = ScratchVar(TealType.uint64)
+    sender_state = LocalStateView(asset_sender.address(), freeze_epoch.load())
+    receiver_state = LocalStateView(asset_receiver.address(), freeze_epoch.load())
+    # NOTE: Checked once the caller is known not to be `clawback_addr`.
+    is_not_clawback = Txn.sender() == asset_sender.address()
+
+    # NOTE: Ref. implementation grants _minting_ premission to `reserve_addr`,
+    # has restriction no restriction on who is the minting _receiver_.
+    # WARNING: Setting Smart ASA `reserve` to ZERO_ADDRESS switchs-off minting.
+    is_minting = And(
+        Txn.sender() == reserve_addr,
+        asset_sender.address() == Global.current_application_address(),
+    )
+
+    # NOTE: Ref. implementation grants _burning_ premission to `reserve_addr`,
+    # has restriction both on burning _sender_ and _receiver_ to prevent
+    # _clawback_ throug burning.
+    # WARNING: Setting Smart ASA `reserve` to ZERO_ADDRESS switchs-off burning.
+    # NOTE: `asset_sender` is compared with the caller, so that `reserve_addr`
+    # is read just once.
+    is_burning = And(
+        Txn.sender() == reserve_addr,
+        asset_sender.address() == Txn.sender(),
+        asset_receiver.address() == Global.current_application_address(),
+    )
+
+    is_clawback = Txn.sender() == clawback_addr
+    is_correct_smart_asa_id = smart_asa_id == xfer_asset.asset_id()
+
+    # NOTE: Ref. implementation checks that `smart_asa_id` is correct in Local
+    # State since the App could generate a new Smart ASA (if the previous one
+    # has been dystroied) requiring users to opt-in again to gain a coherent
+    # new `frozen` status.
+    is_current_smart_asa_id = And(
+        smart_asa_id == sender_state.get(LocalState.smart_asa_id),
+        smart_asa_id == receiver_state.get(LocalState.smart_asa_id),
+    )
+    asset_frozen = global_get(GlobalState.frozen)
+    sender_not_frozen = [
+        Assert(Not(sender_state.get(LocalState.frozen)), comment=Error.sender_frozen)
+    ]
+    receiver_not_frozen = [
+        Assert(
+            Not(receiver_state.get(LocalState.frozen)), comment=Error.receiver_frozen
+        )
+    ]
+    if options.without_account_freeze:
+        sender_not_frozen = receiver_not_frozen = []
+
+    regular_preconditions = Seq(
+        # Asset Regular Transfer Preconditions
+        sender_state.load(),
+        receiver_state.load(),
+        Assert(Not(asset_frozen), comment=Error.asset_frozen),
+        *sender_not_frozen,
+        *receiver_not_frozen,
+        Assert(is_current_smart_asa_id, comment=Error.invalid_smart_asa_id),
+        *sender_allowed,
+        *receiver_allowed,
+    )
+
+    def reserve_preconditions(otherwise: Expr) -> Expr:
+        preconditions = If(is_minting).Then(
+            # Asset Minting Preconditions
+            receiver_state.load(),
+            Assert(Not(asset_frozen), comment=Error.asset_frozen),
+            *receiver_not_frozen,
+            Assert(
+                smart_asa_id == receiver_state.get(LocalState.smart_asa_id),
+                comment=Error.invalid_smart_asa_id,
+            ),
+            # NOTE: Ref. implementation prevents minting more than `total`.
+            Assert(
+                circulating_supply(smart_asa_id) + asset_amount.get()
+                <= global_get(GlobalState.total),
+                comment="Over-minting (can not mint more than Total)",
+            ),
+            *receiver_allowed,
+        )
+        if not options.without_burn:
+            preconditions.ElseIf(is_burning).Then(
+                # Asset Burning Preconditions
+                sender_state.load(),
+                Assert(Not(asset_frozen), comment=Error.asset_frozen),
+                *sender_not_frozen,
+                Assert(
+                    smart_asa_id == sender_state.get(LocalState.smart_asa_id),
+                    comment=Error.invalid_smart_asa_id,
+                ),
+                *sender_allowed,
+            )
+        return preconditions.Else(otherwise)
+
+    if options.without_clawback:
+        preconditions = (
+            If(is_not_clawback)
+            .Then(regular_preconditions)
+            .Else(reserve_preconditions(Reject()))
+        )
+    else:
+        # NOTE: The caller is compared with `clawback_addr` first, so that it
+        # is read just once. Minting and burning still take precedence over
+        # clawback, if the Clawback Address is the Reserve Address too.
+        preconditions = (
+            If(is_clawback)
+            .Then(
+                reserve_preconditions(
+                    Seq(
+                        # Asset Clawback Preconditions
+                        # NOTE: `is_current_smart_asa_id` implicitly checks
+                        # that both `asset_sender` and `asset_receiver`
+                        # opted-in the Smart ASA App. This ensures that _mint_
+                        # and _burn_ can not be executed as _clawback_, since
+                        # the Smart ASA App can not opt-in to itself.
+                        sender_state.load(),
+                        receiver_state.load(),
+                        Assert(
+                            is_current_smart_asa_id,
+                            comment=Error.invalid_smart_asa_id,
+                        ),
+                    )
+                )
+            )
+            .ElseIf(is_not_clawback)
+            .Then(regular_preconditions)
+            .Else(reserve_preconditions(Reject()))
+        )
+
+    return Seq(
+        # Preconditions
+        global_state.load(),
+        Assert(smart_asa_id, comment=Error.missing_smart_asa_id),
+        Assert(is_correct_smart_asa_id, comment=Error.invalid_smart_asa_id),
+        is_valid_address_bytes_length(asset_sender.address()),
+        is_valid_address_bytes_length(asset_receiver.address()),
+        # NOTE: Just holders `frozen` fields depend on the freeze epoch.
+        Seq()
+        if options.without_account_freeze
+        else freeze_epoch.store(global_get(GlobalState.freeze_epoch)),
+        preconditions,
         # Effects
-        App.globalPut(GlobalState.total, total.get()),
-        App.globalPut(GlobalState.decimals, decimals.get()),
-        App.globalPut(GlobalState.default_frozen, default_frozen.get()),
-        App.globalPut(GlobalState.unit_name, unit_name.get()),
-        App.globalPut(GlobalState.name, name.get()),
-        App.globalPut(GlobalState.url, url.get()),
-        App.globalPut(
-            GlobalState.metadata_hash, strip_len_prefix(metadata_hash.encode())
+        smart_asa_transfer_inner_txn(
+            xfer_asset.asset_id(),
+            asset_amount.get(),
+            asset_sender.address(),
+            asset_receiver.address(),
+        ),
+        Event.asset_transfer.log(
+            xfer_asset.asset_id(),
+            asset_amount.get(),
+            asset_sender.address(),
+            asset_receiver.address(),
         ),
-        App.globalPut(GlobalState.manager_addr, manager_addr.get()),
-        App.globalPut(GlobalState.reserve_addr, reserve_addr.get()),
-        App.globalPut(GlobalState.freeze_addr, freeze_addr.get()),
-        App.globalPut(GlobalState.clawback_addr, clawback_addr.get()),
     )
 
 
-@smart_asa_abi.method
+@smart_asa_method
 def asset_transfer(
     xfer_asset: abi.Asset,
     asset_amount: abi.Uint64,
@@ -602,108 +2074,161 @@ def asset_transfer(
         asset_sender: Smart ASA sender, for regular transfer this must be equal to the Smart ASA App caller.
         asset_receiver: The recipient of the Smart ASA transfer.
     """
-    smart_asa_id = App.globalGet(GlobalState.smart_asa_id)
-    clawback_addr = App.globalGet(GlobalState.clawback_addr)
-    is_not_clawback = And(
-        Txn.sender() == asset_sender.address(),
-        Txn.sender() != clawback_addr,
-    )
+    return transfer(xfer_asset, asset_amount, asset_sender, asset_receiver)
 
-    # NOTE: Ref. implementation grants _minting_ premission to `reserve_addr`,
-    # has restriction no restriction on who is the minting _receiver_.
-    # WARNING: Setting Smart ASA `reserve` to ZERO_ADDRESS switchs-off minting.
-    is_minting = And(
-        Txn.sender() == App.globalGet(GlobalState.reserve_addr),
-        asset_sender.address() == Global.current_application_address(),
-    )
 
-    # NOTE: Ref. implementation grants _burning_ premission to `reserve_addr`,
-    # has restriction both on burning _sender_ and _receiver_ to prevent
-    # _clawback_ throug burning.
-    # WARNING: Setting Smart ASA `reserve` to ZERO_ADDRESS switchs-off burning.
-    is_burning = And(
-        Txn.sender() == App.globalGet(GlobalState.reserve_addr),
-        asset_sender.address() == App.globalGet(GlobalState.reserve_addr),
-        asset_receiver.address() == Global.current_application_address(),
+def asset_transfer_allow_list(
+    xfer_asset: abi.Asset,
+    asset_amount: abi.Uint64,
+    asset_sender: abi.Account,
+    asset_receiver: abi.Account,
+    sender_proof: abi.DynamicArray[abi.StaticBytes[Literal[32]]],
+    receiver_proof: abi.DynamicArray[abi.StaticBytes[Literal[32]]],
+) -> Expr:
+    """
+    Smart ASA transfers: regular, clawback (Clawback Address), mint or burn (Reserve Address). Holders must be in the allow list.
+
+    Args:
+        xfer_asset: Underlying ASA ID to transfer (ref. App Global State: "smart_asa_id").
+        asset_amount: Smart ASA amount to transfer.
+        asset_sender: Smart ASA sender, for regular transfer this must be equal to the Smart ASA App caller.
+        asset_receiver: The recipient of the Smart ASA transfer.
+        sender_proof: Merkle proof of `asset_sender` in the allow list (ignored for mint and clawback).
+        receiver_proof: Merkle proof of `asset_receiver` in the allow list (ignored for burn and clawback).
+    """
+    return transfer(
+        xfer_asset,
+        asset_amount,
+        asset_sender,
+        asset_receiver,
+        sender_proof.encode(),
+        receiver_proof.encode(),
     )
 
-    is_clawback = Txn.sender() == clawback_addr
-    is_correct_smart_asa_id = smart_asa_id == xfer_asset.asset_id()
 
-    # NOTE: Ref. implementation checks that `smart_asa_id` is correct in Local
-    # State since the App could generate a new Smart ASA (if the previous one
-    # has been dystroied) requiring users to opt-in again to gain a coherent
-    # new `frozen` status.
-    is_current_smart_asa_id = And(
-        smart_asa_id == App.localGet(asset_sender.address(), LocalState.smart_asa_id),
-        smart_asa_id == App.localGet(asset_receiver.address(), LocalState.smart_asa_id),
+@smart_asa_method
+def asset_transfer_batch(
+    xfer_asset: abi.Asset,
+    asset_sender: abi.Account,
+    transfers: abi.DynamicArray[SmartASATransfer],
+) -> Expr:
+    """
+    Smart ASA batch transfers from the same sender: regular or mint (Reserve Address).
+
+    Args:
+        xfer_asset: Underlying ASA ID to transfer (ref. App Global State: "smart_asa_id").
+        asset_sender: Smart ASA sender, for regular transfers this must be equal to the Smart ASA App caller.
+        transfers: Smart ASA receivers and amounts (receivers must be in the foreign accounts array).
+    """
+    # NOTE: Smart ASA ID is loaded once into scratch, not re-read for each receiver.
+    options = build_options()
+    global_state = GlobalStateView(GlobalState.smart_asa_id)
+    smart_asa_id = global_state.get(GlobalState.smart_asa_id)
+    is_correct_smart_asa_id = smart_asa_id == xfer_asset.asset_id()
+    is_not_clawback = And(
+        Txn.sender() == asset_sender.address(),
+        Txn.sender() != global_get(GlobalState.clawback_addr),
+    )
+    if options.without_clawback:
+        is_not_clawback = Txn.sender() == asset_sender.address()
+    is_minting = And(
+        Txn.sender() == global_get(GlobalState.reserve_addr),
+        asset_sender.address() == Global.current_application_address(),
     )
-    asset_frozen = App.globalGet(GlobalState.frozen)
-    asset_sender_frozen = App.localGet(asset_sender.address(), LocalState.frozen)
-    asset_receiver_frozen = App.localGet(asset_receiver.address(), LocalState.frozen)
+    freeze_epoch = ScratchVar(TealType.uint64)
+    sender_state = LocalStateView(asset_sender.address(), freeze_epoch.load())
+
+    is_regular = ScratchVar(TealType.uint64)
+    batch_amount = ScratchVar(TealType.uint64)
+    i = ScratchVar(TealType.uint64)
+    transfer = SmartASATransfer()
+    receiver = abi.Address()
+    amount = abi.Uint64()
+    receiver_state = LocalStateView(receiver.get(), freeze_epoch.load())
+    sender_not_frozen = [
+        Assert(Not(sender_state.get(LocalState.frozen)), comment=Error.sender_frozen)
+    ]
+    receiver_not_frozen = [
+        Assert(
+            Not(receiver_state.get(LocalState.frozen)), comment=Error.receiver_frozen
+        )
+    ]
+    if options.without_account_freeze:
+        sender_not_frozen = receiver_not_frozen = []
     return Seq(
         # Preconditions
+        global_state.load(),
         Assert(smart_asa_id, comment=Error.missing_smart_asa_id),
         Assert(is_correct_smart_asa_id, comment=Error.invalid_smart_asa_id),
-        is_valid_address_bytes_length(asset_sender.address()),
-        is_valid_address_bytes_length(asset_receiver.address()),
-        If(is_not_clawback)
+        Assert(transfers.length(), comment="Empty transfers batch"),
+        Assert(Not(global_get(GlobalState.frozen)), comment=Error.asset_frozen),
+        Seq()
+        if options.without_account_freeze
+        else freeze_epoch.store(global_get(GlobalState.freeze_epoch)),
+        is_regular.store(is_not_clawback),
+        If(is_regular.load())
         .Then(
             # Asset Regular Transfer Preconditions
-            Assert(Not(asset_frozen), comment=Error.asset_frozen),
-            Assert(Not(asset_sender_frozen), comment=Error.sender_frozen),
-            Assert(Not(asset_receiver_frozen), comment=Error.receiver_frozen),
-            Assert(is_current_smart_asa_id, comment=Error.invalid_smart_asa_id),
-        )
-        .ElseIf(is_minting)
-        .Then(
-            # Asset Minting Preconditions
-            Assert(Not(asset_frozen), comment=Error.asset_frozen),
-            Assert(Not(asset_receiver_frozen), comment=Error.receiver_frozen),
+            sender_state.load(),
+            *sender_not_frozen,
             Assert(
-                smart_asa_id
-                == App.localGet(asset_receiver.address(), LocalState.smart_asa_id),
+                smart_asa_id == sender_state.get(LocalState.smart_asa_id),
                 comment=Error.invalid_smart_asa_id,
             ),
-            # NOTE: Ref. implementation prevents minting more than `total`.
-            Assert(
-                circulating_supply(smart_asa_id) + asset_amount.get()
-                <= App.globalGet(GlobalState.total),
-                comment="Over-minting (can not mint more than Total)",
-            ),
         )
-        .ElseIf(is_burning)
-        .Then(
-            # Asset Burning Preconditions
-            Assert(Not(asset_frozen), comment=Error.asset_frozen),
-            Assert(Not(asset_sender_frozen), comment=Error.sender_frozen),
+        .Else(
+            # NOTE: Batches of burn and clawback are not supported.
+            Assert(is_minting, comment="Batch transfers can only be regular or mint"),
+        ),
+        # Effects
+        batch_amount.store(Int(0)),
+        For(
+            i.store(Int(0)),
+            i.load() < transfers.length(),
+            i.store(i.load() + Int(1)),
+        ).Do(
+            transfers[i.load()].store_into(transfer),
+            transfer.receiver.store_into(receiver),
+            transfer.amount.store_into(amount),
+            # Receiver Preconditions
+            receiver_state.load(),
+            *receiver_not_frozen,
             Assert(
-                smart_asa_id
-                == App.localGet(asset_sender.address(), LocalState.smart_asa_id),
+                smart_asa_id == receiver_state.get(LocalState.smart_asa_id),
                 comment=Error.invalid_smart_asa_id,
             ),
-        )
-        .Else(
-            # Asset Clawback Preconditions
-            Assert(is_clawback, comment=Error.not_clawback_addr),
-            # NOTE: `is_current_smart_asa_id` implicitly checks that both
-            # `asset_sender` and `asset_receiver` opted-in the Smart ASA
-            # App. This ensures that _mint_ and _burn_ can not be
-            # executed as _clawback_, since the Smart ASA App can not
-            # opt-in to itself.
-            Assert(is_current_smart_asa_id, comment=Error.invalid_smart_asa_id),
+            If(i.load()).Then(InnerTxnBuilder.Next()).Else(InnerTxnBuilder.Begin()),
+            InnerTxnBuilder.SetFields(
+                {
+                    TxnField.fee: Int(0),
+                    TxnField.type_enum: TxnType.AssetTransfer,
+                    TxnField.xfer_asset: smart_asa_id,
+                    TxnField.asset_amount: amount.get(),
+                    TxnField.asset_sender: asset_sender.address(),
+                    TxnField.asset_receiver: receiver.get(),
+                }
+            ),
+            batch_amount.store(batch_amount.load() + amount.get()),
+            Event.asset_transfer.log(
+                xfer_asset.asset_id(),
+                amount.get(),
+                asset_sender.address(),
+                receiver.get(),
+            ),
         ),
-        # Effects
-        smart_asa_transfer_inner_txn(
-            xfer_asset.asset_id(),
-            asset_amount.get(),
-            asset_sender.address(),
-            asset_receiver.address(),
+        If(Not(is_regular.load())).Then(
+            # NOTE: Ref. implementation prevents minting more than `total`.
+            Assert(
+                circulating_supply(smart_asa_id) + batch_amount.load()
+                <= global_get(GlobalState.total),
+                comment="Over-minting (can not mint more than Total)",
+            ),
         ),
+        InnerTxnBuilder.Submit(),
     )
 
 
-@smart_asa_abi.method
+@smart_asa_method
 def asset_freeze(freeze_asset: abi.Asset, asset_frozen: abi.Bool) -> Expr:
     """
     Smart ASA global freeze (all accounts), called by the Freeze Address.
@@ -712,9 +2237,9 @@ def asset_freeze(freeze_asset: abi.Asset, asset_frozen: abi.Bool) -> Expr:
         freeze_asset: Underlying ASA ID to freeze/unfreeze (ref. App Global State: "smart_asa_id").
         asset_frozen: Smart ASA ID forzen status.
     """
-    smart_asa_id = App.globalGet(GlobalState.smart_asa_id)
+    smart_asa_id = global_get(GlobalState.smart_asa_id)
     is_correct_smart_asa_id = smart_asa_id == freeze_asset.asset_id()
-    is_freeze_addr = Txn.sender() == App.globalGet(GlobalState.freeze_addr)
+    is_freeze_addr = Txn.sender() == global_get(GlobalState.freeze_addr)
     return Seq(
         # Asset Freeze Preconditions
         Assert(
@@ -730,11 +2255,12 @@ def asset_freeze(freeze_asset: abi.Asset, asset_frozen: abi.Bool) -> Expr:
             comment=Error.not_freeze_addr,
         ),
         # Effects
-        App.globalPut(GlobalState.frozen, asset_frozen.get()),
+        global_put(GlobalState.frozen, asset_frozen.get()),
+        Event.asset_freeze.log(freeze_asset.asset_id(), asset_frozen.get()),
     )
 
 
-@smart_asa_abi.method
+@smart_asa_method
 def account_freeze(
     freeze_asset: abi.Asset,
     freeze_account: abi.Account,
@@ -748,9 +2274,9 @@ def account_freeze(
         freeze_account: Account to freeze/unfreeze.
         asset_frozen: Smart ASA ID forzen status.
     """
-    smart_asa_id = App.globalGet(GlobalState.smart_asa_id)
+    smart_asa_id = global_get(GlobalState.smart_asa_id)
     is_correct_smart_asa_id = smart_asa_id == freeze_asset.asset_id()
-    is_freeze_addr = Txn.sender() == App.globalGet(GlobalState.freeze_addr)
+    is_freeze_addr = Txn.sender() == global_get(GlobalState.freeze_addr)
     return Seq(
         # Account Freeze Preconditions
         is_valid_address_bytes_length(freeze_account.address()),
@@ -767,11 +2293,129 @@ def account_freeze(
             comment=Error.not_freeze_addr,
         ),
         # Effects
-        App.localPut(freeze_account.address(), LocalState.frozen, asset_frozen.get()),
+        local_put(freeze_account.address(), LocalState.frozen, asset_frozen.get()),
+        Event.account_freeze.log(
+            freeze_asset.asset_id(), freeze_account.address(), asset_frozen.get()
+        ),
+    )
+
+
+@smart_asa_method
+def account_freeze_batch(freeze_asset: abi.Asset, asset_frozen: abi.Bool) -> Expr:
+    """
+    Smart ASA local freeze of many accounts, called by the Freeze Address.
+
+    Args:
+        freeze_asset: Underlying ASA ID to freeze/unfreeze (ref. App Global State: "smart_asa_id").
+        asset_frozen: Smart ASA ID forzen status of all the App Call foreign accounts.
+    """
+    smart_asa_id = global_get(GlobalState.smart_asa_id)
+    is_correct_smart_asa_id = smart_asa_id == freeze_asset.asset_id()
+    is_freeze_addr = Txn.sender() == global_get(GlobalState.freeze_addr)
+    i = ScratchVar(TealType.uint64)
+    return Seq(
+        # Account Freeze Preconditions
+        Assert(
+            smart_asa_id,
+            comment=Error.missing_smart_asa_id,
+        ),
+        Assert(
+            is_correct_smart_asa_id,
+            comment=Error.invalid_smart_asa_id,
+        ),
+        Assert(
+            is_freeze_addr,
+            comment=Error.not_freeze_addr,
+        ),
+        Assert(Txn.accounts.length(), comment="Empty freeze batch"),
+        # Effects
+        # NOTE: Foreign accounts start from 1 (0 is the App Call sender).
+        For(
+            i.store(Int(1)),
+            i.load() <= Txn.accounts.length(),
+            i.store(i.load() + Int(1)),
+        ).Do(
+            local_put(Txn.accounts[i.load()], LocalState.frozen, asset_frozen.get()),
+            Event.account_freeze.log(
+                freeze_asset.asset_id(), Txn.accounts[i.load()], asset_frozen.get()
+            ),
+        ),
+    )
+
+
+@smart_asa_method
+def account_unfreeze_all(freeze_asset: abi.Asset) -> Expr:
+    """
+    Smart ASA local unfreeze of all accounts, called by the Freeze Address. Account freezes are lifted at once by starting a new freeze epoch.
+
+    Args:
+        freeze_asset: Underlying ASA ID to unfreeze (ref. App Global State: "smart_asa_id").
+    """
+    smart_asa_id = global_get(GlobalState.smart_asa_id)
+    is_correct_smart_asa_id = smart_asa_id == freeze_asset.asset_id()
+    is_freeze_addr = Txn.sender() == global_get(GlobalState.freeze_addr)
+    freeze_epoch = ScratchVar(TealType.uint64)
+    return Seq(
+        # Account Unfreeze Preconditions
+        Assert(
+            smart_asa_id,
+            comment=Error.missing_smart_asa_id,
+        ),
+        Assert(
+            is_correct_smart_asa_id,
+            comment=Error.invalid_smart_asa_id,
+        ),
+        Assert(
+            is_freeze_addr,
+            comment=Error.not_freeze_addr,
+        ),
+        freeze_epoch.store(global_get(GlobalState.freeze_epoch) + Int(1)),
+        # NOTE: Holders keep the freeze epoch in a bounded `frozen` field.
+        Assert(
+            freeze_epoch.load() <= Int(local_state_layout().MAX_FREEZE_EPOCH),
+            comment="Freeze epochs exhausted",
+        ),
+        # Effects
+        global_put(GlobalState.freeze_epoch, freeze_epoch.load()),
+        Event.account_unfreeze_all.log(freeze_asset.asset_id(), freeze_epoch.load()),
+    )
+
+
+@smart_asa_method
+def asset_allow_list(
+    allow_asset: abi.Asset, allow_list_root: abi.StaticBytes[Literal[32]]
+) -> Expr:
+    """
+    Smart ASA allow list update, called by the Freeze Address. The allow list is committed as the root of the Merkle tree of its addresses (ref. `merkle_tree`), the zero root lifts it.
+
+    Args:
+        allow_asset: Underlying ASA ID to restrict (ref. App Global State: "smart_asa_id").
+        allow_list_root: Allow list Merkle root.
+    """
+    smart_asa_id = global_get(GlobalState.smart_asa_id)
+    is_correct_smart_asa_id = smart_asa_id == allow_asset.asset_id()
+    is_freeze_addr = Txn.sender() == global_get(GlobalState.freeze_addr)
+    return Seq(
+        # Allow List Preconditions
+        Assert(
+            smart_asa_id,
+            comment=Error.missing_smart_asa_id,
+        ),
+        Assert(
+            is_correct_smart_asa_id,
+            comment=Error.invalid_smart_asa_id,
+        ),
+        Assert(
+            is_freeze_addr,
+            comment=Error.not_freeze_addr,
+        ),
+        # Effects
+        App.globalPut(ALLOW_LIST_ROOT, allow_list_root.get()),
+        Event.asset_allow_list.log(allow_asset.asset_id(), allow_list_root.get()),
     )
 
 
-@smart_asa_abi.method(close_out=CallConfig.ALL)
+@smart_asa_method(close_out=CallConfig.ALL)
 def asset_app_closeout(
     close_asset: abi.Asset,
     close_to: abi.Account,
@@ -783,20 +2427,32 @@ def asset_app_closeout(
         close_asset: Underlying ASA ID to close-out (ref. App Global State: "smart_asa_id").
         close_to: Account to send all Smart ASA reminder to. If the asset/account is forzen then this must be set to Smart ASA Creator.
     """
-    smart_asa_id = App.globalGet(GlobalState.smart_asa_id)
+    smart_asa_id = global_get(GlobalState.smart_asa_id)
     is_correct_smart_asa_id = smart_asa_id == close_asset.asset_id()
-    current_smart_asa_id = App.localGet(Txn.sender(), LocalState.smart_asa_id)
+    closer_state = LocalStateView(Txn.sender())
+    current_smart_asa_id = closer_state.get(LocalState.smart_asa_id)
     is_current_smart_asa_id = current_smart_asa_id == close_asset.asset_id()
     account_balance = AssetHolding().balance(Txn.sender(), close_asset.asset_id())
     asset_creator = AssetParam().creator(close_asset.asset_id())
-    asset_frozen = App.globalGet(GlobalState.frozen)
-    asset_closer_frozen = App.localGet(Txn.sender(), LocalState.frozen)
+    asset_frozen = global_get(GlobalState.frozen)
+    asset_closer_frozen = closer_state.get(LocalState.frozen)
     asa_closeout_relative_idx = Txn.group_index() + Int(1)
+    must_close_to_creator = Or(asset_frozen, asset_closer_frozen)
+    if build_options().without_account_freeze:
+        must_close_to_creator = asset_frozen
+    if build_options().merkle_allow_list:
+        # NOTE: Close-to proofs are not verified, so holders of an allow list
+        # restricted Smart ASA can only close-out to Creator.
+        must_close_to_creator = Or(
+            must_close_to_creator,
+            App.globalGet(ALLOW_LIST_ROOT) != BytesZero(Int(MERKLE_NODE_BYTES)),
+        )
     return Seq(
         # Preconditions
         # NOTE: Smart ASA existence is not checked by default on close-out
         # since would be impossible to close-out destroyed assets.
         is_valid_address_bytes_length(close_to.address()),
+        closer_state.load(),
         Assert(
             is_current_smart_asa_id,
             comment=Error.invalid_smart_asa_id,
@@ -833,7 +2489,7 @@ def asset_app_closeout(
         If(asset_creator.hasValue()).Then(
             # NOTE: Smart ASA has not been destroyed.
             Assert(is_correct_smart_asa_id, comment=Error.invalid_smart_asa_id),
-            If(Or(asset_frozen, asset_closer_frozen)).Then(
+            If(must_close_to_creator).Then(
                 # NOTE: If Smart ASA is frozen, users can only close-out to
                 # Creator
                 Assert(
@@ -846,7 +2502,7 @@ def asset_app_closeout(
                 # opted-in to the current Smart ASA.
                 Assert(
                     smart_asa_id
-                    == App.localGet(close_to.address(), LocalState.smart_asa_id),
+                    == local_get(close_to.address(), LocalState.smart_asa_id),
                     comment=Error.invalid_smart_asa_id,
                 )
             ),
@@ -857,15 +2513,22 @@ def asset_app_closeout(
                 Txn.sender(),
                 close_to.address(),
             ),
+            Event.asset_transfer.log(
+                close_asset.asset_id(),
+                account_balance.value(),
+                Txn.sender(),
+                close_to.address(),
+            ),
         ),
         # NOTE: If Smart ASA has been destroyed:
         #   1. The close-to address could be anyone
         #   2. No InnerTxn happens
+        local_state_layout().clear(Txn.sender()),
         Approve(),
     )
 
 
-@smart_asa_abi.method
+@smart_asa_method
 def asset_destroy(destroy_asset: abi.Asset) -> Expr:
     """
     Destroy the Underlying ASA, must be called by Manager Address.
@@ -873,9 +2536,9 @@ def asset_destroy(destroy_asset: abi.Asset) -> Expr:
     Args:
         destroy_asset: Underlying ASA ID to destroy (ref. App Global State: "smart_asa_id").
     """
-    smart_asa_id = App.globalGet(GlobalState.smart_asa_id)
+    smart_asa_id = global_get(GlobalState.smart_asa_id)
     is_correct_smart_asa_id = smart_asa_id == destroy_asset.asset_id()
-    is_manager_addr = Txn.sender() == App.globalGet(GlobalState.manager_addr)
+    is_manager_addr = Txn.sender() == global_get(GlobalState.manager_addr)
     return Seq(
         # Asset Destroy Preconditions
         Assert(
@@ -892,12 +2555,46 @@ def asset_destroy(destroy_asset: abi.Asset) -> Expr:
         ),
         # Effects
         smart_asa_destroy_inner_txn(destroy_asset.asset_id()),
-        init_global_state(),
+        global_state_layout().clear(),
+        Event.asset_destroy.log(destroy_asset.asset_id()),
+    )
+
+
+@smart_asa_method
+def asset_register(register_asset: abi.Asset) -> Expr:
+    """
+    Register the pending Smart ASA, created by the last `asset_create`, under its Smart ASA ID (multi-asset Smart ASA Apps).
+
+    Args:
+        register_asset: Underlying ASA ID returned by `asset_create`.
+    """
+    is_creator = Txn.sender() == Global.creator_address()
+    pending_box = Bytes(PENDING_SMART_ASA_BOX)
+    pending_smart_asa_id = Btoi(App.box_extract(pending_box, Int(0), Int(UINT64_BYTES)))
+    pending_config_box = Itob(Int(PENDING_SMART_ASA_ID))
+    pending_config = App.box_get(pending_config_box)
+    return Seq(
+        # Preconditions
+        Assert(is_creator, comment=Error.not_creator_addr),
+        Assert(
+            register_asset.asset_id() == pending_smart_asa_id,
+            comment=Error.invalid_smart_asa_id,
+        ),
+        # Effects
+        pending_config,
+        App.box_put(BoxGlobalState.box_name(), pending_config.value()),
+        Pop(App.box_delete(pending_config_box)),
+        Pop(App.box_delete(pending_box)),
     )
 
 
+# NOTE: Registered after the methods of the reference implementation, not to
+# delay their dispatch (see `BuildOptions.dispatch_order`).
+smart_asa_method(asset_config_partial)
+
+
 # / --- --- GETTERS
-@smart_asa_abi.method
+@smart_asa_method
 def get_asset_is_frozen(freeze_asset: abi.Asset, *, output: abi.Bool) -> Expr:
     """
     Get Smart ASA global frozen status.
@@ -912,11 +2609,11 @@ def get_asset_is_frozen(freeze_asset: abi.Asset, *, output: abi.Bool) -> Expr:
         # Preconditions
         getter_preconditions(freeze_asset.asset_id()),
         # Effects
-        output.set(App.globalGet(GlobalState.frozen)),
+        output.set(global_get(GlobalState.frozen)),
     )
 
 
-@smart_asa_abi.method
+@smart_asa_method
 def get_account_is_frozen(
     freeze_asset: abi.Asset, freeze_account: abi.Account, *, output: abi.Bool
 ) -> Expr:
@@ -935,11 +2632,51 @@ def get_account_is_frozen(
         getter_preconditions(freeze_asset.asset_id()),
         is_valid_address_bytes_length(freeze_account.address()),
         # Effects
-        output.set(App.localGet(freeze_account.address(), LocalState.frozen)),
+        output.set(local_get(freeze_account.address(), LocalState.frozen)),
+    )
+
+
+@smart_asa_method
+def get_accounts_frozen(
+    freeze_asset: abi.Asset, *, output: abi.DynamicArray[abi.Bool]
+) -> Expr:
+    """
+    Get Smart ASA local frozen status of many accounts (account specific).
+
+    Args:
+        freeze_asset: Underlying ASA ID (ref. App Global State: "smart_asa_id").
+
+    Returns:
+        Smart ASA local frozen status of each App Call foreign account (in order).
+    """
+    num_accounts = Txn.accounts.length()
+    # NOTE: ABI `bool[]` encoding is the array length (uint16) followed by the
+    # bools packed in bits, so each status is written with a single `setbit`.
+    length_prefix = Suffix(Itob(num_accounts), Int(UINT64_BYTES - 2))
+    frozen_bits = ScratchVar(TealType.bytes)
+    i = ScratchVar(TealType.uint64)
+    return Seq(
+        # Preconditions
+        getter_preconditions(freeze_asset.asset_id()),
+        # Effects
+        frozen_bits.store(
+            Concat(length_prefix, BytesZero((num_accounts + Int(7)) / Int(8)))
+        ),
+        # NOTE: Foreign accounts start from 1 (0 is the App Call sender).
+        For(i.store(Int(1)), i.load() <= num_accounts, i.store(i.load() + Int(1)),).Do(
+            frozen_bits.store(
+                SetBit(
+                    frozen_bits.load(),
+                    Int(15) + i.load(),
+                    local_get(Txn.accounts[i.load()], LocalState.frozen),
+                )
+            ),
+        ),
+        output.decode(frozen_bits.load()),
     )
 
 
-@smart_asa_abi.method
+@smart_asa_method
 def get_circulating_supply(asset: abi.Asset, *, output: abi.Uint64) -> Expr:
     """
     Get Smart ASA circulating supply.
@@ -958,7 +2695,7 @@ def get_circulating_supply(asset: abi.Asset, *, output: abi.Uint64) -> Expr:
     )
 
 
-@smart_asa_abi.method
+@smart_asa_method
 def get_optin_min_balance(asset: abi.Asset, *, output: abi.Uint64) -> Expr:
     """
     Get Smart ASA required minimum balance (including Underlying ASA and App Local State).
@@ -969,21 +2706,15 @@ def get_optin_min_balance(asset: abi.Asset, *, output: abi.Uint64) -> Expr:
     Returns:
         Smart ASA required minimum balance in microALGO.
     """
-    min_balance = Int(
-        OPTIN_COST
-        + UINTS_COST * LocalState.num_uints()
-        + BYTES_COST * LocalState.num_bytes()
-    )
-
     return Seq(
         # Preconditions
         getter_preconditions(asset.asset_id()),
         # Effects
-        output.set(min_balance),
+        output.set(optin_min_balance()),
     )
 
 
-@smart_asa_abi.method
+@smart_asa_method
 def get_asset_config(asset: abi.Asset, *, output: SmartASAConfig) -> Expr:
     """
     Get Smart ASA configuration.
@@ -994,49 +2725,185 @@ def get_asset_config(asset: abi.Asset, *, output: SmartASAConfig) -> Expr:
     Returns:
         Smart ASA configuration parameters.
     """
+    config, config_values = get_config_values()
     return Seq(
         # Preconditions
         getter_preconditions(asset.asset_id()),
         # Effects
-        (total := abi.Uint64()).set(App.globalGet(GlobalState.total)),
-        (decimals := abi.Uint32()).set(App.globalGet(GlobalState.decimals)),
-        (default_frozen := abi.Bool()).set(App.globalGet(GlobalState.default_frozen)),
-        (unit_name := abi.String()).set(App.globalGet(GlobalState.unit_name)),
-        (name := abi.String()).set(App.globalGet(GlobalState.name)),
-        (url := abi.String()).set(App.globalGet(GlobalState.url)),
-        (metadata_hash_str := abi.String()).set(
-            App.globalGet(GlobalState.metadata_hash)
-        ),
-        (metadata_hash := abi.make(abi.DynamicArray[abi.Byte])).decode(
-            metadata_hash_str.encode()
-        ),
-        (manager_addr := abi.Address()).set(App.globalGet(GlobalState.manager_addr)),
-        (reserve_addr := abi.Address()).set(App.globalGet(GlobalState.reserve_addr)),
-        (freeze_addr := abi.Address()).set(App.globalGet(GlobalState.freeze_addr)),
-        (clawback_addr := abi.Address()).set(App.globalGet(GlobalState.clawback_addr)),
-        output.set(
-            total,
-            decimals,
-            default_frozen,
-            unit_name,
-            name,
-            url,
-            metadata_hash,
-            manager_addr,
-            reserve_addr,
-            freeze_addr,
-            clawback_addr,
-        ),
+        config,
+        output.set(*config_values),
+    )
+
+
+@smart_asa_method
+def get_asset_state(asset: abi.Asset, *, output: SmartASAState) -> Expr:
+    """
+    Get Smart ASA configuration, global frozen status, circulating supply and required minimum balance in a single call.
+
+    Args:
+        asset: Underlying ASA ID (ref. App Global State: "smart_asa_id").
+
+    Returns:
+        Smart ASA configuration parameters, global frozen status, circulating supply and required minimum balance in microALGO.
+    """
+    config, config_values = get_config_values()
+    return Seq(
+        # Preconditions
+        getter_preconditions(asset.asset_id()),
+        # Effects
+        config,
+        (frozen := abi.Bool()).set(global_get(GlobalState.frozen)),
+        (supply := abi.Uint64()).set(circulating_supply(asset.asset_id())),
+        (min_balance := abi.Uint64()).set(optin_min_balance()),
+        output.set(*config_values, frozen, supply, min_balance),
     )
 
 
-def compile_stateful(program: Expr) -> str:
+# NOTE: Builds with holders in Boxes have no Smart ASA App opt-in, so holders
+# close-out with a NoOp call.
+BOX_REGISTRY_METHOD_CONFIGS = {
+    "asset_app_optin": None,
+    "asset_app_closeout": dict(no_op=CallConfig.CALL),
+}
+
+# NOTE: Builds with a Merkle allow list replace (or drop, if None) the methods
+# moving Smart ASA with allow list restricted ones. Batches would not fit the
+# proofs in the App Call arguments.
+MERKLE_ALLOW_LIST_METHODS = {
+    "asset_transfer": asset_transfer_allow_list,
+    "asset_transfer_batch": None,
+}
+MERKLE_ALLOW_LIST_ONLY_METHODS = {"asset_allow_list"}
+
+# NOTE: Just multi-asset builds stage new Smart ASAs (see `PENDING_SMART_ASA_ID`).
+MULTI_ASSET_ONLY_METHODS = {"asset_register"}
+
+# NOTE: Builds with features compiled out drop their methods.
+COMPILED_OUT_METHODS = {
+    "without_account_freeze": {
+        "account_freeze",
+        "account_freeze_batch",
+        "account_unfreeze_all",
+        "get_account_is_frozen",
+        "get_accounts_frozen",
+    },
+}
+
+_ROUTERS: dict[BuildOptions, Router] = {}
+
+
+def with_current_smart_asa(implementation: Callable) -> Callable:
+    # NOTE: Multi-asset methods act on the Smart ASA of their first Asset
+    # argument (`asset_create` sets the new one).
+    @functools.wraps(implementation)
+    def implementation_with_current_smart_asa(*args, **kwargs):
+        asset = next((a for a in args if isinstance(a, abi.Asset)), None)
+        if asset is None:
+            return implementation(*args, **kwargs)
+        return Seq(
+            CURRENT_SMART_ASA_ID.store(asset.asset_id()),
+            implementation(*args, **kwargs),
+        )
+
+    return implementation_with_current_smart_asa
+
+
+def smart_asa_router(options: BuildOptions = DEFAULT_BUILD_OPTIONS) -> Router:
+    """Smart ASA ABI Router built with the given build options."""
+    if options not in _ROUTERS:
+        if options.merkle_allow_list and options.multi_asset:
+            raise ValueError("Merkle allow list is not available for multi-asset")
+        token = _build_options.set(options)
+        try:
+            router = Router(
+                MULTI_ASSET_APP_NAME if options.multi_asset else SMART_ASA_APP_NAME,
+                BareCallActions(
+                    # NOTE: Bare NoOp calls (after creation) do nothing but
+                    # pool opcode budget to the other App Calls of the group
+                    # (ref. `budget_app_calls`). They neither read nor write
+                    # any state, and the App Calls they fund still run all of
+                    # their checks, so they are approved as long as they are
+                    # grouped: alone, they would have nothing to fund.
+                    no_op=OnCompleteAction.always(
+                        If(Txn.application_id())
+                        .Then(Return(Global.group_size() > Int(1)))
+                        .Else(asset_app_create())
+                    ),
+                    # Rules governing a Smart ASA are only in place as long as
+                    # the controlling Smart Contract is not updatable.
+                    update_application=OnCompleteAction.always(Reject()),
+                    # Rules governing a Smart ASA are only in place as long as
+                    # the controlling Smart Contract is not deletable.
+                    delete_application=OnCompleteAction.always(Reject()),
+                    clear_state=OnCompleteAction.call_only(Reject()),
+                ),
+            )
+            # NOTE: The Router dispatches method selectors in registration
+            # order, each comparison costs every App Call dispatched after it.
+            order = options.dispatch_order
+            unknown = set(order) - {m.__name__ for m, _ in SMART_ASA_METHODS}
+            if unknown:
+                raise ValueError(f"Unknown Smart ASA methods: {sorted(unknown)}")
+            methods = sorted(
+                SMART_ASA_METHODS,
+                key=lambda m: order.index(m[0].__name__)
+                if m[0].__name__ in order
+                else len(order),
+            )
+            for implementation, method_config in methods:
+                name = implementation.__name__
+                if options.holder_boxes and name in BOX_REGISTRY_METHOD_CONFIGS:
+                    method_config = BOX_REGISTRY_METHOD_CONFIGS[name]
+                    if method_config is None:
+                        continue
+                if options.merkle_allow_list and name in MERKLE_ALLOW_LIST_METHODS:
+                    implementation = MERKLE_ALLOW_LIST_METHODS[name]
+                    if implementation is None:
+                        continue
+                elif (
+                    not options.merkle_allow_list
+                    and name in MERKLE_ALLOW_LIST_ONLY_METHODS
+                ):
+                    continue
+                if not options.multi_asset and name in MULTI_ASSET_ONLY_METHODS:
+                    continue
+                if any(
+                    getattr(options, feature) and name in dropped
+                    for feature, dropped in COMPILED_OUT_METHODS.items()
+                ):
+                    continue
+                if options.multi_asset:
+                    implementation = with_current_smart_asa(implementation)
+                router.method(
+                    with_build_options(implementation, options),
+                    name=name,
+                    **method_config,
+                )
+        finally:
+            _build_options.reset(token)
+        _ROUTERS[options] = router
+    return _ROUTERS[options]
+
+
+smart_asa_abi = smart_asa_router()
+
+
+def hot_dispatch_order(calls: Mapping[str, int]) -> tuple[str, ...]:
+    """Dispatch order of the ABI methods by number of `calls` (call profile)."""
+    return tuple(sorted((m for m in calls if calls[m]), key=lambda m: -calls[m]))
+
+
+def teal_version(options: BuildOptions = DEFAULT_BUILD_OPTIONS) -> int:
+    return BOX_REGISTRY_TEAL_VERSION if options.holder_boxes else TEAL_VERSION
+
+
+def compile_stateful(program: Expr, version: int = TEAL_VERSION) -> str:
     return compileTeal(
         program,
         Mode.Application,
-        version=TEAL_VERSION,
+        version=version,
         assembleConstants=True,
-        optimize=OptimizeOptions(scratch_slots=True),
+        optimize=OPTIMIZE_OPTIONS,
     )
 
 
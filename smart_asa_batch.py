@@ -0,0 +1,357 @@
+"""
+Smart ASA operations packed into atomic groups
+"""
+
+__author__ = "Cosimo Bassi, Stefano De Angelis"
+__email__ = "<cosimo.bassi@algorand.com>, <stefano.deangelis@algorand.com>"
+
+import copy
+import dataclasses
+import functools
+from concurrent.futures import Future
+from typing import Any, Optional, Union
+
+from algosdk import abi
+from algosdk.abi import Contract
+from algosdk.atomic_transaction_composer import (
+    AtomicTransactionComposer,
+    TransactionWithSigner,
+)
+from algosdk.future.transaction import (
+    ApplicationNoOpTxn,
+    AssetTransferTxn,
+    OnComplete,
+    SuggestedParams,
+    Transaction,
+)
+
+from account import Account, AppAccount
+from pipeline import PendingTxn
+from smart_asa_asc import BuildOptions
+from smart_asa_client import (
+    MAX_APP_TXN_ACCOUNTS,
+    MAX_APP_TXN_FOREIGN_REFS,
+    app_build_options,
+    is_box_registry,
+    method_opcode_cost,
+    smart_asa_boxes,
+    transfer_proofs,
+)
+from teal_cost import BARE_CALL_NAME, MAX_APP_BUDGET, budget_app_calls
+from utils import get_params
+from watcher import abi_return, get_watcher
+
+
+@dataclasses.dataclass
+class Operation:
+    """
+    A Smart ASA operation of a batch: a `method` App Call (if any), preceded by
+    its transaction arguments (`txns`). Its `fees` (in minimum fees) pay the
+    inner transactions too.
+    """
+
+    method: Optional[abi.Method]
+    args: list = dataclasses.field(default_factory=list)
+    txns: list[Transaction] = dataclasses.field(default_factory=list)
+    on_complete: OnComplete = OnComplete.NoOpOC
+    boxes: Optional[list[tuple[int, bytes]]] = None
+    opcode_cost: int = 0
+    fees: int = 1
+
+    @property
+    def size(self) -> int:
+        return len(self.txns) + (self.method is not None)
+
+
+class SmartASABatch:
+    """
+    Composes independent Smart ASA operations (transfers, freezes, opt-ins)
+    of a `caller`, packed in order into as few atomic groups as possible. Each
+    group pools the opcode budget of its App Calls (adding bare NoOp calls if
+    needed) and its fees (all paid by its first transaction), and is signed
+    once. Groups are rejected as a whole: all of their operations fail.
+    """
+
+    def __init__(
+        self,
+        smart_asa_contract: Contract,
+        smart_asa_app: AppAccount,
+        caller: Account,
+        options: Optional[BuildOptions] = None,
+    ):
+        assert caller.algod_client
+        self.smart_asa_contract = smart_asa_contract
+        self.smart_asa_app = smart_asa_app
+        self.caller = caller
+        # NOTE: Build options are inferred from the App if not given.
+        self.options = options or app_build_options(
+            caller.algod_client, smart_asa_app.app_id
+        )
+        self.operations: list[Operation] = []
+
+    def __len__(self) -> int:
+        return len(self.operations)
+
+    def _params(self) -> SuggestedParams:
+        # NOTE: Fees are pooled on the first transaction of each group.
+        params = copy.copy(get_params(self.caller.algod_client))
+        params.fee = 0
+        return params
+
+    def _add(self, operation: Operation) -> int:
+        if operation.method is not None:
+            addresses = {
+                arg.address if isinstance(arg, Account) else arg
+                for arg, arg_type in zip(operation.args, operation.method.args)
+                if arg_type.type == abi.ABIReferenceType.ACCOUNT
+            }
+            accounts = len(addresses - {self.caller.address})
+            references = accounts + 1 + len(operation.boxes or [])  # Smart ASA ID
+            if accounts > MAX_APP_TXN_ACCOUNTS or references > MAX_APP_TXN_FOREIGN_REFS:
+                raise ValueError(
+                    f"{operation.method.name} exceeds the App Call foreign references"
+                )
+        if self.group_size([operation]) > AtomicTransactionComposer.MAX_GROUP_SIZE:
+            raise ValueError("Operation exceeds the atomic group size")
+        self.operations.append(operation)
+        return len(self.operations) - 1
+
+    def _app_call(self, method: str, *args, max_iterations=None, **kwargs) -> int:
+        return self._add(
+            Operation(
+                self.smart_asa_contract.get_method_by_name(method),
+                list(args),
+                opcode_cost=method_opcode_cost(self.options, method, max_iterations),
+                **kwargs,
+            )
+        )
+
+    def transfer(
+        self,
+        xfer_asset: int,
+        asset_amount: int,
+        asset_receiver: Union[str, Account],
+        asset_sender: Optional[Union[str, Account]] = None,
+        sender_proof: Optional[list[bytes]] = None,
+        receiver_proof: Optional[list[bytes]] = None,
+    ) -> int:
+        """Add a Smart ASA transfer (as `smart_asa_transfer`), returns its index."""
+        if asset_sender is None:
+            asset_sender = self.caller
+        proofs, max_iterations = transfer_proofs(
+            self.smart_asa_contract, sender_proof, receiver_proof
+        )
+        return self._app_call(
+            "asset_transfer",
+            xfer_asset,
+            asset_amount,
+            asset_sender,
+            asset_receiver,
+            *proofs,
+            max_iterations=max_iterations,
+            boxes=smart_asa_boxes(
+                self.smart_asa_contract, xfer_asset, asset_sender, asset_receiver
+            ),
+            fees=2,
+        )
+
+    def freeze(self, freeze_asset: int, asset_frozen: bool = False) -> int:
+        """Add a Smart ASA freeze (as `smart_asa_freeze`), returns its index."""
+        return self._app_call(
+            "asset_freeze",
+            freeze_asset,
+            asset_frozen,
+            boxes=smart_asa_boxes(self.smart_asa_contract, freeze_asset),
+            fees=2,
+        )
+
+    def account_freeze(
+        self,
+        freeze_asset: int,
+        target_account: Union[str, Account],
+        account_frozen: bool = False,
+    ) -> int:
+        """
+        Add a Smart ASA account freeze (as `smart_asa_account_freeze`), returns
+        its index.
+        """
+        return self._app_call(
+            "account_freeze",
+            freeze_asset,
+            target_account,
+            account_frozen,
+            boxes=smart_asa_boxes(
+                self.smart_asa_contract, freeze_asset, target_account
+            ),
+            fees=2,
+        )
+
+    def optin(self, asset_id: int) -> int:
+        """Add a Smart ASA opt-in (as `smart_asa_optin`), returns its index."""
+        asa_optin_txn = AssetTransferTxn(
+            sender=self.caller.address,
+            sp=self._params(),
+            receiver=self.caller.address,
+            amt=0,
+            index=asset_id,
+        )
+        if is_box_registry(self.smart_asa_contract):
+            # NOTE: Holders just opt-in to the Underlying ASA.
+            return self._add(Operation(None, txns=[asa_optin_txn]))
+        return self._app_call(
+            "asset_app_optin",
+            asset_id,
+            asa_optin_txn,
+            txns=[asa_optin_txn],
+            on_complete=OnComplete.OptInOC,
+            fees=2,
+        )
+
+    def budget_calls(self, operations: list[Operation]) -> int:
+        """Bare NoOp App Calls pooling the opcode budget of a group."""
+        app_calls = sum(op.method is not None for op in operations)
+        if not app_calls:
+            return 0
+        opcode_cost = sum(op.opcode_cost for op in operations)
+        return budget_app_calls(
+            # NOTE: Each App Call of the group adds its own budget.
+            opcode_cost - MAX_APP_BUDGET * (app_calls - 1),
+            method_opcode_cost(self.options, BARE_CALL_NAME),
+        )
+
+    def group_size(self, operations: list[Operation]) -> int:
+        return sum(op.size for op in operations) + self.budget_calls(operations)
+
+    def groups(self) -> list[list[int]]:
+        """Operation indexes of each atomic group, packed in order."""
+        groups: list[list[int]] = []
+        for i, operation in enumerate(self.operations):
+            group = [self.operations[j] for j in groups[-1]] if groups else []
+            size = self.group_size(group + [operation])
+            if not groups or size > AtomicTransactionComposer.MAX_GROUP_SIZE:
+                groups.append([])
+            groups[-1].append(i)
+        return groups
+
+    def build_group(
+        self, indexes: list[int]
+    ) -> tuple[AtomicTransactionComposer, list[int]]:
+        """
+        Signed atomic group of the `indexes` operations, with the group index
+        of each operation (of its App Call, if any).
+        """
+        operations = [self.operations[i] for i in indexes]
+        atc = AtomicTransactionComposer()
+        txn_indexes = []
+        for i, operation in zip(indexes, operations):
+            # NOTE: Equal operations would be otherwise identical transactions.
+            note = f"operation {i}".encode()
+            txns = []
+            for txn in operation.txns:
+                txn = copy.copy(txn)
+                txn.note = note
+                txns.append(TransactionWithSigner(txn, self.caller))
+            if operation.method is None:
+                for txn in txns:
+                    txn_indexes.append(atc.get_tx_count())
+                    atc.add_transaction(txn)
+                continue
+            args = []
+            txns = iter(txns)
+            for arg, arg_type in zip(operation.args, operation.method.args):
+                if abi.is_abi_transaction_type(arg_type.type):
+                    arg = next(txns)
+                elif isinstance(arg, Account):
+                    arg = arg.address
+                args.append(arg)
+            txn_indexes.append(atc.get_tx_count() + len(operation.txns))
+            atc.add_method_call(
+                app_id=self.smart_asa_app.app_id,
+                method=operation.method,
+                sender=self.caller.address,
+                sp=self._params(),
+                signer=self.caller,
+                method_args=args,
+                on_complete=operation.on_complete,
+                note=note,
+                boxes=operation.boxes,
+            )
+
+        budget_calls = self.budget_calls(operations)
+        for i in range(budget_calls):
+            budget_call = ApplicationNoOpTxn(
+                sender=self.caller.address,
+                sp=self._params(),
+                index=self.smart_asa_app.app_id,
+                # NOTE: Budget calls would be otherwise identical.
+                note=f"budget {i}".encode(),
+            )
+            atc.add_transaction(TransactionWithSigner(budget_call, self.caller))
+
+        min_fee = get_params(self.caller.algod_client).fee
+        fees = sum(operation.fees for operation in operations) + budget_calls
+        atc.txn_list[0].txn.fee = min_fee * fees
+        atc.build_group()
+        atc.gather_signatures()
+        return atc, txn_indexes
+
+    def submit(self, max_wait_rounds: int = 10) -> list[PendingTxn]:
+        """
+        Submit all the operation groups at once (ref. `watcher`), returns a
+        handle of each operation resolved to its ABI return value (or
+        transaction info, for non ABI calls), or to its group error.
+        """
+        watcher = get_watcher(self.caller.algod_client)
+        handles: list[PendingTxn] = []
+        for indexes in self.groups():
+            group_handles = []
+            try:
+                atc, txn_indexes = self.build_group(indexes)
+                group_handles = [
+                    PendingTxn(
+                        atc.signed_txns[txn_index].get_txid(),
+                        self.operations[i].method,
+                    )
+                    for i, txn_index in zip(indexes, txn_indexes)
+                ]
+                confirmation = watcher.submit(atc.signed_txns, max_wait_rounds)
+            except Exception as err:
+                # NOTE: A failed group fails just its own operations.
+                if not group_handles:
+                    group_handles = [
+                        PendingTxn(None, self.operations[i].method) for i in indexes
+                    ]
+                for handle in group_handles:
+                    handle.set_exception(err)
+            else:
+                confirmation.add_done_callback(
+                    functools.partial(
+                        _resolve, handles=group_handles, txn_indexes=txn_indexes
+                    )
+                )
+            # NOTE: Groups are packed in order.
+            handles.extend(group_handles)
+        return handles
+
+    def execute(self, max_wait_rounds: int = 10) -> list[Any]:
+        """
+        Submit all the operation groups and wait for their confirmation,
+        returns the result of each operation (raising the first group error).
+        """
+        return [handle.result() for handle in self.submit(max_wait_rounds)]
+
+
+def _resolve(
+    confirmation: Future, handles: list[PendingTxn], txn_indexes: list[int]
+) -> None:
+    if confirmation.exception() is not None:
+        for handle in handles:
+            handle.set_exception(confirmation.exception())
+        return
+    tx_infos = confirmation.result()
+    for handle, txn_index in zip(handles, txn_indexes):
+        handle.tx_info = tx_infos[txn_index]
+        if handle.method is not None:
+            handle.set_result(abi_return(handle.method, handle.tx_info))
+        else:
+            handle.set_result(handle.tx_info)
@@ -0,0 +1,129 @@
+"""
+Smart ASA batch composer test suite, against a stand-in algod
+"""
+
+import pytest
+from algosdk import constants
+from algosdk.atomic_transaction_composer import AtomicTransactionComposer
+
+from account import Account, AppAccount
+from pipeline_test import StandInAlgod
+from smart_asa_artifacts import load_contract
+from smart_asa_asc import DEFAULT_BUILD_OPTIONS, BuildOptions
+from smart_asa_batch import SmartASABatch
+
+ASSET_ID = 42
+APP_ID = 7
+
+
+def smart_asa_batch(
+    algod_client: StandInAlgod, options: BuildOptions = DEFAULT_BUILD_OPTIONS
+) -> SmartASABatch:
+    return SmartASABatch(
+        load_contract(options=options),
+        AppAccount.from_app_id(APP_ID, algod_client=algod_client),
+        Account.create(algod_client=algod_client),
+        options=options,
+    )
+
+
+@pytest.mark.parametrize(
+    "options", [DEFAULT_BUILD_OPTIONS, BuildOptions(multi_asset=True)]
+)
+def test_packing(options: BuildOptions) -> None:
+    batch = smart_asa_batch(StandInAlgod(), options)
+    receivers = [Account.create() for _ in range(40)]
+    for amount, receiver in enumerate(receivers):
+        batch.transfer(ASSET_ID, amount, receiver)
+    batch.account_freeze(ASSET_ID, receivers[0], True)
+    batch.freeze(ASSET_ID, True)
+
+    groups = batch.groups()
+    assert [i for group in groups for i in group] == list(range(len(batch)))
+    # An atomic submission for up to 16 operations, instead of each
+    assert len(groups) < len(batch) // 10
+    for group in groups:
+        operations = [batch.operations[i] for i in group]
+        assert batch.group_size(operations) <= AtomicTransactionComposer.MAX_GROUP_SIZE
+        # Groups are as large as possible
+        if group is not groups[-1]:
+            next_operation = batch.operations[group[-1] + 1]
+            assert (
+                batch.group_size(operations + [next_operation])
+                > AtomicTransactionComposer.MAX_GROUP_SIZE
+            )
+
+
+def test_pooled_fees() -> None:
+    batch = smart_asa_batch(StandInAlgod())
+    for amount in range(3):
+        batch.transfer(ASSET_ID, amount, Account.create())
+    batch.optin(ASSET_ID)
+
+    [group] = batch.groups()
+    atc, txn_indexes = batch.build_group(group)
+    txns = [stxn.transaction for stxn in atc.signed_txns]
+    assert txns[0].fee == constants.MIN_TXN_FEE * (2 * 4 + len(txns) - 5)
+    assert all(txn.fee == 0 for txn in txns[1:])
+    assert len({txn.group for txn in txns}) == 1
+    # The opt-in App Call follows its ASA opt-in
+    assert txn_indexes == [0, 1, 2, 4]
+    assert txns[3].type == "axfer" and txns[4].type == "appl"
+
+
+def test_equal_operations() -> None:
+    batch = smart_asa_batch(StandInAlgod())
+    receiver = Account.create()
+    for _ in range(3):
+        batch.transfer(ASSET_ID, 1, receiver)
+        batch.optin(ASSET_ID)
+
+    [group] = batch.groups()
+    atc, _ = batch.build_group(group)
+    # Equal operations of a group are still distinct transactions
+    txids = [stxn.get_txid() for stxn in atc.signed_txns]
+    assert len(set(txids)) == len(txids)
+
+
+def test_submit() -> None:
+    algod_client = StandInAlgod(block_time=0.5)
+    batch = smart_asa_batch(algod_client)
+    for amount in range(20):
+        batch.transfer(ASSET_ID, amount, Account.create())
+    batch.freeze(ASSET_ID, True)
+
+    handles = batch.submit()
+    assert [handle.result() for handle in handles] == [None] * len(batch)
+    assert all(handle.tx_info["confirmed-round"] == 2 for handle in handles)
+    assert {handle.method.name for handle in handles[:-1]} == {"asset_transfer"}
+    assert handles[-1].method.name == "asset_freeze"
+    # A group for each submission, all confirmed in a round
+    groups = {stxn.transaction.group for _, stxn in algod_client.submitted.values()}
+    assert len(groups) == len(batch.groups())
+    assert algod_client.blocks_fetched == 1
+
+
+def test_submit_group_error() -> None:
+    algod_client = StandInAlgod()
+    batch = smart_asa_batch(algod_client)
+    for amount in range(20):
+        batch.transfer(ASSET_ID, amount, Account.create())
+    send_transactions = algod_client.send_transactions
+    sent = []
+
+    def drop_first_group(stxns: list) -> str:
+        sent.append(stxns)
+        if len(sent) == 1:
+            raise ConnectionResetError("Connection dropped")
+        return send_transactions(stxns)
+
+    algod_client.send_transactions = drop_first_group
+    handles = batch.submit()
+    [first, *rest] = batch.groups()
+    assert len(handles) == len(batch) and rest
+    # Just the operations of the failed group fail
+    for i in first:
+        with pytest.raises(ConnectionResetError):
+            handles[i].result()
+    for group in rest:
+        assert [handles[i].result() for i in group] == [None] * len(group)
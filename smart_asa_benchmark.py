@@ -0,0 +1,232 @@
+"""
+Smart ASA opcode cost benchmarks
+
+Usage:
+  smart_asa_benchmark itoa
+  smart_asa_benchmark merkle
+  smart_asa_benchmark variants
+  smart_asa_benchmark --help
+
+Commands:
+  itoa      Cost of Underlying ASA creation by number of digits of the App ID
+  merkle    Cost of allow list transfers by allow list size, against Local State
+  variants  Program size and methods cost by features compiled out
+"""
+
+__author__ = "Cosimo Bassi, Stefano De Angelis"
+__email__ = "<cosimo.bassi@algorand.com>, <stefano.deangelis@algorand.com>"
+
+import itertools
+import math
+from typing import NamedTuple
+
+from docopt import docopt
+from pyteal import (
+    Approve,
+    Bytes,
+    Concat,
+    Expr,
+    Extract,
+    Global,
+    If,
+    Int,
+    Pop,
+    Seq,
+    Subroutine,
+    TealType,
+)
+
+from merkle_tree import NODE_BYTES
+from smart_asa_asc import (
+    UINT64_MAX_DIGITS,
+    BuildOptions,
+    compile_stateful,
+    smart_asa_abi,
+    smart_asa_router,
+)
+from smart_asa_artifacts import FEATURES, build_variant, load_teal_programs
+from smart_asa_client import max_batch_size
+from teal_cost import Cost, CostAnalyzer, analyze
+
+
+# / --- REFERENCE IMPLEMENTATIONS
+@Subroutine(TealType.bytes)
+def recursive_digit_to_ascii(i: Expr) -> Expr:
+    return Extract(Bytes("0123456789"), i, Int(1))
+
+
+@Subroutine(TealType.bytes)
+def recursive_itoa(i: Expr) -> Expr:
+    # Former Smart ASA `itoa`: one `callsub` and one `concat` per digit.
+    return If(
+        i == Int(0),
+        Bytes("0"),
+        Concat(
+            If(i / Int(10) > Int(0), recursive_itoa(i / Int(10)), Bytes("")),
+            recursive_digit_to_ascii(i % Int(10)),
+        ),
+    )
+
+
+# / --- BENCHMARKS
+class ItoaBenchmark(NamedTuple):
+    digits: int
+    before: int
+    after: int
+
+
+def itoa_benchmark() -> list[ItoaBenchmark]:
+    """
+    Opcode cost of `underlying_asa_create_inner_tx` with the former recursive
+    `itoa` (before) and with the current `itoa` (after), by number of digits
+    of the Smart ASA App ID.
+    """
+    approval, _, _ = smart_asa_abi.build_program()
+    smart_asa_teal = compile_stateful(approval)
+    recursive_teal = compile_stateful(
+        Seq(Pop(recursive_itoa(Global.current_application_id())), Approve())
+    )
+    results = []
+    for digits in range(1, UINT64_MAX_DIGITS + 1):
+        # A number of `digits` digits takes `digits - 1` loop back edges or
+        # `digits` nested recursive calls.
+        smart_asa = CostAnalyzer(smart_asa_teal, max_iterations=digits - 1)
+        recursive = CostAnalyzer(recursive_teal, max_depth=digits)
+        create = smart_asa.subroutine_cost(
+            smart_asa.subroutine_label("underlying_asa_create_inner_tx")
+        ).max
+        itoa = smart_asa.subroutine_cost(smart_asa.subroutine_label("itoa")).max
+        former_itoa = recursive.subroutine_cost(
+            recursive.subroutine_label("recursive_itoa")
+        ).max
+        results.append(ItoaBenchmark(digits, create - itoa + former_itoa, create))
+    return results
+
+
+class MerkleBenchmark(NamedTuple):
+    size: int
+    depth: int
+    proof_bytes: int
+    transfer: int
+    app_calls: int
+    local_state_transfer: int
+    freeze_calls: int
+    local_state_freeze_calls: int
+
+
+def merkle_benchmark(
+    sizes: tuple[int, ...] = (2**4, 2**8, 2**12, 2**16, 2**20)
+) -> list[MerkleBenchmark]:
+    """
+    Opcode cost of `asset_transfer` (between holders, both proven in the allow
+    list) and App Calls to restrict the Smart ASA to `size` accounts, with a
+    Merkle allow list and with Local State (freezing the other accounts).
+    """
+    approval, _, contract = smart_asa_router(
+        BuildOptions(merkle_allow_list=True)
+    ).build_program()
+    merkle_teal = compile_stateful(approval)
+    approval, _, local_state_contract = smart_asa_abi.build_program()
+    local_state = analyze(compile_stateful(approval), local_state_contract)
+    local_state_transfer = local_state["methods"]["asset_transfer"]["max"]
+    batch_size = max_batch_size(BuildOptions())
+    results = []
+    for size in sizes:
+        depth = max(1, math.ceil(math.log2(size)))
+        report = analyze(merkle_teal, contract, max_iterations=depth)
+        transfer = report["methods"]["asset_transfer"]
+        results.append(
+            MerkleBenchmark(
+                size=size,
+                depth=depth,
+                # ABI `byte[32][]`: length prefix and sibling nodes
+                proof_bytes=2 + depth * NODE_BYTES,
+                transfer=transfer["max"],
+                app_calls=transfer["app_calls"],
+                local_state_transfer=local_state_transfer,
+                # One root update, against a freeze of each account (at best
+                # the frozen accounts are as many as the allowed ones)
+                freeze_calls=1,
+                local_state_freeze_calls=math.ceil(size / batch_size),
+            )
+        )
+    return results
+
+
+class VariantBenchmark(NamedTuple):
+    features: tuple[str, ...]
+    program_size: int
+    extra_pages: int
+    local_uints: int
+    methods: dict[str, Cost]
+
+
+def variants_benchmark(
+    variants: tuple[tuple[str, ...], ...] = tuple(
+        v for n in range(len(FEATURES) + 1) for v in itertools.combinations(FEATURES, n)
+    )
+) -> list[VariantBenchmark]:
+    """
+    Program size (approval and clear, in bytes) and opcode cost of each method
+    of the Smart ASA App with the `variants` features compiled out.
+    """
+    results = []
+    for features in variants:
+        variant = build_variant(*features)
+        approval, _ = load_teal_programs(options=variant.options)
+        report = analyze(approval, variant.contract, max_iterations=4)
+        results.append(
+            VariantBenchmark(
+                features=features,
+                program_size=variant.program_size,
+                extra_pages=variant.extra_pages,
+                local_uints=variant.local_schema.num_uints,
+                methods={
+                    name: Cost(method["min"], method["max"])
+                    for name, method in report["methods"].items()
+                    if method["max"] is not None
+                },
+            )
+        )
+    return results
+
+
+def smart_asa_benchmark(args: dict) -> None:
+    if args["itoa"]:
+        print("underlying_asa_create_inner_tx opcode cost")
+        print(f"{'digits':>6} {'before':>6} {'after':>6} {'saved':>6}")
+        for digits, before, after in itoa_benchmark():
+            print(f"{digits:>6} {before:>6} {after:>6} {before - after:>6}")
+    if args["merkle"]:
+        print("asset_transfer opcode cost and App Calls: Merkle vs Local State")
+        print(
+            f"{'size':>8} {'depth':>5} {'proof':>5} {'cost':>5} {'calls':>5} "
+            f"{'local':>5} {'freeze':>6} {'local':>6}"
+        )
+        for r in merkle_benchmark():
+            print(
+                f"{r.size:>8} {r.depth:>5} {r.proof_bytes:>5} {r.transfer:>5} "
+                f"{r.app_calls:>5} {r.local_state_transfer:>5} "
+                f"{r.freeze_calls:>6} {r.local_state_freeze_calls:>6}"
+            )
+    if args["variants"]:
+        results = variants_benchmark()
+        print("Program size and methods opcode cost by features compiled out")
+        print(f"{'without':<30} {'size':>5} {'pages':>5} {'local':>5}")
+        for r in results:
+            without = ",".join(r.features) or "-"
+            print(
+                f"{without:<30} {r.program_size:>5} {r.extra_pages:>5} "
+                f"{r.local_uints:>5}"
+            )
+        print(f"\n{'method (max cost)':<26}", *(f"{i:>5}" for i in range(len(results))))
+        for name in results[0].methods:
+            costs = [r.methods.get(name) for r in results]
+            print(
+                f"{name:<26}",
+                *(f"{c.max if c else '-':>5}" for c in costs),
+            )
+
+
+if __name__ == "__main__":
+    smart_asa_benchmark(docopt(__doc__))
@@ -0,0 +1,31 @@
+"""
+Smart ASA opcode cost benchmarks test suite
+"""
+
+from smart_asa_artifacts import FEATURES
+from smart_asa_benchmark import itoa_benchmark, merkle_benchmark, variants_benchmark
+
+
+def test_itoa_benchmark() -> None:
+    results = itoa_benchmark()
+    assert [r.digits for r in results] == list(range(1, 21))
+    # Any App ID but the first nine ones
+    assert all(r.after < r.before for r in results if r.digits > 1)
+
+
+def test_merkle_benchmark() -> None:
+    results = merkle_benchmark((2**4, 2**10))
+    assert [(r.size, r.depth) for r in results] == [(16, 4), (1024, 10)]
+    assert results[0].transfer < results[1].transfer
+    # Restricting to a large set takes one App Call, instead of many freezes
+    assert all(r.freeze_calls < r.local_state_freeze_calls for r in results)
+
+
+def test_variants_benchmark() -> None:
+    reference, variant = variants_benchmark(((), FEATURES))
+    assert variant.program_size < reference.program_size
+    assert variant.local_uints < reference.local_uints
+    assert "account_freeze" not in variant.methods
+    assert variant.methods["asset_transfer"].max < (
+        reference.methods["asset_transfer"].max
+    )
@@ -5,7 +5,9 @@ Usage:
   smart_asa create  <creator> <total> [--decimals=<d>] [--default-frozen=<z>]
                     [--name=<n>] [--unit-name=<u>] [--metadata-hash=<s>]
                     [--url=<l>] [--manager=<m>] [--reserve=<r>]
-                    [--freeze=<f>] [--clawback=<c>]
+                    [--freeze=<f>] [--clawback=<c>] [--packed-global-state]
+                    [--packed-local-state] [--box-registry]
+                    [--multi-asset] [--app-id=<a>] [--dispatch-order=<o>]
   smart_asa config  <asset-id> <manager> [--new-total=<t>] [--new-decimals=<d>]
                     [--new-default-frozen=<z>] [--new-name=<n>]
                     [--new-unit-name=<u>] [--new-metadata-hash=<s>]
@@ -13,6 +15,7 @@ Usage:
                     [--new-freeze=<f>] [--new-clawback=<c>]
   smart_asa destroy <asset-id> <manager>
   smart_asa freeze  <asset-id> <freeze> (--asset | --account=<a>) <status>
+  smart_asa unfreeze <asset-id> <freeze>
   smart_asa optin   <asset-id> <account>
   smart_asa optout  <asset-id> <account> <close-to>
   smart_asa send    <asset-id> <from> <to> <amount>
@@ -26,6 +29,7 @@ Commands:
   config     Configure a Smart ASA
   destroy    Destroy a Smart ASA
   freeze     Freeze whole Smart ASA or specific account, <status> = 1 is forzen
+  unfreeze   Unfreeze all the Smart ASA accounts at once
   optin      Optin Smart ASAs
   optout     Optout Smart ASAs
   send       Transfer Smart ASAs
@@ -44,6 +48,14 @@ Options:
   -r, --reserve=<r>            Default to Smart ASA Creator
   -f, --freeze=<f>             Default to Smart ASA Creator
   -c, --clawback=<c>           Default to Smart ASA Creator
+  --packed-global-state        Build the Smart ASA App with packed Global State
+  --packed-local-state         Build the Smart ASA App with packed Local State
+  --box-registry               Build the Smart ASA App with holders in Boxes
+  --multi-asset                Build a Smart ASA App governing many Smart ASAs
+  --app-id=<a>                 Create the Smart ASA with an existing
+                               multi-asset Smart ASA App
+  --dispatch-order=<o>         Comma separated ABI methods dispatched first
+                               (e.g. asset_transfer)
 """
 
 import sys
@@ -53,18 +65,21 @@ from algosdk.abi import Contract
 
 from account import Account, AppAccount
 from sandbox import Sandbox
-from smart_asa_asc import (
-    compile_stateful,
-    smart_asa_abi,
-)
+from smart_asa_asc import BuildOptions
+from smart_asa_artifacts import load_bytecode, load_contract
 from smart_asa_client import (
+    get_build_options,
+    get_smart_asa_holder_state,
     get_smart_asa_params,
+    is_multi_asset,
     smart_asa_account_freeze,
+    smart_asa_account_unfreeze_all,
     smart_asa_closeout,
     smart_asa_app_create,
     smart_asa_optin,
     smart_asa_create,
     smart_asa_config,
+    smart_asa_config_partial,
     smart_asa_destroy,
     smart_asa_freeze,
     smart_asa_get,
@@ -110,6 +125,9 @@ def args_types(args: dict) -> dict:
     if args["<asset-id>"] is not None:
         args["<asset-id>"] = int(args["<asset-id>"])
 
+    if args["--app-id"] is not None:
+        args["--app-id"] = int(args["--app-id"])
+
     if args["--new-total"] is not None:
         args["--new-total"] = int(args["--new-total"])
 
@@ -134,18 +152,25 @@ def args_types(args: dict) -> dict:
 
 def asset_create(
     args: dict,
-    approval: str,
-    clear: str,
+    approval: bytes,
+    clear: bytes,
     contract: Contract,
+    options: BuildOptions,
 ) -> None:
     creator = Sandbox.from_public_key(args["<creator>"])
 
-    print("\n --- Creating Smart ASA App...")
-    smart_asa_app = smart_asa_app_create(approval, clear, creator)
-    print(" --- Smart ASA App ID:", smart_asa_app.app_id)
+    if args["--app-id"] is not None:
+        smart_asa_app = AppAccount.from_app_id(
+            app_id=args["--app-id"], algod_client=Sandbox.algod_client
+        )
+        print(" --- Smart ASA App ID:", smart_asa_app.app_id)
+    else:
+        print("\n --- Creating Smart ASA App...")
+        smart_asa_app = smart_asa_app_create(approval, clear, creator, options)
+        print(" --- Smart ASA App ID:", smart_asa_app.app_id)
 
-    print("\n --- Funding Smart ASA App with 1 ALGO...")
-    creator.pay(receiver=smart_asa_app, amount=1_000_000)
+        print("\n --- Funding Smart ASA App with 1 ALGO...")
+        creator.pay(receiver=smart_asa_app, amount=1_000_000)
 
     print("\n --- Creating Smart ASA...")
     smart_asa_id = smart_asa_create(
@@ -174,8 +199,20 @@ def asset_config(
 ) -> None:
     manager = Sandbox.from_public_key(args["<manager>"])
 
+    # NOTE: Multi-asset Smart ASA Apps configure just fixed size fields partially.
+    variable_size = (
+        "--new-name",
+        "--new-unit-name",
+        "--new-url",
+        "--new-metadata-hash",
+    )
+    if is_multi_asset(contract) and any(args[f] is not None for f in variable_size):
+        configure = smart_asa_config
+    else:
+        configure = smart_asa_config_partial
+
     print(f"\n --- Configuring Smart ASA {args['<asset-id>']}...")
-    smart_asa_config(
+    configure(
         smart_asa_contract=contract,
         smart_asa_app=smart_asa_app,
         manager=manager,
@@ -245,6 +282,21 @@ def asset_or_account_freeze(
         )
 
 
+def account_unfreeze_all(
+    args: dict,
+    contract: Contract,
+    smart_asa_app: AppAccount,
+) -> None:
+    freezer = Sandbox.from_public_key(args["<freeze>"])
+    print(f"\n --- Unfreezing all accounts of Smart ASA {args['<asset-id>']}...\n")
+    return smart_asa_account_unfreeze_all(
+        smart_asa_contract=contract,
+        smart_asa_app=smart_asa_app,
+        freezer=freezer,
+        freeze_asset=args["<asset-id>"],
+    )
+
+
 def asset_optin(
     args: dict,
     contract: Contract,
@@ -260,7 +312,10 @@ def asset_optin(
         caller=account,
     )
     print(f"\n --- Smart ASA {args['<asset-id>']} state:")
-    return print(account.app_local_state(smart_asa_app.app_id), "\n")
+    holder_state = get_smart_asa_holder_state(
+        contract, smart_asa_app, account, args["<asset-id>"]
+    )
+    return print(holder_state, "\n")
 
 
 def asset_optout(
@@ -327,12 +382,16 @@ def asset_send(
 
 def asset_or_account_info(
     args: dict,
+    contract: Contract,
     smart_asa_app: AppAccount,
 ) -> None:
     if args["--account"]:
         account = Account(address=args["--account"])
         print(f"\n --- Smart ASA {args['<asset-id>']} state:")
-        return print(account.app_local_state(smart_asa_app.app_id), "\n")
+        holder_state = get_smart_asa_holder_state(
+            contract, smart_asa_app, account, args["<asset-id>"]
+        )
+        return print(holder_state, "\n")
     else:
         return smart_asa_info(args["<asset-id>"])
 
@@ -365,15 +424,34 @@ def smart_asa_cli():
     args = docopt(__doc__)
     args = args_types(args)
 
-    approval, clear, contract = smart_asa_abi.build_program()
-    approval = compile_stateful(approval)
-    clear = compile_stateful(clear)
-
-    if args["create"]:
-        return asset_create(args, approval, clear, contract)
+    # NOTE: Smart ASA App programs are built (and assembled) only on `create`
+    # and only if the artifacts cache is stale, any other command just needs
+    # the ABI Contract.
+    if args["create"] and args["--app-id"] is not None:
+        options = get_build_options(Sandbox.algod_client, args["--app-id"])
+        assert options.multi_asset, "Smart ASA App must be multi-asset"
+        contract = load_contract(options=options)
+        return asset_create(args, b"", b"", contract, options)
+    elif args["create"]:
+        options = BuildOptions(
+            packed_global_state=args["--packed-global-state"],
+            packed_local_state=args["--packed-local-state"],
+            box_registry=args["--box-registry"],
+            multi_asset=args["--multi-asset"],
+            dispatch_order=tuple(
+                m for m in (args["--dispatch-order"] or "").split(",") if m
+            ),
+        )
+        approval, clear = load_bytecode(options=options)
+        contract = load_contract(options=options)
+        return asset_create(args, approval, clear, contract, options)
     else:
         smart_asa = get_smart_asa_params(Sandbox.algod_client, args["<asset-id>"])
-        smart_asa_app = AppAccount.from_app_id(app_id=smart_asa["app_id"])
+        smart_asa_app = AppAccount.from_app_id(
+            app_id=smart_asa["app_id"], algod_client=Sandbox.algod_client
+        )
+        options = get_build_options(Sandbox.algod_client, smart_asa["app_id"])
+        contract = load_contract(options=options)
 
     if args["config"]:
         return asset_config(args, contract, smart_asa_app)
@@ -381,6 +459,8 @@ def smart_asa_cli():
         return asset_destroy(args, contract, smart_asa_app)
     elif args["freeze"]:
         return asset_or_account_freeze(args, contract, smart_asa_app)
+    elif args["unfreeze"]:
+        return account_unfreeze_all(args, contract, smart_asa_app)
     elif args["optin"]:
         return asset_optin(args, contract, smart_asa_app)
     elif args["optout"]:
@@ -388,7 +468,7 @@ def smart_asa_cli():
     elif args["send"]:
         return asset_send(args, contract, smart_asa_app)
     elif args["info"]:
-        return asset_or_account_info(args, smart_asa_app)
+        return asset_or_account_info(args, contract, smart_asa_app)
     elif args["get"]:
         return asset_get(args, contract, smart_asa_app)
     else:
@@ -5,39 +5,351 @@ Smart ASA client
 __author__ = "Cosimo Bassi, Stefano De Angelis"
 __email__ = "<cosimo.bassi@algorand.com>, <stefano.deangelis@algorand.com>"
 
-from typing import Any, Optional, Union
+import base64
+import functools
+import weakref
+from typing import Any, Optional, Sequence, Union
 from algosdk.abi import Contract
-from algosdk.atomic_transaction_composer import TransactionWithSigner
+from algosdk.atomic_transaction_composer import (
+    AtomicTransactionComposer,
+    TransactionWithSigner,
+)
+from algosdk.error import (
+    AlgodHTTPError,
+    ConfirmationTimeoutError,
+    TransactionRejectedError,
+)
 from algosdk.v2client.algod import AlgodClient
-from algosdk.encoding import encode_address
-from algosdk.future.transaction import AssetTransferTxn, OnComplete
+from algosdk.encoding import decode_address, encode_address
+from algosdk.future.transaction import (
+    ApplicationNoOpTxn,
+    AssetTransferTxn,
+    OnComplete,
+    SuggestedParams,
+    write_to_file,
+)
 from account import Account, AppAccount
-from utils import get_params, normalize_getter_params
+from pipeline import PendingTxn, resolve
+from smart_asa_artifacts import load_contract, load_opcode_costs
+from teal_cost import BARE_CALL_NAME, budget_app_calls
+from utils import (
+    SmartASAState,
+    chunks,
+    get_params,
+    normalize_getter_params,
+    normalize_getter_state,
+)
+from watcher import get_watcher
 
 from smart_asa_asc import (
+    BUILD_OPTIONS_KEY,
+    CONFIG_FIELDS,
+    DEFAULT_BUILD_OPTIONS,
+    MULTI_ASSET_APP_NAME,
+    PENDING_SMART_ASA_BOX,
+    PENDING_SMART_ASA_ID,
     SMART_ASA_APP_BINDING,
     UNDERLYING_ASA_TOTAL,
-    GlobalState,
-    LocalState,
+    BoxGlobalState,
+    BoxLocalState,
+    BuildOptions,
+    MultiAssetLocalState,
+    decode_event,
+    decode_global_state,
+    decode_local_state,
+    encode_config_fields,
+    global_state_schema,
+    local_state_schema,
 )
 
+# NOTE: AVM limits the foreign accounts and all the foreign references (assets,
+# apps, accounts and boxes) of an App Call.
+MAX_APP_TXN_ACCOUNTS = 4
+MAX_APP_TXN_FOREIGN_REFS = 8
 
-def get_smart_asa_params(algod_client: AlgodClient, smart_asa_id: int) -> dict:
-    smart_asa = algod_client.asset_info(smart_asa_id)["params"]
-    assert SMART_ASA_APP_BINDING in smart_asa["url"]
-    smart_asa_app_id = int(smart_asa["url"].replace(SMART_ASA_APP_BINDING, ""))
-    smart_asa_app_account = AppAccount.from_app_id(
-        app_id=smart_asa_app_id,
+
+def is_box_registry(smart_asa_contract: Contract) -> bool:
+    # Box registry Smart ASA Apps have no App opt-in (ref. `BoxLocalState`).
+    return "asset_app_optin" not in {m.name for m in smart_asa_contract.methods}
+
+
+def is_multi_asset(smart_asa_contract: Contract) -> bool:
+    return smart_asa_contract.name == MULTI_ASSET_APP_NAME
+
+
+def is_allow_list(smart_asa_contract: Contract) -> bool:
+    # Merkle allow list Smart ASA Apps transfer with allow list proofs.
+    return "asset_allow_list" in {m.name for m in smart_asa_contract.methods}
+
+
+def holder_boxes(
+    smart_asa_contract: Contract, *holders: Union[str, Account], asset_id: int = 0
+) -> Optional[list[tuple[int, bytes]]]:
+    """Box references of the Smart ASA holders, if stored in App Boxes."""
+    if not is_box_registry(smart_asa_contract):
+        return None
+    layout = (
+        MultiAssetLocalState if is_multi_asset(smart_asa_contract) else BoxLocalState
+    )
+    addresses = [holder_address(h) for h in holders]
+    return [
+        (0, layout.box_key(asset_id, decode_address(address)))
+        for address in dict.fromkeys(addresses)
+    ]
+
+
+def smart_asa_boxes(
+    smart_asa_contract: Contract, asset_id: int, *holders: Union[str, Account]
+) -> Optional[list[tuple[int, bytes]]]:
+    """
+    Box references of an App Call on Smart ASA `asset_id` involving `holders`:
+    the Smart ASA Box (multi-asset Apps) and the holder Boxes (if any).
+    """
+    boxes = holder_boxes(smart_asa_contract, *holders, asset_id=asset_id)
+    if is_multi_asset(smart_asa_contract):
+        boxes.insert(0, (0, BoxGlobalState.box_key(asset_id)))
+    return boxes
+
+
+def pending_smart_asa_boxes(asset_id: Optional[int] = None) -> list[tuple[int, bytes]]:
+    """
+    Box references of a multi-asset Smart ASA creation or, given the new Smart
+    ASA `asset_id`, registration (ref. `PENDING_SMART_ASA_ID`).
+    """
+    boxes = [
+        (0, BoxGlobalState.box_key(PENDING_SMART_ASA_ID)),
+        (0, PENDING_SMART_ASA_BOX.encode()),
+    ]
+    if asset_id is not None:
+        boxes.append((0, BoxGlobalState.box_key(asset_id)))
+    return boxes
+
+
+# NOTE: Pure App Call builders, shared with the asyncio Smart ASA client.
+def holder_address(holder: Any) -> str:
+    """Address of a holder, given as an address or as an account."""
+    return holder if isinstance(holder, str) else holder.address
+
+
+def app_call_fee(params: SuggestedParams, inner_txns: int = 1) -> int:
+    """Flat fee of a Smart ASA App Call, paying for its inner transactions."""
+    return params.fee * (1 + inner_txns)
+
+
+def transfer_proofs(
+    smart_asa_contract: Contract,
+    sender_proof: Optional[list[bytes]] = None,
+    receiver_proof: Optional[list[bytes]] = None,
+) -> tuple[list[list[bytes]], Optional[int]]:
+    """
+    `asset_transfer` allow list proofs, with their max loop iterations (each
+    proof node is one).
+    """
+    # NOTE: Allow list proofs (ref. `merkle_tree`) are ignored when not needed
+    # (e.g. for mint, burn or clawback).
+    if not is_allow_list(smart_asa_contract):
+        return [], None
+    proofs = [sender_proof or [], receiver_proof or []]
+    return proofs, max(len(proof) for proof in proofs)
+
+
+def config_fields(**config_args: Any) -> dict[str, Any]:
+    """Smart ASA config fields of the given (not None) `config_*` arguments."""
+    return {
+        name.removeprefix("config_"): holder_address(value)
+        if name.endswith("_addr")
+        else value
+        for name, value in config_args.items()
+        if value is not None
+    }
+
+
+def asset_config_args(
+    smart_asa_params: dict, fields: dict[str, Any], metadata_hash: bytes = b""
+) -> list:
+    """
+    `asset_config` arguments: the config `fields` given, the current Smart ASA
+    params (and `metadata_hash`) for the others.
+    """
+    current = {**smart_asa_params, "metadata_hash": metadata_hash}
+    return [fields.get(name, current[name]) for name in CONFIG_FIELDS]
+
+
+def get_build_options(algod_client: AlgodClient, app_id: int) -> BuildOptions:
+    """
+    Build options of a Smart ASA App, as recorded on its creation (the dispatch
+    order is not recorded, so it is the default).
+    """
+    return infer_build_options(algod_client.application_info(app_id))
+
+
+def infer_build_options(app_info: dict) -> BuildOptions:
+    """Build options of a Smart ASA App, from its algod `application_info`."""
+    app_id = app_info["id"]
+    for entry in app_info["params"].get("global-state", []):
+        if base64.b64decode(entry["key"]) == BUILD_OPTIONS_KEY.encode():
+            return BuildOptions.from_flags(entry["value"]["uint"])
+    raise ValueError(f"App {app_id} is not a Smart ASA App")
+
+
+def max_batch_size(options: BuildOptions) -> int:
+    """
+    Upper bound of the accounts processed by a batch App Call: each needs a
+    Box reference too if holders are in Boxes (besides the Smart ASA ID).
+    """
+    if options.holder_boxes:
+        return (MAX_APP_TXN_FOREIGN_REFS - 1) // 2
+    return MAX_APP_TXN_ACCOUNTS
+
+
+@functools.cache
+def smart_asa_opcode_costs(
+    options: BuildOptions, max_iterations: Optional[int] = None
+) -> dict[str, dict]:
+    """
+    Static opcode costs (ref. `teal_cost`) of each Smart ASA method, with loops
+    bounded by `max_iterations` (default: the max batch size), from the cost
+    report of the build artifacts.
+    """
+    if max_iterations is None:
+        max_iterations = max_batch_size(options)
+    return {
+        name: {
+            "max": cost["max"] + cost["per_iteration"] * max_iterations,
+            "dispatch": cost["dispatch"],
+        }
+        for name, cost in load_opcode_costs(options=options).items()
+    }
+
+
+# NOTE: Build options are read once for each Smart ASA App, by algod client.
+_build_options: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+
+
+def app_build_options(algod_client: AlgodClient, app_id: int) -> BuildOptions:
+    """Build options of a Smart ASA App (ref. `get_build_options`), cached."""
+    app_options = _build_options.setdefault(algod_client, {})
+    if app_id not in app_options:
+        app_options[app_id] = get_build_options(algod_client, app_id)
+    return app_options[app_id]
+
+
+def smart_asa_budget_calls(
+    smart_asa_app: AppAccount, method: str, max_iterations: Optional[int] = None
+) -> int:
+    """
+    Bare NoOp App Calls pooling enough opcode budget for a `method` App Call,
+    from its estimated max opcode cost. The dispatch order is not inferred from
+    the App, so the slowest method dispatch is assumed.
+    """
+    options = app_build_options(smart_asa_app.algod_client, smart_asa_app.app_id)
+    return method_budget_calls(options, method, max_iterations)
+
+
+def method_budget_calls(
+    options: BuildOptions, method: str, max_iterations: Optional[int] = None
+) -> int:
+    """Bare NoOp App Calls for a `method` App Call of the given build options."""
+    return budget_app_calls(
+        method_opcode_cost(options, method, max_iterations),
+        method_opcode_cost(options, BARE_CALL_NAME),
+    )
+
+
+def method_opcode_cost(
+    options: BuildOptions, method: str, max_iterations: Optional[int] = None
+) -> int:
+    """Max opcode cost of a `method` App Call, with the slowest dispatch."""
+    costs = smart_asa_opcode_costs(options, max_iterations)
+    if method == BARE_CALL_NAME:
+        return costs[method]["max"]
+    slowest_dispatch = max(c["dispatch"] for c in costs.values())
+    return costs[method]["max"] - costs[method]["dispatch"] + slowest_dispatch
+
+
+def get_smart_asa_holder_state(
+    smart_asa_contract: Contract,
+    smart_asa_app: AppAccount,
+    account: Union[str, Account],
+    asset_id: int = 0,
+) -> dict[str, Union[int, bool]]:
+    """
+    Smart ASA holder fields of `account`, whatever their layout (multi-asset
+    Apps require the Smart ASA `asset_id`).
+    """
+    if not is_box_registry(smart_asa_contract):
+        state = smart_asa_app.app_local_state(account)
+    else:
+        [(_, box_name)] = holder_boxes(smart_asa_contract, account, asset_id=asset_id)
+        try:
+            box = smart_asa_app.algod_client.application_box_by_name(
+                smart_asa_app.app_id, box_name
+            )
+        except AlgodHTTPError:
+            # NOTE: Holders without a Box have the `default_frozen` status.
+            return {}
+        value = base64.b64decode(box["value"])
+        state = {BoxLocalState.RECORD: int.from_bytes(value, "big")}
+    if not state:
+        return {}
+    freeze_epoch = get_smart_asa_state(smart_asa_app, asset_id)["freeze_epoch"]
+    return decode_local_state(state, freeze_epoch)
+
+
+def get_smart_asa_app(algod_client: AlgodClient, smart_asa_id: int) -> AppAccount:
+    """Smart ASA App governing a Smart ASA (ref. Underlying ASA url)."""
+    return AppAccount.from_app_id(
+        app_id=smart_asa_app_id(algod_client.asset_info(smart_asa_id)["params"]),
         algod_client=algod_client,
     )
-    smart_asa_state = smart_asa_app_account.global_state()
-    smart_asa_app = algod_client.application_info(smart_asa_app_id)["params"]
-    circulating_supply = UNDERLYING_ASA_TOTAL.value - smart_asa_app_account.asa_balance(
-        smart_asa_id
+
+
+def smart_asa_app_id(underlying_asa_params: dict) -> int:
+    """Smart ASA App ID bound in the Underlying ASA url."""
+    assert SMART_ASA_APP_BINDING in underlying_asa_params["url"]
+    return int(underlying_asa_params["url"].replace(SMART_ASA_APP_BINDING, ""))
+
+
+def get_smart_asa_state(smart_asa_app: AppAccount, smart_asa_id: int) -> dict:
+    """Smart ASA fields of a Smart ASA App, whatever their layout."""
+    smart_asa_state = decode_global_state(smart_asa_app.global_state())
+    if not smart_asa_state:
+        # NOTE: Multi-asset Smart ASA Apps keep each Smart ASA in a Box.
+        box = smart_asa_app.algod_client.application_box_by_name(
+            smart_asa_app.app_id, BoxGlobalState.box_key(smart_asa_id)
+        )
+        smart_asa_state = BoxGlobalState.decode_box(
+            smart_asa_id, base64.b64decode(box["value"])
+        )
+    return smart_asa_state
+
+
+def get_smart_asa_params(algod_client: AlgodClient, smart_asa_id: int) -> dict:
+    smart_asa_app_account = get_smart_asa_app(algod_client, smart_asa_id)
+    return decode_smart_asa_params(
+        smart_asa_id,
+        smart_asa_app_account,
+        algod_client.application_info(smart_asa_app_account.app_id)["params"],
+        get_smart_asa_state(smart_asa_app_account, smart_asa_id),
+        smart_asa_app_account.asa_balance(smart_asa_id),
     )
+
+
+def decode_smart_asa_params(
+    smart_asa_id: int,
+    smart_asa_app_account: AppAccount,
+    smart_asa_app: dict,
+    smart_asa_state: dict,
+    smart_asa_app_balance: int,
+) -> dict:
+    """
+    Smart ASA parameters, from the Smart ASA App params, the decoded Smart ASA
+    fields and the Underlying ASA balance of the Smart ASA App.
+    """
+    circulating_supply = UNDERLYING_ASA_TOTAL.value - smart_asa_app_balance
     return {
         "smart_asa_id": smart_asa_id,
-        "app_id": smart_asa_app_id,
+        "app_id": smart_asa_app_account.app_id,
         "app_address": smart_asa_app_account.address,
         "creator_addr": smart_asa_app["creator"],
         "circulating_supply": circulating_supply,
@@ -48,6 +360,7 @@ def get_smart_asa_params(algod_client: AlgodClient, smart_asa_id: int) -> dict:
         "total": int(smart_asa_state["total"]),
         "decimals": int(smart_asa_state["decimals"]),
         "frozen": bool(smart_asa_state["frozen"]),
+        "freeze_epoch": int(smart_asa_state["freeze_epoch"]),
         "default_frozen": bool(smart_asa_state["default_frozen"]),
         "manager_addr": encode_address(smart_asa_state["manager_addr"]),
         "reserve_addr": encode_address(smart_asa_state["reserve_addr"]),
@@ -56,14 +369,36 @@ def get_smart_asa_params(algod_client: AlgodClient, smart_asa_id: int) -> dict:
     }
 
 
+def decode_smart_asa_events(txn_info: dict) -> list[tuple[str, dict]]:
+    """
+    Smart ASA events (name and arguments) logged by a confirmed App Call, in
+    order. Other logs (e.g. ABI return values) are skipped.
+    """
+    events = []
+    for log in txn_info.get("logs", []):
+        event = decode_event(base64.b64decode(log))
+        if event is not None:
+            events.append(event)
+    return events
+
+
+def get_smart_asa_events(
+    algod_client: AlgodClient, txid: str
+) -> list[tuple[str, dict]]:
+    return decode_smart_asa_events(algod_client.pending_transaction_info(txid))
+
+
 def smart_asa_app_create(
-    teal_approval: str, teal_clear: str, creator: Account
+    teal_approval: Union[str, bytes],
+    teal_clear: Union[str, bytes],
+    creator: Account,
+    options: BuildOptions = DEFAULT_BUILD_OPTIONS,
 ) -> AppAccount:
     return creator.create_asc(
         approval_program=teal_approval,
         clear_program=teal_clear,
-        global_schema=GlobalState.schema(),
-        local_schema=LocalState.schema(),
+        global_schema=global_state_schema(options),
+        local_schema=local_state_schema(options),
     )
 
 
@@ -83,12 +418,16 @@ def smart_asa_create(
     freeze_addr: Optional[Union[str, Account]] = None,
     clawback_addr: Optional[Union[str, Account]] = None,
     save_abi_call: Optional[str] = None,
-) -> int:
+) -> Union[int, PendingTxn]:
 
     params = get_params(creator.algod_client)
-    abi_call_fee = params.fee * 2
+    abi_call_fee = app_call_fee(params)
 
-    return creator.abi_call(
+    boxes = None
+    if is_multi_asset(smart_asa_contract):
+        boxes = pending_smart_asa_boxes()
+
+    smart_asa_id = creator.abi_call(
         smart_asa_contract.get_method_by_name("asset_create"),
         total,
         decimals,
@@ -104,6 +443,34 @@ def smart_asa_create(
         app=smart_asa_app,
         fee=abi_call_fee,
         save_abi_call=save_abi_call,
+        boxes=boxes,
+        budget_calls=smart_asa_budget_calls(smart_asa_app, "asset_create"),
+    )
+    if not is_multi_asset(smart_asa_contract):
+        return smart_asa_id
+
+    # NOTE: The new Smart ASA Box can be referenced once its ID is known.
+    smart_asa_id = resolve(smart_asa_id)
+    resolve(
+        smart_asa_register(smart_asa_contract, smart_asa_app, creator, smart_asa_id)
+    )
+    return smart_asa_id
+
+
+def smart_asa_register(
+    smart_asa_contract: Contract,
+    smart_asa_app: AppAccount,
+    creator: Account,
+    asset_id: int,
+    save_abi_call: Optional[str] = None,
+) -> Union[None, PendingTxn]:
+    """Register the pending Smart ASA `asset_id` of a multi-asset Smart ASA App."""
+    return creator.abi_call(
+        smart_asa_contract.get_method_by_name("asset_register"),
+        asset_id,
+        app=smart_asa_app,
+        save_abi_call=save_abi_call,
+        boxes=pending_smart_asa_boxes(asset_id),
     )
 
 
@@ -114,10 +481,10 @@ def smart_asa_optin(
     caller: Account,
     debug_txn: Optional[TransactionWithSigner] = None,
     save_abi_call: Optional[str] = None,
-) -> None:
+) -> Optional[PendingTxn]:
 
     params = get_params(caller.algod_client)
-    abi_call_fee = params.fee
+    abi_call_fee = app_call_fee(params, inner_txns=0)
 
     if debug_txn:
         asa_optin_txn = debug_txn
@@ -134,7 +501,12 @@ def smart_asa_optin(
             signer=caller,
         )
 
-    caller.abi_call(
+    if is_box_registry(smart_asa_contract):
+        # NOTE: Holders just opt-in to the Underlying ASA.
+        txn_info = caller.sign_send_wait(asa_optin_txn.txn, save_txn=save_abi_call)
+        return txn_info if caller.pipeline is not None else None
+
+    return caller.abi_call(
         smart_asa_contract.get_method_by_name("asset_app_optin"),
         asset_id,
         asa_optin_txn,
@@ -142,6 +514,7 @@ def smart_asa_optin(
         app=smart_asa_app,
         fee=abi_call_fee,
         save_abi_call=save_abi_call,
+        budget_calls=smart_asa_budget_calls(smart_asa_app, "asset_app_optin"),
     )
 
 
@@ -153,10 +526,10 @@ def smart_asa_closeout(
     close_to: Union[str, Account],
     debug_txn: Optional[TransactionWithSigner] = None,
     save_abi_call: Optional[str] = None,
-) -> None:
+) -> Optional[PendingTxn]:
 
     params = get_params(caller.algod_client)
-    abi_call_fee = params.fee * 2
+    abi_call_fee = app_call_fee(params)
 
     if debug_txn:
         asa_close_to_txn = debug_txn
@@ -174,15 +547,22 @@ def smart_asa_closeout(
             signer=caller,
         )
 
-    caller.abi_call(
+    if is_box_registry(smart_asa_contract):
+        on_complete = OnComplete.NoOpOC
+    else:
+        on_complete = OnComplete.CloseOutOC
+
+    return caller.abi_call(
         smart_asa_contract.get_method_by_name("asset_app_closeout"),
         asset_id,
         close_to,
-        on_complete=OnComplete.CloseOutOC,
+        on_complete=on_complete,
         app=smart_asa_app,
         fee=abi_call_fee,
         group_extra_txns=[asa_close_to_txn],
         save_abi_call=save_abi_call,
+        boxes=smart_asa_boxes(smart_asa_contract, asset_id, caller, close_to),
+        budget_calls=smart_asa_budget_calls(smart_asa_app, "asset_app_closeout"),
     )
 
 
@@ -203,54 +583,102 @@ def smart_asa_config(
     config_freeze_addr: Optional[Union[str, Account]] = None,
     config_clawback_addr: Optional[Union[str, Account]] = None,
     save_abi_call: Optional[str] = None,
-) -> int:
+) -> Union[int, PendingTxn]:
 
+    fields = config_fields(
+        config_total=config_total,
+        config_decimals=config_decimals,
+        config_default_frozen=config_default_frozen,
+        config_unit_name=config_unit_name,
+        config_name=config_name,
+        config_url=config_url,
+        config_metadata_hash=config_metadata_hash,
+        config_manager_addr=config_manager_addr,
+        config_reserve_addr=config_reserve_addr,
+        config_freeze_addr=config_freeze_addr,
+        config_clawback_addr=config_clawback_addr,
+    )
     s_asa = get_smart_asa_params(manager.algod_client, asset_id)
+    metadata_hash = b""
     if config_metadata_hash is None:
         smart_asa_params = normalize_getter_params(
-            smart_asa_get(
-                smart_asa_contract=smart_asa_contract,
-                smart_asa_app=smart_asa_app,
-                caller=manager,
-                asset_id=asset_id,
-                getter="get_asset_config",
+            resolve(
+                smart_asa_get(
+                    smart_asa_contract=smart_asa_contract,
+                    smart_asa_app=smart_asa_app,
+                    caller=manager,
+                    asset_id=asset_id,
+                    getter="get_asset_config",
+                )
             )
         )
-        config_metadata_hash = bytes(smart_asa_params.metadata_hash)
-
-    if config_manager_addr is None:
-        config_manager_addr = Account(address=s_asa["manager_addr"])
-    if config_reserve_addr is None:
-        config_reserve_addr = Account(address=s_asa["reserve_addr"])
-    if config_freeze_addr is None:
-        config_freeze_addr = Account(address=s_asa["freeze_addr"])
-    if config_clawback_addr is None:
-        config_clawback_addr = Account(address=s_asa["clawback_addr"])
+        metadata_hash = bytes(smart_asa_params.metadata_hash)
 
     params = get_params(manager.algod_client)
-    abi_call_fee = params.fee * 2
 
-    manager.abi_call(
+    pending = manager.abi_call(
         smart_asa_contract.get_method_by_name("asset_config"),
         asset_id,
-        s_asa["total"] if config_total is None else config_total,
-        s_asa["decimals"] if config_decimals is None else config_decimals,
-        s_asa["default_frozen"]
-        if config_default_frozen is None
-        else config_default_frozen,
-        s_asa["unit_name"] if config_unit_name is None else config_unit_name,
-        s_asa["name"] if config_name is None else config_name,
-        s_asa["url"] if config_url is None else config_url,
-        config_metadata_hash,
-        config_manager_addr,
-        config_reserve_addr,
-        config_freeze_addr,
-        config_clawback_addr,
+        *asset_config_args(s_asa, fields, metadata_hash),
         app=smart_asa_app,
-        fee=abi_call_fee,
+        fee=app_call_fee(params),
         save_abi_call=save_abi_call,
+        boxes=smart_asa_boxes(smart_asa_contract, asset_id),
+        budget_calls=smart_asa_budget_calls(smart_asa_app, "asset_config"),
     )
-    return asset_id
+    # NOTE: Pipelined calls return their pending handle instead.
+    return asset_id if pending is None else pending
+
+
+def smart_asa_config_partial(
+    smart_asa_contract: Contract,
+    smart_asa_app: AppAccount,
+    manager: Account,
+    asset_id: int,
+    config_total: Optional[int] = None,
+    config_decimals: Optional[int] = None,
+    config_default_frozen: Optional[bool] = None,
+    config_unit_name: Optional[str] = None,
+    config_name: Optional[str] = None,
+    config_url: Optional[str] = None,
+    config_metadata_hash: Optional[bytes] = None,
+    config_manager_addr: Optional[Union[str, Account]] = None,
+    config_reserve_addr: Optional[Union[str, Account]] = None,
+    config_freeze_addr: Optional[Union[str, Account]] = None,
+    config_clawback_addr: Optional[Union[str, Account]] = None,
+    save_abi_call: Optional[str] = None,
+) -> Union[int, PendingTxn]:
+    """
+    Configure just the given Smart ASA parameters (`asset_config_partial`),
+    with no need to read the unchanged ones first.
+    """
+    fields = config_fields(
+        config_total=config_total,
+        config_decimals=config_decimals,
+        config_default_frozen=config_default_frozen,
+        config_unit_name=config_unit_name,
+        config_name=config_name,
+        config_url=config_url,
+        config_metadata_hash=config_metadata_hash,
+        config_manager_addr=config_manager_addr,
+        config_reserve_addr=config_reserve_addr,
+        config_freeze_addr=config_freeze_addr,
+        config_clawback_addr=config_clawback_addr,
+    )
+    params = get_params(manager.algod_client)
+
+    pending = manager.abi_call(
+        smart_asa_contract.get_method_by_name("asset_config_partial"),
+        asset_id,
+        *encode_config_fields(**fields),
+        app=smart_asa_app,
+        fee=app_call_fee(params),
+        save_abi_call=save_abi_call,
+        boxes=smart_asa_boxes(smart_asa_contract, asset_id),
+        budget_calls=smart_asa_budget_calls(smart_asa_app, "asset_config_partial"),
+    )
+    # NOTE: Pipelined calls return their pending handle instead.
+    return asset_id if pending is None else pending
 
 
 def smart_asa_transfer(
@@ -261,22 +689,138 @@ def smart_asa_transfer(
     caller: Account,
     asset_receiver: Account,
     asset_sender: Optional[Union[str, Account]] = None,
+    sender_proof: Optional[list[bytes]] = None,
+    receiver_proof: Optional[list[bytes]] = None,
     save_abi_call: Optional[str] = None,
-) -> None:
+) -> Optional[PendingTxn]:
 
     params = get_params(caller.algod_client)
-    abi_call_fee = params.fee * 2
+    if asset_sender is None:
+        asset_sender = caller
+    proofs, max_iterations = transfer_proofs(
+        smart_asa_contract, sender_proof, receiver_proof
+    )
 
-    caller.abi_call(
+    return caller.abi_call(
         smart_asa_contract.get_method_by_name("asset_transfer"),
         xfer_asset,
         asset_amount,
-        caller if asset_sender is None else asset_sender,
+        asset_sender,
         asset_receiver,
+        *proofs,
         app=smart_asa_app,
-        fee=abi_call_fee,
+        fee=app_call_fee(params),
         save_abi_call=save_abi_call,
+        boxes=smart_asa_boxes(
+            smart_asa_contract, xfer_asset, asset_sender, asset_receiver
+        ),
+        budget_calls=smart_asa_budget_calls(
+            smart_asa_app, "asset_transfer", max_iterations
+        ),
+    )
+
+
+def transfer_batch_size(
+    smart_asa_contract: Contract,
+    caller: Account,
+    asset_sender: Union[str, Account],
+) -> int:
+    """
+    Max transfers of an `asset_transfer_batch` call, bounded by the foreign
+    references of an App Call (receivers must be referenced).
+    """
+    sender = holder_address(asset_sender)
+    accounts = MAX_APP_TXN_ACCOUNTS
+    references = MAX_APP_TXN_FOREIGN_REFS - 1  # Smart ASA ID
+    if is_multi_asset(smart_asa_contract):
+        references -= 1  # Smart ASA Box
+    if sender != caller.address:
+        accounts -= 1
+        references -= 1
+    if not is_box_registry(smart_asa_contract):
+        return min(accounts, references)
+    if sender == caller.address:
+        references -= 1  # Sender Box
+    # Receivers need both an account and a Box reference
+    return min(accounts, references // 2)
+
+
+def smart_asa_transfer_batch(
+    smart_asa_contract: Contract,
+    smart_asa_app: AppAccount,
+    xfer_asset: int,
+    caller: Account,
+    transfers: list[tuple[Union[str, Account], int]],
+    asset_sender: Optional[Union[str, Account]] = None,
+    save_abi_call: Optional[str] = None,
+    max_wait_rounds: int = 10,
+) -> list[Optional[PendingTxn]]:
+    """
+    Transfer Smart ASA to many receivers (as `(receiver, amount)`), with as
+    few `asset_transfer_batch` App Calls as possible, chained into atomic
+    groups: an App Call references at most `transfer_batch_size` receivers,
+    a group up to 16 times as many (less its budget calls). Returns the
+    pending handle of each group, if pipelined.
+    """
+    assert caller.algod_client
+    params = get_params(caller.algod_client)
+    method = smart_asa_contract.get_method_by_name("asset_transfer_batch")
+    if asset_sender is None:
+        asset_sender = caller
+    sender = holder_address(asset_sender)
+
+    budget_calls = smart_asa_budget_calls(smart_asa_app, "asset_transfer_batch")
+    batches = list(
+        chunks(transfers, transfer_batch_size(smart_asa_contract, caller, sender))
     )
+    group_calls = AtomicTransactionComposer.MAX_GROUP_SIZE // (1 + budget_calls)
+
+    pending: list[Optional[PendingTxn]] = []
+    for group in chunks(batches, group_calls):
+        atc = AtomicTransactionComposer()
+        for i, batch in enumerate(group):
+            receivers = [holder_address(r) for r, _ in batch]
+            holders = (
+                [caller.address, *receivers] if sender == caller.address else receivers
+            )
+            atc.add_method_call(
+                app_id=smart_asa_app.app_id,
+                method=method,
+                sender=caller.address,
+                # NOTE: Outer fee pays an inner transfer for each receiver.
+                sp=get_params(caller.algod_client, app_call_fee(params, len(batch))),
+                signer=caller,
+                method_args=[
+                    xfer_asset,
+                    sender,
+                    [
+                        (receiver, amount)
+                        for receiver, (_, amount) in zip(receivers, batch)
+                    ],
+                ],
+                accounts=receivers,
+                boxes=smart_asa_boxes(smart_asa_contract, xfer_asset, *holders),
+                # NOTE: Calls of the group would be otherwise identical.
+                note=f"batch {i}".encode(),
+            )
+        for i in range(budget_calls * len(group)):
+            budget_call = ApplicationNoOpTxn(
+                sender=caller.address,
+                sp=params,
+                index=smart_asa_app.app_id,
+                note=f"budget {i}".encode(),
+            )
+            atc.add_transaction(TransactionWithSigner(txn=budget_call, signer=caller))
+        atc.build_group()
+        atc.gather_signatures()
+        if save_abi_call:
+            write_to_file(atc.signed_txns, save_abi_call, overwrite=True)
+        if caller.pipeline is not None:
+            pending.append(caller.pipeline.submit(atc.signed_txns))
+        else:
+            get_watcher(caller.algod_client).execute(atc, max_wait_rounds)
+            pending.append(None)
+    return pending
 
 
 def smart_asa_freeze(
@@ -286,18 +830,20 @@ def smart_asa_freeze(
     freeze_asset: int,
     asset_frozen: bool = False,
     save_abi_call: Optional[str] = None,
-) -> None:
+) -> Optional[PendingTxn]:
 
     params = get_params(freezer.algod_client)
-    abi_call_fee = params.fee * 2
+    abi_call_fee = app_call_fee(params)
 
-    freezer.abi_call(
+    return freezer.abi_call(
         smart_asa_contract.get_method_by_name("asset_freeze"),
         freeze_asset,
         asset_frozen,
         app=smart_asa_app,
         fee=abi_call_fee,
         save_abi_call=save_abi_call,
+        boxes=smart_asa_boxes(smart_asa_contract, freeze_asset),
+        budget_calls=smart_asa_budget_calls(smart_asa_app, "asset_freeze"),
     )
 
 
@@ -309,12 +855,12 @@ def smart_asa_account_freeze(
     target_account: Account,
     account_frozen: bool = False,
     save_abi_call: Optional[str] = None,
-) -> None:
+) -> Optional[PendingTxn]:
 
     params = get_params(freezer.algod_client)
-    abi_call_fee = params.fee * 2
+    abi_call_fee = app_call_fee(params)
 
-    freezer.abi_call(
+    return freezer.abi_call(
         smart_asa_contract.get_method_by_name("account_freeze"),
         freeze_asset,
         target_account,
@@ -322,6 +868,129 @@ def smart_asa_account_freeze(
         app=smart_asa_app,
         fee=abi_call_fee,
         save_abi_call=save_abi_call,
+        boxes=smart_asa_boxes(smart_asa_contract, freeze_asset, target_account),
+        budget_calls=smart_asa_budget_calls(smart_asa_app, "account_freeze"),
+    )
+
+
+def freeze_batch_size(smart_asa_contract: Contract) -> int:
+    """
+    Max accounts of an `account_freeze_batch` call, bounded by the foreign
+    references of an App Call.
+    """
+    references = MAX_APP_TXN_FOREIGN_REFS - 1  # Smart ASA ID
+    if is_multi_asset(smart_asa_contract):
+        references -= 1  # Smart ASA Box
+    if is_box_registry(smart_asa_contract):
+        # Accounts need both an account and a Box reference
+        references //= 2
+    return min(MAX_APP_TXN_ACCOUNTS, references)
+
+
+def smart_asa_account_freeze_batch(
+    smart_asa_contract: Contract,
+    smart_asa_app: AppAccount,
+    freezer: Account,
+    freeze_asset: int,
+    target_accounts: list[Union[str, Account]],
+    account_frozen: bool = False,
+    max_wait_rounds: int = 10,
+) -> dict[str, Optional[str]]:
+    """
+    Freeze/unfreeze many accounts with as few `account_freeze_batch` App Calls
+    as possible, packed into atomic groups. Returns the error of each address
+    (`None` if succeeded): rejected groups are bisected (down to single
+    addresses) to find the failing addresses, timed out groups fail for all
+    their addresses.
+    """
+    assert freezer.algod_client
+    params = get_params(freezer.algod_client)
+    method = smart_asa_contract.get_method_by_name("account_freeze_batch")
+
+    addresses = [holder_address(a) for a in target_accounts]
+    batches = list(
+        chunks(list(dict.fromkeys(addresses)), freeze_batch_size(smart_asa_contract))
+    )
+
+    results: dict[str, Optional[str]] = {}
+
+    def freeze_group(group: Sequence[Sequence[str]]) -> None:
+        atc = AtomicTransactionComposer()
+        for batch in group:
+            atc.add_method_call(
+                app_id=smart_asa_app.app_id,
+                method=method,
+                sender=freezer.address,
+                sp=params,
+                signer=freezer,
+                method_args=[freeze_asset, account_frozen],
+                accounts=list(batch),
+                boxes=smart_asa_boxes(smart_asa_contract, freeze_asset, *batch),
+            )
+        group_addresses = [address for batch in group for address in batch]
+        atc.gather_signatures()
+        try:
+            get_watcher(freezer.algod_client).execute(atc, max_wait_rounds)
+        except ConfirmationTimeoutError as err:
+            results.update(dict.fromkeys(group_addresses, str(err)))
+        except (AlgodHTTPError, TransactionRejectedError) as err:
+            if len(group) > 1:
+                freeze_group(group[: len(group) // 2])
+                freeze_group(group[len(group) // 2 :])
+            elif len(group_addresses) > 1:
+                freeze_group([[address] for address in group_addresses])
+            else:
+                results.update(dict.fromkeys(group_addresses, str(err)))
+        else:
+            results.update(dict.fromkeys(group_addresses))
+
+    for group in chunks(batches, AtomicTransactionComposer.MAX_GROUP_SIZE):
+        freeze_group(group)
+    return results
+
+
+def smart_asa_account_unfreeze_all(
+    smart_asa_contract: Contract,
+    smart_asa_app: AppAccount,
+    freezer: Account,
+    freeze_asset: int,
+    save_abi_call: Optional[str] = None,
+) -> Optional[PendingTxn]:
+
+    params = get_params(freezer.algod_client)
+    abi_call_fee = app_call_fee(params)
+
+    return freezer.abi_call(
+        smart_asa_contract.get_method_by_name("account_unfreeze_all"),
+        freeze_asset,
+        app=smart_asa_app,
+        fee=abi_call_fee,
+        save_abi_call=save_abi_call,
+        boxes=smart_asa_boxes(smart_asa_contract, freeze_asset),
+        budget_calls=smart_asa_budget_calls(smart_asa_app, "account_unfreeze_all"),
+    )
+
+
+def smart_asa_allow_list(
+    smart_asa_contract: Contract,
+    smart_asa_app: AppAccount,
+    freezer: Account,
+    allow_asset: int,
+    allow_list_root: bytes,
+    save_abi_call: Optional[str] = None,
+) -> Optional[PendingTxn]:
+
+    params = get_params(freezer.algod_client)
+    abi_call_fee = app_call_fee(params)
+
+    return freezer.abi_call(
+        smart_asa_contract.get_method_by_name("asset_allow_list"),
+        allow_asset,
+        allow_list_root,
+        app=smart_asa_app,
+        fee=abi_call_fee,
+        save_abi_call=save_abi_call,
+        budget_calls=smart_asa_budget_calls(smart_asa_app, "asset_allow_list"),
     )
 
 
@@ -331,17 +1000,19 @@ def smart_asa_destroy(
     manager: Account,
     destroy_asset: int,
     save_abi_call: Optional[str] = None,
-) -> None:
+) -> Optional[PendingTxn]:
 
     params = get_params(manager.algod_client)
-    abi_call_fee = params.fee * 2
+    abi_call_fee = app_call_fee(params)
 
-    manager.abi_call(
+    return manager.abi_call(
         smart_asa_contract.get_method_by_name("asset_destroy"),
         destroy_asset,
         app=smart_asa_app,
         fee=abi_call_fee,
         save_abi_call=save_abi_call,
+        boxes=smart_asa_boxes(smart_asa_contract, destroy_asset),
+        budget_calls=smart_asa_budget_calls(smart_asa_app, "asset_destroy"),
     )
 
 
@@ -362,4 +1033,75 @@ def smart_asa_get(
         *args,
         app=smart_asa_app,
         save_abi_call=save_abi_call,
+        boxes=smart_asa_boxes(smart_asa_contract, asset_id, *args[1:]),
+        budget_calls=smart_asa_budget_calls(smart_asa_app, getter),
+    )
+
+
+def smart_asa_get_state(
+    smart_asa_contract: Contract,
+    smart_asa_app: AppAccount,
+    caller: Account,
+    asset_id: int,
+    save_abi_call: Optional[str] = None,
+) -> SmartASAState:
+    """
+    Smart ASA configuration, global frozen status, circulating supply and
+    opt-in minimum balance, with a single `get_asset_state` App Call.
+    """
+    smart_asa_state = normalize_getter_state(
+        resolve(
+            smart_asa_get(
+                smart_asa_contract=smart_asa_contract,
+                smart_asa_app=smart_asa_app,
+                caller=caller,
+                asset_id=asset_id,
+                getter="get_asset_state",
+                save_abi_call=save_abi_call,
+            )
+        )
+    )
+    return smart_asa_state._replace(metadata_hash=bytes(smart_asa_state.metadata_hash))
+
+
+def smart_asa_get_accounts_frozen(
+    smart_asa_contract: Contract,
+    smart_asa_app: AppAccount,
+    caller: Account,
+    asset_id: int,
+    accounts: list[Union[str, Account]],
+    max_wait_rounds: int = 10,
+) -> dict[str, bool]:
+    """
+    Smart ASA local frozen status of many accounts, with as few
+    `get_accounts_frozen` App Calls as possible (as many accounts each as
+    `freeze_batch_size`), packed into atomic groups.
+    """
+    assert caller.algod_client
+    params = get_params(caller.algod_client)
+    method = smart_asa_contract.get_method_by_name("get_accounts_frozen")
+
+    addresses = [holder_address(a) for a in accounts]
+    batches = list(
+        chunks(list(dict.fromkeys(addresses)), freeze_batch_size(smart_asa_contract))
     )
+
+    frozen: dict[str, bool] = {}
+    for group in chunks(batches, AtomicTransactionComposer.MAX_GROUP_SIZE):
+        atc = AtomicTransactionComposer()
+        for batch in group:
+            atc.add_method_call(
+                app_id=smart_asa_app.app_id,
+                method=method,
+                sender=caller.address,
+                sp=params,
+                signer=caller,
+                method_args=[asset_id],
+                accounts=list(batch),
+                boxes=smart_asa_boxes(smart_asa_contract, asset_id, *batch),
+            )
+        atc.gather_signatures()
+        results = get_watcher(caller.algod_client).execute(atc, max_wait_rounds)
+        for batch, result in zip(group, results):
+            frozen.update(zip(batch, result))
+    return frozen
@@ -5,6 +5,7 @@ Smart ASA test suite
 __author__ = "Cosimo Bassi, Stefano De Angelis"
 __email__ = "<cosimo.bassi@algorand.com>, <stefano.deangelis@algorand.com>"
 
+import base64
 import json
 import pprint
 
@@ -15,42 +16,122 @@ import pytest
 from pyteal import compileTeal, Expr, Int, Mode, Reject, Router
 
 from algosdk.abi import Contract
-from algosdk.atomic_transaction_composer import TransactionWithSigner
+from algosdk.atomic_transaction_composer import (
+    AtomicTransactionComposer,
+    TransactionWithSigner,
+)
 from algosdk.error import AlgodHTTPError
 from algosdk.constants import ZERO_ADDRESS
-from algosdk.future.transaction import AssetTransferTxn, PaymentTxn
+from algosdk.future.transaction import AssetTransferTxn, PaymentTxn, retrieve_from_file
 
 from sandbox import Sandbox
 from account import Account, AppAccount
+from merkle_tree import EMPTY_LEAF, MerkleTree
+from pipeline import PendingTxn, Pipeline
+from smart_asa_batch import SmartASABatch
 
 from smart_asa_asc import (
+    CONFIG_FIELDS,
+    HOT_METHODS,
     UNDERLYING_ASA_TOTAL,
+    BoxGlobalState,
+    BoxLocalState,
+    BuildOptions,
+    COMPILED_OUT_METHODS,
+    Event,
+    GlobalState,
     LocalState,
+    MultiAssetLocalState,
+    PackedGlobalState,
+    PackedLocalState,
+    SMART_ASA_EVENTS,
     compile_stateful,
+    decode_config_fields,
+    decode_event,
+    decode_global_state,
+    decode_local_state,
+    encode_config_fields,
+    global_state_layout,
+    global_state_schema,
+    hot_dispatch_order,
+    local_state_layout,
+    local_state_schema,
     smart_asa_abi,
+    smart_asa_router,
+    teal_version,
 )
 
 from smart_asa_client import (
+    asset_config_args,
+    config_fields,
+    decode_smart_asa_events,
+    get_smart_asa_events,
+    get_smart_asa_holder_state,
     get_smart_asa_params,
+    holder_boxes,
+    infer_build_options,
+    max_batch_size,
     get_params,
+    get_smart_asa_app,
+    freeze_batch_size,
+    pending_smart_asa_boxes,
     smart_asa_account_freeze,
+    smart_asa_account_freeze_batch,
+    smart_asa_account_unfreeze_all,
+    smart_asa_allow_list,
     smart_asa_app_create,
+    smart_asa_boxes,
+    smart_asa_budget_calls,
     smart_asa_closeout,
     smart_asa_config,
+    smart_asa_config_partial,
     smart_asa_create,
     smart_asa_destroy,
     smart_asa_freeze,
     smart_asa_get,
+    smart_asa_get_accounts_frozen,
+    smart_asa_get_state,
+    smart_asa_opcode_costs,
     smart_asa_optin,
     smart_asa_transfer,
+    smart_asa_transfer_batch,
+    transfer_batch_size,
+    MAX_APP_TXN_ACCOUNTS,
+)
+
+from teal_cost import BARE_CALL_NAME, analyze, budget_app_calls
+
+from smart_asa_artifacts import (
+    CONTRACT_JSON,
+    COSTS_JSON,
+    FEATURES,
+    artifacts_dir,
+    artifacts_key,
+    build_artifacts,
+    build_variant,
+    load_contract,
+    load_opcode_costs,
+    load_teal_programs,
+    opcode_cost_report,
 )
 
 from utils import (
+    assemble_program,
+    chunks,
+    compile_program,
     get_local_state,
     normalize_getter_params,
 )
 
 INITIAL_FUNDS = 100_000_000
+PACKED_GLOBAL_STATE = BuildOptions(packed_global_state=True)
+PACKED_LOCAL_STATE = BuildOptions(packed_local_state=True)
+BOX_REGISTRY = BuildOptions(box_registry=True)
+MULTI_ASSET = BuildOptions(multi_asset=True)
+MERKLE_ALLOW_LIST = BuildOptions(merkle_allow_list=True)
+WITHOUT_ALL_FEATURES = BuildOptions(
+    without_account_freeze=True, without_clawback=True, without_burn=True
+)
 
 
 @pytest.fixture(scope="session")
@@ -120,6 +201,23 @@ def smart_asa_app(
     return app_account
 
 
+@pytest.fixture(scope="function")
+def smart_asa_app_factory(creator: Account) -> Callable:
+    def _factory(options: BuildOptions) -> AppAccount:
+        approval, clear, _ = smart_asa_router(options).build_program()
+        app_account = smart_asa_app_create(
+            teal_approval=compile_stateful(approval, teal_version(options)),
+            teal_clear=compile_stateful(clear, teal_version(options)),
+            creator=creator,
+            options=options,
+        )
+        creator.pay(receiver=app_account, amount=1_000_000)
+        print(f"\n --- Creating Smart ASA App with {options}...")
+        return app_account
+
+    return _factory
+
+
 @pytest.fixture(
     scope="function",
     params=[False, True],
@@ -241,6 +339,62 @@ def test_compile(
     with open("smart_asa_clear.teal", "w") as f:
         f.write(teal_clear_program)
 
+    costs = opcode_cost_report(teal_approval_program, smart_asa_contract)
+    with open("smart_asa_costs.json", "w") as f:
+        f.write(json.dumps(costs, indent=4) + "\n")
+
+
+class TestArtifactsCache:
+    def test_build_once(self, tmp_path, monkeypatch, teal_approval: str) -> None:
+        approval, _ = load_teal_programs(tmp_path)
+        assert approval == teal_approval
+
+        def _rebuild():
+            raise AssertionError("Smart ASA App rebuilt with a fresh cache")
+
+        monkeypatch.setattr(smart_asa_abi, "build_program", _rebuild)
+        assert load_teal_programs(tmp_path)[0] == teal_approval
+
+    def test_key_changes_with_build_config(self, monkeypatch) -> None:
+        key = artifacts_key()
+        assert key == artifacts_key()
+        monkeypatch.setattr("smart_asa_artifacts.TEAL_VERSION", 8)
+        assert key != artifacts_key()
+
+    def test_load_contract(self, tmp_path, smart_asa_contract: Contract) -> None:
+        # Falls back to `smart_asa_abi.json` if nothing has been cached yet
+        fallback = load_contract(tmp_path)
+        assert {m.name for m in fallback.methods} == {
+            m.name for m in smart_asa_contract.methods
+        }
+        build_artifacts(tmp_path)
+        assert load_contract(tmp_path).dictify() == smart_asa_contract.dictify()
+
+    def test_load_contract_variant(self, tmp_path, monkeypatch) -> None:
+        options = BuildOptions(packed_local_state=True)
+        contract = load_contract(tmp_path, options)
+        # Non default builds are cached too, as any other build
+        assert (artifacts_dir(tmp_path, options) / CONTRACT_JSON).exists()
+
+        def _rebuild(options):
+            raise AssertionError("Smart ASA App rebuilt with a fresh cache")
+
+        monkeypatch.setattr("smart_asa_artifacts.smart_asa_router", _rebuild)
+        assert load_contract(tmp_path, options).dictify() == contract.dictify()
+        assert load_teal_programs(tmp_path, options)
+
+    def test_load_opcode_costs(self, tmp_path, monkeypatch) -> None:
+        # Falls back to `smart_asa_costs.json` if nothing has been cached yet
+        fallback = load_opcode_costs(tmp_path)
+        path = build_artifacts(tmp_path)
+        assert (path / COSTS_JSON).exists()
+
+        def _analyze(*args, **kwargs):
+            raise AssertionError("Smart ASA App analyzed with a fresh cache")
+
+        monkeypatch.setattr("smart_asa_artifacts.analyze", _analyze)
+        assert load_opcode_costs(tmp_path) == fallback
+
 
 class TestAppDeployment:
     def test_wrong_state_schema(
@@ -264,6 +418,13 @@ class TestAppDeployment:
     ) -> None:
         print(f" --- Created Smart ASA App ID: {smart_asa_app.app_id}")
 
+    def test_offline_assembler(self, teal_approval: str, teal_clear: str) -> None:
+        print("\n --- Assembling Smart ASA App offline and with algod...")
+        for program in (teal_approval, teal_clear):
+            assert assemble_program(program) == compile_program(
+                Sandbox.algod_client, program
+            )
+
     def test_app_update_fail(self, smart_asa_app: AppAccount, creator: Account) -> None:
 
         new_approval_program = compileTeal(
@@ -572,6 +733,21 @@ class TestAssetOptin:
 
 
 class TestAssetConfig:
+    def test_config_args(self) -> None:
+        manager = Account.create()
+        fields = config_fields(
+            config_name="Foo", config_url=None, config_manager_addr=manager
+        )
+        assert fields == {"name": "Foo", "manager_addr": manager.address}
+        smart_asa = {name: name for name in CONFIG_FIELDS}
+        args = asset_config_args(smart_asa, fields, metadata_hash=b"hash")
+        # The given fields, the current ones for the others
+        assert dict(zip(CONFIG_FIELDS, args)) == {
+            **smart_asa,
+            **fields,
+            "metadata_hash": b"hash",
+        }
+
     def test_smart_asa_not_created(
         self,
         smart_asa_contract: Contract,
@@ -820,6 +996,92 @@ class TestAssetConfig:
         print(" --- Rejected as expected!")
 
 
+class TestAssetConfigPartial:
+    def test_encode_config_fields(self) -> None:
+        assert encode_config_fields() == (0, b"")
+        assert encode_config_fields(total=1, name="Foo") == (
+            0b10001,
+            (1).to_bytes(8, "big") + b"\x00\x03Foo",
+        )
+        assert encode_config_fields(default_frozen=True, clawback_addr=ZERO_ADDRESS)[
+            0
+        ] == (1 << 2 | 1 << 10)
+        with pytest.raises(ValueError):
+            encode_config_fields(frozen=True)
+
+    def test_decode_config_fields(self) -> None:
+        values = {"total": 1, "name": "Foo", "clawback_addr": ZERO_ADDRESS}
+        assert decode_config_fields(*encode_config_fields(**values)) == values
+        assert decode_config_fields(0, b"") == {}
+
+    def test_is_not_manager(
+        self,
+        smart_asa_contract: Contract,
+        smart_asa_app: AppAccount,
+        eve: Account,
+        smart_asa_id: int,
+    ) -> None:
+        print("\n --- Partially configuring Smart ASA not with Smart ASA Manager...")
+        with pytest.raises(AlgodHTTPError):
+            smart_asa_config_partial(
+                smart_asa_contract=smart_asa_contract,
+                smart_asa_app=smart_asa_app,
+                manager=eve,
+                asset_id=smart_asa_id,
+                config_name="Eve",
+            )
+        print(" --- Rejected as expected!")
+
+    def test_invalid_config_values(
+        self,
+        smart_asa_contract: Contract,
+        smart_asa_app: AppAccount,
+        creator: Account,
+        smart_asa_id: int,
+    ) -> None:
+        config_fields, config_values = encode_config_fields(total=1, decimals=2)
+
+        print("\n --- Partially configuring Smart ASA with missing values...")
+        with pytest.raises(AlgodHTTPError):
+            creator.abi_call(
+                smart_asa_contract.get_method_by_name("asset_config_partial"),
+                smart_asa_id,
+                config_fields,
+                config_values[:-1],
+                app=smart_asa_app,
+                fee=creator.algod_client.suggested_params().fee * 2,
+            )
+        print(" --- Rejected as expected!")
+
+    def test_happy_path(
+        self,
+        smart_asa_contract: Contract,
+        smart_asa_app: AppAccount,
+        creator: Account,
+        eve: Account,
+        smart_asa_id: int,
+    ) -> None:
+        smart_asa = get_smart_asa_params(creator.algod_client, smart_asa_id)
+
+        print("\n --- Partially configuring Smart ASA...")
+        smart_asa_config_partial(
+            smart_asa_contract=smart_asa_contract,
+            smart_asa_app=smart_asa_app,
+            manager=creator,
+            asset_id=smart_asa_id,
+            config_decimals=3,
+            config_name="Partial Test",
+            config_reserve_addr=eve,
+        )
+        configured = get_smart_asa_params(creator.algod_client, smart_asa_id)
+        assert configured == {
+            **smart_asa,
+            "decimals": 3,
+            "name": "Partial Test",
+            "reserve_addr": eve.address,
+        }
+
+
 class TestAssetTransfer:
     def test_smart_asa_not_created(
         self,
@@ -1734,6 +1996,212 @@ class TestAssetTransfer:
         print(" --- Rejected as expected!")
 
 
+class TestAssetTransferBatch:
+    def test_batch_size(self, smart_asa_contract: Contract) -> None:
+        assert [list(c) for c in chunks(range(5), 2)] == [[0, 1], [2, 3], [4]]
+        _, _, box_contract = smart_asa_router(BOX_REGISTRY).build_program()
+        caller = Account(address=ZERO_ADDRESS)
+        app = AppAccount.from_app_id(1)
+        assert transfer_batch_size(smart_asa_contract, caller, caller) == 4
+        assert transfer_batch_size(smart_asa_contract, caller, app) == 3
+        assert transfer_batch_size(box_contract, caller, caller) == 3
+        assert transfer_batch_size(box_contract, caller, app) == 3
+
+    @pytest.mark.parametrize("smart_asa_id", [False], indirect=True)
+    def test_minting_batch_happy_path(
+        self,
+        smart_asa_contract: Contract,
+        smart_asa_app: AppAccount,
+        opted_in_account_factory: Callable,
+        opted_in_creator: Account,
+        smart_asa_id: int,
+    ) -> None:
+        receivers = [opted_in_account_factory() for _ in range(5)]
+        print("\n --- Minting Smart ASA in batches...")
+        smart_asa_transfer_batch(
+            smart_asa_contract=smart_asa_contract,
+            smart_asa_app=smart_asa_app,
+            xfer_asset=smart_asa_id,
+            caller=opted_in_creator,
+            transfers=[(r, i + 1) for i, r in enumerate(receivers)],
+            asset_sender=smart_asa_app,
+        )
+        for i, receiver in enumerate(receivers):
+            assert receiver.asa_balance(smart_asa_id) == i + 1
+
+    @pytest.mark.parametrize("smart_asa_id", [False], indirect=True)
+    def test_regular_batch_happy_path(
+        self,
+        smart_asa_contract: Contract,
+        smart_asa_app: AppAccount,
+        opted_in_account_factory: Callable,
+        creator_with_supply: Account,
+        smart_asa_id: int,
+    ) -> None:
+        receivers = [opted_in_account_factory() for _ in range(5)]
+        sender_balance = creator_with_supply.asa_balance(smart_asa_id)
+        print("\n --- Transferring Smart ASA in batches...")
+        groups = smart_asa_transfer_batch(
+            smart_asa_contract=smart_asa_contract,
+            smart_asa_app=smart_asa_app,
+            xfer_asset=smart_asa_id,
+            caller=creator_with_supply,
+            transfers=[(r, 2) for r in receivers],
+        )
+        # Chained App Calls, in an atomic group
+        assert groups == [None]
+        for receiver in receivers:
+            assert receiver.asa_balance(smart_asa_id) == 2
+        assert creator_with_supply.asa_balance(smart_asa_id) == sender_balance - 10
+
+    @pytest.mark.parametrize("smart_asa_id", [False], indirect=True)
+    def test_pipelined_batch_happy_path(
+        self,
+        smart_asa_contract: Contract,
+        smart_asa_app: AppAccount,
+        opted_in_account_factory: Callable,
+        creator_with_supply: Account,
+        smart_asa_id: int,
+    ) -> None:
+        receivers = [opted_in_account_factory() for _ in range(5)]
+        print("\n --- Pipelining Smart ASA transfers in batches...")
+        with Pipeline(creator_with_supply.algod_client) as pipeline:
+            [handle] = smart_asa_transfer_batch(
+                smart_asa_contract=smart_asa_contract,
+                smart_asa_app=smart_asa_app,
+                xfer_asset=smart_asa_id,
+                caller=creator_with_supply.pipelined(pipeline),
+                transfers=[(r, 1) for r in receivers],
+            )
+            assert isinstance(handle, PendingTxn)
+        assert handle.result()["confirmed-round"]
+        for receiver in receivers:
+            assert receiver.asa_balance(smart_asa_id) == 1
+
+    @pytest.mark.parametrize("smart_asa_id", [False], indirect=True)
+    def test_over_minting_batch(
+        self,
+        smart_asa_contract: Contract,
+        smart_asa_app: AppAccount,
+        opted_in_account_factory: Callable,
+        opted_in_creator: Account,
+        smart_asa_id: int,
+    ) -> None:
+        receivers = [opted_in_account_factory() for _ in range(2)]
+        print("\n --- Minting more than Total in a batch...")
+        with pytest.raises(AlgodHTTPError):
+            smart_asa_transfer_batch(
+                smart_asa_contract=smart_asa_contract,
+                smart_asa_app=smart_asa_app,
+                xfer_asset=smart_asa_id,
+                caller=opted_in_creator,
+                transfers=[(r, 60) for r in receivers],
+                asset_sender=smart_asa_app,
+            )
+        print(" --- Rejected as expected!")
+        for receiver in receivers:
+            assert receiver.asa_balance(smart_asa_id) == 0
+
+    @pytest.mark.parametrize("smart_asa_id", [False], indirect=True)
+    def test_fail_if_receiver_is_frozen(
+        self,
+        smart_asa_contract: Contract,
+        smart_asa_app: AppAccount,
+        opted_in_account_factory: Callable,
+        creator_with_supply: Account,
+        smart_asa_id: int,
+    ) -> None:
+        receivers = [opted_in_account_factory() for _ in range(2)]
+        smart_asa_account_freeze(
+            smart_asa_contract=smart_asa_contract,
+            smart_asa_app=smart_asa_app,
+            freezer=creator_with_supply,
+            freeze_asset=smart_asa_id,
+            target_account=receivers[1],
+            account_frozen=True,
+        )
+        print("\n --- Transferring Smart ASA batch to a frozen receiver...")
+        with pytest.raises(AlgodHTTPError):
+            smart_asa_transfer_batch(
+                smart_asa_contract=smart_asa_contract,
+                smart_asa_app=smart_asa_app,
+                xfer_asset=smart_asa_id,
+                caller=creator_with_supply,
+                transfers=[(r, 1) for r in receivers],
+            )
+        print(" --- Rejected as expected!")
+        # The whole batch is atomic
+        assert receivers[0].asa_balance(smart_asa_id) == 0
+
+
+class TestPipeline:
+    @pytest.mark.parametrize("smart_asa_id", [False], indirect=True)
+    def test_happy_path(
+        self,
+        smart_asa_contract: Contract,
+        smart_asa_app: AppAccount,
+        opted_in_account_factory: Callable,
+        creator_with_supply: Account,
+        smart_asa_id: int,
+    ) -> None:
+        receiver = opted_in_account_factory()
+        sender_balance = creator_with_supply.asa_balance(smart_asa_id)
+        print("\n --- Pipelining Smart ASA transfers...")
+        with Pipeline(creator_with_supply.algod_client, window=4) as pipeline:
+            caller = creator_with_supply.pipelined(pipeline)
+            handles = [
+                smart_asa_transfer(
+                    smart_asa_contract=smart_asa_contract,
+                    smart_asa_app=smart_asa_app,
+                    xfer_asset=smart_asa_id,
+                    asset_amount=amount,
+                    caller=caller,
+                    asset_receiver=receiver,
+                )
+                for amount in range(1, 6)
+            ]
+            circulating_supply = smart_asa_get(
+                smart_asa_contract=smart_asa_contract,
+                smart_asa_app=smart_asa_app,
+                caller=caller,
+                asset_id=smart_asa_id,
+                getter="get_circulating_supply",
+            )
+            assert isinstance(circulating_supply, PendingTxn)
+            assert circulating_supply.result() == 50
+        assert all(handle.result() is None for handle in handles)
+        assert receiver.asa_balance(smart_asa_id) == 15
+        assert creator_with_supply.asa_balance(smart_asa_id) == sender_balance - 15
+
+
+class TestSmartASABatch:
+    @pytest.mark.parametrize("smart_asa_id", [False], indirect=True)
+    def test_happy_path(
+        self,
+        smart_asa_contract: Contract,
+        smart_asa_app: AppAccount,
+        opted_in_account_factory: Callable,
+        creator_with_supply: Account,
+        smart_asa_id: int,
+    ) -> None:
+        receivers = [opted_in_account_factory() for _ in range(3)]
+        sender_balance = creator_with_supply.asa_balance(smart_asa_id)
+        batch = SmartASABatch(smart_asa_contract, smart_asa_app, creator_with_supply)
+        for amount in range(1, 7):
+            batch.transfer(smart_asa_id, amount, receivers[amount % 3])
+        frozen = batch.account_freeze(smart_asa_id, receivers[0], True)
+        print("\n --- Batching Smart ASA transfers and account freeze...")
+        assert len(batch.groups()) == 1
+        assert batch.execute() == [None] * len(batch)
+        assert [r.asa_balance(smart_asa_id) for r in receivers] == [9, 5, 7]
+        assert creator_with_supply.asa_balance(smart_asa_id) == sender_balance - 21
+        receiver_state = get_local_state(
+            receivers[0].algod_client, receivers[0].address, smart_asa_app.app_id
+        )
+        assert receiver_state["frozen"]
+        assert frozen == len(batch) - 1
+
+
 class TestAssetFreeze:
     def test_smart_asa_not_created(
         self,
@@ -1927,62 +2395,303 @@ class TestAccountFreeze:
         assert not account_state["frozen"]
 
 
-class TestAssetDestroy:
-    def test_smart_asa_not_created(
+class TestAccountFreezeBatch:
+    def test_batch_size(self, smart_asa_contract: Contract) -> None:
+        _, _, box_contract = smart_asa_router(BOX_REGISTRY).build_program()
+        assert freeze_batch_size(smart_asa_contract) == 4
+        assert freeze_batch_size(box_contract) == 3
+
+    @pytest.mark.parametrize("smart_asa_id", [False], indirect=True)
+    def test_is_not_freezer(
         self,
         smart_asa_contract: Contract,
         smart_asa_app: AppAccount,
-        creator: Account,
+        smart_asa_id: int,
+        eve: Account,
+        opted_in_account_factory: Callable,
     ) -> None:
-
-        with pytest.raises(AlgodHTTPError):
-            print("\n --- Destroying unexisting Smart ASA...")
-            smart_asa_destroy(
-                smart_asa_contract=smart_asa_contract,
-                smart_asa_app=smart_asa_app,
-                manager=creator,
-                destroy_asset=42,
+        accounts = [opted_in_account_factory() for _ in range(2)]
+        print("\n --- Freezeing Smart ASA accounts with wrong Freeze Account...")
+        results = smart_asa_account_freeze_batch(
+            smart_asa_contract=smart_asa_contract,
+            smart_asa_app=smart_asa_app,
+            freezer=eve,
+            freeze_asset=smart_asa_id,
+            target_accounts=accounts,
+            account_frozen=True,
+        )
+        assert all(results[account.address] for account in accounts)
+        for account in accounts:
+            account_state = get_local_state(
+                account.algod_client, account.address, smart_asa_app.app_id
             )
-        print(" --- Rejected as expected!")
+            assert not account_state["frozen"]
 
     @pytest.mark.parametrize("smart_asa_id", [False], indirect=True)
-    def test_is_not_correct_smart_asa(
+    def test_happy_path(
         self,
         smart_asa_contract: Contract,
         smart_asa_app: AppAccount,
         smart_asa_id: int,
         creator: Account,
+        opted_in_account_factory: Callable,
     ) -> None:
+        accounts = [opted_in_account_factory() for _ in range(6)]
+        print("\n --- Freezeing Smart ASA accounts in batches...")
+        results = smart_asa_account_freeze_batch(
+            smart_asa_contract=smart_asa_contract,
+            smart_asa_app=smart_asa_app,
+            freezer=creator,
+            freeze_asset=smart_asa_id,
+            target_accounts=accounts + [accounts[0].address],
+            account_frozen=True,
+        )
+        assert results == {account.address: None for account in accounts}
+        for account in accounts:
+            account_state = get_local_state(
+                account.algod_client, account.address, smart_asa_app.app_id
+            )
+            assert account_state["frozen"]
 
-        with pytest.raises(AlgodHTTPError):
-            print("\n --- Destroying wrong Smart ASA ID...")
-            smart_asa_destroy(
-                smart_asa_contract=smart_asa_contract,
-                smart_asa_app=smart_asa_app,
-                manager=creator,
-                destroy_asset=42,
+        print("\n --- A rejected group is retried to find the failing accounts...")
+        not_optedin = Sandbox.create(funds_amount=INITIAL_FUNDS)
+        results = smart_asa_account_freeze_batch(
+            smart_asa_contract=smart_asa_contract,
+            smart_asa_app=smart_asa_app,
+            freezer=creator,
+            freeze_asset=smart_asa_id,
+            target_accounts=[*accounts, not_optedin],
+            account_frozen=False,
+        )
+        assert results[not_optedin.address]
+        assert all(results[account.address] is None for account in accounts)
+        for account in accounts:
+            account_state = get_local_state(
+                account.algod_client, account.address, smart_asa_app.app_id
             )
-        print(" --- Rejected as expected!")
+            assert not account_state["frozen"]
 
-    def test_is_not_manager(
+
+class TestAccountUnfreezeAll:
+    @pytest.mark.parametrize("smart_asa_id", [False], indirect=True)
+    def test_is_not_freezer(
         self,
         smart_asa_contract: Contract,
         smart_asa_app: AppAccount,
         smart_asa_id: int,
         eve: Account,
     ) -> None:
+        print("\n --- Unfreezing Smart ASA accounts with wrong Freeze Account...")
         with pytest.raises(AlgodHTTPError):
-            print("\n --- Destroying Smart ASA with wrong account...")
-            smart_asa_destroy(
+            smart_asa_account_unfreeze_all(
                 smart_asa_contract=smart_asa_contract,
                 smart_asa_app=smart_asa_app,
-                manager=eve,
-                destroy_asset=smart_asa_id,
+                freezer=eve,
+                freeze_asset=smart_asa_id,
             )
         print(" --- Rejected as expected!")
 
     @pytest.mark.parametrize("smart_asa_id", [False], indirect=True)
-    def test_smart_asa_still_in_circulation(
+    def test_happy_path(
+        self,
+        smart_asa_contract: Contract,
+        smart_asa_app: AppAccount,
+        smart_asa_id: int,
+        creator: Account,
+        account_with_supply_factory: Callable,
+    ) -> None:
+        sender = account_with_supply_factory()
+        receiver = account_with_supply_factory()
+        smart_asa_account_freeze_batch(
+            smart_asa_contract=smart_asa_contract,
+            smart_asa_app=smart_asa_app,
+            freezer=creator,
+            freeze_asset=smart_asa_id,
+            target_accounts=[sender, receiver],
+            account_frozen=True,
+        )
+        with pytest.raises(AlgodHTTPError):
+            smart_asa_transfer(
+                smart_asa_contract=smart_asa_contract,
+                smart_asa_app=smart_asa_app,
+                xfer_asset=smart_asa_id,
+                asset_amount=1,
+                caller=sender,
+                asset_receiver=receiver,
+            )
+
+        print("\n --- Unfreezing all Smart ASA accounts...")
+        smart_asa_account_unfreeze_all(
+            smart_asa_contract=smart_asa_contract,
+            smart_asa_app=smart_asa_app,
+            freezer=creator,
+            freeze_asset=smart_asa_id,
+        )
+        assert (
+            get_smart_asa_params(creator.algod_client, smart_asa_id)["freeze_epoch"]
+            == 1
+        )
+        assert smart_asa_get_accounts_frozen(
+            smart_asa_contract=smart_asa_contract,
+            smart_asa_app=smart_asa_app,
+            caller=creator,
+            asset_id=smart_asa_id,
+            accounts=[sender, receiver],
+        ) == {sender.address: False, receiver.address: False}
+        smart_asa_transfer(
+            smart_asa_contract=smart_asa_contract,
+            smart_asa_app=smart_asa_app,
+            xfer_asset=smart_asa_id,
+            asset_amount=1,
+            caller=sender,
+            asset_receiver=receiver,
+        )
+
+        print("\n --- Freezing Smart ASA account in the new freeze epoch...")
+        smart_asa_account_freeze(
+            smart_asa_contract=smart_asa_contract,
+            smart_asa_app=smart_asa_app,
+            freezer=creator,
+            freeze_asset=smart_asa_id,
+            target_account=receiver,
+            account_frozen=True,
+        )
+        assert smart_asa_get(
+            smart_asa_contract=smart_asa_contract,
+            smart_asa_app=smart_asa_app,
+            caller=creator,
+            asset_id=smart_asa_id,
+            getter="get_account_is_frozen",
+            account=receiver,
+        )
+        receiver_state = get_local_state(
+            receiver.algod_client, receiver.address, smart_asa_app.app_id
+        )
+        # Frozen in the freeze epoch 1
+        assert receiver_state["frozen"] == 2
+        with pytest.raises(AlgodHTTPError):
+            smart_asa_transfer(
+                smart_asa_contract=smart_asa_contract,
+                smart_asa_app=smart_asa_app,
+                xfer_asset=smart_asa_id,
+                asset_amount=1,
+                caller=sender,
+                asset_receiver=receiver,
+            )
+
+    def test_box_registry_default_frozen(
+        self,
+        smart_asa_app_factory: Callable,
+        creator: Account,
+        eve: Account,
+    ) -> None:
+        _, _, contract = smart_asa_router(BOX_REGISTRY).build_program()
+        smart_asa_app = smart_asa_app_factory(BOX_REGISTRY)
+        smart_asa_id = smart_asa_create(
+            smart_asa_app=smart_asa_app,
+            creator=creator,
+            smart_asa_contract=contract,
+            total=100,
+            default_frozen=True,
+        )
+        smart_asa_optin(
+            smart_asa_contract=contract,
+            smart_asa_app=smart_asa_app,
+            asset_id=smart_asa_id,
+            caller=eve,
+        )
+
+        def is_frozen(account: Account) -> bool:
+            return smart_asa_get(
+                smart_asa_contract=contract,
+                smart_asa_app=smart_asa_app,
+                caller=creator,
+                asset_id=smart_asa_id,
+                account=account,
+                getter="get_account_is_frozen",
+            )
+
+        assert is_frozen(eve)
+
+        print("\n --- Unfreezing all Smart ASA accounts of the Box registry...")
+        smart_asa_account_unfreeze_all(
+            smart_asa_contract=contract,
+            smart_asa_app=smart_asa_app,
+            freezer=creator,
+            freeze_asset=smart_asa_id,
+        )
+        # Holders without a Box have no opt-in freeze epoch: the default freeze
+        # applies in any freeze epoch.
+        assert get_smart_asa_holder_state(contract, smart_asa_app, eve) == {}
+        assert is_frozen(eve)
+
+        print("\n --- Lifting the default freeze...")
+        smart_asa_config(
+            smart_asa_contract=contract,
+            smart_asa_app=smart_asa_app,
+            manager=creator,
+            asset_id=smart_asa_id,
+            config_default_frozen=False,
+        )
+        assert not is_frozen(eve)
+
+
+class TestAssetDestroy:
+    def test_smart_asa_not_created(
+        self,
+        smart_asa_contract: Contract,
+        smart_asa_app: AppAccount,
+        creator: Account,
+    ) -> None:
+
+        with pytest.raises(AlgodHTTPError):
+            print("\n --- Destroying unexisting Smart ASA...")
+            smart_asa_destroy(
+                smart_asa_contract=smart_asa_contract,
+                smart_asa_app=smart_asa_app,
+                manager=creator,
+                destroy_asset=42,
+            )
+        print(" --- Rejected as expected!")
+
+    @pytest.mark.parametrize("smart_asa_id", [False], indirect=True)
+    def test_is_not_correct_smart_asa(
+        self,
+        smart_asa_contract: Contract,
+        smart_asa_app: AppAccount,
+        smart_asa_id: int,
+        creator: Account,
+    ) -> None:
+
+        with pytest.raises(AlgodHTTPError):
+            print("\n --- Destroying wrong Smart ASA ID...")
+            smart_asa_destroy(
+                smart_asa_contract=smart_asa_contract,
+                smart_asa_app=smart_asa_app,
+                manager=creator,
+                destroy_asset=42,
+            )
+        print(" --- Rejected as expected!")
+
+    def test_is_not_manager(
+        self,
+        smart_asa_contract: Contract,
+        smart_asa_app: AppAccount,
+        smart_asa_id: int,
+        eve: Account,
+    ) -> None:
+        with pytest.raises(AlgodHTTPError):
+            print("\n --- Destroying Smart ASA with wrong account...")
+            smart_asa_destroy(
+                smart_asa_contract=smart_asa_contract,
+                smart_asa_app=smart_asa_app,
+                manager=eve,
+                destroy_asset=smart_asa_id,
+            )
+        print(" --- Rejected as expected!")
+
+    @pytest.mark.parametrize("smart_asa_id", [False], indirect=True)
+    def test_smart_asa_still_in_circulation(
         self,
         smart_asa_contract: Contract,
         smart_asa_app: AppAccount,
@@ -2506,6 +3215,76 @@ class TestGetters:
             getter="get_optin_min_balance",
         )
 
+    def test_asset_state(
+        self,
+        smart_asa_contract: Contract,
+        smart_asa_app: AppAccount,
+        smart_asa_id: int,
+        creator: Account,
+    ) -> None:
+        smart_asa = get_smart_asa_params(creator.algod_client, smart_asa_id)
+
+        print(f"\n --- Getting state of Smart ASA {smart_asa_app.app_id}...")
+        smart_asa_state = smart_asa_get_state(
+            smart_asa_contract=smart_asa_contract,
+            smart_asa_app=smart_asa_app,
+            caller=creator,
+            asset_id=smart_asa_id,
+        )
+
+        for field in (
+            "total",
+            "decimals",
+            "default_frozen",
+            "unit_name",
+            "name",
+            "url",
+            "metadata_hash",
+            "manager_addr",
+            "reserve_addr",
+            "freeze_addr",
+            "clawback_addr",
+            "frozen",
+            "circulating_supply",
+        ):
+            assert smart_asa[field] == getattr(smart_asa_state, field), field
+        assert smart_asa_state.optin_min_balance == smart_asa_get(
+            smart_asa_contract=smart_asa_contract,
+            smart_asa_app=smart_asa_app,
+            caller=creator,
+            asset_id=smart_asa_id,
+            getter="get_optin_min_balance",
+        )
+
+    @pytest.mark.parametrize("smart_asa_id", [False], indirect=True)
+    def test_accounts_frozen(
+        self,
+        smart_asa_contract: Contract,
+        smart_asa_app: AppAccount,
+        smart_asa_id: int,
+        creator: Account,
+        opted_in_account_factory: Callable,
+    ) -> None:
+        accounts = [opted_in_account_factory() for _ in range(6)]
+        frozen_accounts = accounts[1::2]
+        smart_asa_account_freeze_batch(
+            smart_asa_contract=smart_asa_contract,
+            smart_asa_app=smart_asa_app,
+            freezer=creator,
+            freeze_asset=smart_asa_id,
+            target_accounts=frozen_accounts,
+            account_frozen=True,
+        )
+
+        print("\n --- Getting frozen status of many accounts...")
+        assert smart_asa_get_accounts_frozen(
+            smart_asa_contract=smart_asa_contract,
+            smart_asa_app=smart_asa_app,
+            caller=creator,
+            asset_id=smart_asa_id,
+            accounts=accounts + [accounts[0].address],
+        ) == {account.address: account in frozen_accounts for account in accounts}
+
     def test_uninitialized_smart_asa(
         self,
         smart_asa_contract: Contract,
@@ -2524,3 +3303,970 @@ class TestGetters:
                     getter="get_asset_config",
                 )
             )
+
+
+class TestPackedGlobalState:
+    def test_schema(self) -> None:
+        assert global_state_layout(PACKED_GLOBAL_STATE) is PackedGlobalState
+        schema = PackedGlobalState.schema()
+        assert schema.num_uints == 0
+        assert schema.num_byte_slices == 7
+        assert (
+            schema.num_byte_slices < GlobalState.num_uints() + GlobalState.num_bytes()
+        )
+
+    def test_compile(self) -> None:
+        approval, clear, contract = smart_asa_router(
+            PACKED_GLOBAL_STATE
+        ).build_program()
+        teal_approval = compile_stateful(approval)
+        assemble_program(teal_approval)
+        assemble_program(compile_stateful(clear))
+        report = analyze(teal_approval, contract, max_iterations=MAX_APP_TXN_ACCOUNTS)
+        for name, method in report["methods"].items():
+            assert method["within_budget"], name
+
+    def test_decode(self) -> None:
+        state = {
+            "ints": b"".join(n.to_bytes(8, "big") for n in (42, 100, 2, 1, 0, 3)),
+            "manager_freeze": b"M" * 32 + b"F" * 32,
+            "reserve_clawback": b"R" * 32 + b"C" * 32,
+            "unit_name": b"S-ASA",
+            "name": b"SMART-ASA",
+            "url": b"",
+            "metadata_hash": b"XYZXYZ",
+        }
+        assert decode_global_state(state) == {
+            "smart_asa_id": 42,
+            "total": 100,
+            "decimals": 2,
+            "default_frozen": 1,
+            "frozen": 0,
+            "freeze_epoch": 3,
+            "manager_addr": b"M" * 32,
+            "freeze_addr": b"F" * 32,
+            "reserve_addr": b"R" * 32,
+            "clawback_addr": b"C" * 32,
+            "unit_name": b"S-ASA",
+            "name": b"SMART-ASA",
+            "url": b"",
+            "metadata_hash": b"XYZXYZ",
+        }
+        # Classic layout is left as is
+        assert decode_global_state({"total": 100}) == {"total": 100}
+
+    def test_happy_path(
+        self,
+        smart_asa_contract: Contract,
+        smart_asa_app_factory: Callable,
+        creator: Account,
+        eve: Account,
+    ) -> None:
+        packed_smart_asa_app = smart_asa_app_factory(PACKED_GLOBAL_STATE)
+        print("\n --- Creating Smart ASA with packed Global State...")
+        smart_asa_id = smart_asa_create(
+            smart_asa_app=packed_smart_asa_app,
+            creator=creator,
+            smart_asa_contract=smart_asa_contract,
+            total=100,
+            metadata_hash=b"XYZXYZ",
+        )
+        assert packed_smart_asa_app.global_state().keys() == set(
+            PackedGlobalState.RECORDS
+        ) | {"unit_name", "name", "url", "metadata_hash", "build_options"}
+
+        print("\n --- Configuring Smart ASA with packed Global State...")
+        smart_asa_config(
+            smart_asa_contract=smart_asa_contract,
+            smart_asa_app=packed_smart_asa_app,
+            manager=creator,
+            asset_id=smart_asa_id,
+            config_total=200,
+            config_name="PACKED",
+            config_freeze_addr=eve,
+        )
+        smart_asa_freeze(
+            smart_asa_contract=smart_asa_contract,
+            smart_asa_app=packed_smart_asa_app,
+            freezer=eve,
+            freeze_asset=smart_asa_id,
+            asset_frozen=True,
+        )
+
+        smart_asa = get_smart_asa_params(creator.algod_client, smart_asa_id)
+        assert smart_asa["smart_asa_id"] == smart_asa_id
+        assert smart_asa["total"] == 200
+        assert smart_asa["name"] == "PACKED"
+        assert smart_asa["metadata_hash"] == b"XYZXYZ"
+        assert smart_asa["frozen"]
+        assert smart_asa["manager_addr"] == creator.address
+        assert smart_asa["freeze_addr"] == eve.address
+        assert smart_asa["clawback_addr"] == creator.address
+        assert smart_asa_get(
+            smart_asa_contract=smart_asa_contract,
+            smart_asa_app=packed_smart_asa_app,
+            caller=creator,
+            asset_id=smart_asa_id,
+            getter="get_asset_is_frozen",
+        )
+
+
+class TestPackedLocalState:
+    def test_schema(self) -> None:
+        assert local_state_layout(PACKED_LOCAL_STATE) is PackedLocalState
+        schema = PackedLocalState.schema()
+        assert schema.num_uints == 1
+        assert schema.num_byte_slices == 0
+
+    def test_compile(self) -> None:
+        approval, clear, contract = smart_asa_router(PACKED_LOCAL_STATE).build_program()
+        teal_approval = compile_stateful(approval)
+        assemble_program(teal_approval)
+        assemble_program(compile_stateful(clear))
+        report = analyze(teal_approval, contract, max_iterations=MAX_APP_TXN_ACCOUNTS)
+        for name, method in report["methods"].items():
+            assert method["within_budget"], name
+
+    def test_decode(self) -> None:
+        frozen_bits = PackedLocalState.FROZEN_BITS
+        assert decode_local_state({"smart_asa_state": 42 << frozen_bits | 1}, 0) == {
+            "smart_asa_id": 42,
+            "frozen": True,
+            "frozen_stamp": 1,
+        }
+        # Frozen in the freeze epoch 2, lifted in the next ones
+        state = {"smart_asa_state": 42 << frozen_bits | 3}
+        assert decode_local_state(state, 2)["frozen"]
+        assert decode_local_state(state, 3) == {
+            "smart_asa_id": 42,
+            "frozen": False,
+            "frozen_stamp": 3,
+        }
+        # Classic layout has the same fields
+        classic = {"smart_asa_id": 42, "frozen": 3}
+        assert decode_local_state(classic, 2) == decode_local_state(state, 2)
+
+    def test_happy_path(
+        self,
+        smart_asa_contract: Contract,
+        smart_asa_app_factory: Callable,
+        creator: Account,
+        eve: Account,
+    ) -> None:
+        smart_asa_app = smart_asa_app_factory(PACKED_LOCAL_STATE)
+        smart_asa_id = smart_asa_create(
+            smart_asa_app=smart_asa_app,
+            creator=creator,
+            smart_asa_contract=smart_asa_contract,
+            total=100,
+        )
+        for account in (creator, eve):
+            smart_asa_optin(
+                smart_asa_contract=smart_asa_contract,
+                smart_asa_app=smart_asa_app,
+                asset_id=smart_asa_id,
+                caller=account,
+            )
+            assert smart_asa_app.app_local_state(account) == {
+                PackedLocalState.RECORD: smart_asa_id << PackedLocalState.FROZEN_BITS
+            }
+
+        print("\n --- Minting and transferring with packed Local State...")
+        smart_asa_transfer(
+            smart_asa_contract=smart_asa_contract,
+            smart_asa_app=smart_asa_app,
+            xfer_asset=smart_asa_id,
+            asset_amount=50,
+            caller=creator,
+            asset_receiver=creator,
+            asset_sender=smart_asa_app,
+        )
+        smart_asa_transfer(
+            smart_asa_contract=smart_asa_contract,
+            smart_asa_app=smart_asa_app,
+            xfer_asset=smart_asa_id,
+            asset_amount=10,
+            caller=creator,
+            asset_receiver=eve,
+        )
+        assert eve.asa_balance(smart_asa_id) == 10
+
+        print("\n --- Freezing Account with packed Local State...")
+        smart_asa_account_freeze(
+            smart_asa_contract=smart_asa_contract,
+            smart_asa_app=smart_asa_app,
+            freezer=creator,
+            freeze_asset=smart_asa_id,
+            target_account=eve,
+            account_frozen=True,
+        )
+        eve_state = decode_local_state(smart_asa_app.app_local_state(eve), 0)
+        assert eve_state == {
+            "smart_asa_id": smart_asa_id,
+            "frozen": True,
+            "frozen_stamp": 1,
+        }
+        assert smart_asa_get(
+            smart_asa_contract=smart_asa_contract,
+            smart_asa_app=smart_asa_app,
+            caller=creator,
+            asset_id=smart_asa_id,
+            account=eve,
+            getter="get_account_is_frozen",
+        )
+        with pytest.raises(AlgodHTTPError):
+            smart_asa_transfer(
+                smart_asa_contract=smart_asa_contract,
+                smart_asa_app=smart_asa_app,
+                xfer_asset=smart_asa_id,
+                asset_amount=10,
+                caller=eve,
+                asset_receiver=creator,
+            )
+
+        print("\n --- Closing-out frozen Account with packed Local State...")
+        smart_asa_closeout(
+            smart_asa_contract=smart_asa_contract,
+            smart_asa_app=smart_asa_app,
+            asset_id=smart_asa_id,
+            caller=eve,
+            close_to=smart_asa_app,
+        )
+        assert (
+            smart_asa_get(
+                smart_asa_contract=smart_asa_contract,
+                smart_asa_app=smart_asa_app,
+                caller=creator,
+                asset_id=smart_asa_id,
+                getter="get_optin_min_balance",
+            )
+            == 100_000 + 28_500
+        )
+
+
+class TestBoxRegistry:
+    def test_schema(self) -> None:
+        assert local_state_layout(BOX_REGISTRY) is BoxLocalState
+        schema = BoxLocalState.schema()
+        assert schema.num_uints == 0
+        assert schema.num_byte_slices == 0
+
+    def test_compile(self) -> None:
+        approval, clear, contract = smart_asa_router(BOX_REGISTRY).build_program()
+        teal_approval = compile_stateful(approval, teal_version(BOX_REGISTRY))
+        assert teal_approval.startswith("#pragma version 8")
+        assemble_program(teal_approval)
+        report = analyze(teal_approval, contract, max_iterations=MAX_APP_TXN_ACCOUNTS)
+        for name, method in report["methods"].items():
+            assert method["within_budget"], name
+
+        # Holders do not opt-in to the Smart ASA App
+        methods = {m.name for m in contract.methods}
+        assert "asset_app_optin" not in methods
+        assert "asset_app_closeout" in methods
+
+    def test_holder_boxes(self, smart_asa_contract: Contract) -> None:
+        _, _, contract = smart_asa_router(BOX_REGISTRY).build_program()
+        holder = Account(address=ZERO_ADDRESS)
+        assert holder_boxes(smart_asa_contract, holder) is None
+        assert holder_boxes(contract, holder, ZERO_ADDRESS) == [
+            (0, holder.decoded_address)
+        ]
+        record = 42 << BoxLocalState.FROZEN_BITS
+        assert BoxLocalState.decode_box(record.to_bytes(8, "big")) == {
+            "smart_asa_id": 42,
+            "frozen": 0,
+        }
+
+    def test_happy_path(
+        self,
+        smart_asa_app_factory: Callable,
+        creator: Account,
+        eve: Account,
+    ) -> None:
+        _, _, contract = smart_asa_router(BOX_REGISTRY).build_program()
+        smart_asa_app = smart_asa_app_factory(BOX_REGISTRY)
+        smart_asa_id = smart_asa_create(
+            smart_asa_app=smart_asa_app,
+            creator=creator,
+            smart_asa_contract=contract,
+            total=100,
+        )
+
+        print("\n --- Opting-in just to the Underlying ASA...")
+        for account in (creator, eve):
+            smart_asa_optin(
+                smart_asa_contract=contract,
+                smart_asa_app=smart_asa_app,
+                asset_id=smart_asa_id,
+                caller=account,
+            )
+            assert not account.local_state()
+            assert get_smart_asa_holder_state(contract, smart_asa_app, account) == {}
+
+        smart_asa_transfer(
+            smart_asa_contract=contract,
+            smart_asa_app=smart_asa_app,
+            xfer_asset=smart_asa_id,
+            asset_amount=50,
+            caller=creator,
+            asset_receiver=eve,
+            asset_sender=smart_asa_app,
+        )
+        smart_asa_transfer(
+            smart_asa_contract=contract,
+            smart_asa_app=smart_asa_app,
+            xfer_asset=smart_asa_id,
+            asset_amount=10,
+            caller=eve,
+            asset_receiver=creator,
+        )
+        assert creator.asa_balance(smart_asa_id) == 10
+
+        print("\n --- Freezing Account in the Box registry...")
+        smart_asa_account_freeze(
+            smart_asa_contract=contract,
+            smart_asa_app=smart_asa_app,
+            freezer=creator,
+            freeze_asset=smart_asa_id,
+            target_account=eve,
+            account_frozen=True,
+        )
+        assert get_smart_asa_holder_state(contract, smart_asa_app, eve) == {
+            "smart_asa_id": smart_asa_id,
+            "frozen": True,
+            "frozen_stamp": 1,
+        }
+        assert smart_asa_get(
+            smart_asa_contract=contract,
+            smart_asa_app=smart_asa_app,
+            caller=creator,
+            asset_id=smart_asa_id,
+            account=eve,
+            getter="get_account_is_frozen",
+        )
+        with pytest.raises(AlgodHTTPError):
+            smart_asa_transfer(
+                smart_asa_contract=contract,
+                smart_asa_app=smart_asa_app,
+                xfer_asset=smart_asa_id,
+                asset_amount=10,
+                caller=eve,
+                asset_receiver=creator,
+            )
+        # The Smart ASA App is not a holder
+        with pytest.raises(AlgodHTTPError):
+            smart_asa_transfer(
+                smart_asa_contract=contract,
+                smart_asa_app=smart_asa_app,
+                xfer_asset=smart_asa_id,
+                asset_amount=10,
+                caller=creator,
+                asset_receiver=smart_asa_app,
+            )
+
+        print("\n --- Closing-out frozen Account from the Box registry...")
+        smart_asa_closeout(
+            smart_asa_contract=contract,
+            smart_asa_app=smart_asa_app,
+            asset_id=smart_asa_id,
+            caller=eve,
+            close_to=smart_asa_app,
+        )
+        assert get_smart_asa_holder_state(contract, smart_asa_app, eve) == {}
+
+
+class TestMultiAsset:
+    def test_schema(self) -> None:
+        assert global_state_layout(MULTI_ASSET) is BoxGlobalState
+        assert local_state_layout(MULTI_ASSET) is MultiAssetLocalState
+        for schema in (BoxGlobalState.schema(), MultiAssetLocalState.schema()):
+            assert schema.num_uints == 0
+            assert schema.num_byte_slices == 0
+
+    def test_compile(self) -> None:
+        approval, clear, contract = smart_asa_router(MULTI_ASSET).build_program()
+        teal_approval = compile_stateful(approval, teal_version(MULTI_ASSET))
+        assert teal_approval.startswith("#pragma version 8")
+        assemble_program(teal_approval)
+        report = analyze(
+            teal_approval, contract, max_iterations=max_batch_size(MULTI_ASSET)
+        )
+        for name, method in report["methods"].items():
+            assert method["within_budget"], name
+        assert "asset_app_optin" not in {m.name for m in contract.methods}
+        assert "asset_register" in {m.name for m in contract.methods}
+
+    def test_boxes(self, smart_asa_contract: Contract) -> None:
+        _, _, contract = smart_asa_router(MULTI_ASSET).build_program()
+        holder = Account(address=ZERO_ADDRESS)
+        smart_asa_box = (42).to_bytes(8, "big")
+        assert smart_asa_boxes(smart_asa_contract, 42, holder) is None
+        assert smart_asa_boxes(contract, 42, holder, ZERO_ADDRESS) == [
+            (0, smart_asa_box),
+            (0, smart_asa_box + holder.decoded_address),
+        ]
+        assert smart_asa_boxes(contract, 42) == [(0, smart_asa_box)]
+        assert pending_smart_asa_boxes(42) == [
+            (0, bytes(8)),
+            (0, b"pending_smart_asa_id"),
+            (0, smart_asa_box),
+        ]
+
+    def test_decode_box(self) -> None:
+        record = b"".join(i.to_bytes(8, "big") for i in (100, 2, 1, 0, 3))
+        record += bytes(range(32)) * 4
+        # ABI encoded `(byte[],byte[],byte[],byte[])`
+        metadata = bytes.fromhex("0008000d000f0011") + b"\x00\x03ASA" + bytes(6)
+        assert BoxGlobalState.decode_box(42, record + metadata) == {
+            "smart_asa_id": 42,
+            "total": 100,
+            "decimals": 2,
+            "default_frozen": 1,
+            "frozen": 0,
+            "freeze_epoch": 3,
+            "manager_addr": bytes(range(32)),
+            "reserve_addr": bytes(range(32)),
+            "freeze_addr": bytes(range(32)),
+            "clawback_addr": bytes(range(32)),
+            "unit_name": b"ASA",
+            "name": b"",
+            "url": b"",
+            "metadata_hash": b"",
+        }
+
+    def test_happy_path(
+        self,
+        smart_asa_app_factory: Callable,
+        creator: Account,
+        eve: Account,
+    ) -> None:
+        _, _, contract = smart_asa_router(MULTI_ASSET).build_program()
+        smart_asa_app = smart_asa_app_factory(MULTI_ASSET)
+
+        print("\n --- Creating many Smart ASAs with the same Smart ASA App...")
+        smart_asa_ids = [
+            smart_asa_create(
+                smart_asa_app=smart_asa_app,
+                creator=creator,
+                smart_asa_contract=contract,
+                total=total,
+                unit_name=unit_name,
+                metadata_hash=b"XYZXYZ",
+            )
+            for total, unit_name in ((100, "ONE"), (200, "TWO"))
+        ]
+        for smart_asa_id, total, unit_name in zip(
+            smart_asa_ids, (100, 200), ("ONE", "TWO")
+        ):
+            assert get_smart_asa_app(creator.algod_client, smart_asa_id).app_id == (
+                smart_asa_app.app_id
+            )
+            smart_asa = get_smart_asa_params(creator.algod_client, smart_asa_id)
+            assert smart_asa["total"] == total
+            assert smart_asa["unit_name"] == unit_name
+            assert smart_asa["metadata_hash"] == b"XYZXYZ"
+            for account in (creator, eve):
+                smart_asa_optin(
+                    smart_asa_contract=contract,
+                    smart_asa_app=smart_asa_app,
+                    asset_id=smart_asa_id,
+                    caller=account,
+                )
+            smart_asa_transfer(
+                smart_asa_contract=contract,
+                smart_asa_app=smart_asa_app,
+                xfer_asset=smart_asa_id,
+                asset_amount=50,
+                caller=creator,
+                asset_receiver=eve,
+                asset_sender=smart_asa_app,
+            )
+            assert eve.asa_balance(smart_asa_id) == 50
+
+        first_id, second_id = smart_asa_ids
+        print("\n --- Freezing Account just for the first Smart ASA...")
+        smart_asa_account_freeze(
+            smart_asa_contract=contract,
+            smart_asa_app=smart_asa_app,
+            freezer=creator,
+            freeze_asset=first_id,
+            target_account=eve,
+            account_frozen=True,
+        )
+        assert get_smart_asa_holder_state(contract, smart_asa_app, eve, first_id) == {
+            "smart_asa_id": first_id,
+            "frozen": True,
+            "frozen_stamp": 1,
+        }
+        assert get_smart_asa_holder_state(contract, smart_asa_app, eve, second_id) == {}
+        with pytest.raises(AlgodHTTPError):
+            smart_asa_transfer(
+                smart_asa_contract=contract,
+                smart_asa_app=smart_asa_app,
+                xfer_asset=first_id,
+                asset_amount=10,
+                caller=eve,
+                asset_receiver=creator,
+            )
+        smart_asa_transfer(
+            smart_asa_contract=contract,
+            smart_asa_app=smart_asa_app,
+            xfer_asset=second_id,
+            asset_amount=10,
+            caller=eve,
+            asset_receiver=creator,
+        )
+        assert creator.asa_balance(second_id) == 10
+
+        print("\n --- Configuring just the second Smart ASA...")
+        smart_asa_config(
+            smart_asa_contract=contract,
+            smart_asa_app=smart_asa_app,
+            manager=creator,
+            asset_id=second_id,
+            config_name="SECOND",
+        )
+        assert get_smart_asa_params(creator.algod_client, second_id)["name"] == (
+            "SECOND"
+        )
+        assert get_smart_asa_params(creator.algod_client, first_id)["name"] == ""
+        assert (
+            smart_asa_get(
+                smart_asa_contract=contract,
+                smart_asa_app=smart_asa_app,
+                caller=creator,
+                asset_id=second_id,
+                getter="get_circulating_supply",
+            )
+            == 50
+        )
+
+
+class TestMerkleAllowList:
+    def test_schema(self) -> None:
+        schema = global_state_schema(MERKLE_ALLOW_LIST)
+        assert schema.num_uints == GlobalState.num_uints() + 1  # Build options
+        assert schema.num_byte_slices == GlobalState.num_bytes() + 1
+
+    def test_compile(self) -> None:
+        approval, _, contract = smart_asa_router(MERKLE_ALLOW_LIST).build_program()
+        teal_approval = compile_stateful(approval)
+        assemble_program(teal_approval)
+        report = analyze(teal_approval, contract, max_iterations=1)
+        for name, method in report["methods"].items():
+            assert method["within_budget"], name
+
+        # Transfers take the holders' proofs, batches do not fit them
+        methods = {m.name: m for m in contract.methods}
+        assert "asset_allow_list" in methods
+        assert "asset_transfer_batch" not in methods
+        assert [str(a.type) for a in methods["asset_transfer"].args][-2:] == [
+            "byte[32][]",
+            "byte[32][]",
+        ]
+        assert "asset_allow_list" not in {m.name for m in smart_asa_abi.methods}
+
+        with pytest.raises(ValueError):
+            smart_asa_router(BuildOptions(merkle_allow_list=True, multi_asset=True))
+
+    def test_happy_path(
+        self,
+        smart_asa_app_factory: Callable,
+        creator: Account,
+        eve: Account,
+    ) -> None:
+        _, _, contract = smart_asa_router(MERKLE_ALLOW_LIST).build_program()
+        smart_asa_app = smart_asa_app_factory(MERKLE_ALLOW_LIST)
+        smart_asa_id = smart_asa_create(
+            smart_asa_app=smart_asa_app,
+            creator=creator,
+            smart_asa_contract=contract,
+            total=100,
+        )
+        for account in (creator, eve):
+            smart_asa_optin(
+                smart_asa_contract=contract,
+                smart_asa_app=smart_asa_app,
+                asset_id=smart_asa_id,
+                caller=account,
+            )
+
+        print("\n --- Minting with no allow list...")
+        smart_asa_transfer(
+            smart_asa_contract=contract,
+            smart_asa_app=smart_asa_app,
+            xfer_asset=smart_asa_id,
+            asset_amount=50,
+            caller=creator,
+            asset_receiver=creator,
+            asset_sender=smart_asa_app,
+        )
+
+        print("\n --- Restricting Smart ASA to the allow list...")
+        allow_list = MerkleTree([creator.address] + [Account.create().address] * 4)
+        with pytest.raises(AlgodHTTPError):
+            smart_asa_allow_list(
+                smart_asa_contract=contract,
+                smart_asa_app=smart_asa_app,
+                freezer=eve,
+                allow_asset=smart_asa_id,
+                allow_list_root=allow_list.root,
+            )
+        smart_asa_allow_list(
+            smart_asa_contract=contract,
+            smart_asa_app=smart_asa_app,
+            freezer=creator,
+            allow_asset=smart_asa_id,
+            allow_list_root=allow_list.root,
+        )
+        with pytest.raises(AlgodHTTPError):
+            smart_asa_transfer(
+                smart_asa_contract=contract,
+                smart_asa_app=smart_asa_app,
+                xfer_asset=smart_asa_id,
+                asset_amount=10,
+                caller=creator,
+                asset_receiver=eve,
+                sender_proof=allow_list.proof(creator.address),
+                receiver_proof=[EMPTY_LEAF] * allow_list.depth,
+            )
+
+        print("\n --- Adding Account to the allow list...")
+        smart_asa_allow_list(
+            smart_asa_contract=contract,
+            smart_asa_app=smart_asa_app,
+            freezer=creator,
+            allow_asset=smart_asa_id,
+            allow_list_root=allow_list.add(eve.address),
+        )
+        smart_asa_transfer(
+            smart_asa_contract=contract,
+            smart_asa_app=smart_asa_app,
+            xfer_asset=smart_asa_id,
+            asset_amount=10,
+            caller=creator,
+            asset_receiver=eve,
+            sender_proof=allow_list.proof(creator.address),
+            receiver_proof=allow_list.proof(eve.address),
+        )
+        assert eve.asa_balance(smart_asa_id) == 10
+
+        print("\n --- Closing-out restricted Smart ASA...")
+        with pytest.raises(AlgodHTTPError):
+            smart_asa_closeout(
+                smart_asa_contract=contract,
+                smart_asa_app=smart_asa_app,
+                asset_id=smart_asa_id,
+                caller=eve,
+                close_to=creator,
+            )
+        smart_asa_closeout(
+            smart_asa_contract=contract,
+            smart_asa_app=smart_asa_app,
+            asset_id=smart_asa_id,
+            caller=eve,
+            close_to=smart_asa_app,
+        )
+
+
+class TestVariants:
+    @pytest.mark.parametrize(
+        "features", [("account_freeze",), ("clawback",), ("burn",), FEATURES]
+    )
+    def test_compile(self, tmp_path, features: tuple[str, ...]) -> None:
+        reference = build_variant(cache_dir=tmp_path)
+        variant = build_variant(*features, cache_dir=tmp_path)
+        assert variant.program_size < reference.program_size
+        assert variant.global_schema == reference.global_schema
+
+        methods = {m.name for m in variant.contract.methods}
+        reference_methods = {m.name for m in reference.contract.methods}
+        if "account_freeze" in features:
+            dropped = COMPILED_OUT_METHODS["without_account_freeze"]
+            assert methods == reference_methods - dropped
+            assert variant.local_schema.num_uints == 1
+            assert variant.extra_pages < reference.extra_pages
+        else:
+            assert methods == reference_methods
+            assert variant.local_schema == reference.local_schema
+
+        teal_approval, _ = load_teal_programs(tmp_path, variant.options)
+        report = analyze(teal_approval, variant.contract, max_iterations=4)
+        for name, method in report["methods"].items():
+            assert method["within_budget"], name
+        reference_approval, _ = load_teal_programs(tmp_path)
+        reference_report = analyze(
+            reference_approval, reference.contract, max_iterations=4
+        )
+        transfer = report["methods"]["asset_transfer"]
+        assert transfer["min"] < reference_report["methods"]["asset_transfer"]["min"]
+
+    def test_build_options_record(self) -> None:
+        without_account_freeze = BuildOptions(without_account_freeze=True)
+        packed_local_state = BuildOptions(packed_local_state=True)
+        # Same State Schema, told apart by the build options record
+        assert local_state_schema(without_account_freeze) == local_state_schema(
+            packed_local_state
+        )
+        for options in (
+            without_account_freeze,
+            packed_local_state,
+            BuildOptions(multi_asset=True, without_burn=True),
+        ):
+            global_state = [
+                {
+                    "key": base64.b64encode(b"build_options").decode(),
+                    "value": {"type": 2, "uint": options.flags()},
+                }
+            ]
+            app_info = {"id": 1, "params": {"global-state": global_state}}
+            assert infer_build_options(app_info) == options
+        with pytest.raises(ValueError):
+            infer_build_options({"id": 1, "params": {}})
+
+    def test_unknown_feature(self, tmp_path) -> None:
+        with pytest.raises(ValueError):
+            build_variant("asset_freeze", cache_dir=tmp_path)
+
+    def test_happy_path(
+        self,
+        smart_asa_app_factory: Callable,
+        creator: Account,
+        eve: Account,
+    ) -> None:
+        _, _, contract = smart_asa_router(WITHOUT_ALL_FEATURES).build_program()
+        smart_asa_app = smart_asa_app_factory(WITHOUT_ALL_FEATURES)
+
+        print("\n --- Creating Smart ASA with compiled out features...")
+        for compiled_out in (dict(default_frozen=True), dict(clawback_addr=eve)):
+            with pytest.raises(AlgodHTTPError):
+                smart_asa_create(
+                    smart_asa_app=smart_asa_app,
+                    creator=creator,
+                    smart_asa_contract=contract,
+                    total=100,
+                    **{"clawback_addr": ZERO_ADDRESS, **compiled_out},
+                )
+        smart_asa_id = smart_asa_create(
+            smart_asa_app=smart_asa_app,
+            creator=creator,
+            smart_asa_contract=contract,
+            total=100,
+            clawback_addr=ZERO_ADDRESS,
+        )
+        with pytest.raises(AlgodHTTPError):
+            smart_asa_config_partial(
+                smart_asa_contract=contract,
+                smart_asa_app=smart_asa_app,
+                manager=creator,
+                asset_id=smart_asa_id,
+                config_clawback_addr=eve,
+            )
+
+        for account in (creator, eve):
+            smart_asa_optin(
+                smart_asa_contract=contract,
+                smart_asa_app=smart_asa_app,
+                asset_id=smart_asa_id,
+                caller=account,
+            )
+            assert get_local_state(
+                account.algod_client, account.address, smart_asa_app.app_id
+            ) == {"smart_asa_id": smart_asa_id}
+
+        print("\n --- Minting and transferring Smart ASA...")
+        smart_asa_transfer(
+            smart_asa_contract=contract,
+            smart_asa_app=smart_asa_app,
+            xfer_asset=smart_asa_id,
+            asset_amount=50,
+            caller=creator,
+            asset_receiver=creator,
+            asset_sender=smart_asa_app,
+        )
+        smart_asa_transfer(
+            smart_asa_contract=contract,
+            smart_asa_app=smart_asa_app,
+            xfer_asset=smart_asa_id,
+            asset_amount=10,
+            caller=creator,
+            asset_receiver=eve,
+        )
+        assert eve.asa_balance(smart_asa_id) == 10
+
+        print("\n --- Burning Smart ASA...")
+        with pytest.raises(AlgodHTTPError):
+            smart_asa_transfer(
+                smart_asa_contract=contract,
+                smart_asa_app=smart_asa_app,
+                xfer_asset=smart_asa_id,
+                asset_amount=10,
+                caller=creator,
+                asset_receiver=smart_asa_app,
+            )
+
+        smart_asa_closeout(
+            smart_asa_contract=contract,
+            smart_asa_app=smart_asa_app,
+            asset_id=smart_asa_id,
+            caller=eve,
+            close_to=creator,
+        )
+        assert creator.asa_balance(smart_asa_id) == 50
+
+
+class TestEvents:
+    def test_selectors(self) -> None:
+        assert len(SMART_ASA_EVENTS) == 8
+        assert Event.asset_transfer.signature == (
+            "AssetTransfer(uint64,uint64,address,address)"
+        )
+        assert Event.asset_transfer.selector == bytes.fromhex("89f0ee88")
+        assert all(selector == e.selector for selector, e in SMART_ASA_EVENTS.items())
+
+    def test_decode(self) -> None:
+        sender = Account.create()
+        log = Event.account_freeze.selector + Event.account_freeze.abi_type.encode(
+            [42, sender.address, True]
+        )
+        assert decode_event(log) == (
+            "AccountFreeze",
+            {"asset": 42, "account": sender.address, "frozen": True},
+        )
+        # ABI return values are not events
+        abi_return = bytes.fromhex("151f7c75") + (42).to_bytes(8, "big")
+        assert decode_event(abi_return) is None
+        assert decode_smart_asa_events(
+            {"logs": [base64.b64encode(log).decode() for log in (abi_return, log)]}
+        ) == [decode_event(log)]
+
+        # Partial configurations log just the configured fields
+        config_fields, config_values = encode_config_fields(total=1, name="Foo")
+        event = Event.asset_config_partial
+        encoded = event.abi_type.encode([42, config_fields, list(config_values)])
+        # The head ends with the offset of the values (ref. `SmartASAEvent.log`)
+        assert encoded[10:12] == (8 + 2 + 2).to_bytes(2, "big")
+        assert decode_event(event.selector + encoded) == (
+            "AssetConfigPartial",
+            {"asset": 42, "config_fields": 0b10001, "config_values": config_values},
+        )
+
+    @pytest.mark.parametrize("smart_asa_id", [False], indirect=True)
+    def test_happy_path(
+        self,
+        smart_asa_contract: Contract,
+        smart_asa_app: AppAccount,
+        opted_in_account_factory: Callable,
+        smart_asa_id: int,
+        creator: Account,
+    ) -> None:
+        receiver = opted_in_account_factory()
+        print("\n --- Minting Smart ASA...")
+        smart_asa_transfer(
+            smart_asa_contract=smart_asa_contract,
+            smart_asa_app=smart_asa_app,
+            xfer_asset=smart_asa_id,
+            asset_amount=100,
+            caller=creator,
+            asset_receiver=receiver,
+            asset_sender=smart_asa_app,
+            save_abi_call="/tmp/txn.signed",
+        )
+        [abi_call] = retrieve_from_file("/tmp/txn.signed")
+        assert get_smart_asa_events(creator.algod_client, abi_call.get_txid()) == [
+            (
+                "AssetTransfer",
+                {
+                    "asset": smart_asa_id,
+                    "amount": 100,
+                    "sender": smart_asa_app.address,
+                    "receiver": receiver.address,
+                },
+            )
+        ]
+
+        print("\n --- Freezing Smart ASA account...")
+        smart_asa_account_freeze(
+            smart_asa_contract=smart_asa_contract,
+            smart_asa_app=smart_asa_app,
+            freezer=creator,
+            freeze_asset=smart_asa_id,
+            target_account=receiver,
+            account_frozen=True,
+            save_abi_call="/tmp/txn.signed",
+        )
+        [abi_call] = retrieve_from_file("/tmp/txn.signed")
+        assert get_smart_asa_events(creator.algod_client, abi_call.get_txid()) == [
+            (
+                "AccountFreeze",
+                {"asset": smart_asa_id, "account": receiver.address, "frozen": True},
+            )
+        ]
+
+
+class TestBudgetPooling:
+    @pytest.mark.parametrize("options", [BuildOptions(), BOX_REGISTRY, MULTI_ASSET])
+    def test_opcode_costs(self, options: BuildOptions) -> None:
+        costs = smart_asa_opcode_costs(options)
+        _, _, contract = smart_asa_router(options).build_program()
+        assert costs.keys() == {m.name for m in contract.methods} | {BARE_CALL_NAME}
+        # NOTE: Costs are extrapolated from the cost report of the build.
+        approval, _ = load_teal_programs(options=options)
+        report = analyze(approval, contract, max_iterations=max_batch_size(options))
+        assert costs == {
+            name: {"max": cost["max"], "dispatch": cost["dispatch"]}
+            for name, cost in report["methods"].items()
+        }
+        # NOTE: Smart ASA methods fit a single App Call budget.
+        for name, cost in costs.items():
+            assert budget_app_calls(cost["max"], costs[BARE_CALL_NAME]["max"]) == 0
+
+    @pytest.mark.parametrize("smart_asa_id", [False], indirect=True)
+    def test_happy_path(
+        self,
+        smart_asa_contract: Contract,
+        smart_asa_app: AppAccount,
+        smart_asa_id: int,
+        creator: Account,
+    ) -> None:
+        assert smart_asa_budget_calls(smart_asa_app, "asset_transfer") == 0
+
+        print("\n --- Pooling opcode budget with bare NoOp calls...")
+        assert not creator.abi_call(
+            smart_asa_contract.get_method_by_name("get_asset_is_frozen"),
+            smart_asa_id,
+            app=smart_asa_app,
+            budget_calls=2,
+        )
+        # Bare NoOp calls just pool opcode budget
+        creator.abi_call(
+            smart_asa_contract.get_method_by_name("asset_freeze"),
+            smart_asa_id,
+            True,
+            app=smart_asa_app,
+            budget_calls=AtomicTransactionComposer.MAX_GROUP_SIZE - 1,
+        )
+        assert get_smart_asa_params(creator.algod_client, smart_asa_id)["frozen"]
+
+
+class TestDispatchOrder:
+    def test_hot_dispatch_order(self) -> None:
+        assert hot_dispatch_order(
+            {"asset_config": 1, "asset_transfer": 95, "asset_freeze": 0}
+        ) == ("asset_transfer", "asset_config")
+
+    def test_compile(self) -> None:
+        options = BuildOptions(dispatch_order=HOT_METHODS)
+        approval, _, contract = smart_asa_router(options).build_program()
+        assemble_program(compile_stateful(approval))
+        assert [m.name for m in contract.methods][: len(HOT_METHODS)] == list(
+            HOT_METHODS
+        )
+        assert {m.name for m in contract.methods} == {
+            m.name for m in smart_asa_abi.build_program()[2].methods
+        }
+
+    def test_unknown_method(self) -> None:
+        with pytest.raises(ValueError):
+            smart_asa_router(BuildOptions(dispatch_order=("asset_send",)))
@@ -0,0 +1,861 @@
+"""
+Offline TEAL assembler
+
+In-process replacement of algod `/v2/teal/compile` for the TEAL programs
+generated by PyTeal: the output is byte-identical to the one of the reference
+(go-algorand) assembler, including the constants blocks optimization of the
+`int`, `byte`, `addr` and `method` pseudo-ops.
+"""
+
+import base64
+import hashlib
+from typing import NamedTuple, Optional, Union
+
+from algosdk import encoding
+from algosdk.abi import Method
+
+DEFAULT_VERSION = 1
+MAX_VERSION = 8
+# Constants blocks of the pseudo-ops are optimized (sorted by frequency of use
+# and pushing constants used just once) since this version.
+OPTIMIZE_CONSTANTS_VERSION = 4
+
+# Opcodes cost for AVM version >= 2 (fixed part of the cost for opcodes with
+# a dynamic cost, i.e. `base64_decode` and `json_ref`).
+DEFAULT_COST = 1
+
+
+# / --- IMMEDIATES KINDS
+UINT8 = "uint8"
+INT8 = "int8"
+VARUINT = "varuint"
+BYTES = "bytes"
+LABEL = "label"
+LABELS = "labels"
+INTS = "ints"
+BYTESS = "bytess"
+TXN_FIELD = "txn_field"
+GLOBAL_FIELD = "global_field"
+ASSET_HOLDING_FIELD = "asset_holding_field"
+ASSET_PARAMS_FIELD = "asset_params_field"
+APP_PARAMS_FIELD = "app_params_field"
+ACCT_PARAMS_FIELD = "acct_params_field"
+ECDSA_CURVE = "ecdsa_curve"
+BASE64_ENCODING = "base64_encoding"
+JSON_TYPE = "json_type"
+VRF_STANDARD = "vrf_standard"
+BLOCK_FIELD = "block_field"
+
+
+# / --- FIELDS
+TXN_FIELDS = [
+    "Sender",
+    "Fee",
+    "FirstValid",
+    "FirstValidTime",
+    "LastValid",
+    "Note",
+    "Lease",
+    "Receiver",
+    "Amount",
+    "CloseRemainderTo",
+    "VotePK",
+    "SelectionPK",
+    "VoteFirst",
+    "VoteLast",
+    "VoteKeyDilution",
+    "Type",
+    "TypeEnum",
+    "XferAsset",
+    "AssetAmount",
+    "AssetSender",
+    "AssetReceiver",
+    "AssetCloseTo",
+    "GroupIndex",
+    "TxID",
+    "ApplicationID",
+    "OnCompletion",
+    "ApplicationArgs",
+    "NumAppArgs",
+    "Accounts",
+    "NumAccounts",
+    "ApprovalProgram",
+    "ClearStateProgram",
+    "RekeyTo",
+    "ConfigAsset",
+    "ConfigAssetTotal",
+    "ConfigAssetDecimals",
+    "ConfigAssetDefaultFrozen",
+    "ConfigAssetUnitName",
+    "ConfigAssetName",
+    "ConfigAssetURL",
+    "ConfigAssetMetadataHash",
+    "ConfigAssetManager",
+    "ConfigAssetReserve",
+    "ConfigAssetFreeze",
+    "ConfigAssetClawback",
+    "FreezeAsset",
+    "FreezeAssetAccount",
+    "FreezeAssetFrozen",
+    "Assets",
+    "NumAssets",
+    "Applications",
+    "NumApplications",
+    "GlobalNumUint",
+    "GlobalNumByteSlice",
+    "LocalNumUint",
+    "LocalNumByteSlice",
+    "ExtraProgramPages",
+    "Nonparticipation",
+    "Logs",
+    "NumLogs",
+    "CreatedAssetID",
+    "CreatedApplicationID",
+    "LastLog",
+    "StateProofPK",
+    "ApprovalProgramPages",
+    "NumApprovalProgramPages",
+    "ClearStateProgramPages",
+    "NumClearStateProgramPages",
+]
+
+TXN_ARRAY_FIELDS = {
+    "ApplicationArgs",
+    "Accounts",
+    "Assets",
+    "Applications",
+    "Logs",
+    "ApprovalProgramPages",
+    "ClearStateProgramPages",
+}
+
+GLOBAL_FIELDS = [
+    "MinTxnFee",
+    "MinBalance",
+    "MaxTxnLife",
+    "ZeroAddress",
+    "GroupSize",
+    "LogicSigVersion",
+    "Round",
+    "LatestTimestamp",
+    "CurrentApplicationID",
+    "CreatorAddress",
+    "CurrentApplicationAddress",
+    "GroupID",
+    "OpcodeBudget",
+    "CallerApplicationID",
+    "CallerApplicationAddress",
+]
+
+ASSET_HOLDING_FIELDS = ["AssetBalance", "AssetFrozen"]
+
+ASSET_PARAMS_FIELDS = [
+    "AssetTotal",
+    "AssetDecimals",
+    "AssetDefaultFrozen",
+    "AssetUnitName",
+    "AssetName",
+    "AssetURL",
+    "AssetMetadataHash",
+    "AssetManager",
+    "AssetReserve",
+    "AssetFreeze",
+    "AssetClawback",
+    "AssetCreator",
+]
+
+APP_PARAMS_FIELDS = [
+    "AppApprovalProgram",
+    "AppClearStateProgram",
+    "AppGlobalNumUint",
+    "AppGlobalNumByteSlice",
+    "AppLocalNumUint",
+    "AppLocalNumByteSlice",
+    "AppExtraProgramPages",
+    "AppCreator",
+    "AppAddress",
+]
+
+ACCT_PARAMS_FIELDS = [
+    "AcctBalance",
+    "AcctMinBalance",
+    "AcctAuthAddr",
+    "AcctTotalNumUint",
+    "AcctTotalNumByteSlice",
+    "AcctTotalExtraAppPages",
+    "AcctTotalAppsCreated",
+    "AcctTotalAppsOptedIn",
+    "AcctTotalAssetsCreated",
+    "AcctTotalAssets",
+    "AcctTotalBoxes",
+    "AcctTotalBoxBytes",
+]
+
+FIELDS = {
+    TXN_FIELD: TXN_FIELDS,
+    GLOBAL_FIELD: GLOBAL_FIELDS,
+    ASSET_HOLDING_FIELD: ASSET_HOLDING_FIELDS,
+    ASSET_PARAMS_FIELD: ASSET_PARAMS_FIELDS,
+    APP_PARAMS_FIELD: APP_PARAMS_FIELDS,
+    ACCT_PARAMS_FIELD: ACCT_PARAMS_FIELDS,
+    ECDSA_CURVE: ["Secp256k1", "Secp256r1"],
+    BASE64_ENCODING: ["URLEncoding", "StdEncoding"],
+    JSON_TYPE: ["JSONString", "JSONUint64", "JSONObject"],
+    VRF_STANDARD: ["VrfAlgorand"],
+    BLOCK_FIELD: ["BlkSeed", "BlkTimestamp"],
+}
+
+# Named integer constants accepted by `int` and `pushint`.
+NAMED_INTS = {
+    # OnCompletion
+    "NoOp": 0,
+    "OptIn": 1,
+    "CloseOut": 2,
+    "ClearState": 3,
+    "UpdateApplication": 4,
+    "DeleteApplication": 5,
+    # TypeEnum
+    "unknown": 0,
+    "pay": 1,
+    "keyreg": 2,
+    "acfg": 3,
+    "axfer": 4,
+    "afrz": 5,
+    "appl": 6,
+}
+
+
+# / --- OPCODES
+class OpSpec(NamedTuple):
+    name: str
+    opcode: int
+    immediates: tuple[str, ...] = ()
+    version: int = 1
+    cost: int = DEFAULT_COST
+
+
+OPCODES = {
+    spec.name: spec
+    for spec in (
+        OpSpec("err", 0x00),
+        OpSpec("sha256", 0x01, cost=35),
+        OpSpec("keccak256", 0x02, cost=130),
+        OpSpec("sha512_256", 0x03, cost=45),
+        OpSpec("ed25519verify", 0x04, cost=1900),
+        OpSpec("ecdsa_verify", 0x05, (ECDSA_CURVE,), 5, cost=1700),
+        OpSpec("ecdsa_pk_decompress", 0x06, (ECDSA_CURVE,), 5, cost=650),
+        OpSpec("ecdsa_pk_recover", 0x07, (ECDSA_CURVE,), 5, cost=2000),
+        OpSpec("+", 0x08),
+        OpSpec("-", 0x09),
+        OpSpec("/", 0x0A),
+        OpSpec("*", 0x0B),
+        OpSpec("<", 0x0C),
+        OpSpec(">", 0x0D),
+        OpSpec("<=", 0x0E),
+        OpSpec(">=", 0x0F),
+        OpSpec("&&", 0x10),
+        OpSpec("||", 0x11),
+        OpSpec("==", 0x12),
+        OpSpec("!=", 0x13),
+        OpSpec("!", 0x14),
+        OpSpec("len", 0x15),
+        OpSpec("itob", 0x16),
+        OpSpec("btoi", 0x17),
+        OpSpec("%", 0x18),
+        OpSpec("|", 0x19),
+        OpSpec("&", 0x1A),
+        OpSpec("^", 0x1B),
+        OpSpec("~", 0x1C),
+        OpSpec("mulw", 0x1D),
+        OpSpec("addw", 0x1E, version=2),
+        OpSpec("divmodw", 0x1F, version=4, cost=20),
+        OpSpec("intcblock", 0x20, (INTS,)),
+        OpSpec("intc", 0x21, (UINT8,)),
+        OpSpec("intc_0", 0x22),
+        OpSpec("intc_1", 0x23),
+        OpSpec("intc_2", 0x24),
+        OpSpec("intc_3", 0x25),
+        OpSpec("bytecblock", 0x26, (BYTESS,)),
+        OpSpec("bytec", 0x27, (UINT8,)),
+        OpSpec("bytec_0", 0x28),
+        OpSpec("bytec_1", 0x29),
+        OpSpec("bytec_2", 0x2A),
+        OpSpec("bytec_3", 0x2B),
+        OpSpec("arg", 0x2C, (UINT8,)),
+        OpSpec("arg_0", 0x2D),
+        OpSpec("arg_1", 0x2E),
+        OpSpec("arg_2", 0x2F),
+        OpSpec("arg_3", 0x30),
+        OpSpec("txn", 0x31, (TXN_FIELD,)),
+        OpSpec("global", 0x32, (GLOBAL_FIELD,)),
+        OpSpec("gtxn", 0x33, (UINT8, TXN_FIELD)),
+        OpSpec("load", 0x34, (UINT8,)),
+        OpSpec("store", 0x35, (UINT8,)),
+        OpSpec("txna", 0x36, (TXN_FIELD, UINT8), 2),
+        OpSpec("gtxna", 0x37, (UINT8, TXN_FIELD, UINT8), 2),
+        OpSpec("gtxns", 0x38, (TXN_FIELD,), 3),
+        OpSpec("gtxnsa", 0x39, (TXN_FIELD, UINT8), 3),
+        OpSpec("gload", 0x3A, (UINT8, UINT8), 4),
+        OpSpec("gloads", 0x3B, (UINT8,), 4),
+        OpSpec("gaid", 0x3C, (UINT8,), 4),
+        OpSpec("gaids", 0x3D, version=4),
+        OpSpec("loads", 0x3E, version=5),
+        OpSpec("stores", 0x3F, version=5),
+        OpSpec("bnz", 0x40, (LABEL,)),
+        OpSpec("bz", 0x41, (LABEL,), 2),
+        OpSpec("b", 0x42, (LABEL,), 2),
+        OpSpec("return", 0x43, version=2),
+        OpSpec("assert", 0x44, version=3),
+        OpSpec("bury", 0x45, (UINT8,), 8),
+        OpSpec("popn", 0x46, (UINT8,), 8),
+        OpSpec("dupn", 0x47, (UINT8,), 8),
+        OpSpec("pop", 0x48),
+        OpSpec("dup", 0x49),
+        OpSpec("dup2", 0x4A, version=2),
+        OpSpec("dig", 0x4B, (UINT8,), 3),
+        OpSpec("swap", 0x4C, version=3),
+        OpSpec("select", 0x4D, version=3),
+        OpSpec("cover", 0x4E, (UINT8,), 5),
+        OpSpec("uncover", 0x4F, (UINT8,), 5),
+        OpSpec("concat", 0x50, version=2),
+        OpSpec("substring", 0x51, (UINT8, UINT8), 2),
+        OpSpec("substring3", 0x52, version=2),
+        OpSpec("getbit", 0x53, version=3),
+        OpSpec("setbit", 0x54, version=3),
+        OpSpec("getbyte", 0x55, version=3),
+        OpSpec("setbyte", 0x56, version=3),
+        OpSpec("extract", 0x57, (UINT8, UINT8), 5),
+        OpSpec("extract3", 0x58, version=5),
+        OpSpec("extract_uint16", 0x59, version=5),
+        OpSpec("extract_uint32", 0x5A, version=5),
+        OpSpec("extract_uint64", 0x5B, version=5),
+        OpSpec("replace2", 0x5C, (UINT8,), 7),
+        OpSpec("replace3", 0x5D, version=7),
+        OpSpec("base64_decode", 0x5E, (BASE64_ENCODING,), 7),
+        OpSpec("json_ref", 0x5F, (JSON_TYPE,), 7, cost=25),
+        OpSpec("balance", 0x60, version=2),
+        OpSpec("app_opted_in", 0x61, version=2),
+        OpSpec("app_local_get", 0x62, version=2),
+        OpSpec("app_local_get_ex", 0x63, version=2),
+        OpSpec("app_global_get", 0x64, version=2),
+        OpSpec("app_global_get_ex", 0x65, version=2),
+        OpSpec("app_local_put", 0x66, version=2),
+        OpSpec("app_global_put", 0x67, version=2),
+        OpSpec("app_local_del", 0x68, version=2),
+        OpSpec("app_global_del", 0x69, version=2),
+        OpSpec("asset_holding_get", 0x70, (ASSET_HOLDING_FIELD,), 2),
+        OpSpec("asset_params_get", 0x71, (ASSET_PARAMS_FIELD,), 2),
+        OpSpec("app_params_get", 0x72, (APP_PARAMS_FIELD,), 5),
+        OpSpec("acct_params_get", 0x73, (ACCT_PARAMS_FIELD,), 6),
+        OpSpec("min_balance", 0x78, version=3),
+        OpSpec("pushbytes", 0x80, (BYTES,), 3),
+        OpSpec("pushint", 0x81, (VARUINT,), 3),
+        OpSpec("pushbytess", 0x82, (BYTESS,), 8),
+        OpSpec("pushints", 0x83, (INTS,), 8),
+        OpSpec("ed25519verify_bare", 0x84, version=7, cost=1900),
+        OpSpec("callsub", 0x88, (LABEL,), 4),
+        OpSpec("retsub", 0x89, version=4),
+        OpSpec("proto", 0x8A, (UINT8, UINT8), 8),
+        OpSpec("frame_dig", 0x8B, (INT8,), 8),
+        OpSpec("frame_bury", 0x8C, (INT8,), 8),
+        OpSpec("switch", 0x8D, (LABELS,), 8),
+        OpSpec("match", 0x8E, (LABELS,), 8),
+        OpSpec("shl", 0x90, version=4),
+        OpSpec("shr", 0x91, version=4),
+        OpSpec("sqrt", 0x92, version=4, cost=4),
+        OpSpec("bitlen", 0x93, version=4),
+        OpSpec("exp", 0x94, version=4),
+        OpSpec("expw", 0x95, version=4, cost=10),
+        OpSpec("bsqrt", 0x96, version=6, cost=40),
+        OpSpec("divw", 0x97, version=6),
+        OpSpec("sha3_256", 0x98, version=7, cost=130),
+        OpSpec("b+", 0xA0, version=4, cost=10),
+        OpSpec("b-", 0xA1, version=4, cost=10),
+        OpSpec("b/", 0xA2, version=4, cost=20),
+        OpSpec("b*", 0xA3, version=4, cost=20),
+        OpSpec("b<", 0xA4, version=4),
+        OpSpec("b>", 0xA5, version=4),
+        OpSpec("b<=", 0xA6, version=4),
+        OpSpec("b>=", 0xA7, version=4),
+        OpSpec("b==", 0xA8, version=4),
+        OpSpec("b!=", 0xA9, version=4),
+        OpSpec("b%", 0xAA, version=4, cost=20),
+        OpSpec("b|", 0xAB, version=4, cost=6),
+        OpSpec("b&", 0xAC, version=4, cost=6),
+        OpSpec("b^", 0xAD, version=4, cost=6),
+        OpSpec("b~", 0xAE, version=4, cost=4),
+        OpSpec("bzero", 0xAF, version=4),
+        OpSpec("log", 0xB0, version=5),
+        OpSpec("itxn_begin", 0xB1, version=5),
+        OpSpec("itxn_field", 0xB2, (TXN_FIELD,), 5),
+        OpSpec("itxn_submit", 0xB3, version=5),
+        OpSpec("itxn", 0xB4, (TXN_FIELD,), 5),
+        OpSpec("itxna", 0xB5, (TXN_FIELD, UINT8), 5),
+        OpSpec("itxn_next", 0xB6, version=6),
+        OpSpec("gitxn", 0xB7, (UINT8, TXN_FIELD), 6),
+        OpSpec("gitxna", 0xB8, (UINT8, TXN_FIELD, UINT8), 6),
+        OpSpec("box_create", 0xB9, version=8),
+        OpSpec("box_extract", 0xBA, version=8),
+        OpSpec("box_replace", 0xBB, version=8),
+        OpSpec("box_del", 0xBC, version=8),
+        OpSpec("box_len", 0xBD, version=8),
+        OpSpec("box_get", 0xBE, version=8),
+        OpSpec("box_put", 0xBF, version=8),
+        OpSpec("txnas", 0xC0, (TXN_FIELD,), 5),
+        OpSpec("gtxnas", 0xC1, (UINT8, TXN_FIELD), 5),
+        OpSpec("gtxnsas", 0xC2, (TXN_FIELD,), 5),
+        OpSpec("args", 0xC3, version=5),
+        OpSpec("gloadss", 0xC4, version=6),
+        OpSpec("itxnas", 0xC5, (TXN_FIELD,), 6),
+        OpSpec("gitxnas", 0xC6, (UINT8, TXN_FIELD), 6),
+        OpSpec("vrf_verify", 0xD0, (VRF_STANDARD,), 7, cost=5700),
+        OpSpec("block", 0xD1, (BLOCK_FIELD,), 7),
+    )
+}
+
+# Shortcut opcodes for the first four constants / arguments.
+SHORTCUTS = {"intc": "intc_{}", "bytec": "bytec_{}", "arg": "arg_{}"}
+
+# Array fields accessed with an explicit index are assembled with the array
+# variant of the opcode (e.g. `txn Accounts 1` is `txna Accounts 1`).
+ARRAY_VARIANTS = {
+    "txn": ("txna", 2),
+    "gtxn": ("gtxna", 3),
+    "gtxns": ("gtxnsa", 2),
+    "itxn": ("itxna", 2),
+    "gitxn": ("gitxna", 3),
+}
+
+# Opcodes accessing transaction array fields (all the others just accept
+# scalar transaction fields).
+TXN_ARRAY_OPCODES = {
+    "txna",
+    "gtxna",
+    "gtxnsa",
+    "itxna",
+    "gitxna",
+    "txnas",
+    "gtxnas",
+    "gtxnsas",
+    "itxnas",
+    "gitxnas",
+}
+
+PSEUDO_INTS = {"int"}
+PSEUDO_BYTES = {"byte", "addr", "method"}
+
+
+class TealAssemblyError(Exception):
+    def __init__(self, line: int, message: str) -> None:
+        super().__init__(f"{line}: {message}")
+        self.line = line
+
+
+# / --- PARSING
+class Instruction(NamedTuple):
+    line: int
+    op: str
+    args: tuple[str, ...]
+
+
+def tokenize(line: str) -> list[str]:
+    """Split a TEAL source line in tokens, dropping comments."""
+    tokens = []
+    token = ""
+    in_string = False
+    escaped = False
+    i = 0
+    while i < len(line):
+        c = line[i]
+        if in_string:
+            token += c
+            if escaped:
+                escaped = False
+            elif c == "\\":
+                escaped = True
+            elif c == '"':
+                in_string = False
+        elif c == '"':
+            token += c
+            in_string = True
+        elif line.startswith("//", i):
+            break
+        elif c.isspace():
+            if token:
+                tokens.append(token)
+            token = ""
+        else:
+            token += c
+        i += 1
+    if token:
+        tokens.append(token)
+    return tokens
+
+
+def parse(source: str) -> tuple[int, list[Union[str, Instruction]]]:
+    """
+    Parse TEAL source code in its version and a list of label definitions
+    (as `str`) and instructions.
+    """
+    version = None
+    program: list[Union[str, Instruction]] = []
+    for line_number, line in enumerate(source.splitlines(), start=1):
+        tokens = tokenize(line)
+        if not tokens:
+            continue
+        if tokens[0] == "#pragma":
+            if len(tokens) != 3 or tokens[1] != "version":
+                raise TealAssemblyError(line_number, "invalid #pragma")
+            if version is not None or program:
+                raise TealAssemblyError(
+                    line_number, "#pragma version is only allowed before instructions"
+                )
+            version = parse_uint(line_number, tokens[2])
+            if not 1 <= version <= MAX_VERSION:
+                raise TealAssemblyError(line_number, f"unsupported version {version}")
+            continue
+        if tokens[0].endswith(":"):
+            program.append(tokens[0][:-1])
+            tokens = tokens[1:]
+            if not tokens:
+                continue
+        program.append(Instruction(line_number, tokens[0], tuple(tokens[1:])))
+    return version or DEFAULT_VERSION, program
+
+
+def parse_uint(line: int, token: str) -> int:
+    if token in NAMED_INTS:
+        return NAMED_INTS[token]
+    # Go `strconv.ParseUint(token, 0, 64)` syntax.
+    literal = (
+        token.replace("_", "") if token[:2].lower() in ("0x", "0o", "0b") else token
+    )
+    if len(literal) > 1 and literal[0] == "0" and literal[1].isdigit():
+        literal = "0o" + literal[1:]
+    try:
+        value = int(literal, 0)
+    except ValueError:
+        raise TealAssemblyError(line, f"unable to parse {token!r} as integer")
+    if not 0 <= value < 2**64:
+        raise TealAssemblyError(line, f"{token!r} out of uint64 range")
+    return value
+
+
+def parse_string(line: int, token: str) -> bytes:
+    value = bytearray()
+    body = token[1:-1]
+    i = 0
+    while i < len(body):
+        c = body[i]
+        if c != "\\":
+            value += c.encode()
+            i += 1
+            continue
+        escape = body[i + 1 : i + 2]
+        if escape in ("n", "r", "t", "\\", '"'):
+            value += {"n": b"\n", "r": b"\r", "t": b"\t"}.get(escape, escape.encode())
+            i += 2
+        elif escape == "x":
+            value.append(int(body[i + 2 : i + 4], 16))
+            i += 4
+        else:
+            raise TealAssemblyError(line, f"invalid escape sequence in {token}")
+    return bytes(value)
+
+
+def parse_bytes(line: int, tokens: tuple[str, ...]) -> tuple[bytes, int]:
+    """Parse a byte-array literal, returns its value and the consumed tokens."""
+    if not tokens:
+        raise TealAssemblyError(line, "missing byte-array literal")
+    token = tokens[0]
+    try:
+        if token.startswith("0x"):
+            return bytes.fromhex(token[2:]), 1
+        if len(token) >= 2 and token[0] == token[-1] == '"':
+            return parse_string(line, token), 1
+        for prefix, decode in (
+            ("base64", base64.b64decode),
+            ("b64", base64.b64decode),
+            ("base32", _b32decode),
+            ("b32", _b32decode),
+        ):
+            if token == prefix and len(tokens) > 1:
+                return decode(tokens[1]), 2
+            if token.startswith(prefix + "(") and token.endswith(")"):
+                return decode(token[len(prefix) + 1 : -1]), 1
+    except ValueError:
+        pass
+    raise TealAssemblyError(line, f"unable to parse byte-array literal {token!r}")
+
+
+def _b32decode(value: str) -> bytes:
+    return base64.b32decode(value + "=" * (-len(value) % 8))
+
+
+def pseudo_constant(instruction: Instruction) -> Union[int, bytes]:
+    line, op, args = instruction
+    if op == "int":
+        if len(args) != 1:
+            raise TealAssemblyError(line, "int expects one immediate")
+        return parse_uint(line, args[0])
+    if op == "addr":
+        if len(args) != 1:
+            raise TealAssemblyError(line, "addr expects one immediate")
+        return encoding.decode_address(args[0])
+    if op == "method":
+        if len(args) != 1 or not args[0].startswith('"'):
+            raise TealAssemblyError(line, "method expects a method signature string")
+        return Method.from_signature(
+            parse_string(line, args[0]).decode()
+        ).get_selector()
+    value, consumed = parse_bytes(line, args)
+    if consumed != len(args):
+        raise TealAssemblyError(line, "byte expects one byte-array literal")
+    return value
+
+
+# / --- ENCODING
+def encode_varuint(value: int) -> bytes:
+    encoded = bytearray()
+    while value >= 0x80:
+        encoded.append((value & 0x7F) | 0x80)
+        value >>= 7
+    encoded.append(value)
+    return bytes(encoded)
+
+
+def encode_bytes(value: bytes) -> bytes:
+    return encode_varuint(len(value)) + value
+
+
+def optimize_constants(
+    constants: list[Union[int, bytes]], version: int
+) -> tuple[list[Union[int, bytes]], set[Union[int, bytes]]]:
+    """
+    Reference assembler constants optimization: constants are sorted by
+    frequency of use (stable on first use), constants used just once are
+    pushed. Returns the constants block and the pushed constants.
+    """
+    frequency: dict[Union[int, bytes], int] = {}
+    for constant in constants:
+        frequency[constant] = frequency.get(constant, 0) + 1
+    if version < OPTIMIZE_CONSTANTS_VERSION:
+        return list(frequency), set()
+    by_frequency = sorted(frequency, key=lambda c: -frequency[c])
+    block = [c for c in by_frequency if frequency[c] > 1]
+    return block, {c for c in by_frequency if frequency[c] == 1}
+
+
+class Assembler:
+    def __init__(self, source: str) -> None:
+        self.version, self.program = parse(source)
+        self.instructions = [i for i in self.program if isinstance(i, Instruction)]
+        self.intc: Optional[list[int]] = None
+        self.bytec: Optional[list[bytes]] = None
+        self.push_constants: set[Union[int, bytes]] = set()
+        self._resolve_constants()
+
+    def _resolve_constants(self) -> None:
+        explicit_intc = any(i.op in ("intcblock",) for i in self.instructions)
+        explicit_bytec = any(i.op in ("bytecblock",) for i in self.instructions)
+        int_refs: list[Union[int, bytes]] = []
+        byte_refs: list[Union[int, bytes]] = []
+        for instruction in self.instructions:
+            if instruction.op in PSEUDO_INTS and not explicit_intc:
+                int_refs.append(pseudo_constant(instruction))
+            elif instruction.op in PSEUDO_BYTES and not explicit_bytec:
+                byte_refs.append(pseudo_constant(instruction))
+        if int_refs:
+            self.intc, pushed = optimize_constants(int_refs, self.version)
+            self.push_constants |= pushed
+        if byte_refs:
+            # NOTE: `int` and `byte` constants never collide since ints and
+            # bytes values never compare equal.
+            self.bytec, pushed = optimize_constants(byte_refs, self.version)
+            self.push_constants |= pushed
+        if explicit_intc:
+            self.intc = self._explicit_block("intcblock")
+        if explicit_bytec:
+            self.bytec = self._explicit_block("bytecblock")
+
+    def _explicit_block(self, op: str) -> list:
+        instruction = next(i for i in self.instructions if i.op == op)
+        return self._block_values(instruction)
+
+    def _block_values(self, instruction: Instruction) -> list:
+        line, op, args = instruction
+        if op in ("intcblock", "pushints"):
+            return [parse_uint(line, arg) for arg in args]
+        values = []
+        while args:
+            value, consumed = parse_bytes(line, args)
+            values.append(value)
+            args = args[consumed:]
+        return values
+
+    def _expand(self, instruction: Instruction) -> Instruction:
+        """Rewrite pseudo-ops and shortcuts into concrete opcodes."""
+        line, op, args = instruction
+        if op in PSEUDO_INTS or op in PSEUDO_BYTES:
+            constant = pseudo_constant(instruction)
+            is_int = op in PSEUDO_INTS
+            block = self.intc if is_int else self.bytec
+            explicit = any(
+                i.op == ("intcblock" if is_int else "bytecblock")
+                for i in self.instructions
+            )
+            can_push = self.version >= OPTIMIZE_CONSTANTS_VERSION
+            if constant in self.push_constants or (
+                explicit and can_push and op != "method"
+            ):
+                push = "pushint" if is_int else "pushbytes"
+                return Instruction(line, push, (constant,))
+            if block is None or constant not in block:
+                raise TealAssemblyError(
+                    line,
+                    f"value {constant!r} does not appear in existing constants block",
+                )
+            op, args = ("intc" if is_int else "bytec"), (str(block.index(constant)),)
+        if op in SHORTCUTS and len(args) == 1:
+            index = parse_uint(line, args[0])
+            block = {"intc": self.intc, "bytec": self.bytec}.get(op, [])
+            if op != "arg" and (block is None or index >= len(block)):
+                raise TealAssemblyError(line, f"{op} {index} is not defined")
+            if index < 4:
+                return Instruction(line, SHORTCUTS[op].format(index), ())
+        if op in ARRAY_VARIANTS and len(args) == ARRAY_VARIANTS[op][1]:
+            op = ARRAY_VARIANTS[op][0]
+        return Instruction(line, op, args)
+
+    def _encode(
+        self, instruction: Instruction, labels: Optional[dict[str, int]], pc: int
+    ) -> bytes:
+        line, op, args = instruction
+        spec = OPCODES.get(op)
+        if spec is None:
+            raise TealAssemblyError(line, f"unknown opcode: {op}")
+        if spec.version > self.version:
+            raise TealAssemblyError(
+                line, f"{op} opcode was introduced in v{spec.version}"
+            )
+        encoded = bytearray([spec.opcode])
+        if spec.immediates and spec.immediates[-1] in (INTS, BYTESS, LABELS):
+            kind = spec.immediates[-1]
+            if kind == LABELS:
+                # Offsets are relative to the end of the whole instruction.
+                end = pc + 2 + 2 * len(args)
+                encoded.append(len(args))
+                for label in args:
+                    encoded += self._offset(line, labels, label, end)
+                return bytes(encoded)
+            if args and not isinstance(args[0], str):
+                values = list(args)
+            else:
+                values = self._block_values(instruction)
+            encoded += encode_varuint(len(values))
+            for value in values:
+                encoded += (
+                    encode_varuint(value) if kind == INTS else encode_bytes(value)
+                )
+            return bytes(encoded)
+
+        if len(args) != len(spec.immediates):
+            raise TealAssemblyError(
+                line, f"{op} expects {len(spec.immediates)} immediate arguments"
+            )
+        for kind, arg in zip(spec.immediates, args):
+            if kind == UINT8:
+                value = parse_uint(line, arg)
+                if value > 0xFF:
+                    raise TealAssemblyError(line, f"{op} immediate {arg} > 255")
+                encoded.append(value)
+            elif kind == INT8:
+                value = int(arg)
+                if not -128 <= value <= 127:
+                    raise TealAssemblyError(line, f"{op} immediate {arg} out of range")
+                encoded += value.to_bytes(1, "big", signed=True)
+            elif kind == VARUINT:
+                value = arg if isinstance(arg, int) else parse_uint(line, arg)
+                encoded += encode_varuint(value)
+            elif kind == BYTES:
+                if isinstance(arg, bytes):
+                    value = arg
+                else:
+                    value, consumed = parse_bytes(line, args)
+                    if consumed != len(args):
+                        raise TealAssemblyError(line, f"{op} expects one literal")
+                encoded += encode_bytes(value)
+                break
+            elif kind == LABEL:
+                encoded += self._offset(line, labels, arg, pc + 3)
+            else:
+                if arg not in FIELDS[kind] or (
+                    kind == TXN_FIELD
+                    and op not in ("itxn_field", "gitxn")
+                    and (arg in TXN_ARRAY_FIELDS) != (op in TXN_ARRAY_OPCODES)
+                ):
+                    raise TealAssemblyError(line, f"{op} unknown field: {arg}")
+                encoded.append(FIELDS[kind].index(arg))
+        return bytes(encoded)
+
+    @staticmethod
+    def _offset(
+        line: int, labels: Optional[dict[str, int]], label: str, end: int
+    ) -> bytes:
+        if labels is None:
+            # Sizing pass: offsets are fixed size.
+            return bytes(2)
+        if label not in labels:
+            raise TealAssemblyError(line, f"reference to undefined label {label!r}")
+        offset = labels[label] - end
+        if not -(2**15) <= offset < 2**15:
+            raise TealAssemblyError(line, f"label {label!r} is too far away")
+        return offset.to_bytes(2, "big", signed=True)
+
+    def assemble(self) -> bytes:
+        program: list[Union[str, Instruction]] = []
+        for item in self.program:
+            program.append(
+                self._expand(item) if isinstance(item, Instruction) else item
+            )
+
+        # NOTE: Optimized constants blocks are emitted at the beginning of the
+        # program (`intcblock` first), even before explicit constants blocks.
+        ops = _ops(program)
+        if self.bytec and "bytecblock" not in ops:
+            program.insert(0, Instruction(0, "bytecblock", tuple(self.bytec)))
+        if self.intc and "intcblock" not in ops:
+            program.insert(0, Instruction(0, "intcblock", tuple(self.intc)))
+
+        # Instructions size does not depend on labels (offsets are fixed size),
+        # so labels are resolved in a first sizing pass.
+        labels: dict[str, int] = {}
+        pc = len(encode_varuint(self.version))
+        for item in program:
+            if isinstance(item, str):
+                if item in labels:
+                    raise TealAssemblyError(0, f"duplicate label {item!r}")
+                labels[item] = pc
+            else:
+                pc += len(self._encode(item, None, pc))
+
+        bytecode = bytearray(encode_varuint(self.version))
+        for item in program:
+            if isinstance(item, Instruction):
+                bytecode += self._encode(item, labels, len(bytecode))
+        return bytes(bytecode)
+
+
+def _ops(program: list[Union[str, Instruction]]) -> list[str]:
+    return [i.op for i in program if isinstance(i, Instruction)]
+
+
+_ASSEMBLED: dict[str, bytes] = {}
+
+
+def assemble(source: str) -> bytes:
+    """Assemble TEAL source code, results are cached by source hash."""
+    source_hash = hashlib.sha256(source.encode()).hexdigest()
+    if source_hash not in _ASSEMBLED:
+        _ASSEMBLED[source_hash] = Assembler(source).assemble()
+    return _ASSEMBLED[source_hash]
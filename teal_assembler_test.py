@@ -0,0 +1,129 @@
+"""
+Offline TEAL assembler test suite
+
+Expected bytecodes have been produced by the reference (go-algorand) assembler.
+"""
+
+import pytest
+
+from smart_asa_asc import compile_stateful, smart_asa_abi
+from teal_assembler import TealAssemblyError, assemble
+
+
+@pytest.mark.parametrize(
+    "source,bytecode",
+    [
+        pytest.param(
+            "#pragma version 7\nint 1\nint 2\n+\nint 1\n+\nint 300\n+\nreturn\n",
+            "0720010122810208220881ac020843",
+            id="int constants optimization",
+        ),
+        pytest.param(
+            "#pragma version 7\nint 5\nint 6\nint 6\nint 5\nint 6\n+\n+\n+\n+\n",
+            "0720020605232222232208080808",
+            id="int constants sorted by frequency",
+        ),
+        pytest.param(
+            "#pragma version 2\nint 5\nint 6\n+\nreturn\n",
+            "022002050622230843",
+            id="no constants optimization before v4",
+        ),
+        pytest.param(
+            "#pragma version 7\nintcblock 5 7\nint 7\nint 9\n+\nreturn\n",
+            "0720020507810781090843",
+            id="int with explicit intcblock",
+        ),
+        pytest.param(
+            '#pragma version 7\nbyte "a"\nbyte "b"\nconcat\nbyte "a"\n'
+            "concat\nlen\nreturn\n",
+            "0726010161288001625028501543",
+            id="byte constants optimization",
+        ),
+        pytest.param(
+            '#pragma version 7\nbytecblock 0x01 0x84467aff\nmethod "foo()void"\n'
+            "len\nreturn\n",
+            "07260201010484467aff291543",
+            id="method with explicit bytecblock",
+        ),
+        pytest.param(
+            '#pragma version 7\nmethod "foo()void"\nlen\nreturn\n',
+            "07800484467aff1543",
+            id="method",
+        ),
+        pytest.param(
+            "#pragma version 7\nbyte base64 AAEC\nbyte b64(AAEC)\n"
+            "byte base32 AAAQE\nconcat\nconcat\nlen\nreturn\n",
+            "0726010300010228282850501543",
+            id="byte literals encodings",
+        ),
+        pytest.param(
+            '#pragma version 7\nbyte "a\\x41\\n\\t\\\\\\"b"\nlen\nreturn\n',
+            "07800761410a095c22621543",
+            id="string escapes",
+        ),
+        pytest.param(
+            "#pragma version 7\nint 0x10\nint 010\nint 0b11\n+\n+\nreturn\n",
+            "07811081088103080843",
+            id="int literals",
+        ),
+        pytest.param(
+            "#pragma version 7\nint pay\nint NoOp\n+\nint OptIn\n+\nreturn\n",
+            "0720010122810008220843",
+            id="named int constants",
+        ),
+        pytest.param(
+            "#pragma version 7\ntxn ApplicationArgs 0\ngtxn 0 Accounts 1\n"
+            "concat\nlen\nreturn\n",
+            "07361a0037001c01501543",
+            id="txn array fields",
+        ),
+        pytest.param(
+            "#pragma version 7\nint 1\nbnz l\nerr\nl:\nint 1\nreturn\n",
+            "0720010122400001002243",
+            id="forward branch",
+        ),
+        pytest.param(
+            "#pragma version 7\nl: int 1 // comment\nbnz l\nint 1\nreturn\n",
+            "072001012240fffc2243",
+            id="backward branch",
+        ),
+        pytest.param(
+            "#pragma version 8\nint 1\nswitch a b\na:\nb:\nint 1\nreturn\n",
+            "08200101228d02000000002243",
+            id="switch",
+        ),
+        pytest.param(
+            "int 1\n",
+            "0120010122",
+            id="default version",
+        ),
+    ],
+)
+def test_assemble(source: str, bytecode: str) -> None:
+    assert assemble(source).hex() == bytecode
+
+
+def test_assemble_smart_asa_app() -> None:
+    approval, clear, _ = smart_asa_abi.build_program()
+    approval_bytecode = assemble(compile_stateful(approval))
+    clear_bytecode = assemble(compile_stateful(clear))
+    assert approval_bytecode[0] == clear_bytecode[0] == 7
+    assert assemble(compile_stateful(approval)) is approval_bytecode
+
+
+@pytest.mark.parametrize(
+    "source",
+    [
+        "#pragma version 7\nfoo\n",
+        "#pragma version 7\nb missing\n",
+        "#pragma version 7\nintc 0\n",
+        "#pragma version 7\ntxn Accounts\n",
+        "#pragma version 7\ntxna Sender 0\n",
+        "#pragma version 4\nbox_len\n",
+        '#pragma version 7\nbytecblock 0x01\nmethod "foo()void"\n',
+        "#pragma version 7\nl:\nl:\nint 1\n",
+    ],
+)
+def test_assemble_errors(source: str) -> None:
+    with pytest.raises(TealAssemblyError):
+        assemble(source)
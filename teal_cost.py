@@ -0,0 +1,639 @@
+"""
+Smart ASA static opcode cost analyzer
+
+Estimates, without executing it, the min and max opcode cost of each ABI
+method (and of each method branch) of a TEAL approval program, walking the
+control-flow graph of the program from the Router method selector dispatch.
+
+Usage:
+  teal_cost [--teal=<t>] [--abi=<a>] [--budget=<b>] [--max-iterations=<i>]
+            [--max-depth=<d>] [--baseline=<p>]
+  teal_cost --help
+
+Options:
+  -h, --help
+  -t, --teal=<t>              Approval program, default to Smart ASA App
+  -a, --abi=<a>               ABI JSON, default to Smart ASA App ABI
+  -b, --budget=<b>            [default: 700]
+  -i, --max-iterations=<i>    [default: 20]
+  -d, --max-depth=<d>         [default: 20]
+  -p, --baseline=<p>          Approval program to compare the methods dispatch
+                              cost with (e.g. another dispatch order)
+
+Prints a JSON cost report, exits with non-zero status if any method could
+exceed the opcode budget.
+"""
+
+__author__ = "Cosimo Bassi, Stefano De Angelis"
+__email__ = "<cosimo.bassi@algorand.com>, <stefano.deangelis@algorand.com>"
+
+import json
+import math
+import sys
+from typing import NamedTuple, Optional, Union
+
+from algosdk.abi import Contract
+
+from teal_assembler import (
+    DEFAULT_COST,
+    OPCODES,
+    PSEUDO_BYTES,
+    PSEUDO_INTS,
+    Instruction,
+    TealAssemblyError,
+    assemble,
+    parse,
+    parse_bytes,
+    parse_uint,
+    pseudo_constant,
+)
+
+# Opcode budget of a single Application Call (pooled across the group).
+MAX_APP_BUDGET = 700
+
+# NOTE: Loops and recursion have no static bound: each subroutine call may
+# take its loops back edges at most `MAX_ITERATIONS` times and recursive
+# subroutines may nest at most `MAX_RECURSION_DEPTH` calls. Defaults fit
+# decimal conversions of uint64 (at most 20 digits).
+MAX_ITERATIONS = 20
+MAX_RECURSION_DEPTH = 20
+
+# Methods with more paths than this have no per-branch report.
+MAX_BRANCHES = 1024
+
+# Dispatch selector of the Bare App Calls (no Application Args).
+BARE_CALL = b""
+BARE_CALL_NAME = "bare"
+
+MAIN = "main"
+
+BRANCH_OPS = {"bnz", "bz", "b", "switch", "match"}
+BLOCK_END_OPS = BRANCH_OPS | {"callsub", "retsub", "return", "err"}
+
+
+class Cost(NamedTuple):
+    min: int
+    max: int
+
+
+class Exits(NamedTuple):
+    # Cost of the paths returning to the caller (`retsub`) and of the paths
+    # approving the program (`return`, end of program).
+    ret: Optional[Cost] = None
+    halt: Optional[Cost] = None
+
+
+class Block(NamedTuple):
+    index: int
+    label: Optional[str]
+    instructions: list[Instruction]
+    cost: int
+
+
+# Value of `txn NumAppArgs` for ABI method calls: not zero, otherwise unknown.
+_NOT_ZERO = object()
+
+
+def _add(a: Optional[Cost], b: Optional[Cost]) -> Optional[Cost]:
+    if a is None or b is None:
+        return None
+    return Cost(a.min + b.min, a.max + b.max)
+
+
+def _union(a: Optional[Cost], b: Optional[Cost]) -> Optional[Cost]:
+    if a is None:
+        return b
+    if b is None:
+        return a
+    return Cost(min(a.min, b.min), max(a.max, b.max))
+
+
+def _exits_union(a: Exits, b: Exits) -> Exits:
+    return Exits(_union(a.ret, b.ret), _union(a.halt, b.halt))
+
+
+def _exits_shift(exits: Exits, cost: Cost) -> Exits:
+    return Exits(_add(cost, exits.ret), _add(cost, exits.halt))
+
+
+def opcode_cost(instruction: Instruction) -> int:
+    """Opcode cost of an instruction (pseudo-ops cost as their opcode)."""
+    spec = OPCODES.get(instruction.op)
+    return spec.cost if spec is not None else DEFAULT_COST
+
+
+class CostAnalyzer:
+    """
+    Control-flow graph of a TEAL program, split in basic blocks and
+    subroutines (`callsub` targets). Assertions are assumed to succeed, while
+    paths hitting `err` or approving with a constant `0` are rejected.
+    """
+
+    def __init__(
+        self,
+        source: str,
+        budget: int = MAX_APP_BUDGET,
+        max_iterations: int = MAX_ITERATIONS,
+        max_depth: int = MAX_RECURSION_DEPTH,
+    ) -> None:
+        # Fail early on invalid programs.
+        assemble(source)
+        self.budget = budget
+        self.max_iterations = max_iterations
+        self.max_depth = max_depth
+        _, program = parse(source)
+        self.intc: list[int] = []
+        self.bytec: list[bytes] = []
+        self.blocks: list[Block] = []
+        self.labels: dict[str, int] = {}
+        self._build_blocks(program)
+        self.functions: dict[str, int] = {MAIN: 0}
+        for block in self.blocks:
+            if block.instructions and block.instructions[-1].op == "callsub":
+                target = block.instructions[-1].args[0]
+                self.functions[target] = self.labels[target]
+        self.function_of: dict[int, str] = {}
+        self.back_edges: set[tuple[int, int]] = set()
+        self.calls: dict[str, set[str]] = {f: set() for f in self.functions}
+        for function in self.functions:
+            self._walk_function(function)
+        self.recursive = self._recursive_functions()
+        self._memo: dict[tuple, Exits] = {}
+
+    # / --- CONTROL-FLOW GRAPH
+    def _build_blocks(self, program: list[Union[str, Instruction]]) -> None:
+        label: Optional[str] = None
+        instructions: list[Instruction] = []
+
+        def close_block() -> None:
+            nonlocal label, instructions
+            if label is not None or instructions:
+                self.blocks.append(
+                    Block(
+                        len(self.blocks),
+                        label,
+                        instructions,
+                        sum(opcode_cost(i) for i in instructions),
+                    )
+                )
+            label, instructions = None, []
+
+        for item in program:
+            if isinstance(item, str):
+                close_block()
+                label = item
+                self.labels[item] = len(self.blocks)
+                continue
+            if item.op == "intcblock":
+                self.intc = [parse_uint(item.line, arg) for arg in item.args]
+            elif item.op == "bytecblock":
+                args = item.args
+                while args:
+                    value, consumed = parse_bytes(item.line, args)
+                    self.bytec.append(value)
+                    args = args[consumed:]
+            instructions.append(item)
+            if item.op in BLOCK_END_OPS:
+                close_block()
+        close_block()
+
+    def _next(self, index: int) -> Optional[int]:
+        return index + 1 if index + 1 < len(self.blocks) else None
+
+    def _constant(self, instruction: Instruction) -> Optional[Union[int, bytes]]:
+        line, op, args = instruction
+        if op in PSEUDO_INTS or op in PSEUDO_BYTES:
+            return pseudo_constant(instruction)
+        if op == "pushint":
+            return parse_uint(line, args[0])
+        if op == "pushbytes":
+            return parse_bytes(line, args)[0]
+        for block_op, block in (("intc", self.intc), ("bytec", self.bytec)):
+            if op == block_op:
+                return block[parse_uint(line, args[0])]
+            if op.startswith(block_op + "_"):
+                return block[int(op[len(block_op) + 1 :])]
+        return None
+
+    def _dispatch_value(self, instruction: Instruction, selector: bytes) -> object:
+        # Value pushed by a dispatch condition operand for the `selector` call.
+        op, args = instruction.op, instruction.args
+        if op in ("txn", "txna") and args == ("ApplicationArgs", "0"):
+            return None if selector == BARE_CALL else selector
+        if op == "txn" and args == ("NumAppArgs",):
+            return 0 if selector == BARE_CALL else _NOT_ZERO
+        return self._constant(instruction)
+
+    def _branch_condition(
+        self, block: Block, selector: Optional[bytes]
+    ) -> Optional[bool]:
+        """
+        Evaluates the Router dispatch conditions (`txn NumAppArgs` or method
+        selector comparisons) for the `selector` call, None if not known.
+        """
+        if selector is None or len(block.instructions) < 4:
+            return None
+        left, right, compare = block.instructions[-4:-1]
+        if compare.op not in ("==", "!="):
+            return None
+        values = [self._dispatch_value(i, selector) for i in (left, right)]
+        if None in values:
+            return None
+        if _NOT_ZERO in values:
+            other = values[1] if values[0] is _NOT_ZERO else values[0]
+            if other != 0:
+                return None
+            equal = False
+        else:
+            equal = values[0] == values[1]
+        return equal if compare.op == "==" else not equal
+
+    def _edges(
+        self, block: Block, selector: Optional[bytes] = None
+    ) -> list[tuple[Optional[int], Optional[str]]]:
+        """
+        Successors of a block in its function (None is the end of program),
+        with the label of undecided conditional branches taken.
+        """
+        if not block.instructions:
+            return [(self._next(block.index), None)]
+        last = block.instructions[-1]
+        fallthrough = (self._next(block.index), None)
+        if last.op in ("return", "err", "retsub"):
+            return []
+        if last.op == "b":
+            return [(self.labels[last.args[0]], None)]
+        if last.op in ("bnz", "bz"):
+            target = last.args[0]
+            condition = self._branch_condition(block, selector)
+            if condition is None:
+                return [fallthrough, (self.labels[target], target)]
+            if condition == (last.op == "bnz"):
+                return [(self.labels[target], None)]
+            return [fallthrough]
+        if last.op in ("switch", "match"):
+            return [fallthrough] + [(self.labels[t], t) for t in last.args]
+        return [fallthrough]
+
+    def _rejects(self, block: Block) -> bool:
+        instructions = block.instructions
+        if not instructions or instructions[-1].op == "err":
+            return bool(instructions)
+        return (
+            instructions[-1].op == "return"
+            and len(instructions) > 1
+            and self._constant(instructions[-2]) == 0
+        )
+
+    def _walk_function(self, function: str) -> None:
+        # Iterative DFS: blocks of the function, back edges and callees.
+        entry = self.functions[function]
+        visited = {entry}
+        on_stack = {entry}
+        stack = [(entry, iter(self._edges(self.blocks[entry])))]
+        self.function_of[entry] = function
+        while stack:
+            index, edges = stack[-1]
+            block = self.blocks[index]
+            if block.instructions and block.instructions[-1].op == "callsub":
+                self.calls[function].add(block.instructions[-1].args[0])
+            target = next((t for t, _ in edges if t is not None), None)
+            if target is None:
+                stack.pop()
+                on_stack.discard(index)
+                continue
+            if target in on_stack:
+                self.back_edges.add((index, target))
+            elif target not in visited:
+                visited.add(target)
+                on_stack.add(target)
+                self.function_of[target] = function
+                stack.append((target, iter(self._edges(self.blocks[target]))))
+
+    def _recursive_functions(self) -> dict[str, set[str]]:
+        # Functions mutually recursive with each function (call graph SCC).
+        reachable = {}
+        for function in self.functions:
+            reached: set[str] = set()
+            frontier = list(self.calls[function])
+            while frontier:
+                callee = frontier.pop()
+                if callee not in reached:
+                    reached.add(callee)
+                    frontier.extend(self.calls[callee])
+            reachable[function] = reached
+        return {
+            f: {g for g in reachable[f] if f in reachable[g]} for f in self.functions
+        }
+
+    def _is_inlinable(self, function: str) -> bool:
+        return not self.recursive[function] and not any(
+            self.function_of.get(src) == function for src, _ in self.back_edges
+        )
+
+    # / --- COST
+    def _call(self, block: Block, depth: int) -> Optional[Exits]:
+        caller = self.function_of[block.index]
+        callee = block.instructions[-1].args[0]
+        if callee in self.recursive[caller]:
+            if depth == 0:
+                return None
+            depth -= 1
+        else:
+            depth = self.max_depth - 1
+        return self._exits(self.functions[callee], self.max_iterations, depth, None)
+
+    def _exits(
+        self,
+        index: Optional[int],
+        iterations: int,
+        depth: int,
+        selector: Optional[bytes],
+    ) -> Exits:
+        if index is None:
+            return Exits(halt=Cost(0, 0))
+        key = (index, iterations, depth, selector)
+        if key in self._memo:
+            return self._memo[key]
+        block = self.blocks[index]
+        last = block.instructions[-1] if block.instructions else None
+        exits = Exits()
+        if self._rejects(block):
+            pass
+        elif last is not None and last.op == "return":
+            exits = Exits(halt=Cost(0, 0))
+        elif last is not None and last.op == "retsub":
+            exits = Exits(ret=Cost(0, 0))
+        elif last is not None and last.op == "callsub":
+            callee = self._call(block, depth)
+            if callee is not None:
+                after = self._exits(self._next(index), iterations, depth, selector)
+                exits = Exits(
+                    _add(callee.ret, after.ret),
+                    _union(callee.halt, _add(callee.ret, after.halt)),
+                )
+        else:
+            for target, _ in self._edges(block, selector):
+                if (index, target) in self.back_edges:
+                    if iterations == 0:
+                        continue
+                    target_exits = self._exits(target, iterations - 1, depth, selector)
+                else:
+                    target_exits = self._exits(target, iterations, depth, selector)
+                exits = _exits_union(exits, target_exits)
+        exits = _exits_shift(exits, Cost(block.cost, block.cost))
+        self._memo[key] = exits
+        return exits
+
+    def subroutine_cost(self, label: str) -> Optional[Cost]:
+        """Min and max opcode cost of a subroutine call (None if always fails)."""
+        exits = self._exits(
+            self.functions[label], self.max_iterations, self.max_depth - 1, None
+        )
+        return _union(exits.ret, exits.halt)
+
+    def subroutine_label(self, name: str) -> str:
+        """Label of a PyTeal subroutine, given its Python name."""
+        prefix = name.replace("_", "") + "_"
+        return next(
+            f
+            for f in self.functions
+            if f.startswith(prefix) and f[len(prefix) :].isdigit()
+        )
+
+    def selectors(self) -> list[bytes]:
+        """Method selectors dispatched by the program (BARE_CALL included)."""
+        selectors = []
+        for block in self.blocks:
+            instructions = block.instructions
+            if (
+                self.function_of.get(block.index) != MAIN
+                or len(instructions) < 4
+                or instructions[-1].op not in ("bnz", "bz")
+            ):
+                continue
+            left, right = instructions[-4:-2]
+            for operand, other in ((left, right), (right, left)):
+                if operand.op == "txn" and operand.args == ("NumAppArgs",):
+                    selector = BARE_CALL
+                elif operand.op in ("txn", "txna") and operand.args == (
+                    "ApplicationArgs",
+                    "0",
+                ):
+                    selector = self._constant(other)
+                else:
+                    continue
+                if isinstance(selector, bytes) and selector not in selectors:
+                    selectors.append(selector)
+        return selectors
+
+    def dispatch_cost(self, selector: bytes) -> Optional[int]:
+        """
+        Opcode cost of the Router dispatch of the `selector` method, from the
+        program entry to its method selector match (None if not dispatched).
+        """
+        index: Optional[int] = 0
+        cost = 0
+        while index is not None:
+            block = self.blocks[index]
+            last = block.instructions[-1] if block.instructions else None
+            condition = self._branch_condition(block, selector)
+            if last is None or last.op not in ("bnz", "bz") or condition is None:
+                return None
+            cost += block.cost
+            if condition == (last.op == "bnz"):
+                return cost
+            index = self._next(index)
+        return None
+
+    def method_cost(self, selector: bytes) -> Optional[Cost]:
+        """
+        Min and max opcode cost of an approved App Call dispatched to the
+        `selector` method (None if always rejected).
+        """
+        return self._exits(0, self.max_iterations, self.max_depth - 1, selector).halt
+
+    def method_branches(self, selector: bytes) -> Optional[dict[tuple, Cost]]:
+        """
+        Min and max opcode cost of each approved path of the `selector` method,
+        keyed by the labels of the conditional branches taken. Subroutines
+        with loops or recursion are not expanded. None if the method has more
+        than MAX_BRANCHES paths.
+        """
+        if not self._is_inlinable(MAIN):
+            return None
+        branches: dict[tuple, Cost] = {}
+        paths = 0
+        stack: list[tuple[Optional[int], tuple, Cost, tuple]] = [
+            (0, (), Cost(0, 0), ())
+        ]
+
+        def approve(labels: tuple, cost: Cost) -> None:
+            nonlocal paths
+            paths += 1
+            branches[labels] = _union(branches.get(labels), cost)
+
+        while stack and paths <= MAX_BRANCHES:
+            index, labels, cost, returns = stack.pop()
+            if index is None:
+                approve(labels, cost)
+                continue
+            block = self.blocks[index]
+            cost = _add(cost, Cost(block.cost, block.cost))
+            last = block.instructions[-1] if block.instructions else None
+            if self._rejects(block):
+                continue
+            if last is not None and last.op == "return":
+                approve(labels, cost)
+            elif last is not None and last.op == "retsub":
+                if returns:
+                    stack.append((returns[-1], labels, cost, returns[:-1]))
+            elif last is not None and last.op == "callsub":
+                callee = last.args[0]
+                if self._is_inlinable(callee):
+                    returns += (self._next(index),)
+                    stack.append((self.functions[callee], labels, cost, returns))
+                    continue
+                exits = self._call(block, self.max_depth - 1)
+                if exits is not None and exits.halt is not None:
+                    approve(labels + (callee,), _add(cost, exits.halt))
+                if exits is not None and exits.ret is not None:
+                    stack.append(
+                        (self._next(index), labels, _add(cost, exits.ret), returns)
+                    )
+            else:
+                for target, label in reversed(self._edges(block, selector)):
+                    if label is not None:
+                        stack.append((target, labels + (label,), cost, returns))
+                    else:
+                        stack.append((target, labels, cost, returns))
+        if paths > MAX_BRANCHES:
+            return None
+        return branches
+
+    # / --- REPORT
+    def _cost_report(self, cost: Cost) -> dict:
+        return {
+            "min": cost.min,
+            "max": cost.max,
+            "within_budget": cost.max <= self.budget,
+            "app_calls": max(1, math.ceil(cost.max / self.budget)),
+        }
+
+    def report(self, contract: Optional[Contract] = None) -> dict:
+        """
+        Machine-readable cost report of the program methods (named after the
+        `contract` methods, if provided) and subroutines.
+        """
+        names = {}
+        if contract is not None:
+            names = {m.get_selector(): m.name for m in contract.methods}
+        methods = {}
+        for selector in self.selectors():
+            cost = self.method_cost(selector)
+            if cost is None:
+                continue
+            branches = self.method_branches(selector)
+            if selector == BARE_CALL:
+                name = BARE_CALL_NAME
+            else:
+                name = names.get(selector, "0x" + selector.hex())
+            methods[name] = {
+                "selector": "0x" + selector.hex(),
+                "dispatch": self.dispatch_cost(selector),
+                **self._cost_report(cost),
+                "branches": None
+                if branches is None
+                else [
+                    {"path": list(labels), **self._cost_report(branch_cost)}
+                    for labels, branch_cost in sorted(branches.items())
+                ],
+            }
+        subroutines = {}
+        for label in self.functions:
+            cost = self.subroutine_cost(label) if label != MAIN else None
+            if cost is not None:
+                subroutines[label] = {"min": cost.min, "max": cost.max}
+        return {
+            "budget": self.budget,
+            "max_iterations": self.max_iterations,
+            "max_depth": self.max_depth,
+            "methods": methods,
+            "subroutines": subroutines,
+        }
+
+
+def analyze(
+    source: str,
+    contract: Optional[Contract] = None,
+    budget: int = MAX_APP_BUDGET,
+    max_iterations: int = MAX_ITERATIONS,
+    max_depth: int = MAX_RECURSION_DEPTH,
+) -> dict:
+    """Opcode cost report of a TEAL approval program (see `CostAnalyzer`)."""
+    return CostAnalyzer(source, budget, max_iterations, max_depth).report(contract)
+
+
+def budget_app_calls(
+    opcode_cost: int, budget_call_cost: int, budget: int = MAX_APP_BUDGET
+) -> int:
+    """
+    Minimum number of extra App Calls, each costing `budget_call_cost`, pooling
+    enough opcode budget for an App Call costing `opcode_cost`.
+    """
+    assert budget_call_cost < budget
+    if opcode_cost <= budget:
+        return 0
+    return math.ceil((opcode_cost - budget) / (budget - budget_call_cost))
+
+
+def dispatch_savings(baseline: dict, report: dict) -> dict[str, int]:
+    """
+    Opcode cost saved on the Router dispatch of each method by the `report`
+    program with respect to the `baseline` program (negative if spent more).
+    """
+    return {
+        name: baseline["methods"][name]["dispatch"] - method["dispatch"]
+        for name, method in report["methods"].items()
+        if name in baseline["methods"]
+        and method["dispatch"] is not None
+        and baseline["methods"][name]["dispatch"] is not None
+    }
+
+
+def teal_cost(args: dict) -> int:
+    # Imported here: building the Smart ASA App requires PyTeal.
+    from smart_asa_artifacts import load_contract, load_teal_programs
+
+    if args["--teal"]:
+        with open(args["--teal"]) as f:
+            source = f.read()
+    else:
+        source, _ = load_teal_programs()
+    if args["--abi"]:
+        with open(args["--abi"]) as f:
+            contract = Contract.from_json(f.read())
+    else:
+        contract = load_contract()
+    analysis = (
+        int(args["--budget"]),
+        int(args["--max-iterations"]),
+        int(args["--max-depth"]),
+    )
+    try:
+        report = analyze(source, contract, *analysis)
+        if args["--baseline"]:
+            with open(args["--baseline"]) as f:
+                baseline = analyze(f.read(), contract, *analysis)
+            report["dispatch_savings"] = dispatch_savings(baseline, report)
+    except TealAssemblyError as e:
+        print(f"Invalid TEAL program: {e}", file=sys.stderr)
+        return 2
+    print(json.dumps(report, indent=4))
+    return int(not all(m["within_budget"] for m in report["methods"].values()))
+
+
+if __name__ == "__main__":
+    from docopt import docopt
+
+    sys.exit(teal_cost(docopt(__doc__)))
@@ -0,0 +1,293 @@
+"""
+Static opcode cost analyzer test suite
+"""
+
+import pytest
+from algosdk.abi import Contract, Method
+
+from smart_asa_asc import (
+    HOT_METHODS,
+    BuildOptions,
+    compile_stateful,
+    smart_asa_abi,
+    smart_asa_router,
+    teal_version,
+)
+from teal_assembler import TealAssemblyError
+from teal_cost import (
+    BARE_CALL,
+    Cost,
+    CostAnalyzer,
+    analyze,
+    budget_app_calls,
+    dispatch_savings,
+)
+
+BRANCHES = """#pragma version 7
+txn Fee
+bnz expensive
+int 1
+return
+expensive:
+byte "a"
+keccak256
+len
+return
+"""
+
+LOOP = """#pragma version 7
+int 0
+loop:
+int 1
++
+dup
+int 5
+<
+bnz loop
+return
+"""
+
+RECURSION = """#pragma version 7
+int 3
+callsub rec
+return
+rec:
+dup
+bz rec_end
+int 1
+-
+callsub rec
+rec_end:
+retsub
+"""
+
+DISPATCH = """#pragma version 7
+txn NumAppArgs
+int 0
+==
+bnz bare
+txna ApplicationArgs 0
+method "cheap()void"
+==
+bnz cheap
+txna ApplicationArgs 0
+method "expensive()void"
+==
+bnz expensive
+err
+bare:
+int 0
+return
+cheap:
+int 1
+return
+expensive:
+byte "a"
+sha256
+pop
+int 1
+return
+"""
+
+# Opcode cost regression ceilings of the hot Smart ASA methods, by build
+# options (`asset_transfer_batch` of 4 transfers).
+SMART_ASA_COSTS = {
+    BuildOptions(): {
+        "asset_transfer": Cost(173, 188),
+        "asset_transfer_batch": Cost(111, 446),
+        "asset_config": Cost(225, 243),
+    },
+    BuildOptions(packed_global_state=True): {
+        "asset_transfer": Cost(180, 198),
+        "asset_transfer_batch": Cost(119, 455),
+        "asset_config": Cost(233, 254),
+    },
+    BuildOptions(box_registry=True): {
+        "asset_transfer": Cost(185, 243),
+        "asset_transfer_batch": Cost(107, 621),
+        "asset_config": Cost(221, 239),
+    },
+    BuildOptions(multi_asset=True): {
+        "asset_transfer": Cost(211, 304),
+        "asset_transfer_batch": Cost(130, 746),
+        "asset_config": Cost(353, 381),
+    },
+}
+
+CHEAP = Method.from_signature("cheap()void")
+EXPENSIVE = Method.from_signature("expensive()void")
+
+
+def test_branches() -> None:
+    analyzer = CostAnalyzer(BRANCHES)
+    assert analyzer.method_cost(BARE_CALL) == Cost(4, 135)
+    assert analyzer.method_branches(BARE_CALL) == {
+        (): Cost(4, 4),
+        ("expensive",): Cost(135, 135),
+    }
+
+
+@pytest.mark.parametrize("max_iterations,cost", [(0, Cost(8, 8)), (3, Cost(8, 26))])
+def test_loop(max_iterations: int, cost: Cost) -> None:
+    analyzer = CostAnalyzer(LOOP, max_iterations=max_iterations)
+    assert analyzer.method_cost(BARE_CALL) == cost
+
+
+@pytest.mark.parametrize("max_depth,cost", [(1, Cost(6, 6)), (3, Cost(6, 18))])
+def test_recursion(max_depth: int, cost: Cost) -> None:
+    analyzer = CostAnalyzer(RECURSION, max_depth=max_depth)
+    assert analyzer.method_cost(BARE_CALL) == cost
+    assert analyzer.subroutine_cost("rec") == Cost(cost.min - 3, cost.max - 3)
+
+
+def test_dispatch() -> None:
+    analyzer = CostAnalyzer(DISPATCH)
+    assert analyzer.selectors() == [
+        BARE_CALL,
+        CHEAP.get_selector(),
+        EXPENSIVE.get_selector(),
+    ]
+    # Bare App Calls are always rejected
+    assert analyzer.method_cost(BARE_CALL) is None
+    assert analyzer.method_cost(CHEAP.get_selector()) == Cost(10, 10)
+    assert analyzer.method_cost(EXPENSIVE.get_selector()) == Cost(51, 51)
+    assert analyzer.dispatch_cost(BARE_CALL) == 4
+    assert analyzer.dispatch_cost(CHEAP.get_selector()) == 8
+    assert analyzer.dispatch_cost(EXPENSIVE.get_selector()) == 12
+    assert analyzer.dispatch_cost(b"none") is None
+
+
+def test_dispatch_savings() -> None:
+    contract = Contract("test", [CHEAP, EXPENSIVE])
+    cheap = 'txna ApplicationArgs 0\nmethod "cheap()void"\n==\nbnz cheap\n'
+    expensive = 'txna ApplicationArgs 0\nmethod "expensive()void"\n==\nbnz expensive\n'
+    swapped = DISPATCH.replace(cheap + expensive, expensive + cheap)
+    assert dispatch_savings(
+        analyze(DISPATCH, contract), analyze(swapped, contract)
+    ) == {
+        "cheap": -4,
+        "expensive": 4,
+    }
+
+
+@pytest.mark.parametrize(
+    "opcode_cost,budget_calls",
+    [(0, 0), (700, 0), (701, 1), (1390, 1), (1391, 2), (700 * 16, 16)],
+)
+def test_budget_app_calls(opcode_cost: int, budget_calls: int) -> None:
+    assert budget_app_calls(opcode_cost, budget_call_cost=10) == budget_calls
+
+
+def test_report() -> None:
+    contract = Contract("test", [CHEAP, EXPENSIVE])
+    report = analyze(DISPATCH, contract, budget=50)
+    assert report["methods"] == {
+        "cheap": {
+            "selector": "0x" + CHEAP.get_selector().hex(),
+            "dispatch": 8,
+            "min": 10,
+            "max": 10,
+            "within_budget": True,
+            "app_calls": 1,
+            "branches": [
+                {
+                    "path": [],
+                    "min": 10,
+                    "max": 10,
+                    "within_budget": True,
+                    "app_calls": 1,
+                }
+            ],
+        },
+        "expensive": {
+            "selector": "0x" + EXPENSIVE.get_selector().hex(),
+            "dispatch": 12,
+            "min": 51,
+            "max": 51,
+            "within_budget": False,
+            "app_calls": 2,
+            "branches": [
+                {
+                    "path": [],
+                    "min": 51,
+                    "max": 51,
+                    "within_budget": False,
+                    "app_calls": 2,
+                }
+            ],
+        },
+    }
+
+
+def test_invalid_program() -> None:
+    with pytest.raises(TealAssemblyError):
+        CostAnalyzer("#pragma version 7\nb missing\n")
+
+
+def test_smart_asa_app_report() -> None:
+    approval, _, contract = smart_asa_abi.build_program()
+    report = analyze(compile_stateful(approval), contract)
+    methods = report["methods"]
+    assert set(methods) == {m.name for m in contract.methods} | {"bare"}
+
+    for method in methods.values():
+        if method["branches"] is None:
+            # More than MAX_BRANCHES paths (e.g. `asset_config_partial`)
+            continue
+        assert method["min"] == min(b["min"] for b in method["branches"])
+        assert method["max"] == max(b["max"] for b in method["branches"])
+
+    # Transfer, Mint, Burn and Clawback (Mint and Burn either by the Reserve or
+    # by the Clawback, if it is the Reserve too)
+    assert len(methods["asset_transfer"]["branches"]) == 6
+
+    for name in (
+        "asset_app_optin",
+        "asset_config",
+        "asset_config_partial",
+        "asset_transfer",
+        "asset_freeze",
+        "account_freeze",
+        "account_unfreeze_all",
+        "asset_app_closeout",
+        "asset_destroy",
+        "get_asset_is_frozen",
+        "get_account_is_frozen",
+        "get_accounts_frozen",
+        "get_circulating_supply",
+        "get_optin_min_balance",
+        "get_asset_config",
+        "get_asset_state",
+    ):
+        assert methods[name]["within_budget"], name
+
+
+@pytest.mark.parametrize("options", SMART_ASA_COSTS)
+def test_smart_asa_app_cost_regression(options: BuildOptions) -> None:
+    approval, _, contract = smart_asa_router(options).build_program()
+    report = analyze(
+        compile_stateful(approval, teal_version(options)), contract, max_iterations=4
+    )
+    for name, cost in SMART_ASA_COSTS[options].items():
+        method = report["methods"][name]
+        assert method["min"] <= cost.min, name
+        assert method["max"] <= cost.max, name
+
+
+def test_smart_asa_app_hot_dispatch() -> None:
+    approval, _, contract = smart_asa_abi.build_program()
+    baseline = analyze(compile_stateful(approval), contract)
+    approval, _, contract = smart_asa_router(
+        BuildOptions(dispatch_order=HOT_METHODS)
+    ).build_program()
+    report = analyze(compile_stateful(approval), contract)
+    assert contract.methods[0].name == "asset_transfer"
+
+    savings = dispatch_savings(baseline, report)
+    assert savings.keys() == report["methods"].keys()
+    assert savings["asset_transfer"] > 0
+    assert savings["bare"] == 0
+    for name in ("asset_transfer", "bare"):
+        assert report["methods"][name]["max"] == (
+            baseline["methods"][name]["max"] - savings[name]
+        )
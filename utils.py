@@ -1,11 +1,17 @@
 import base64
+import copy
+import threading
+import time
+import weakref
 from collections import namedtuple
 from inspect import get_annotations
-from typing import Union
+from typing import Iterator, Sequence, TypeVar, Union
 from algosdk import constants
 from algosdk.future import transaction
 from algosdk.v2client import algod
 from smart_asa_asc import SmartASAConfig as PyTealSmartASAConfig
+from smart_asa_asc import SmartASAState as PyTealSmartASAState
+from teal_assembler import assemble
 
 
 def decode_state(state) -> dict[str, Union[int, bytes]]:
@@ -22,7 +28,10 @@ def decode_state(state) -> dict[str, Union[int, bytes]]:
 def get_global_state(
     algod_client: algod.AlgodClient, asc_idx: int
 ) -> dict[str, Union[bytes, int]]:
-    global_state = algod_client.application_info(asc_idx)["params"]["global-state"]
+    # NOTE: Apps without Global State (e.g. all in Boxes) have no key.
+    global_state = algod_client.application_info(asc_idx)["params"].get(
+        "global-state", []
+    )
     global_state = decode_state(global_state)
     return global_state
 
@@ -38,15 +47,57 @@ def get_local_state(
     return local_state
 
 
+# NOTE: Suggested params change once per round, so they are cached for each
+# algod client, for `PARAMS_TTL` seconds (well within the validity window of
+# the transactions built with them) or until a "txn dead" rejection.
+PARAMS_TTL = 3.0
+
+_params_cache: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+_params_lock = threading.Lock()
+
+
+def suggested_params(algod_client: algod.AlgodClient) -> transaction.SuggestedParams:
+    """algod suggested params, cached (shared, must not be modified)."""
+    now = time.monotonic()
+    with _params_lock:
+        cached = _params_cache.get(algod_client)
+    if cached is not None and now - cached[0] < PARAMS_TTL:
+        return cached[1]
+    params = algod_client.suggested_params()
+    with _params_lock:
+        _params_cache[algod_client] = (now, params)
+    return params
+
+
+def invalidate_params(algod_client: algod.AlgodClient) -> None:
+    with _params_lock:
+        _params_cache.pop(algod_client, None)
+
+
+def is_txn_dead(err: Exception) -> bool:
+    """Transaction rejected since out of its validity rounds."""
+    return "txn dead" in str(err)
+
+
 def get_params(
     algod_client: algod.AlgodClient, fee: int = None
 ) -> transaction.SuggestedParams:
-    params = algod_client.suggested_params()
+    params = copy.copy(suggested_params(algod_client))
     params.flat_fee = True
     params.fee = fee or constants.MIN_TXN_FEE
     return params
 
 
+T = TypeVar("T")
+
+
+def chunks(items: Sequence[T], size: int) -> Iterator[Sequence[T]]:
+    """Split `items` in consecutive chunks of at most `size` items."""
+    assert size > 0
+    for start in range(0, len(items), size):
+        yield items[start : start + size]
+
+
 def get_last_round(algod_client: algod.AlgodClient):
     return algod_client.status()["last-round"]
 
@@ -55,7 +106,13 @@ def get_last_timestamp(algod_client: algod.AlgodClient):
     return algod_client.block_info(get_last_round(algod_client))["block"]["ts"]
 
 
-def assemble_program(algod_client: algod.AlgodClient, source_code: str) -> bytes:
+def assemble_program(source_code: str) -> bytes:
+    # NOTE: Assembled offline, no algod `/compile` round-trip (which requires
+    # the algod developer API enabled).
+    return assemble(source_code)
+
+
+def compile_program(algod_client: algod.AlgodClient, source_code: str) -> bytes:
     compile_response = algod_client.compile(source_code)
     return base64.b64decode(compile_response["result"])
 
@@ -66,5 +123,15 @@ SmartASAConfig = namedtuple(
 )
 
 
+SmartASAState = namedtuple(
+    PyTealSmartASAState.__class__.__name__,
+    list(get_annotations(PyTealSmartASAState)),
+)
+
+
 def normalize_getter_params(getter_params: list) -> SmartASAConfig:
     return SmartASAConfig(*getter_params)
+
+
+def normalize_getter_state(getter_state: list) -> SmartASAState:
+    return SmartASAState(*getter_state)
@@ -0,0 +1,66 @@
+"""
+Utils test suite
+"""
+
+import pytest
+from algosdk import constants
+from algosdk.error import AlgodHTTPError
+from algosdk.future.transaction import SuggestedParams
+
+import utils
+from utils import get_params, invalidate_params, is_txn_dead, suggested_params
+
+
+class CountingAlgodClient:
+    """Stand-in algod client counting the suggested params requests."""
+
+    def __init__(self):
+        self.requests = 0
+
+    def suggested_params(self) -> SuggestedParams:
+        self.requests += 1
+        return SuggestedParams(
+            fee=0, first=self.requests, last=self.requests + 1000, gh="gh"
+        )
+
+
+def test_params_cache() -> None:
+    algod_client, other_client = CountingAlgodClient(), CountingAlgodClient()
+    params = suggested_params(algod_client)
+    assert suggested_params(algod_client) is params
+    assert algod_client.requests == 1
+
+    # Cached for each algod client
+    assert suggested_params(other_client) is not params
+    assert other_client.requests == 1
+
+    invalidate_params(algod_client)
+    assert suggested_params(algod_client).first == 2
+
+
+def test_params_expire(monkeypatch) -> None:
+    algod_client = CountingAlgodClient()
+    suggested_params(algod_client)
+    monkeypatch.setattr(utils, "PARAMS_TTL", 0)
+    suggested_params(algod_client)
+    assert algod_client.requests == 2
+
+
+def test_fee_override_copy() -> None:
+    algod_client = CountingAlgodClient()
+    params = get_params(algod_client, fee=3000)
+    assert (params.fee, params.flat_fee) == (3000, True)
+    assert get_params(algod_client).fee == constants.MIN_TXN_FEE
+    assert suggested_params(algod_client).fee == 0
+    assert algod_client.requests == 1
+
+
+@pytest.mark.parametrize(
+    "message,dead",
+    [
+        ("TransactionPool.Remember: txn dead: round 1001 outside of 1--1000", True),
+        ("TransactionPool.Remember: overspend", False),
+    ],
+)
+def test_is_txn_dead(message: str, dead: bool) -> None:
+    assert is_txn_dead(AlgodHTTPError(message)) == dead
@@ -0,0 +1,351 @@
+"""
+Shared block-driven transaction confirmation
+"""
+
+__author__ = "Cosimo Bassi, Stefano De Angelis"
+__email__ = "<cosimo.bassi@algorand.com>, <stefano.deangelis@algorand.com>"
+
+import asyncio
+import base64
+import dataclasses
+import threading
+import weakref
+from concurrent.futures import Future
+from typing import Any, Callable, Optional, Union
+
+import msgpack
+from algosdk import abi, constants, encoding, error
+from algosdk.atomic_transaction_composer import (
+    ABI_RETURN_HASH,
+    AtomicTransactionComposer,
+)
+from algosdk.future.transaction import SignedTransaction
+from algosdk.v2client.algod import AlgodClient
+
+from utils import invalidate_params, is_txn_dead
+
+# NOTE: Transactions not yet confirmed are checked with `pending_transaction_info`
+# (e.g. for pool errors) every `STRAGGLER_ROUNDS` rounds from their submission,
+# and on their last wait round.
+STRAGGLER_ROUNDS = 2
+
+
+def abi_return(method: abi.Method, tx_info: dict) -> Any:
+    """Return value of a confirmed `method` App Call (`None` if void)."""
+    if method.returns.type == abi.Returns.VOID:
+        return None
+    logs = tx_info.get("logs", [])
+    result = base64.b64decode(logs[-1]) if logs else b""
+    if result[:4] != ABI_RETURN_HASH:
+        print("ABI decode error: app call transaction did not log a return value")
+        return None
+    return method.returns.type.decode(result[4:])
+
+
+def transaction_id(txn: dict) -> str:
+    """ID of a transaction, from its (msgpack decoded) fields."""
+    to_sign = constants.txid_prefix + base64.b64decode(encoding.msgpack_encode(txn))
+    return base64.b32encode(encoding.checksum(to_sign)).decode().rstrip("=")
+
+
+def block_confirmations(block: bytes) -> dict[str, dict]:
+    """
+    Transaction info (as a subset of `pending_transaction_info`) of the
+    transactions confirmed in a block, by ID, from the msgpack encoded block.
+    """
+    block = msgpack.unpackb(block, raw=False, strict_map_key=False)["block"]
+    confirmations = {}
+    for stib in block.get("txns", []):
+        # NOTE: Blocks omit the genesis fields of their transactions.
+        txn = dict(stib["txn"], gh=block["gh"])
+        if stib.get("hgi"):
+            txn["gen"] = block["gen"]
+        tx_info = {
+            "confirmed-round": block.get("rnd", 0),
+            "logs": [
+                base64.b64encode(log).decode()
+                for log in stib.get("dt", {}).get("lg", [])
+            ],
+        }
+        if "caid" in stib:
+            tx_info["asset-index"] = stib["caid"]
+        if "apid" in stib:
+            tx_info["application-index"] = stib["apid"]
+        confirmations[transaction_id(txn)] = tx_info
+    return confirmations
+
+
+def group_last_valid_round(signed_txns: list[SignedTransaction]) -> int:
+    """Last round signed transactions (an atomic group) can be confirmed in."""
+    return min(stxn.transaction.last_valid_round for stxn in signed_txns)
+
+
+@dataclasses.dataclass
+class Waiter:
+    """Transactions (an atomic group) waiting for their confirmation."""
+
+    txids: list[str]
+    submitted_round: int
+    last_round: int
+    future: Union[Future, Any]
+
+
+class WaiterRegistry:
+    """
+    Waiters by their first transaction ID, matched against new blocks.
+    Rejections of dead transactions (built with stale suggested params) call
+    `on_txn_dead`.
+    """
+
+    def __init__(self, on_txn_dead: Optional[Callable[[], None]] = None):
+        self.waiters: dict[str, Waiter] = {}
+        self.next_round: Optional[int] = None
+        self.on_txn_dead = on_txn_dead
+
+    def register(
+        self,
+        txids: list[str],
+        max_wait_rounds: int,
+        future: Any,
+        last_valid_round: int,
+    ) -> Waiter:
+        """
+        Wait for `txids` up to `max_wait_rounds` rounds, never past their
+        `last_valid_round` (nor with no `max_wait_rounds`).
+        """
+        submitted_round = self.next_round - 1
+        last_round = last_valid_round
+        if max_wait_rounds > 0:
+            last_round = min(last_round, submitted_round + max_wait_rounds)
+        waiter = Waiter(txids, submitted_round, last_round, future)
+        self.waiters[txids[0]] = waiter
+        return waiter
+
+    def confirm(
+        self, round_num: int, confirmations: dict[str, dict]
+    ) -> tuple[list[tuple[Waiter, list[dict]]], list[Waiter]]:
+        """
+        Match a new block: returns the confirmed waiters (with their
+        transaction info) and the ones to check with `pending_transaction_info`.
+        """
+        self.next_round = round_num + 1
+        confirmed = []
+        for txid in [t for t in self.waiters if t in confirmations]:
+            waiter = self.waiters.pop(txid)
+            confirmed.append((waiter, [confirmations[t] for t in waiter.txids]))
+        stragglers = [
+            waiter
+            for waiter in self.waiters.values()
+            if (round_num - waiter.submitted_round) % STRAGGLER_ROUNDS == 0
+            or round_num >= waiter.last_round
+        ]
+        return confirmed, stragglers
+
+    def check(self, waiter: Waiter, round_num: int, tx_info: dict) -> None:
+        """Resolve a straggler with its `pending_transaction_info`."""
+        if tx_info.get("pool-error"):
+            self.fail(
+                waiter,
+                error.TransactionRejectedError(
+                    "Transaction rejected: " + tx_info["pool-error"]
+                ),
+            )
+        elif round_num >= waiter.last_round:
+            self.fail(
+                waiter,
+                error.ConfirmationTimeoutError(
+                    f"Wait for transaction id {waiter.txids[0]} timed out"
+                ),
+            )
+
+    def fail(self, waiter: Waiter, exc: Exception) -> None:
+        if self.withdraw(waiter.txids[0], exc) and not waiter.future.done():
+            waiter.future.set_exception(exc)
+
+    def withdraw(self, txid: str, exc: BaseException) -> bool:
+        """Stop waiting for the `txid` waiter (if any), rejected with `exc`."""
+        if self.waiters.pop(txid, None) is None:
+            return False
+        if self.on_txn_dead is not None and is_txn_dead(exc):
+            self.on_txn_dead()
+        return True
+
+    def fail_all(self, exc: Exception) -> None:
+        for waiter in list(self.waiters.values()):
+            self.fail(waiter, exc)
+
+
+class BlockWatcher:
+    """
+    Confirms the transactions submitted with an algod client: a background
+    thread follows the new rounds (`status_after_block`), fetching each new
+    block once and waking the waiters of the transactions confirmed in it.
+    """
+
+    def __init__(self, algod_client: AlgodClient):
+        self.algod_client = algod_client
+        self._registry = WaiterRegistry(lambda: invalidate_params(algod_client))
+        # NOTE: Reentrant, since futures run their callbacks when resolved.
+        self._lock = threading.RLock()
+        self._thread: Optional[threading.Thread] = None
+
+    def submit(
+        self, signed_txns: list[SignedTransaction], max_wait_rounds: int = 10
+    ) -> Future:
+        """
+        Submit signed transactions (an atomic group, if more than one), returns
+        a future resolved to their transaction info once confirmed. Waits up
+        to their last valid round with no `max_wait_rounds`.
+        """
+        txids = [stxn.get_txid() for stxn in signed_txns]
+        last_valid_round = group_last_valid_round(signed_txns)
+        # NOTE: Waiters are registered before the submission, so their
+        # confirmation block can not be fetched before.
+        last_round = None
+        while True:
+            with self._lock:
+                if self._thread is None and last_round is not None:
+                    self._registry.next_round = last_round + 1
+                    self._thread = threading.Thread(target=self._watch, daemon=True)
+                    self._thread.start()
+                if self._thread is not None:
+                    waiter = self._registry.register(
+                        txids, max_wait_rounds, Future(), last_valid_round
+                    )
+                    break
+            last_round = self.algod_client.status()["last-round"]
+        try:
+            self.algod_client.send_transactions(signed_txns)
+        except BaseException as exc:
+            with self._lock:
+                self._registry.withdraw(txids[0], exc)
+            raise
+        return waiter.future
+
+    def execute(
+        self, atc: AtomicTransactionComposer, max_wait_rounds: int = 10
+    ) -> list:
+        """Submit a signed ATC group, returns the ABI return values."""
+        tx_infos = self.submit(atc.signed_txns, max_wait_rounds).result()
+        return [
+            abi_return(method, tx_infos[i]) for i, method in atc.method_dict.items()
+        ]
+
+    def _watch(self) -> None:
+        while True:
+            with self._lock:
+                if not self._registry.waiters:
+                    self._thread = None
+                    return
+                next_round = self._registry.next_round
+            try:
+                last_round = self.algod_client.status_after_block(next_round - 1)[
+                    "last-round"
+                ]
+                for round_num in range(next_round, last_round + 1):
+                    block = self.algod_client.block_info(
+                        block=round_num, response_format="msgpack"
+                    )
+                    self._process(round_num, block_confirmations(block))
+            except Exception as exc:
+                # NOTE: Unknown confirmations are failed, not left pending.
+                with self._lock:
+                    self._registry.fail_all(exc)
+
+    def _process(self, round_num: int, confirmations: dict[str, dict]) -> None:
+        with self._lock:
+            confirmed, stragglers = self._registry.confirm(round_num, confirmations)
+        for waiter, tx_infos in confirmed:
+            if not waiter.future.done():
+                waiter.future.set_result(tx_infos)
+        for waiter in stragglers:
+            try:
+                tx_info = self.algod_client.pending_transaction_info(waiter.txids[0])
+            except error.AlgodHTTPError:
+                tx_info = {}
+            with self._lock:
+                self._registry.check(waiter, round_num, tx_info)
+
+
+class AsyncBlockWatcher:
+    """
+    `BlockWatcher` of an `AsyncAlgodClient`: a task follows the new rounds
+    while transactions are waiting for their confirmation.
+    """
+
+    def __init__(self, algod_client: Any):
+        self.algod_client = algod_client
+        self._registry = WaiterRegistry(algod_client.invalidate_params)
+        self._task: Optional[asyncio.Task] = None
+
+    async def submit(
+        self, signed_txns: list[SignedTransaction], max_wait_rounds: int = 10
+    ) -> list[dict]:
+        """
+        Submit signed transactions (an atomic group, if more than one), returns
+        their transaction info once confirmed (ref. `BlockWatcher.submit`).
+        """
+        txids = [stxn.get_txid() for stxn in signed_txns]
+        last_valid_round = group_last_valid_round(signed_txns)
+        if self._task is None:
+            last_round = (await self.algod_client.status())["last-round"]
+            # NOTE: Another submitter may have started the task meanwhile.
+            if self._task is None:
+                self._registry.next_round = last_round + 1
+                self._task = asyncio.ensure_future(self._watch())
+        future = asyncio.get_running_loop().create_future()
+        self._registry.register(txids, max_wait_rounds, future, last_valid_round)
+        try:
+            await self.algod_client.send_transactions(signed_txns)
+        except BaseException as exc:
+            self._registry.withdraw(txids[0], exc)
+            raise
+        return await future
+
+    async def _watch(self) -> None:
+        while self._registry.waiters:
+            next_round = self._registry.next_round
+            try:
+                status = await self.algod_client.status_after_block(next_round - 1)
+                for round_num in range(next_round, status["last-round"] + 1):
+                    block = await self.algod_client.block_info(
+                        round_num, response_format="msgpack"
+                    )
+                    await self._process(round_num, block_confirmations(block))
+            except Exception as exc:
+                self._registry.fail_all(exc)
+        self._task = None
+
+    async def _process(self, round_num: int, confirmations: dict[str, dict]) -> None:
+        confirmed, stragglers = self._registry.confirm(round_num, confirmations)
+        for waiter, tx_infos in confirmed:
+            if not waiter.future.done():
+                waiter.future.set_result(tx_infos)
+        for waiter in stragglers:
+            try:
+                tx_info = await self.algod_client.pending_transaction_info(
+                    waiter.txids[0]
+                )
+            except error.AlgodHTTPError:
+                tx_info = {}
+            self._registry.check(waiter, round_num, tx_info)
+
+
+_watchers: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+_watchers_lock = threading.Lock()
+
+
+def get_watcher(algod_client: Any) -> Union[BlockWatcher, AsyncBlockWatcher]:
+    """
+    The block watcher shared by all the submitters of an algod client (an
+    `AsyncBlockWatcher` for an `AsyncAlgodClient`).
+    """
+    with _watchers_lock:
+        if algod_client not in _watchers:
+            watcher_cls = (
+                AsyncBlockWatcher
+                if asyncio.iscoroutinefunction(algod_client.status)
+                else BlockWatcher
+            )
+            _watchers[algod_client] = watcher_cls(algod_client)
+        return _watchers[algod_client]
@@ -0,0 +1,146 @@
+"""
+Shared block watcher test suite
+"""
+
+import base64
+import threading
+from concurrent.futures import Future
+
+import msgpack
+import pytest
+from algosdk.error import ConfirmationTimeoutError, TransactionRejectedError
+from algosdk.future.transaction import (
+    ApplicationNoOpTxn,
+    AssetTransferTxn,
+    PaymentTxn,
+    SuggestedParams,
+)
+
+from account import Account
+from pipeline_test import StandInAlgod
+from watcher import STRAGGLER_ROUNDS, WaiterRegistry, block_confirmations, get_watcher
+
+GENESIS_HASH = bytes(range(32))
+PARAMS = SuggestedParams(
+    fee=1000,
+    first=1,
+    last=1000,
+    gh=base64.b64encode(GENESIS_HASH).decode(),
+    gen="testnet-v1.0",
+    flat_fee=True,
+)
+
+
+def test_block_confirmations() -> None:
+    account = Account.create()
+    stxns = [
+        account.sign(PaymentTxn(account.address, PARAMS, account.address, 1)),
+        account.sign(AssetTransferTxn(account.address, PARAMS, account.address, 0, 1)),
+        account.sign(ApplicationNoOpTxn(account.address, PARAMS, 0)),
+    ]
+    stibs = []
+    for stxn in stxns:
+        txn = stxn.transaction.dictify()
+        # Blocks omit the genesis fields, flagging the genesis ID
+        del txn["gh"], txn["gen"]
+        stibs.append({"txn": txn, "hgi": True})
+    stibs[1]["caid"] = 10
+    stibs[2]["apid"] = 11
+    stibs[2]["dt"] = {"lg": [b"log"]}
+    block = msgpack.packb(
+        {
+            "block": {
+                "gh": GENESIS_HASH,
+                "gen": "testnet-v1.0",
+                "rnd": 5,
+                "txns": stibs,
+            }
+        },
+        use_bin_type=True,
+    )
+
+    confirmations = block_confirmations(block)
+    assert list(confirmations) == [stxn.get_txid() for stxn in stxns]
+    assert all(info["confirmed-round"] == 5 for info in confirmations.values())
+    assert confirmations[stxns[1].get_txid()]["asset-index"] == 10
+    assert confirmations[stxns[2].get_txid()]["application-index"] == 11
+    assert confirmations[stxns[2].get_txid()]["logs"] == [
+        base64.b64encode(b"log").decode()
+    ]
+
+
+def test_registry_stragglers() -> None:
+    registry = WaiterRegistry()
+    registry.next_round = 11
+    confirmed = registry.register(["A", "B"], 10, Future(), 1000)
+    # Waits up to the last valid round, with no `max_wait_rounds` or beyond it
+    last_round = 11 + 2 * STRAGGLER_ROUNDS
+    late = registry.register(["C"], 0, Future(), last_round)
+    assert late.last_round == last_round
+    assert registry.register(["D"], 100, Future(), last_round).last_round == last_round
+    registry.waiters.pop("D")
+
+    done, stragglers = registry.confirm(11, {"A": {"r": 1}, "B": {"r": 2}})
+    assert done == [(confirmed, [{"r": 1}, {"r": 2}])]
+    assert stragglers == []
+
+    # Checked every `STRAGGLER_ROUNDS`...
+    checks = []
+    for round_num in range(12, last_round):
+        _, stragglers = registry.confirm(round_num, {})
+        if stragglers:
+            assert stragglers == [late]
+            checks.append(round_num)
+            registry.check(late, round_num, {"confirmed-round": 0})
+    assert checks == list(range(10 + STRAGGLER_ROUNDS, last_round, STRAGGLER_ROUNDS))
+    assert not late.future.done()
+    # ... then on the last wait round
+    _, stragglers = registry.confirm(last_round, {})
+    assert stragglers == [late]
+    registry.check(late, last_round, {"confirmed-round": 0})
+    with pytest.raises(ConfirmationTimeoutError):
+        late.future.result()
+    assert registry.waiters == {}
+
+
+def test_registry_pool_error() -> None:
+    dead = []
+    registry = WaiterRegistry(lambda: dead.append(True))
+    registry.next_round = 2
+    waiter = registry.register(["A"], 0, Future(), 1000)
+    registry.check(waiter, 3, {"pool-error": "overspend"})
+    with pytest.raises(TransactionRejectedError, match="overspend"):
+        waiter.future.result()
+    assert not dead
+
+    # Dead transactions notify the stale suggested params, once
+    waiter = registry.register(["B"], 0, Future(), 1000)
+    registry.check(waiter, 3, {"pool-error": "txn dead: round 1005"})
+    registry.fail(waiter, TransactionRejectedError("txn dead: round 1005"))
+    assert dead == [True]
+    assert registry.withdraw("C", TransactionRejectedError("txn dead")) is False
+
+
+def test_one_block_fetch_per_round() -> None:
+    algod_client = StandInAlgod(block_time=0.2)
+    account = Account.create(algod_client=algod_client)
+    watcher = get_watcher(algod_client)
+    assert get_watcher(algod_client) is watcher
+
+    def pay(amount: int) -> dict:
+        txn = PaymentTxn(
+            account.address, account._get_params(), account.address, amount
+        )
+        [tx_info] = watcher.submit([account.sign(txn)]).result()
+        return tx_info
+
+    threads = [threading.Thread(target=pay, args=(i,)) for i in range(50)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(algod_client.submitted) == 50
+    # Confirmation cost does not grow with the in-flight transactions
+    assert algod_client.blocks_fetched == algod_client.rounds_waited
+    assert algod_client.blocks_fetched <= 2
+    assert algod_client.pending_checks == 0